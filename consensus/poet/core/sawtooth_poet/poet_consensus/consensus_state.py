@@ -16,6 +16,7 @@
 # pylint: disable=too-many-lines
 
 import math
+import hashlib
 import logging
 import collections
 import itertools
@@ -50,6 +51,315 @@ total_block_claim_count (int): The total number of the blocks that the
     validator has claimed
 """
 
+_Win = \
+    collections.namedtuple(
+        '_Win',
+        ['validator_id',
+         'block_claim_count',
+         'inverse_local_mean_sum',
+         'previous',
+         'key'])
+""" A win of a validator: the block claim count and the running sum of the
+inverse local means (see _add_to_sum) as they were before it, and the
+validator's previous win (or None).  Wins are never changed once made, so a
+validator's win history is shared by all of the consensus state built on it.
+The key is a hash of the win and the key of the previous win, so it
+identifies the whole history and the wins on different forks never collide.
+"""
+
+
+def _add_to_sum(partials, value):
+    """Returns the sum of a running sum and a value.  A running sum is kept
+    exactly, as a list of non-overlapping floats that add up to it (the
+    partials of math.fsum), so that the difference of two running sums is
+    exactly the sum of the values added in between.
+    """
+    sum_partials = []
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            sum_partials.append(low)
+        value = high
+    sum_partials.append(value)
+    return sum_partials
+
+
+# Every float is a whole multiple of the smallest subnormal float, 2 ** -1074,
+# so a sum of floats is exactly an integer number of them.
+_SUM_SCALE_BITS = 1074
+
+
+def _sum_value(partials):
+    """Returns the exact value of a running sum, as an integer number of
+    2 ** -_SUM_SCALE_BITS.
+    """
+    value = 0
+    for partial in partials:
+        numerator, denominator = partial.as_integer_ratio()
+        value += \
+            numerator << (_SUM_SCALE_BITS + 1 - denominator.bit_length())
+    return value
+
+
+def _expected_wins(candidate_expected_wins,
+                   target_wait_time,
+                   inverse_local_mean_sum):
+    """Returns the expected wins for the candidate block and the blocks with
+    the sum (see _sum_value) of the inverse local means.  The population
+    estimate of a block is its local mean divided by the target wait time,
+    so the expected wins for the blocks is the target wait time times the
+    sum.  It is computed exactly and rounded once, so it is the same however
+    the sum was come by.
+    """
+    candidate_numerator, candidate_denominator = \
+        candidate_expected_wins.as_integer_ratio()
+    target_numerator, target_denominator = \
+        target_wait_time.as_integer_ratio()
+
+    # Integer true division is correctly rounded
+    return \
+        ((candidate_numerator * target_denominator << _SUM_SCALE_BITS)
+         + target_numerator * candidate_denominator * inverse_local_mean_sum) \
+        / (candidate_denominator * target_denominator << _SUM_SCALE_BITS)
+
+
+def _check_sum(partials):
+    """Returns the running sum as a list of floats, checking that it is
+    valid.
+
+    Raises:
+        ValueError: The running sum is not valid
+    """
+    if not isinstance(partials, (list, tuple)):
+        raise ValueError('sum ({}) is invalid'.format(partials))
+    partials = [float(partial) for partial in partials]
+    if not all(math.isfinite(partial) for partial in partials) or \
+            _sum_value(partials) < 0:
+        raise ValueError('sum ({}) is invalid'.format(partials))
+    return partials
+
+
+def _win_record(validator_id,
+                block_claim_count,
+                inverse_local_mean_sum,
+                previous):
+    return \
+        [validator_id,
+         block_claim_count,
+         list(inverse_local_mean_sum),
+         None if previous is None else previous.key]
+
+
+def _make_win(validator_id,
+              block_claim_count,
+              inverse_local_mean_sum,
+              previous):
+    """Returns a new win, checking that it comes after the previous one.
+
+    Raises:
+        ValueError: The win is not valid
+    """
+    inverse_local_mean_sum = _check_sum(inverse_local_mean_sum)
+    if previous is not None and \
+            _sum_value(inverse_local_mean_sum) < \
+            _sum_value(previous.inverse_local_mean_sum):
+        raise \
+            ValueError(
+                'win inverse_local_mean_sum ({}) is invalid'.format(
+                    inverse_local_mean_sum))
+    if block_claim_count <= \
+            (0 if previous is None else previous.block_claim_count):
+        raise \
+            ValueError(
+                'win block claim count ({}) is invalid'.format(
+                    block_claim_count))
+
+    record = \
+        _win_record(
+            validator_id=validator_id,
+            block_claim_count=block_claim_count,
+            inverse_local_mean_sum=inverse_local_mean_sum,
+            previous=previous)
+    return \
+        _Win(
+            validator_id=validator_id,
+            block_claim_count=block_claim_count,
+            inverse_local_mean_sum=inverse_local_mean_sum,
+            previous=previous,
+            key=hashlib.sha256(cbor.dumps(record)).hexdigest())
+
+
+class WinHistoryLog(object):
+    """An append-only log of the wins of validators, which consensus state
+    can be serialized with so that each serialization only refers to the
+    latest win of each validator rather than carrying its whole history.
+    The wins most recently read from, or added to, the log are kept decoded
+    in memory, so the win history is shared by the consensus state parsed
+    with it.  Wins are only deleted from the log along with the consensus
+    state for blocks on abandoned forks.
+    """
+
+    def __init__(self, database, size=4096):
+        """
+        Args:
+            database (Database): Where the wins are stored, by key
+            size (int): How many decoded wins are kept in memory
+        """
+        self._database = database
+        self._size = size
+        self._wins = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_get(self, key):
+        win = self._wins.get(key)
+        if win is not None:
+            self._wins.move_to_end(key)
+        return win
+
+    def _cache_put(self, wins):
+        for win in wins:
+            self._wins[win.key] = win
+            self._wins.move_to_end(win.key)
+        while len(self._wins) > self._size:
+            self._wins.popitem(last=False)
+
+    def get(self, key):
+        """Returns the win with the key, reading it, and the wins before it
+        not in memory, from the database.
+
+        Raises:
+            ValueError: The win, or one before it, is missing or invalid
+        """
+        with self._lock:
+            keys = []
+            records = []
+            win = None
+            while key is not None:
+                win = self._cache_get(key)
+                if win is not None:
+                    break
+                record = self._database.get(key)
+                if not isinstance(record, list) or len(record) != 4:
+                    raise \
+                        ValueError('win {} is missing or invalid'.format(key))
+                keys.append(key)
+                records.append(record)
+                key = record[3]
+
+            wins = []
+            for key, record in zip(reversed(keys), reversed(records)):
+                validator_id, block_claim_count, inverse_local_mean_sum, _ = \
+                    record
+                if win is not None and win.validator_id != validator_id:
+                    raise ValueError('win {} is invalid'.format(key))
+                win = \
+                    _make_win(
+                        validator_id=str(validator_id),
+                        block_claim_count=int(block_claim_count),
+                        inverse_local_mean_sum=inverse_local_mean_sum,
+                        previous=win)
+                if win.key != key:
+                    raise ValueError('win {} is invalid'.format(key))
+                wins.append(win)
+
+            self._cache_put(wins)
+
+        return win
+
+    def add(self, win):
+        """Appends the win, and the wins before it not in the log yet, to the
+        log.
+        """
+        with self._lock:
+            wins = []
+            while win is not None and \
+                    self._cache_get(win.key) is None and \
+                    win.key not in self._database:
+                wins.append(win)
+                win = win.previous
+
+            if wins:
+                self._database.update(
+                    [(win.key,
+                      _win_record(
+                          validator_id=win.validator_id,
+                          block_claim_count=win.block_claim_count,
+                          inverse_local_mean_sum=win.inverse_local_mean_sum,
+                          previous=win.previous))
+                     for win in wins],
+                    [])
+                self._cache_put(reversed(wins))
+
+    def delete(self, keys):
+        """Deletes the wins with the keys from the log.  Wins that are built
+        on them are not deleted, so the caller must know there are none that
+        are still needed.
+        """
+        with self._lock:
+            for key in keys:
+                self._wins.pop(key, None)
+            self._database.update(
+                [],
+                [key for key in keys if key in self._database])
+
+
+class _PopulationEstimateCache(object):
+    """A size-bounded mapping of block ID to the population estimate
+    information for the block, evicting the least recently used entries.
+    Because entries are found by following the previous block IDs from a
+    block, blocks on forks that were abandoned stop being used and are the
+    first to be evicted.  The lock is only held while the mapping is read or
+    changed, never while blocks are fetched.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, block_id):
+        with self._lock:
+            return block_id in self._entries
+
+    def get_chain(self, block_id, count):
+        """Returns the cached population estimate information for up to
+        count blocks, starting at the block ID and following the previous
+        block IDs, stopping at the first block that is not cached.
+        """
+        chain = []
+        with self._lock:
+            while len(chain) < count:
+                estimate_info = self._entries.get(block_id)
+                if estimate_info is None:
+                    break
+                self._entries.move_to_end(block_id)
+                chain.append(estimate_info)
+                block_id = estimate_info.previous_block_id
+
+        return chain
+
+    def update(self, entries):
+        """Adds the (block ID, population estimate information) pairs to
+        the cache.
+        """
+        with self._lock:
+            for block_id, estimate_info in entries:
+                self._entries[block_id] = estimate_info
+                self._entries.move_to_end(block_id)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class ConsensusState(object):
     """Represents the consensus state at a particular point in time (i.e.,
@@ -69,7 +379,8 @@ class ConsensusState(object):
     _BlockInfo = \
         collections.namedtuple(
             '_BlockInfo',
-            ['wait_certificate', 'validator_info', 'poet_settings_view'])
+            ['wait_certificate', 'validator_info', 'poet_settings_view',
+             'block_num'])
 
     """ Instead of creating a full-fledged class, let's use a named tuple for
     the block info.  The block info represents the information we need to
@@ -81,6 +392,7 @@ class ConsensusState(object):
         validator that claimed the block
     poet_settings_view (PoetSettingsView): The PoET settings view associated
         with the block
+    block_num (int): The number of the block
     """
 
     _PopulationSample = \
@@ -97,7 +409,7 @@ class ConsensusState(object):
     """
 
     _EstimateInfo = collections.namedtuple('_EstimateInfo',
-                                           ['population_estimate',
+                                           ['local_mean',
                                             'previous_block_id',
                                             'validator_id'])
 
@@ -105,8 +417,9 @@ class ConsensusState(object):
     the population estimates.  The population estimate represents what we need
     to help in computing zTest results.  A population estimate object contains:
 
-    population_estimate (float): The population estimate for the corresponding
-        block
+    local_mean (float): The local mean of the wait certificate for the
+        corresponding block, which divided by the target wait time is its
+        population estimate
     previous_block_id (str): The ID of the block previous to the one that this
         population estimate corresponds to
     validator_id (str): The ID of the validator that won the corresponding
@@ -116,8 +429,13 @@ class ConsensusState(object):
     # The population estimate cache is a mapping of block ID to its
     # corresponding _EstimateInfo object.  This is used so that when building
     # the population list, we don't have to always walk back the entire list
-    _population_estimate_cache = {}
-    _population_estimate_cache_lock = threading.Lock()
+    _POPULATION_ESTIMATE_CACHE_SIZE = 16384
+    _population_estimate_cache = \
+        _PopulationEstimateCache(size=_POPULATION_ESTIMATE_CACHE_SIZE)
+
+    # The most blocks fetched at a time when filling the population estimate
+    # cache, after which the cache is checked again
+    _POPULATION_ESTIMATE_FETCH_SIZE = 256
 
     @staticmethod
     def consensus_state_for_block_id(block_id,
@@ -195,7 +513,8 @@ class ConsensusState(object):
                     ConsensusState._BlockInfo(
                         wait_certificate=wait_certificate,
                         validator_info=validator_info,
-                        poet_settings_view=PoetSettingsView(state_view))
+                        poet_settings_view=PoetSettingsView(state_view),
+                        block_num=block.block_num)
 
             # Otherwise, this is a non-PoET block.  If we don't have any blocks
             # yet or the last block we processed was a PoET block, put a
@@ -206,17 +525,32 @@ class ConsensusState(object):
                     ConsensusState._BlockInfo(
                         wait_certificate=None,
                         validator_info=None,
-                        poet_settings_view=None)
+                        poet_settings_view=None,
+                        block_num=block.block_num)
 
             previous_wait_certificate = wait_certificate
 
             # Move to the previous block
             current_id = block.previous_block_id
 
+        # The consensus state for each block we store is kept as a change to
+        # that of the PoET block before it, if we have it.
+        previous_id = current_id
+
         # At this point, if we have not found any consensus state, we need to
         # create default state from which we can build upon
         if consensus_state is None:
             consensus_state = ConsensusState()
+            previous_id = None
+
+        # Consensus state stored before the win history was kept needs it
+        # rebuilt once, so that the consensus state we are about to store for
+        # the newer blocks carries it forward.
+        elif blocks and not consensus_state.has_win_history:
+            consensus_state.rebuild_win_history(
+                block_id=current_id,
+                block_cache=block_cache,
+                poet_enclave_module=poet_enclave_module)
 
         # Now, walk through the blocks for which we were supposed to create
         # consensus state, from oldest to newest (i.e., in the reverse order in
@@ -229,6 +563,7 @@ class ConsensusState(object):
             # it as the starting for the next PoET block.
             if block_info.wait_certificate is None:
                 consensus_state = ConsensusState()
+                previous_id = None
 
             # Otherwise, let the consensus state update itself appropriately
             # based upon the validator claiming a block, and then associate the
@@ -244,7 +579,12 @@ class ConsensusState(object):
                     validator_info=block_info.validator_info,
                     wait_certificate=block_info.wait_certificate,
                     poet_settings_view=block_info.poet_settings_view)
-                consensus_state_store[current_id] = consensus_state
+                consensus_state_store.put(
+                    block_id=current_id,
+                    consensus_state=consensus_state,
+                    previous_block_id=previous_id,
+                    block_num=block_info.block_num)
+                previous_id = current_id
 
                 LOGGER.debug(
                     'Create consensus state: BID=%s, ALM=%f, TBCC=%d',
@@ -266,6 +606,15 @@ class ConsensusState(object):
         self._total_block_claim_count = 0
         self._validators = {}
 
+        # The running sum, over the blocks claimed, of the inverse of the
+        # local mean of each wait certificate and, for each validator, its
+        # latest win, which links back through its earlier wins.  Together
+        # they give the expected and observed wins at each depth of the zTest
+        # without walking back through the blocks.
+        self._inverse_local_mean_sum = []
+        self._validator_wins = {}
+        self._has_win_history = True
+
     @property
     def aggregate_local_mean(self):
         return self._aggregate_local_mean
@@ -274,6 +623,26 @@ class ConsensusState(object):
     def total_block_claim_count(self):
         return self._total_block_claim_count
 
+    @property
+    def latest_win_key(self):
+        """The key of the win for the latest block claimed, or None if no
+        block has been claimed or there is no win history.
+        """
+        if not self._validator_wins:
+            return None
+
+        return \
+            max(
+                self._validator_wins.values(),
+                key=lambda win: win.block_claim_count).key
+
+    @property
+    def has_win_history(self):
+        """False if this consensus state was stored before the win history
+        was kept, in which case the zTest walks back through the blocks.
+        """
+        return self._has_win_history
+
     @staticmethod
     def _check_validator_state(validator_state):
         if not isinstance(
@@ -366,32 +735,195 @@ class ConsensusState(object):
         number_of_blocks = \
             self.total_block_claim_count - \
             poet_settings_view.population_estimate_sample_size
-        with ConsensusState._population_estimate_cache_lock:
-            for _ in range(number_of_blocks):
+        population_estimate_cache = ConsensusState._population_estimate_cache
+        while len(population_estimate_list) < number_of_blocks:
+            cached_chain = \
+                population_estimate_cache.get_chain(
+                    block_id=block_id,
+                    count=number_of_blocks - len(population_estimate_list))
+            if cached_chain:
+                population_estimate_list.extend(cached_chain)
+                block_id = cached_chain[-1].previous_block_id
+                continue
+
+            # The blocks are fetched and their wait certificates deserialized
+            # without holding the cache's lock, so that other threads can
+            # keep using it.
+            cache_entries = []
+            for block in \
+                    ConsensusState._blocks_for_population_estimates(
+                        block_id=block_id,
+                        count=min(
+                            number_of_blocks - len(population_estimate_list),
+                            ConsensusState._POPULATION_ESTIMATE_FETCH_SIZE),
+                        block_cache=block_cache):
+                wait_certificate = \
+                    utils.deserialize_wait_certificate(
+                        block=block,
+                        poet_enclave_module=poet_enclave_module)
                 population_cache_entry = \
-                    ConsensusState._population_estimate_cache.get(block_id)
-                if population_cache_entry is None:
-                    block = block_cache[block_id]
-                    wait_certificate = \
-                        utils.deserialize_wait_certificate(
-                            block=block,
-                            poet_enclave_module=poet_enclave_module)
-                    population_estimate = \
-                        wait_certificate.population_estimate(
-                            poet_settings_view=poet_settings_view)
-                    population_cache_entry = \
-                        ConsensusState._EstimateInfo(
-                            population_estimate=population_estimate,
-                            previous_block_id=block.previous_block_id,
-                            validator_id=block.header.signer_public_key)
-                    ConsensusState._population_estimate_cache[block_id] = \
-                        population_cache_entry
-
+                    ConsensusState._EstimateInfo(
+                        local_mean=wait_certificate.local_mean,
+                        previous_block_id=block.previous_block_id,
+                        validator_id=block.header.signer_public_key)
+                cache_entries.append((block_id, population_cache_entry))
                 population_estimate_list.append(population_cache_entry)
                 block_id = population_cache_entry.previous_block_id
 
+            population_estimate_cache.update(cache_entries)
+
         return population_estimate_list
 
+    @staticmethod
+    def _blocks_for_population_estimates(block_id, count, block_cache):
+        """Returns up to count blocks, starting at the block ID and
+        following the previous block IDs, stopping before a block whose
+        population estimate is cached.  Once a block that has been committed
+        is reached, the blocks before it are read from the block store in
+        bulk instead of one at a time.
+
+        Args:
+            block_id (str): The ID of the block to start with
+            count (int): The number of blocks to return
+            block_cache (BlockCache): The block store cache
+
+        Returns:
+            list: The blocks, in order of most-recent to least-recent block
+
+        Raises:
+            KeyError: If one of the blocks cannot be found
+        """
+        population_estimate_cache = ConsensusState._population_estimate_cache
+        blocks = []
+        while len(blocks) < count:
+            if blocks and block_id in population_estimate_cache:
+                break
+
+            block = block_cache[block_id]
+            blocks.append(block)
+
+            # The block store only holds the blocks in the chain, so the
+            # blocks before a committed block in block number order are its
+            # predecessors, unless the chain changes while we are reading it.
+            if block_id in block_cache.block_store:
+                for previous_block in \
+                        itertools.islice(
+                            block_cache.block_store.get_block_iter(
+                                start_block=block,
+                                reverse=True),
+                            1,
+                            count - len(blocks) + 1):
+                    if previous_block.identifier != \
+                            blocks[-1].previous_block_id:
+                        break
+                    blocks.append(previous_block)
+
+            block_id = blocks[-1].previous_block_id
+
+        return blocks
+
+    def _win_depths_from_history(self,
+                                 validator_id,
+                                 poet_settings_view,
+                                 population_estimate):
+        """Starting at the candidate block, finds the depths at which the
+        validator claimed a block using the win history.
+
+        The blocks claimed while the local mean was a fixed ratio of the
+        target and initial wait times (i.e., the first population estimate
+        sample size blocks) are not part of the history that is tested.
+
+        Args:
+            validator_id (str): The ID of the validator claiming the
+                candidate block
+            poet_settings_view (PoetSettingsView): The current PoET settings
+                view
+            population_estimate (float): The population estimate for the
+                candidate block
+
+        Yields:
+            tuple: The number of blocks, expected wins and observed wins
+                from the candidate block down to each block the validator
+                claimed, in order of most-recent to least-recent.
+        """
+        # The sum of the inverse local means of the blocks from a win to the
+        # latest block is the difference of the exact running sums, so the
+        # expected wins are the same as walking the blocks gives.
+        target_wait_time = poet_settings_view.target_wait_time
+        sample_size = poet_settings_view.population_estimate_sample_size
+
+        candidate_expected_wins = 1.0 / population_estimate
+        yield 1, candidate_expected_wins, 1
+
+        inverse_local_mean_sum = _sum_value(self._inverse_local_mean_sum)
+        observed_wins = 1
+        win = self._validator_wins.get(validator_id)
+        while win is not None and win.block_claim_count > sample_size:
+            observed_wins += 1
+            expected_wins = \
+                _expected_wins(
+                    candidate_expected_wins=candidate_expected_wins,
+                    target_wait_time=target_wait_time,
+                    inverse_local_mean_sum=inverse_local_mean_sum
+                    - _sum_value(win.inverse_local_mean_sum))
+            yield \
+                self._total_block_claim_count - win.block_claim_count + 2, \
+                expected_wins, \
+                observed_wins
+            win = win.previous
+
+    def _win_depths_from_blocks(self,
+                                validator_id,
+                                previous_block_id,
+                                poet_settings_view,
+                                population_estimate,
+                                block_cache,
+                                poet_enclave_module):
+        """Starting at the candidate block, finds the depths at which the
+        validator claimed a block by walking back through the blocks, for
+        consensus state without a win history.
+
+        Yields:
+            tuple: The number of blocks, expected wins and observed wins
+                from the candidate block down to each block the validator
+                claimed, in order of most-recent to least-recent.
+        """
+        # Build up the population estimate list for the block chain, in order
+        # of most-recent to least-recent, after the candidate block (i.e., the
+        # validator trying to claim with the population estimate).
+        population_estimate_list = \
+            self._build_population_estimate_list(
+                block_id=previous_block_id,
+                poet_settings_view=poet_settings_view,
+                block_cache=block_cache,
+                poet_enclave_module=poet_enclave_module)
+
+        target_wait_time = poet_settings_view.target_wait_time
+        candidate_expected_wins = 1.0 / population_estimate
+        yield 1, candidate_expected_wins, 1
+
+        # Keep track of the number of blocks and the sum of the inverse local
+        # means up to this point, summed the same way as the win history.
+        inverse_local_mean_sum = []
+        observed_wins = 1
+        block_count = 1
+        for estimate_info in population_estimate_list:
+            block_count += 1
+            inverse_local_mean_sum = \
+                _add_to_sum(
+                    inverse_local_mean_sum, 1.0 / estimate_info.local_mean)
+
+            if estimate_info.validator_id == validator_id:
+                observed_wins += 1
+                yield \
+                    block_count, \
+                    _expected_wins(
+                        candidate_expected_wins=candidate_expected_wins,
+                        target_wait_time=target_wait_time,
+                        inverse_local_mean_sum=_sum_value(
+                            inverse_local_mean_sum)), \
+                    observed_wins
+
     def _compute_population_estimate(self, poet_settings_view):
         """Estimates the size of the validator population by computing the
         average wait time and the average local mean used by the winning
@@ -526,6 +1058,10 @@ class ConsensusState(object):
         # Update the consensus state statistics.
         self._aggregate_local_mean += wait_certificate.local_mean
         self._total_block_claim_count += 1
+        self._record_win(
+            validator_id=validator_info.id,
+            block_claim_count=self._total_block_claim_count,
+            local_mean=wait_certificate.local_mean)
 
         # Add the wait certificate information to our population sample,
         # evicting the oldest entry if already have at least
@@ -576,6 +1112,56 @@ class ConsensusState(object):
                 poet_public_key=validator_info.signup_info.poet_public_key,
                 total_block_claim_count=total_block_claim_count)
 
+    def _record_win(self, validator_id, block_claim_count, local_mean):
+        self._validator_wins[validator_id] = \
+            _make_win(
+                validator_id=validator_id,
+                block_claim_count=block_claim_count,
+                inverse_local_mean_sum=self._inverse_local_mean_sum,
+                previous=self._validator_wins.get(validator_id))
+        self._inverse_local_mean_sum = \
+            _add_to_sum(self._inverse_local_mean_sum, 1.0 / local_mean)
+
+    def rebuild_win_history(self, block_id, block_cache, poet_enclave_module):
+        """Rebuilds the win history of consensus state that was stored
+        before it was kept, by walking back through the blocks claimed.
+
+        Args:
+            block_id (str): The ID of the block this consensus state is for
+            block_cache (BlockCache): The block store cache
+            poet_enclave_module (module): The PoET enclave module
+
+        Returns:
+            None
+        """
+        claims = collections.deque()
+        try:
+            for _ in range(self._total_block_claim_count):
+                block = block_cache[block_id]
+                wait_certificate = \
+                    utils.deserialize_wait_certificate(
+                        block=block,
+                        poet_enclave_module=poet_enclave_module)
+                claims.appendleft(
+                    (block.header.signer_public_key,
+                     wait_certificate.local_mean))
+                block_id = block.previous_block_id
+        except KeyError:
+            LOGGER.warning(
+                'Failed to rebuild zTest win history: missing block %s',
+                block_id[:8])
+            return
+
+        self._inverse_local_mean_sum = []
+        self._validator_wins = {}
+        for block_claim_count, (validator_id, local_mean) in \
+                enumerate(claims, 1):
+            self._record_win(
+                validator_id=validator_id,
+                block_claim_count=block_claim_count,
+                local_mean=local_mean)
+        self._has_win_history = True
+
     def signup_attempt_timed_out(self,
                                  signup_nonce,
                                  poet_settings_view,
@@ -858,21 +1444,21 @@ class ConsensusState(object):
                 poet_settings_view.population_estimate_sample_size:
             return False
 
-        # Build up the population estimate list for the block chain and then
-        # add the new information (i.e., the validator trying to claim as well
-        # as the population estimate) to the front to maintain the order of
-        # most-recent to least-recent.
-        population_estimate_list = \
-            self._build_population_estimate_list(
-                block_id=previous_block_id,
-                poet_settings_view=poet_settings_view,
-                block_cache=block_cache,
-                poet_enclave_module=poet_enclave_module)
-        population_estimate_list.appendleft(
-            ConsensusState._EstimateInfo(
-                population_estimate=population_estimate,
-                previous_block_id=previous_block_id,
-                validator_id=validator_info.id))
+        if self._has_win_history:
+            win_depths = \
+                self._win_depths_from_history(
+                    validator_id=validator_info.id,
+                    poet_settings_view=poet_settings_view,
+                    population_estimate=population_estimate)
+        else:
+            win_depths = \
+                self._win_depths_from_blocks(
+                    validator_id=validator_info.id,
+                    previous_block_id=previous_block_id,
+                    poet_settings_view=poet_settings_view,
+                    population_estimate=population_estimate,
+                    block_cache=block_cache,
+                    poet_enclave_module=poet_enclave_module)
 
         observed_wins = 0
         expected_wins = 0
@@ -887,41 +1473,34 @@ class ConsensusState(object):
         #
         # See: http://www.cogsci.ucsd.edu/classes/SP07/COGS14/NOTES/
         #             binomial_ztest.pdf
-
-        for estimate_info in population_estimate_list:
-            # Keep track of the number of blocks and the expected number of
-            # wins up to this point.
-            block_count += 1
-            expected_wins += 1.0 / estimate_info.population_estimate
-
-            # If the validator trying to claim the block also claimed this
-            # block, update the number of blocks won and if we have seen more
-            # than the number of wins necessary to trigger the zTest, then we
-            # are going to figure out if the validator is winning too
-            # frequently.
-            if estimate_info.validator_id == validator_info.id:
-                observed_wins += 1
-                if observed_wins > minimum_win_count and \
-                        observed_wins > expected_wins:
-                    probability = expected_wins / block_count
-                    standard_deviation = \
-                        math.sqrt(
-                            block_count * probability * (1.0 - probability))
-                    z_score = \
-                        (observed_wins - expected_wins) / \
-                        standard_deviation
-                    if z_score > maximum_win_deviation:
-                        LOGGER.info(
-                            'Validator %s (ID=%s...%s): zTest failed at depth '
-                            '%d, z_score=%f, expected=%f, observed=%d',
-                            validator_info.name,
-                            validator_info.id[:8],
-                            validator_info.id[-8:],
-                            block_count,
-                            z_score,
-                            expected_wins,
-                            observed_wins)
-                        return True
+        #
+        # The test only needs to be applied at the depths at which the
+        # validator trying to claim the block also claimed a block.  At each,
+        # if we have seen more than the number of wins necessary to trigger
+        # the zTest, then we are going to figure out if the validator is
+        # winning too frequently.
+        for block_count, expected_wins, observed_wins in win_depths:
+            if observed_wins > minimum_win_count and \
+                    observed_wins > expected_wins:
+                probability = expected_wins / block_count
+                standard_deviation = \
+                    math.sqrt(
+                        block_count * probability * (1.0 - probability))
+                z_score = \
+                    (observed_wins - expected_wins) / \
+                    standard_deviation
+                if z_score > maximum_win_deviation:
+                    LOGGER.info(
+                        'Validator %s (ID=%s...%s): zTest failed at depth '
+                        '%d, z_score=%f, expected=%f, observed=%d',
+                        validator_info.name,
+                        validator_info.id[:8],
+                        validator_info.id[-8:],
+                        block_count,
+                        z_score,
+                        expected_wins,
+                        observed_wins)
+                    return True
 
         LOGGER.debug(
             'Validator %s (ID=%s...%s): zTest succeeded with depth %d, '
@@ -935,8 +1514,10 @@ class ConsensusState(object):
 
         LOGGER.debug(
             'zTest history: %s',
-            ['{:.4f}'.format(x.population_estimate) for x in
-             itertools.islice(population_estimate_list, 0, 3)])
+            ['{:.4f}'.format(
+                sample.local_mean / poet_settings_view.target_wait_time)
+             for sample in
+             itertools.islice(reversed(self._population_samples), 0, 3)])
 
         return False
 
@@ -948,16 +1529,54 @@ class ConsensusState(object):
             bytes: serialized version of the consensus state object
         """
         # For serialization, the easiest thing to do is to convert ourself to
-        # a dictionary and convert to CBOR.  The deque object cannot be
-        # automatically serialized, so convert it to a list first.  We will
-        # reconstitute it to a deque upon parsing.
+        # a dictionary and convert to CBOR.
+        return cbor.dumps(self.serialize_to_dict())
+
+    def serialize_to_dict(self, win_log=None):
+        """Returns the consensus state object as a dictionary of values that
+        CBOR can serialize
+
+        Args:
+            win_log (WinHistoryLog): The log to add the win history to, so
+                that only the key of the latest win of each validator is
+                included, if any
+
+        Returns:
+            dict: the fields of the consensus state object
+        """
+        # The deque object cannot be automatically serialized, so convert it
+        # to a list first.  We will reconstitute it to a deque upon parsing.
         self_dict = {
             '_aggregate_local_mean': self._aggregate_local_mean,
             '_population_samples': list(self._population_samples),
             '_total_block_claim_count': self._total_block_claim_count,
             '_validators': self._validators
         }
-        return cbor.dumps(self_dict)
+        if self._has_win_history:
+            self_dict['_inverse_local_mean_sum'] = \
+                list(self._inverse_local_mean_sum)
+            if win_log is not None:
+                for win in self._validator_wins.values():
+                    win_log.add(win)
+                self_dict['_validator_wins'] = {
+                    key: win.key for key, win in self._validator_wins.items()
+                }
+            else:
+                self_dict['_validator_wins'] = {
+                    key: self._win_history(win)
+                    for key, win in self._validator_wins.items()
+                }
+        return self_dict
+
+    @staticmethod
+    def _win_history(win):
+        wins = []
+        while win is not None:
+            wins.append(
+                [win.block_claim_count, list(win.inverse_local_mean_sum)])
+            win = win.previous
+        wins.reverse()
+        return wins
 
     def parse_from_bytes(self, buffer):
         """Returns a consensus state object re-created from the serialized
@@ -976,10 +1595,29 @@ class ConsensusState(object):
             ValueError: failure to parse into a valid ConsensusState object
         """
         try:
-            # Deserialize the CBOR back into a dictionary and set the simple
-            # fields, doing our best to check validity.
             self_dict = cbor.loads(buffer)
+        except (LookupError, ValueError, KeyError, TypeError) as error:
+            raise \
+                ValueError(
+                    'Error parsing ConsensusState buffer: {}'.format(error))
+
+        self.parse_from_dict(self_dict=self_dict)
+
+    def parse_from_dict(self, self_dict, win_log=None):
+        """Re-creates the consensus state object from a dictionary created by
+        a previous call to serialize_to_dict
+
+        Args:
+            self_dict (dict): The fields of the consensus state object
+            win_log (WinHistoryLog): The log the win history was added to
+                when serialized, if it was
 
+        Raises:
+            ValueError: failure to parse into a valid ConsensusState object
+        """
+        try:
+            # Set the simple fields from the dictionary, doing our best to
+            # check validity.
             if not isinstance(self_dict, dict):
                 raise \
                     ValueError(
@@ -1038,11 +1676,81 @@ class ConsensusState(object):
                 self._check_validator_state(validator_state)
                 self._validators[str(key)] = validator_state
 
+            # Consensus state stored before the win history was kept, or
+            # while its sums were kept as single floats, does not have it,
+            # and the zTest falls back to walking the blocks.
+            self._inverse_local_mean_sum = []
+            self._validator_wins = {}
+            self._has_win_history = \
+                '_validator_wins' in self_dict and \
+                isinstance(self_dict.get('_inverse_local_mean_sum'), list)
+            if self._has_win_history:
+                self._parse_win_history(self_dict, win_log)
+
         except (LookupError, ValueError, KeyError, TypeError) as error:
             raise \
                 ValueError(
                     'Error parsing ConsensusState buffer: {}'.format(error))
 
+    def _parse_win_history(self, self_dict, win_log):
+        self._inverse_local_mean_sum = \
+            _check_sum(self_dict['_inverse_local_mean_sum'])
+        sum_value = _sum_value(self._inverse_local_mean_sum)
+
+        validator_wins = self_dict['_validator_wins']
+        if not isinstance(validator_wins, dict):
+            raise ValueError('_validator_wins is not a dict')
+
+        # The win history is either the key of the latest win in the win
+        # log, or the list of every win.  The wins are checked against each
+        # other as they are made, so only the latest needs checking against
+        # the rest of the consensus state.
+        for key, wins in validator_wins.items():
+            key = str(key)
+            if isinstance(wins, str):
+                if win_log is None:
+                    raise ValueError('win history is not in a win log')
+                win = win_log.get(wins)
+                if win is None or win.validator_id != key:
+                    raise ValueError('win {} is invalid'.format(wins))
+            else:
+                win = None
+                for (block_claim_count, inverse_local_mean_sum) in wins:
+                    win = \
+                        _make_win(
+                            validator_id=key,
+                            block_claim_count=int(block_claim_count),
+                            inverse_local_mean_sum=inverse_local_mean_sum,
+                            previous=win)
+                if win is None:
+                    continue
+
+            if win.block_claim_count > self._total_block_claim_count:
+                raise \
+                    ValueError(
+                        'win block claim count ({}) is invalid'.format(
+                            win.block_claim_count))
+            if _sum_value(win.inverse_local_mean_sum) > sum_value:
+                raise \
+                    ValueError(
+                        'win inverse_local_mean_sum ({}) is invalid'.format(
+                            win.inverse_local_mean_sum))
+            self._validator_wins[key] = win
+
+    def __copy__(self):
+        # The population samples, validators and latest wins are replaced or
+        # appended to as blocks are claimed, so the copy gets its own
+        # containers.  The values in them are never changed in place, so the
+        # win history they link back through is shared.
+        consensus_state = ConsensusState()
+        consensus_state.__dict__.update(self.__dict__)
+        consensus_state._population_samples = \
+            collections.deque(self._population_samples)
+        consensus_state._validators = dict(self._validators)
+        consensus_state._validator_wins = dict(self._validator_wins)
+
+        return consensus_state
+
     def __str__(self):
         validators = \
             ['{}: {{KBCC={}, PPK={}, TBCC={} }}'.format(
@@ -13,6 +13,8 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+import collections
+import copy
 import threading
 import logging
 import os
@@ -20,13 +22,90 @@ import os
 # pylint: disable=no-name-in-module
 from collections.abc import MutableMapping
 
+import cbor
+
 from sawtooth_poet.poet_consensus.consensus_state import ConsensusState
+from sawtooth_poet.poet_consensus.consensus_state import WinHistoryLog
 
 from sawtooth_validator.database.lmdb_nolock_database \
     import LMDBNoLockDatabase
 
 LOGGER = logging.getLogger(__name__)
 
+# The block number index groups the blocks with consensus state into buckets
+# of this many block numbers, so that pruning only reads the buckets.
+_INDEX_BUCKET_SIZE = 64
+# The index key holding the numbers of the buckets in the index.  Until it
+# is written, the index has not been built from the consensus state stored.
+_INDEX_BUCKETS_KEY = 'buckets'
+
+
+def _bucket_key(bucket):
+    return '{:016x}'.format(bucket)
+
+
+def _diff(old, new):
+    """Returns the change that turns OLD into NEW, or None if they are equal.
+    Dicts are diffed key by key and lists that drop entries from the front
+    and append to the back (as the population samples do) are diffed as a
+    shift and the appended entries.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = {}
+        for key, value in new.items():
+            if key in old:
+                change = _diff(old[key], value)
+                if change is not None:
+                    changes[key] = change
+            else:
+                changes[key] = ['set', value]
+        removed = [key for key in old if key not in new]
+
+        if not changes and not removed:
+            return None
+        return ['dict', changes, removed]
+
+    if isinstance(old, list) and isinstance(new, list):
+        for shift in range(len(old)):
+            kept = len(old) - shift
+            if kept <= len(new) and old[shift] == new[0] and \
+                    old[shift:] == new[:kept]:
+                if shift == 0 and kept == len(new):
+                    return None
+                return ['list', shift, new[kept:]]
+
+        if not old:
+            return ['list', 0, new] if new else None
+
+    elif old == new:
+        return None
+
+    return ['set', new]
+
+
+def _patch(old, change):
+    """Returns the value made by applying a change created by _diff to OLD,
+    without modifying OLD.
+    """
+    operation = change[0]
+    if operation == 'set':
+        return change[1]
+
+    if operation == 'dict':
+        _, changes, removed = change
+        new = dict(old)
+        for key in removed:
+            del new[key]
+        for key, value_change in changes.items():
+            new[key] = _patch(new.get(key), value_change)
+        return new
+
+    if operation == 'list':
+        _, shift, appended = change
+        return old[shift:] + appended
+
+    raise ValueError('Unknown consensus state change: {}'.format(operation))
+
 
 class ConsensusStateStore(MutableMapping):
     """Manages access to the underlying database holding per-block consensus
@@ -34,12 +113,42 @@ class ConsensusStateStore(MutableMapping):
     the consensus objects, all ConsensusStateStore objects actually reference
     a single underlying database.  Provides a dict-like interface to the
     consensus state, mapping block IDs to their corresponding consensus state.
+
+    Consensus state that is put with the ID of the previous block that has
+    consensus state is stored as the change from that consensus state, with a
+    full checkpoint every checkpoint_interval blocks.  Reading it replays the
+    changes from the nearest checkpoint, and recently used consensus state is
+    kept decoded in memory.  Consensus state for blocks that are too deep in
+    the chain, or on forks that were abandoned, is pruned as the chain head
+    moves.  The block number and previous block ID of each are kept in an
+    index, in a database of its own, so that pruning does not have to read
+    the consensus state.
+
+    The win history of the consensus state is kept in an append-only log in
+    a database of its own, so each consensus state stored only refers to the
+    latest win of each validator.  The index also keeps the key of the win
+    for each block, so that the wins for blocks on abandoned forks are
+    pruned with their consensus state.
     """
 
     _store_dbs = {}
+    _store_caches = {}
+    _store_win_logs = {}
+    _store_indexes = {}
+    # The chain head block number at which each validator's database is
+    # next scanned for consensus state to prune
+    _next_prune_block_nums = {}
     _lock = threading.Lock()
+    # Held while the index is read and written, and while pruning
+    _index_lock = threading.Lock()
 
-    def __init__(self, data_dir, validator_id):
+    def __init__(self,
+                 data_dir,
+                 validator_id,
+                 checkpoint_interval=64,
+                 prune_depth=1000,
+                 fork_prune_depth=64,
+                 cache_size=256):
         """Initialize the consensus state store
 
         Args:
@@ -47,10 +156,24 @@ class ConsensusStateStore(MutableMapping):
                 be stored
             validator_id (str): A unique ID for the validator for which the
                 consensus state store is being created
+            checkpoint_interval (int): The most changes that are stored
+                between full checkpoints of consensus state
+            prune_depth (int): How many blocks behind the chain head
+                consensus state is kept for
+            fork_prune_depth (int): How many blocks behind the chain head
+                consensus state is kept for blocks that are not in the chain
+            cache_size (int): How many decoded consensus state objects are
+                kept in memory
 
         Returns:
             None
         """
+        self._checkpoint_interval = checkpoint_interval
+        self._prune_depth = prune_depth
+        self._fork_prune_depth = fork_prune_depth
+        self._cache_size = cache_size
+        self._validator_id = validator_id
+
         with ConsensusStateStore._lock:
             # Create an underlying LMDB database file for the validator if
             # there already isn't one.  We will create the LMDB with the 'c'
@@ -66,9 +189,214 @@ class ConsensusStateStore(MutableMapping):
                 self._store_db = LMDBNoLockDatabase(db_file_name, 'c')
                 ConsensusStateStore._store_dbs[validator_id] = self._store_db
 
-    def __setitem__(self, block_id, consensus_state):
+            self._win_log = \
+                ConsensusStateStore._store_win_logs.get(validator_id)
+            if self._win_log is None:
+                db_file_name = \
+                    os.path.join(
+                        data_dir,
+                        'poet_consensus_wins-{}.lmdb'.format(
+                            validator_id[:8]))
+                LOGGER.debug('Create consensus win log: %s', db_file_name)
+                self._win_log = \
+                    WinHistoryLog(LMDBNoLockDatabase(db_file_name, 'c'))
+                ConsensusStateStore._store_win_logs[validator_id] = \
+                    self._win_log
+
+            self._index_db = \
+                ConsensusStateStore._store_indexes.get(validator_id)
+            if self._index_db is None:
+                db_file_name = \
+                    os.path.join(
+                        data_dir,
+                        'poet_consensus_index-{}.lmdb'.format(
+                            validator_id[:8]))
+                LOGGER.debug('Create consensus state index: %s', db_file_name)
+                self._index_db = LMDBNoLockDatabase(db_file_name, 'c')
+                ConsensusStateStore._store_indexes[validator_id] = \
+                    self._index_db
+
+            # The decoded consensus state is shared by all of the stores for
+            # the validator, just like the database.
+            self._cache = \
+                ConsensusStateStore._store_caches.setdefault(
+                    validator_id, collections.OrderedDict())
+
+    def _cache_get(self, block_id):
+        with ConsensusStateStore._lock:
+            consensus_state = self._cache.get(block_id)
+            if consensus_state is not None:
+                self._cache.move_to_end(block_id)
+            return consensus_state
+
+    def _cache_put(self, block_id, consensus_state):
+        with ConsensusStateStore._lock:
+            self._cache[block_id] = consensus_state
+            self._cache.move_to_end(block_id)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_discard(self, block_ids):
+        with ConsensusStateStore._lock:
+            for block_id in block_ids:
+                self._cache.pop(block_id, None)
+
+    def _get_entry(self, block_id):
+        entry = self._store_db[block_id]
+        if entry is None:
+            raise KeyError('Block ID {} not found'.format(block_id))
+
+        return entry
+
+    def _load(self, block_id):
+        """Returns the consensus state for the block ID, which callers must
+        not modify, replaying the changes from the nearest checkpoint (or
+        decoded consensus state) if necessary.
+        """
+        consensus_state = self._cache_get(block_id)
+        if consensus_state is not None:
+            return consensus_state
+
+        try:
+            changes = []
+            base = None
+            entry = self._get_entry(block_id)
+            while isinstance(entry, dict) and 'changes' in entry:
+                changes.append(entry['changes'])
+                previous_state = self._cache_get(entry['previous_block_id'])
+                if previous_state is not None:
+                    base = \
+                        previous_state.serialize_to_dict(
+                            win_log=self._win_log)
+                    break
+                entry = self._get_entry(entry['previous_block_id'])
+
+            # Consensus state stored before changes were kept is the CBOR
+            # serialization of the consensus state.
+            if base is None:
+                if isinstance(entry, dict):
+                    base = entry['state']
+                else:
+                    base = cbor.loads(entry)
+
+            for change in reversed(changes):
+                base = _patch(base, change)
+
+            consensus_state = ConsensusState()
+            consensus_state.parse_from_dict(
+                self_dict=base,
+                win_log=self._win_log)
+        except (LookupError, ValueError, TypeError) as error:
+            raise \
+                KeyError(
+                    'Cannot return block with ID {}: {}'.format(
+                        block_id,
+                        error))
+
+        self._cache_put(block_id, consensus_state)
+
+        return consensus_state
+
+    def _checkpoint(self, consensus_state, previous_block_id, block_num):
+        return {
+            'previous_block_id': previous_block_id,
+            'block_num': block_num,
+            'state': consensus_state.serialize_to_dict(win_log=self._win_log)
+        }
+
+    def put(self,
+            block_id,
+            consensus_state,
+            previous_block_id=None,
+            block_num=None):
         """Adds/updates an item in the consensus state store
 
+        Args:
+            block_id (str): The ID of the block that this consensus state
+                corresponds to
+            consensus_state (ConsensusState): The consensus state
+            previous_block_id (str): The ID of the block before this one
+                that has consensus state the consensus state may be stored as
+                a change from, if any
+            block_num (int): The number of the block, used to prune consensus
+                state for blocks deep in the chain.  Consensus state without a
+                block number is never pruned.
+
+        Returns:
+            None
+        """
+        # Keep our own copy, as the caller may go on to change theirs
+        consensus_state = copy.copy(consensus_state)
+
+        entry = None
+        if previous_block_id is not None and previous_block_id != block_id:
+            try:
+                previous_entry = self._get_entry(previous_block_id)
+                depth = 1
+                if isinstance(previous_entry, dict):
+                    depth += previous_entry.get('depth', 0)
+
+                if depth < self._checkpoint_interval:
+                    entry = {
+                        'previous_block_id': previous_block_id,
+                        'block_num': block_num,
+                        'depth': depth,
+                        'changes':
+                            _diff(
+                                self._load(
+                                    previous_block_id).serialize_to_dict(
+                                        win_log=self._win_log),
+                                consensus_state.serialize_to_dict(
+                                    win_log=self._win_log))
+                            or ['dict', {}, []]
+                    }
+            except KeyError:
+                pass
+
+        if entry is None:
+            entry = \
+                self._checkpoint(
+                    consensus_state=consensus_state,
+                    previous_block_id=previous_block_id,
+                    block_num=block_num)
+
+        # The block is added to the index first, so that the consensus
+        # state is never stored without it.
+        if block_num is not None:
+            with ConsensusStateStore._index_lock:
+                self._index_add(
+                    block_id=block_id,
+                    block_num=block_num,
+                    previous_block_id=previous_block_id,
+                    win_key=consensus_state.latest_win_key)
+        self._store_db[block_id] = entry
+        self._cache_put(block_id, consensus_state)
+
+    def _index_add(self, block_id, block_num, previous_block_id, win_key):
+        bucket = block_num // _INDEX_BUCKET_SIZE
+        bucket_entries = self._index_db.get(_bucket_key(bucket)) or []
+        if any(block_id == entry[0] for entry in bucket_entries):
+            return
+
+        puts = \
+            [(_bucket_key(bucket),
+              bucket_entries
+              + [[block_id, block_num, previous_block_id, win_key]])]
+
+        # Until the index is built, the consensus state stored is scanned
+        # for it when pruning, so only the bucket is written, unless nothing
+        # is stored yet.
+        buckets = self._index_db.get(_INDEX_BUCKETS_KEY)
+        if buckets is None and len(self._store_db) == 0:
+            buckets = []
+        if buckets is not None and bucket not in buckets:
+            puts.append((_INDEX_BUCKETS_KEY, sorted(buckets + [bucket])))
+
+        self._index_db.update(puts, [])
+
+    def __setitem__(self, block_id, consensus_state):
+        """Adds/updates an item in the consensus state store as a checkpoint
+
         Args:
             block_id (str): The ID of the block that this consensus state
                 corresponds to
@@ -77,7 +405,7 @@ class ConsensusStateStore(MutableMapping):
         Returns:
             None
         """
-        self._store_db[block_id] = consensus_state.serialize_to_bytes()
+        self.put(block_id=block_id, consensus_state=consensus_state)
 
     def __getitem__(self, block_id):
         """Return the consensus state corresponding to the block ID
@@ -92,23 +420,12 @@ class ConsensusStateStore(MutableMapping):
         Raises:
             KeyError if the block ID is not in the store
         """
-        serialized_consensus_state = self._store_db[block_id]
-        if serialized_consensus_state is None:
-            raise KeyError('Block ID {} not found'.format(block_id))
-
-        try:
-            consensus_state = ConsensusState()
-            consensus_state.parse_from_bytes(
-                buffer=serialized_consensus_state)
-            return consensus_state
-        except ValueError as error:
-            raise \
-                KeyError(
-                    'Cannot return block with ID {}: {}'.format(
-                        block_id,
-                        error))
+        return copy.copy(self._load(block_id))
 
     def __delitem__(self, block_id):
+        # Consensus state stored as a change from this block's can no longer
+        # be read, and will be re-created from the blocks when requested.
+        self._cache_discard([block_id])
         del self._store_db[block_id]
 
     def __contains__(self, block_id):
@@ -125,20 +442,210 @@ class ConsensusStateStore(MutableMapping):
         out = []
         for block_id in self._store_db.keys():
             try:
-                serialized_consensus_state = self._store_db[block_id]
-                consensus_state = ConsensusState()
-                consensus_state.parse_from_bytes(
-                    buffer=serialized_consensus_state)
                 out.append(
                     '{}...{}: {{{}}}'.format(
                         block_id[:8],
                         block_id[-8:],
-                        consensus_state))
-            except ValueError:
+                        self._load(block_id)))
+            except KeyError:
                 pass
 
         return ', '.join(out)
 
+    def prune(self, chain_head_id, chain_head_block_num):
+        """Deletes the consensus state for blocks that are more than
+        prune_depth blocks behind the chain head, or that are not in the
+        chain and more than fork_prune_depth blocks behind it, along with the
+        wins for the blocks not in the chain that no consensus state kept is
+        built on.  Only the index is read to find them, once every
+        checkpoint_interval blocks.
+
+        Args:
+            chain_head_id (str): The ID of the chain head
+            chain_head_block_num (int): The number of the chain head
+
+        Returns:
+            None
+        """
+        # A new store is created for each block that forks are resolved
+        # for, so when to prune is kept with the validator's database.
+        with ConsensusStateStore._lock:
+            next_prune_block_num = \
+                ConsensusStateStore._next_prune_block_nums.get(
+                    self._validator_id, 0)
+            if chain_head_block_num < next_prune_block_num:
+                return
+            ConsensusStateStore._next_prune_block_nums[self._validator_id] = \
+                chain_head_block_num + self._checkpoint_interval
+
+        with ConsensusStateStore._index_lock:
+            buckets = self._index_db.get(_INDEX_BUCKETS_KEY)
+            if buckets is None:
+                buckets = self._build_index()
+
+            bucket_entries = {
+                bucket: self._index_db.get(_bucket_key(bucket)) or []
+                for bucket in buckets
+            }
+            index = {
+                block_id: (block_num, previous_block_id, win_key)
+                for entries in bucket_entries.values()
+                for block_id, block_num, previous_block_id, win_key in entries
+            }
+
+            chain = set()
+            block_id = chain_head_id
+            while block_id in index and block_id not in chain:
+                chain.add(block_id)
+                block_id = index[block_id][1]
+
+            pruned = set()
+            for block_id, (block_num, _, _) in index.items():
+                depth = chain_head_block_num - block_num
+                prune_depth = \
+                    self._prune_depth if block_id in chain \
+                    else min(self._prune_depth, self._fork_prune_depth)
+                if depth > prune_depth:
+                    pruned.add(block_id)
+
+            if not pruned:
+                return
+
+            LOGGER.debug(
+                'Prune consensus state for %d blocks behind %s...%s',
+                len(pruned),
+                chain_head_id[:8],
+                chain_head_id[-8:])
+
+            self._delete(
+                pruned,
+                [(block_id, block_num, previous_block_id)
+                 for block_id, (block_num, previous_block_id, _) in
+                 index.items()])
+            self._win_log.delete(self._dead_wins(index, chain, pruned))
+
+            index_puts = []
+            index_deletes = []
+            kept_buckets = []
+            for bucket, entries in bucket_entries.items():
+                kept = [entry for entry in entries if entry[0] not in pruned]
+                if kept:
+                    kept_buckets.append(bucket)
+                    if len(kept) < len(entries):
+                        index_puts.append((_bucket_key(bucket), kept))
+                else:
+                    index_deletes.append(_bucket_key(bucket))
+            index_puts.append((_INDEX_BUCKETS_KEY, kept_buckets))
+            self._index_db.update(index_puts, index_deletes)
+
+    @staticmethod
+    def _dead_wins(index, chain, pruned):
+        """Returns the keys of the wins for the pruned blocks not in the
+        chain, less those that the wins for blocks in the chain or for
+        blocks kept may be built on.
+        """
+        # A win is built on by the wins for the blocks after its block, so
+        # the blocks are visited from the highest number down to find the
+        # blocks that have blocks kept after them.
+        blocks_kept_after = set()
+        live_wins = set()
+        dead_wins = set()
+        for block_id, (_, previous_block_id, win_key) in \
+                sorted(
+                    index.items(),
+                    key=lambda item: item[1][0],
+                    reverse=True):
+            if block_id in chain or block_id not in pruned or \
+                    block_id in blocks_kept_after:
+                blocks_kept_after.add(previous_block_id)
+                live_wins.add(win_key)
+            else:
+                dead_wins.add(win_key)
+
+        return dead_wins - live_wins - {None}
+
+    def _delete(self, deleted, entries):
+        """Deletes the consensus state for the block IDs in DELETED, a set,
+        first making consensus state that is kept but stored as the change
+        from deleted consensus state a checkpoint.  ENTRIES are the (block
+        ID, block number, previous block ID) of the consensus state that may
+        be stored so, with the block number None if it is not known.
+        """
+        # Consensus state is stored as the change from that of a block with
+        # a lower number, so once it is a checkpoint, consensus state stored
+        # as the change from it can still be read.
+        puts = []
+        for block_id, block_num, previous_block_id in \
+                sorted(entries, key=lambda entry: entry[1] or 0):
+            if block_id in deleted or previous_block_id not in deleted:
+                continue
+
+            entry = self._store_db.get(block_id)
+            if not isinstance(entry, dict) or 'changes' not in entry:
+                continue
+
+            try:
+                puts.append(
+                    (block_id,
+                     self._checkpoint(
+                         consensus_state=self._load(block_id),
+                         previous_block_id=previous_block_id,
+                         block_num=entry['block_num'])))
+            except KeyError:
+                deleted.add(block_id)
+
+        self._store_db.update(puts, list(deleted))
+        self._cache_discard(deleted)
+
+    def _build_index(self):
+        """Builds the index from the consensus state stored, which is only
+        needed once, for consensus state stored before the index was kept.
+        Consensus state stored before changes were kept does not have a
+        block number, and is deleted so that it does not stay forever.
+
+        Returns:
+            list: The numbers of the buckets in the index
+        """
+        legacy = set()
+        entries = []
+        bucket_entries = collections.defaultdict(list)
+        for block_id in self._store_db.keys():
+            entry = self._store_db.get(block_id)
+            if not isinstance(entry, dict):
+                legacy.add(block_id)
+                continue
+
+            # The win for consensus state stored before the index was kept
+            # is not known, so it is never pruned.
+            block_num = entry.get('block_num')
+            entries.append((block_id, block_num, entry['previous_block_id']))
+            if block_num is not None:
+                bucket_entries[block_num // _INDEX_BUCKET_SIZE].append(
+                    [block_id, block_num, entry['previous_block_id'], None])
+
+        LOGGER.info(
+            'Build consensus state index for %d blocks, deleting %d without '
+            'block numbers',
+            len(entries),
+            len(legacy))
+
+        if legacy:
+            self._delete(legacy, entries)
+            for bucket in bucket_entries:
+                bucket_entries[bucket] = [
+                    entry for entry in bucket_entries[bucket]
+                    if entry[0] not in legacy
+                ]
+
+        buckets = sorted(bucket for bucket in bucket_entries)
+        self._index_db.update(
+            [(_bucket_key(bucket), bucket_entries[bucket])
+             for bucket in buckets]
+            + [(_INDEX_BUCKETS_KEY, buckets)],
+            [])
+
+        return buckets
+
     # pylint: disable=arguments-differ
     def get(self, block_id, default=None):
         """Return the consensus state corresponding to block ID or the default
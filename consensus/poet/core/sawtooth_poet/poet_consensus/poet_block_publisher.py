@@ -105,16 +105,24 @@ class PoetBlockPublisher(BlockPublisherInterface):
         self._data_dir = data_dir
         self._config_dir = config_dir
         self._validator_id = validator_id
-        self._consensus_state_store = \
-            ConsensusStateStore(
-                data_dir=self._data_dir,
-                validator_id=self._validator_id)
         self._poet_key_state_store = \
             PoetKeyStateStore(
                 data_dir=self._data_dir,
                 validator_id=self._validator_id)
         self._wait_timer = None
 
+    def _consensus_state_store(self, poet_settings_view):
+        return \
+            ConsensusStateStore(
+                data_dir=self._data_dir,
+                validator_id=self._validator_id,
+                checkpoint_interval=poet_settings_view.
+                consensus_state_checkpoint_interval,
+                prune_depth=poet_settings_view.consensus_state_prune_depth,
+                fork_prune_depth=poet_settings_view.
+                consensus_state_fork_prune_depth,
+                cache_size=poet_settings_view.consensus_state_cache_size)
+
     def _register_signup_information(self, block_header, poet_enclave_module):
         # Create signup information for this validator, putting the block ID
         # of the block previous to the block referenced by block_header in the
@@ -218,14 +226,15 @@ class PoetBlockPublisher(BlockPublisherInterface):
         # See if a registration attempt has timed out. Assumes the caller has
         # checked for a committed registration and did not find it.
         # If it has timed out then this method will re-register.
+        poet_settings_view = PoetSettingsView(state_view)
         consensus_state = \
             ConsensusState.consensus_state_for_block_id(
                 block_id=block_header.previous_block_id,
                 block_cache=self._block_cache,
                 state_view_factory=self._state_view_factory,
-                consensus_state_store=self._consensus_state_store,
+                consensus_state_store=self._consensus_state_store(
+                    poet_settings_view),
                 poet_enclave_module=poet_enclave_module)
-        poet_settings_view = PoetSettingsView(state_view)
 
         if consensus_state.signup_attempt_timed_out(
                 signup_nonce, poet_settings_view, self._block_cache):
@@ -411,14 +420,15 @@ class PoetBlockPublisher(BlockPublisherInterface):
             poet_key_state.sealed_signup_data[:8],
             poet_key_state.sealed_signup_data[-8:])
 
+        poet_settings_view = PoetSettingsView(state_view)
         consensus_state = \
             ConsensusState.consensus_state_for_block_id(
                 block_id=block_header.previous_block_id,
                 block_cache=self._block_cache,
                 state_view_factory=self._state_view_factory,
-                consensus_state_store=self._consensus_state_store,
+                consensus_state_store=self._consensus_state_store(
+                    poet_settings_view),
                 poet_enclave_module=poet_enclave_module)
-        poet_settings_view = PoetSettingsView(state_view)
 
         # If our signup information does not pass the freshness test, then we
         # know that other validators will reject any blocks we try to claim so
@@ -74,10 +74,6 @@ class PoetBlockVerifier(BlockVerifierInterface):
         self._data_dir = data_dir
         self._config_dir = config_dir
         self._validator_id = validator_id
-        self._consensus_state_store = \
-            ConsensusStateStore(
-                data_dir=self._data_dir,
-                validator_id=self._validator_id)
 
     def verify_block(self, block_wrapper):
         """Check that the block received conforms to the consensus rules.
@@ -148,16 +144,26 @@ class PoetBlockVerifier(BlockVerifierInterface):
                 validator_info.id[-8:])
             return False
 
-        # Get the consensus state and PoET configuration view for the block
+        # Get the PoET configuration view and consensus state for the block
         # that is being built upon
+        poet_settings_view = PoetSettingsView(state_view=state_view)
+        consensus_state_store = \
+            ConsensusStateStore(
+                data_dir=self._data_dir,
+                validator_id=self._validator_id,
+                checkpoint_interval=poet_settings_view.
+                consensus_state_checkpoint_interval,
+                prune_depth=poet_settings_view.consensus_state_prune_depth,
+                fork_prune_depth=poet_settings_view.
+                consensus_state_fork_prune_depth,
+                cache_size=poet_settings_view.consensus_state_cache_size)
         consensus_state = \
             ConsensusState.consensus_state_for_block_id(
                 block_id=block_wrapper.previous_block_id,
                 block_cache=self._block_cache,
                 state_view_factory=self._state_view_factory,
-                consensus_state_store=self._consensus_state_store,
+                consensus_state_store=consensus_state_store,
                 poet_enclave_module=poet_enclave_module)
-        poet_settings_view = PoetSettingsView(state_view=state_view)
 
         previous_certificate_id = \
             utils.get_previous_certificate_id(
@@ -70,10 +70,6 @@ class PoetForkResolver(ForkResolverInterface):
         self._data_dir = data_dir
         self._config_dir = config_dir
         self._validator_id = validator_id
-        self._consensus_state_store = \
-            ConsensusStateStore(
-                data_dir=self._data_dir,
-                validator_id=self._validator_id)
 
     def compare_forks(self, cur_fork_head, new_fork_head):
         """Given the head of two forks, return which should be the fork that
@@ -99,6 +95,17 @@ class PoetForkResolver(ForkResolverInterface):
                 state_view=state_view,
                 config_dir=self._config_dir,
                 data_dir=self._data_dir)
+        poet_settings_view = PoetSettingsView(state_view)
+        consensus_state_store = \
+            ConsensusStateStore(
+                data_dir=self._data_dir,
+                validator_id=self._validator_id,
+                checkpoint_interval=poet_settings_view.
+                consensus_state_checkpoint_interval,
+                prune_depth=poet_settings_view.consensus_state_prune_depth,
+                fork_prune_depth=poet_settings_view.
+                consensus_state_fork_prune_depth,
+                cache_size=poet_settings_view.consensus_state_cache_size)
 
         current_fork_wait_certificate = \
             utils.deserialize_wait_certificate(
@@ -180,14 +187,14 @@ class PoetForkResolver(ForkResolverInterface):
                     block_id=cur_fork_head.identifier,
                     block_cache=self._block_cache,
                     state_view_factory=self._state_view_factory,
-                    consensus_state_store=self._consensus_state_store,
+                    consensus_state_store=consensus_state_store,
                     poet_enclave_module=poet_enclave_module)
             new_fork_consensus_state = \
                 ConsensusState.consensus_state_for_block_id(
                     block_id=new_fork_head.previous_block_id,
                     block_cache=self._block_cache,
                     state_view_factory=self._state_view_factory,
-                    consensus_state_store=self._consensus_state_store,
+                    consensus_state_store=consensus_state_store,
                     poet_enclave_module=poet_enclave_module)
             new_fork_aggregate_local_mean = \
                 new_fork_consensus_state.aggregate_local_mean + \
@@ -281,14 +288,17 @@ class PoetForkResolver(ForkResolverInterface):
                         block_id=new_fork_head.previous_block_id,
                         block_cache=self._block_cache,
                         state_view_factory=self._state_view_factory,
-                        consensus_state_store=self._consensus_state_store,
+                        consensus_state_store=consensus_state_store,
                         poet_enclave_module=poet_enclave_module)
                 consensus_state.validator_did_claim_block(
                     validator_info=validator_info,
                     wait_certificate=new_fork_wait_certificate,
                     poet_settings_view=PoetSettingsView(state_view))
-                self._consensus_state_store[new_fork_head.identifier] = \
-                    consensus_state
+                consensus_state_store.put(
+                    block_id=new_fork_head.identifier,
+                    consensus_state=consensus_state,
+                    previous_block_id=new_fork_head.previous_block_id,
+                    block_num=new_fork_head.block_num)
 
                 LOGGER.debug(
                     'Create consensus state: BID=%s, ALM=%f, TBCC=%d',
@@ -308,4 +318,10 @@ class PoetForkResolver(ForkResolverInterface):
                     new_fork_head.header.signer_public_key[-8:])
                 chosen_fork_head = cur_fork_head
 
+        # Now that we know which fork the chain head is on, drop consensus
+        # state that we are no longer going to need.
+        consensus_state_store.prune(
+            chain_head_id=chosen_fork_head.identifier,
+            chain_head_block_num=chosen_fork_head.block_num)
+
         return chosen_fork_head == new_fork_head
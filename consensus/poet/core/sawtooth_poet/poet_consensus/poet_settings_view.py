@@ -28,11 +28,15 @@ class PoetSettingsView(object):
     """
 
     _BLOCK_CLAIM_DELAY_ = 1
+    # pylint: disable=invalid-name
+    _CONSENSUS_STATE_CACHE_SIZE_ = 256
+    _CONSENSUS_STATE_CHECKPOINT_INTERVAL_ = 64
+    _CONSENSUS_STATE_FORK_PRUNE_DEPTH_ = 64
+    _CONSENSUS_STATE_PRUNE_DEPTH_ = 1000
     _ENCLAVE_MODULE_NAME_ = \
         'sawtooth_poet_simulator.poet_enclave_simulator.poet_enclave_simulator'
     _INITIAL_WAIT_TIME_ = 3000.0
     _KEY_BLOCK_CLAIM_LIMIT_ = 250
-    # pylint: disable=invalid-name
     _POPULATION_ESTIMATE_SAMPLE_SIZE_ = 50
     _REGISTRATION_RETRY_DELAY_ = 10
     _SIGNUP_COMMIT_MAXIMUM_DELAY_ = 10
@@ -53,6 +57,10 @@ class PoetSettingsView(object):
         self._settings_view = SettingsView(state_view)
 
         self._block_claim_delay = None
+        self._consensus_state_cache_size = None
+        self._consensus_state_checkpoint_interval = None
+        self._consensus_state_fork_prune_depth = None
+        self._consensus_state_prune_depth = None
         self._enclave_module_name = None
         self._initial_wait_time = None
         self._key_block_claim_limit = None
@@ -125,6 +133,85 @@ class PoetSettingsView(object):
 
         return self._block_claim_delay
 
+    @property
+    def consensus_state_cache_size(self):
+        """Return the consensus state cache size if config setting exists
+        and is valid, otherwise return the default.
+
+        The consensus state cache size is the number of consensus state
+        objects that are kept decoded in memory by the consensus state store.
+        """
+        if self._consensus_state_cache_size is None:
+            self._consensus_state_cache_size = \
+                self._get_config_setting(
+                    name='sawtooth.poet.consensus_state_cache_size',
+                    value_type=int,
+                    default_value=PoetSettingsView.
+                    _CONSENSUS_STATE_CACHE_SIZE_,
+                    validate_function=lambda value: value > 0)
+
+        return self._consensus_state_cache_size
+
+    @property
+    def consensus_state_checkpoint_interval(self):
+        """Return the consensus state checkpoint interval if config setting
+        exists and is valid, otherwise return the default.
+
+        The consensus state checkpoint interval is the largest number of
+        blocks for which consensus state is stored as the change from the
+        consensus state of the previous block before the full consensus
+        state is stored again.
+        """
+        if self._consensus_state_checkpoint_interval is None:
+            self._consensus_state_checkpoint_interval = \
+                self._get_config_setting(
+                    name='sawtooth.poet.consensus_state_checkpoint_interval',
+                    value_type=int,
+                    default_value=PoetSettingsView.
+                    _CONSENSUS_STATE_CHECKPOINT_INTERVAL_,
+                    validate_function=lambda value: value > 0)
+
+        return self._consensus_state_checkpoint_interval
+
+    @property
+    def consensus_state_fork_prune_depth(self):
+        """Return the consensus state fork prune depth if config setting
+        exists and is valid, otherwise return the default.
+
+        The consensus state fork prune depth is the number of blocks behind
+        the chain head that consensus state is kept for blocks that are not
+        in the chain.
+        """
+        if self._consensus_state_fork_prune_depth is None:
+            self._consensus_state_fork_prune_depth = \
+                self._get_config_setting(
+                    name='sawtooth.poet.consensus_state_fork_prune_depth',
+                    value_type=int,
+                    default_value=PoetSettingsView.
+                    _CONSENSUS_STATE_FORK_PRUNE_DEPTH_,
+                    validate_function=lambda value: value > 0)
+
+        return self._consensus_state_fork_prune_depth
+
+    @property
+    def consensus_state_prune_depth(self):
+        """Return the consensus state prune depth if config setting exists
+        and is valid, otherwise return the default.
+
+        The consensus state prune depth is the number of blocks behind the
+        chain head that consensus state is kept for blocks in the chain.
+        """
+        if self._consensus_state_prune_depth is None:
+            self._consensus_state_prune_depth = \
+                self._get_config_setting(
+                    name='sawtooth.poet.consensus_state_prune_depth',
+                    value_type=int,
+                    default_value=PoetSettingsView.
+                    _CONSENSUS_STATE_PRUNE_DEPTH_,
+                    validate_function=lambda value: value > 0)
+
+        return self._consensus_state_prune_depth
+
     @property
     def enclave_module_name(self):
         """Return the enclave module name if config setting exists and is
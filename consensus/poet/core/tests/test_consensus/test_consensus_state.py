@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+import copy
 import math
 import random
 from unittest import TestCase
@@ -783,6 +784,405 @@ class TestConsensusState(TestCase):
             block_cache=mock_block_cache,
             poet_enclave_module=None))
 
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state.utils.'
+                'deserialize_wait_certificate')
+    def test_block_claim_frequency_win_history(self, mock_deserialize):
+        """Verify that the zTest computed from the win history kept in the
+        consensus state agrees with the zTest computed by walking back
+        through the blocks, which is used for consensus state stored
+        before the win history was kept, and that the win history can be
+        rebuilt from the blocks.
+        """
+        mock_poet_settings_view = mock.Mock()
+        mock_poet_settings_view.target_wait_time = 5.0
+        mock_poet_settings_view.population_estimate_sample_size = 5
+        mock_poet_settings_view.ztest_minimum_win_count = 1
+        mock_poet_settings_view.ztest_maximum_win_deviation = 1.5
+
+        blocks = {}
+        mock_block_cache = mock.MagicMock()
+        mock_block_cache.__getitem__.side_effect = blocks.__getitem__
+        mock_deserialize.side_effect = \
+            lambda block, poet_enclave_module: block.wait_certificate
+
+        rand = random.Random(0)
+        validator_ids = ['validator_001', 'validator_002', 'validator_003']
+        state = consensus_state.ConsensusState()
+        previous_block_id = '0000000000000000'
+        results = []
+        for block_num in range(1, 101):
+            validator_info = \
+                ValidatorInfo(
+                    id=rand.choice(validator_ids + validator_ids[:1]),
+                    signup_info=SignUpInfo(poet_public_key='key_001'))
+            wait_certificate = mock.Mock()
+            wait_certificate.duration = 3.14
+            wait_certificate.local_mean = rand.uniform(5.0, 20.0)
+            wait_certificate.population_estimate.return_value = \
+                wait_certificate.local_mean / \
+                mock_poet_settings_view.target_wait_time
+
+            # A copy of the state without the win history walks the blocks
+            legacy_state = self._without_win_history(state)
+            self.assertFalse(legacy_state.has_win_history)
+            consensus_state.ConsensusState._population_estimate_cache.clear()
+
+            kwargs = {
+                'validator_info': validator_info,
+                'previous_block_id': previous_block_id,
+                'poet_settings_view': mock_poet_settings_view,
+                'population_estimate':
+                    wait_certificate.population_estimate.return_value,
+                'block_cache': mock_block_cache,
+                'poet_enclave_module': None
+            }
+            result = state.validator_is_claiming_too_frequently(**kwargs)
+            self.assertEqual(
+                result,
+                legacy_state.validator_is_claiming_too_frequently(**kwargs))
+            results.append(result)
+
+            block = mock.Mock()
+            block.previous_block_id = previous_block_id
+            block.header.signer_public_key = validator_info.id
+            block.wait_certificate = wait_certificate
+            previous_block_id = '{:016x}'.format(block_num)
+            blocks[previous_block_id] = block
+
+            state.validator_did_claim_block(
+                validator_info=validator_info,
+                wait_certificate=wait_certificate,
+                poet_settings_view=mock_poet_settings_view)
+
+        # Make sure the history exercised both outcomes of the zTest
+        self.assertIn(True, results)
+        self.assertIn(False, results)
+
+        legacy_state = self._without_win_history(state)
+        legacy_state.rebuild_win_history(
+            block_id=previous_block_id,
+            block_cache=mock_block_cache,
+            poet_enclave_module=None)
+        self.assertTrue(legacy_state.has_win_history)
+        self.assertEqual(
+            cbor.loads(legacy_state.serialize_to_bytes()),
+            cbor.loads(state.serialize_to_bytes()))
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state.utils.'
+                'deserialize_wait_certificate')
+    def test_win_depths_exact(self, mock_deserialize):
+        """Verify that the expected wins computed from the win history are
+        bit-identical to those computed by walking back through the blocks,
+        over a long history of local means that differ by orders of
+        magnitude, which a running sum of floats does not reproduce.
+        """
+        mock_poet_settings_view = mock.Mock()
+        mock_poet_settings_view.target_wait_time = 30.0
+        mock_poet_settings_view.population_estimate_sample_size = 5
+
+        blocks = {}
+        mock_block_cache = mock.MagicMock()
+        mock_block_cache.__getitem__.side_effect = blocks.__getitem__
+        mock_deserialize.side_effect = \
+            lambda block, poet_enclave_module: block.wait_certificate
+
+        consensus_state.ConsensusState._population_estimate_cache.clear()
+
+        rand = random.Random(1)
+        validator_ids = ['validator_001', 'validator_002', 'validator_003']
+        state = consensus_state.ConsensusState()
+        previous_block_id = '0000000000000000'
+        for block_num in range(1, 601):
+            # One validator claims most of the blocks
+            validator_info = \
+                ValidatorInfo(
+                    id=validator_ids[0] if rand.random() < 0.6
+                    else rand.choice(validator_ids[1:]),
+                    signup_info=SignUpInfo(poet_public_key='key_001'))
+            wait_certificate = mock.Mock()
+            wait_certificate.duration = 3.14
+            wait_certificate.local_mean = 10 ** rand.uniform(-4, 8)
+
+            for validator_id in validator_ids:
+                kwargs = {
+                    'validator_id': validator_id,
+                    'poet_settings_view': mock_poet_settings_view,
+                    'population_estimate': rand.uniform(0.1, 10.0)
+                }
+                self.assertEqual(
+                    list(state._win_depths_from_history(**kwargs)),
+                    list(state._win_depths_from_blocks(
+                        previous_block_id=previous_block_id,
+                        block_cache=mock_block_cache,
+                        poet_enclave_module=None,
+                        **kwargs)))
+
+            block = mock.Mock()
+            block.previous_block_id = previous_block_id
+            block.header.signer_public_key = validator_info.id
+            block.wait_certificate = wait_certificate
+            previous_block_id = '{:016x}'.format(block_num)
+            blocks[previous_block_id] = block
+
+            state.validator_did_claim_block(
+                validator_info=validator_info,
+                wait_certificate=wait_certificate,
+                poet_settings_view=mock_poet_settings_view)
+
+    @staticmethod
+    def _without_win_history(state):
+        legacy_state = consensus_state.ConsensusState()
+        legacy_state.parse_from_bytes(
+            cbor.dumps({
+                key: value for key, value in
+                cbor.loads(state.serialize_to_bytes()).items()
+                if key not in ('_inverse_local_mean_sum', '_validator_wins')
+            }))
+        return legacy_state
+
+    def test_win_history_log(self):
+        """Verify that the win history is shared by copies of consensus state
+        rather than copied, and that consensus state serialized with a win
+        log only refers to the latest win of each validator, is parsed the
+        same through another win log on the same database, and that a win
+        that was changed in the database is rejected.
+        """
+        mock_poet_settings_view = mock.Mock()
+        mock_poet_settings_view.population_estimate_sample_size = 5
+
+        state = consensus_state.ConsensusState()
+        for block_num in range(10):
+            wait_certificate = mock.Mock()
+            wait_certificate.duration = 3.14
+            wait_certificate.local_mean = 5.0 + block_num
+            state.validator_did_claim_block(
+                validator_info=ValidatorInfo(
+                    id='validator_{:03d}'.format(block_num % 3),
+                    signup_info=SignUpInfo(poet_public_key='key_001')),
+                wait_certificate=wait_certificate,
+                poet_settings_view=mock_poet_settings_view)
+
+        # Claiming a block with a copy adds to its history alone
+        state_copy = copy.copy(state)
+        latest_win = state_copy._validator_wins['validator_001']
+        self.assertIs(latest_win, state._validator_wins['validator_001'])
+        state_copy.validator_did_claim_block(
+            validator_info=ValidatorInfo(
+                id='validator_001',
+                signup_info=SignUpInfo(poet_public_key='key_001')),
+            wait_certificate=wait_certificate,
+            poet_settings_view=mock_poet_settings_view)
+        self.assertIs(
+            state_copy._validator_wins['validator_001'].previous,
+            latest_win)
+        self.assertIs(state._validator_wins['validator_001'], latest_win)
+
+        class _Database(dict):
+            def update(self, puts, deletes):
+                # pylint: disable=arguments-differ
+                dict.update(self, puts)
+
+        database = _Database()
+        win_log = consensus_state.WinHistoryLog(database)
+        self_dict = state.serialize_to_dict(win_log=win_log)
+        self.assertEqual(len(database), 10)
+        self.assertEqual(
+            self_dict['_validator_wins'],
+            {key: win.key for key, win in state._validator_wins.items()})
+
+        # Adding a copy with one more win only adds that win
+        state_copy.serialize_to_dict(win_log=win_log)
+        self.assertEqual(len(database), 11)
+
+        doppelganger_state = consensus_state.ConsensusState()
+        doppelganger_state.parse_from_dict(
+            self_dict=self_dict,
+            win_log=consensus_state.WinHistoryLog(database))
+        self.assertEqual(
+            cbor.loads(doppelganger_state.serialize_to_bytes()),
+            cbor.loads(state.serialize_to_bytes()))
+
+        # The win history cannot be parsed without the win log
+        with self.assertRaises(ValueError):
+            consensus_state.ConsensusState().parse_from_dict(
+                self_dict=self_dict)
+
+        # Nor when a win in it has been changed
+        first_key = \
+            state._validator_wins['validator_000'].previous.previous.key
+        database[first_key] = \
+            [database[first_key][0], 2] + database[first_key][2:]
+        with self.assertRaises(ValueError):
+            consensus_state.ConsensusState().parse_from_dict(
+                self_dict=self_dict,
+                win_log=consensus_state.WinHistoryLog(database))
+
+    def test_win_history_log_size(self):
+        """Verify that the win log only keeps as many wins in memory as its
+        size, that the wins it no longer keeps are read back from the
+        database rather than added to it again, and that deleted wins are
+        gone from both.
+        """
+        mock_poet_settings_view = mock.Mock()
+        mock_poet_settings_view.population_estimate_sample_size = 5
+
+        state = consensus_state.ConsensusState()
+        for block_num in range(10):
+            wait_certificate = mock.Mock()
+            wait_certificate.duration = 3.14
+            wait_certificate.local_mean = 5.0 + block_num
+            state.validator_did_claim_block(
+                validator_info=ValidatorInfo(
+                    id='validator_001',
+                    signup_info=SignUpInfo(poet_public_key='key_001')),
+                wait_certificate=wait_certificate,
+                poet_settings_view=mock_poet_settings_view)
+
+        class _Database(dict):
+            def __init__(self):
+                super().__init__()
+                self.written = []
+
+            def update(self, puts, deletes):
+                # pylint: disable=arguments-differ
+                for key in deletes:
+                    del self[key]
+                for key, value in puts:
+                    self.written.append(key)
+                    self[key] = value
+
+        database = _Database()
+        win_log = consensus_state.WinHistoryLog(database, size=3)
+        self_dict = state.serialize_to_dict(win_log=win_log)
+        self.assertEqual(len(database), 10)
+        self.assertEqual(len(win_log._wins), 3)
+
+        # Adding the history again, or one more win, does not write the wins
+        # that were already added
+        state.serialize_to_dict(win_log=win_log)
+        state_copy = copy.copy(state)
+        state_copy.validator_did_claim_block(
+            validator_info=ValidatorInfo(
+                id='validator_001',
+                signup_info=SignUpInfo(poet_public_key='key_001')),
+            wait_certificate=wait_certificate,
+            poet_settings_view=mock_poet_settings_view)
+        state_copy.serialize_to_dict(win_log=win_log)
+        self.assertEqual(len(database.written), 11)
+        self.assertEqual(len(win_log._wins), 3)
+
+        doppelganger_state = consensus_state.ConsensusState()
+        doppelganger_state.parse_from_dict(
+            self_dict=self_dict,
+            win_log=win_log)
+        self.assertEqual(
+            cbor.loads(doppelganger_state.serialize_to_bytes()),
+            cbor.loads(state.serialize_to_bytes()))
+        self.assertEqual(len(win_log._wins), 3)
+
+        win_log.delete([state_copy.latest_win_key])
+        self.assertEqual(len(database), 10)
+        self.assertNotIn(state_copy.latest_win_key, win_log._wins)
+        self.assertEqual(
+            state.latest_win_key,
+            self_dict['_validator_wins']['validator_001'])
+
+    @mock.patch.object(
+        consensus_state.ConsensusState,
+        '_population_estimate_cache',
+        new=consensus_state._PopulationEstimateCache(size=30))
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state.utils.'
+                'deserialize_wait_certificate')
+    def test_population_estimate_cache(self, mock_deserialize):
+        """Verify that the population estimate list is built from blocks
+        read in bulk from the block store once a committed block is reached,
+        follows the fork it is built for, and that the population estimate
+        cache is bounded.
+        """
+        mock_poet_settings_view = mock.Mock()
+        mock_poet_settings_view.population_estimate_sample_size = 5
+
+        mock_deserialize.side_effect = \
+            lambda block, poet_enclave_module: block.wait_certificate
+
+        def make_block(block_id, previous_block_id, local_mean):
+            block = \
+                mock.Mock(
+                    identifier=block_id,
+                    previous_block_id=previous_block_id)
+            block.header.signer_public_key = 'validator_001'
+            block.wait_certificate.local_mean = local_mean
+            return block
+
+        # Blocks 1 to 30 are committed, and blocks 21 to 30 of a fork off of
+        # block 20 are not
+        chain = []
+        blocks = {}
+        previous_block_id = '0000000000000000'
+        for block_num in range(1, 31):
+            block = \
+                make_block(
+                    'chain_{:03d}'.format(block_num),
+                    previous_block_id,
+                    block_num)
+            chain.append(block)
+            blocks[block.identifier] = block
+            previous_block_id = block.identifier
+        previous_block_id = 'chain_020'
+        for block_num in range(21, 31):
+            block = \
+                make_block(
+                    'fork_{:03d}'.format(block_num),
+                    previous_block_id,
+                    block_num + 100)
+            blocks[block.identifier] = block
+            previous_block_id = block.identifier
+
+        def get_block_iter(start_block, reverse):
+            self.assertTrue(reverse)
+            return reversed(chain[:chain.index(start_block) + 1])
+
+        mock_block_cache = mock.MagicMock()
+        mock_block_cache.__getitem__.side_effect = blocks.__getitem__
+        mock_block_cache.block_store.__contains__.side_effect = \
+            lambda block_id: block_id.startswith('chain_')
+        mock_block_cache.block_store.get_block_iter.side_effect = \
+            get_block_iter
+
+        state = consensus_state.ConsensusState()
+        state._total_block_claim_count = 30
+
+        for head_id, expected in \
+                (('chain_030', list(range(30, 5, -1))),
+                 ('fork_030',
+                  list(range(130, 120, -1)) + list(range(20, 5, -1)))):
+            mock_block_cache.__getitem__.reset_mock()
+
+            population_estimate_list = \
+                state._build_population_estimate_list(
+                    block_id=head_id,
+                    poet_settings_view=mock_poet_settings_view,
+                    block_cache=mock_block_cache,
+                    poet_enclave_module=None)
+
+            self.assertEqual(
+                [estimate_info.local_mean
+                 for estimate_info in population_estimate_list],
+                expected)
+
+            # Only the first block in the chain is fetched from the block
+            # cache, and the rest are read from the block store in bulk
+            self.assertEqual(
+                len([block_id for ((block_id,), _) in
+                     mock_block_cache.__getitem__.call_args_list
+                     if block_id.startswith('chain_')]),
+                1 if head_id == 'chain_030' else 0)
+
+            self.assertEqual(
+                len(consensus_state.ConsensusState.
+                    _population_estimate_cache),
+                25 if head_id == 'chain_030' else 30)
+
     def test_signup_commit_maximum_delay(self):
         """Verify that consensus state properly indicates whether or not a
         validator signup was committed before the maximum delay occurred
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+import copy
 import unittest
 from unittest import mock
 import tempfile
@@ -30,6 +31,76 @@ from sawtooth_poet_common.protobuf.validator_registry_pb2 \
     import SignUpInfo
 
 
+class _MockDatabase(dict):
+    def update(self, puts, deletes):
+        # pylint: disable=arguments-differ
+        for key in deletes:
+            del self[key]
+        for key, value in puts:
+            self[key] = value
+
+
+class _ReadCountingDatabase(_MockDatabase):
+    """Records the keys of the entries read, and how many times the keys
+    are scanned.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+        self.scans = 0
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.reads.append(key)
+        return super().get(key, default)
+
+    def keys(self):
+        self.scans += 1
+        return super().keys()
+
+
+def _use_databases(mock_lmdb, database, index_database=None):
+    """Makes the mocked LMDB database class return DATABASE for consensus
+    state, and INDEX_DATABASE, if given, for its index, and returns the
+    database it returns for the win log.
+    """
+    win_database = _MockDatabase()
+    if index_database is None:
+        index_database = _MockDatabase()
+
+    def open_database(filename, flag):
+        if 'poet_consensus_wins' in filename:
+            return win_database
+        if 'poet_consensus_index' in filename:
+            return index_database
+        return database
+
+    mock_lmdb.side_effect = open_database
+    return win_database
+
+
+def _claim_block(state, validator_number):
+    poet_settings_view = mock.Mock()
+    poet_settings_view.population_estimate_sample_size = 5
+
+    wait_certificate = mock.Mock()
+    wait_certificate.duration = 3.0 + validator_number
+    wait_certificate.local_mean = 5.0 + validator_number
+    validator_info = \
+        ValidatorInfo(
+            id='validator_{:03d}'.format(validator_number),
+            signup_info=SignUpInfo(
+                poet_public_key='key_{:03d}'.format(validator_number)))
+    state.validator_did_claim_block(
+        validator_info=validator_info,
+        wait_certificate=wait_certificate,
+        poet_settings_view=poet_settings_view)
+
+
 class TestConsensusStateStore(unittest.TestCase):
     def setUp(self):
         # pylint: disable=invalid-name,global-statement
@@ -100,7 +171,7 @@ class TestConsensusStateStore(unittest.TestCase):
         """
         # Make LMDB return empty dict
         my_dict = {}
-        mock_lmdb.return_value = my_dict
+        _use_databases(mock_lmdb, my_dict)
 
         mock_poet_settings_view = mock.Mock()
         mock_poet_settings_view.target_wait_time = 30.0
@@ -193,3 +264,344 @@ class TestConsensusStateStore(unittest.TestCase):
 
         with self.assertRaises(KeyError):
             _ = store['key']
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state_store.'
+                'LMDBNoLockDatabase')
+    def test_consensus_store_changes(self, mock_lmdb):
+        """Verify that consensus state put with the previous block ID is
+        stored as changes with periodic checkpoints, and is re-created the
+        same when read back without the decoded consensus state.
+        """
+        my_dict = _MockDatabase()
+        win_dict = _use_databases(mock_lmdb, my_dict)
+
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef',
+                checkpoint_interval=4,
+                cache_size=2)
+
+        state = consensus_state.ConsensusState()
+        expected = {}
+        previous_block_id = None
+        for block_num in range(10):
+            _claim_block(state, block_num % 3)
+            block_id = 'block_{:03d}'.format(block_num)
+            store.put(
+                block_id=block_id,
+                consensus_state=state,
+                previous_block_id=previous_block_id,
+                block_num=block_num)
+            expected[block_id] = state.serialize_to_bytes()
+            previous_block_id = block_id
+
+        # Every fourth block is a checkpoint and the rest only hold the
+        # changes from the block before
+        checkpoints = \
+            sorted(key for key, entry in my_dict.items() if 'state' in entry)
+        self.assertEqual(checkpoints, ['block_000', 'block_004', 'block_008'])
+        self.assertEqual(
+            list(my_dict['block_005']['changes'][1].keys()),
+            ['_aggregate_local_mean',
+             '_population_samples',
+             '_total_block_claim_count',
+             '_validators',
+             '_inverse_local_mean_sum',
+             '_validator_wins'])
+
+        # The win history is only stored once, in the win log, and consensus
+        # state only refers to the latest win of each validator
+        self.assertEqual(len(win_dict), 10)
+        self.assertEqual(
+            my_dict['block_005']['changes'][1]['_validator_wins'],
+            ['dict',
+             {'validator_002': ['set', state._validator_wins[
+                 'validator_002'].previous.key]},
+             []])
+        for key in my_dict['block_008']['state']['_validator_wins'].values():
+            self.assertIn(key, win_dict)
+
+        # Read the consensus state back through another store, once the
+        # decoded consensus state has been dropped
+        consensus_state_store.ConsensusStateStore._store_caches.clear()
+        consensus_state_store.ConsensusStateStore._store_win_logs.clear()
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef')
+        for block_id, serialized_state in expected.items():
+            self.assertEqual(
+                store[block_id].serialize_to_bytes(),
+                serialized_state)
+
+        # Consensus state returned by the store can be changed without
+        # changing what is stored
+        retrieved_state = store['block_009']
+        _claim_block(retrieved_state, 1)
+        self.assertEqual(
+            store['block_009'].serialize_to_bytes(),
+            expected['block_009'])
+
+        # Consensus state stored before changes were kept can still be read
+        # and built on
+        my_dict['legacy'] = state.serialize_to_bytes()
+        self.assertEqual(
+            store['legacy'].serialize_to_bytes(),
+            state.serialize_to_bytes())
+        _claim_block(state, 2)
+        store.put(
+            block_id='after_legacy',
+            consensus_state=state,
+            previous_block_id='legacy')
+        self.assertIn('changes', my_dict['after_legacy'])
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state_store.'
+                'LMDBNoLockDatabase')
+    def test_consensus_store_prune(self, mock_lmdb):
+        """Verify that pruning deletes consensus state for blocks deeper than
+        the prune depth and for blocks on abandoned forks, along with the
+        wins for the blocks on abandoned forks, and that the consensus state
+        kept can still be read.
+        """
+        my_dict = _MockDatabase()
+        win_dict = _use_databases(mock_lmdb, my_dict)
+
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef',
+                checkpoint_interval=4,
+                prune_depth=6,
+                fork_prune_depth=2)
+
+        # A chain of 12 blocks with a fork off of block 3 and another off of
+        # block 9
+        state = consensus_state.ConsensusState()
+        expected = {}
+        fork_states = {}
+        previous_block_id = None
+        for block_num in range(12):
+            _claim_block(state, block_num % 3)
+            block_id = 'block_{:03d}'.format(block_num)
+            store.put(
+                block_id=block_id,
+                consensus_state=state,
+                previous_block_id=previous_block_id,
+                block_num=block_num)
+            expected[block_id] = state.serialize_to_bytes()
+            previous_block_id = block_id
+            if block_num in (3, 9):
+                fork_states[block_id] = copy.copy(state)
+
+        chain_wins = set(win_dict)
+
+        fork_wins = {}
+        for previous_block_id, fork_state in fork_states.items():
+            _claim_block(fork_state, 4)
+            block_num = int(previous_block_id[-3:]) + 1
+            block_id = 'fork_{:03d}'.format(block_num)
+            store.put(
+                block_id=block_id,
+                consensus_state=fork_state,
+                previous_block_id=previous_block_id,
+                block_num=block_num)
+            expected[block_id] = fork_state.serialize_to_bytes()
+            fork_wins[block_id] = fork_state.latest_win_key
+
+        store.prune(chain_head_id='block_011', chain_head_block_num=11)
+
+        # Only the win for the pruned fork block is deleted, as the chain is
+        # built on the wins for the pruned blocks in it
+        self.assertEqual(
+            set(win_dict),
+            chain_wins | {fork_wins['fork_010']})
+        self.assertNotIn(fork_wins['fork_004'], chain_wins)
+
+        kept = ['block_{:03d}'.format(block_num) for block_num in range(5, 12)]
+        kept.append('fork_010')
+        self.assertEqual(sorted(my_dict.keys()), sorted(kept))
+
+        # Block 5 was stored as the change from the pruned block 4, and so
+        # becomes a checkpoint
+        self.assertIn('state', my_dict['block_005'])
+
+        consensus_state_store.ConsensusStateStore._store_caches.clear()
+        consensus_state_store.ConsensusStateStore._store_win_logs.clear()
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef')
+        for block_id in kept:
+            self.assertEqual(
+                store[block_id].serialize_to_bytes(),
+                expected[block_id])
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state_store.'
+                'LMDBNoLockDatabase')
+    def test_consensus_store_prune_interval(self, mock_lmdb):
+        """Verify that the database is only scanned for consensus state to
+        prune once every checkpoint interval, even when each prune is made
+        through a different store for the validator.
+        """
+        my_dict = _MockDatabase()
+        _use_databases(mock_lmdb, my_dict)
+
+        def make_store():
+            return \
+                consensus_state_store.ConsensusStateStore(
+                    data_dir=tempfile.gettempdir(),
+                    validator_id='0123456789abcdef',
+                    checkpoint_interval=4,
+                    prune_depth=2,
+                    fork_prune_depth=2)
+
+        state = consensus_state.ConsensusState()
+        store = make_store()
+        for block_num in range(12):
+            _claim_block(state, block_num % 3)
+            store.put(
+                block_id='block_{:03d}'.format(block_num),
+                consensus_state=state,
+                previous_block_id='block_{:03d}'.format(block_num - 1)
+                if block_num else None,
+                block_num=block_num)
+
+        def kept():
+            return sorted(int(block_id[-3:]) for block_id in my_dict)
+
+        make_store().prune(chain_head_id='block_005', chain_head_block_num=5)
+        self.assertEqual(kept(), list(range(3, 12)))
+
+        # Within the interval, another store does not scan the database
+        make_store().prune(chain_head_id='block_008', chain_head_block_num=8)
+        self.assertEqual(kept(), list(range(3, 12)))
+
+        make_store().prune(chain_head_id='block_009', chain_head_block_num=9)
+        self.assertEqual(kept(), list(range(7, 12)))
+
+        # The interval is kept per validator
+        other_dict = _MockDatabase()
+        _use_databases(mock_lmdb, other_dict)
+        other_store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='fedcba9876543210',
+                prune_depth=2)
+        other_store.put(
+            block_id='block_000',
+            consensus_state=state,
+            block_num=0)
+        other_store.prune(chain_head_id='block_009', chain_head_block_num=9)
+        self.assertEqual(list(other_dict), [])
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state_store.'
+                'LMDBNoLockDatabase')
+    def test_consensus_store_prune_index(self, mock_lmdb):
+        """Verify that pruning finds the consensus state to prune from the
+        block number index, only reading the consensus state that becomes a
+        checkpoint, and that the index only keeps the blocks not pruned.
+        """
+        my_dict = _ReadCountingDatabase()
+        index_dict = _MockDatabase()
+        _use_databases(mock_lmdb, my_dict, index_dict)
+
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef',
+                checkpoint_interval=100,
+                prune_depth=100,
+                fork_prune_depth=100)
+
+        state = consensus_state.ConsensusState()
+        previous_block_id = None
+        for block_num in range(200):
+            _claim_block(state, block_num % 3)
+            block_id = 'block_{:03d}'.format(block_num)
+            store.put(
+                block_id=block_id,
+                consensus_state=state,
+                previous_block_id=previous_block_id,
+                block_num=block_num)
+            previous_block_id = block_id
+
+        self.assertEqual(index_dict['buckets'], [0, 1, 2, 3])
+
+        my_dict.reads.clear()
+        consensus_state_store.ConsensusStateStore._store_caches.clear()
+        store.prune(chain_head_id='block_199', chain_head_block_num=199)
+
+        self.assertEqual(
+            sorted(my_dict),
+            ['block_{:03d}'.format(block_num)
+             for block_num in range(99, 200)])
+        self.assertEqual(my_dict.scans, 0)
+        self.assertIn('state', my_dict['block_099'])
+        self.assertNotIn(
+            'block_150', my_dict.reads,
+            'consensus state that is kept as it was was read')
+
+        self.assertEqual(index_dict['buckets'], [1, 2, 3])
+        self.assertEqual(
+            [entry[0] for entry in index_dict['0000000000000001']],
+            ['block_{:03d}'.format(block_num)
+             for block_num in range(99, 128)])
+
+    @mock.patch('sawtooth_poet.poet_consensus.consensus_state_store.'
+                'LMDBNoLockDatabase')
+    def test_consensus_store_build_index(self, mock_lmdb):
+        """Verify that consensus state stored before the index was kept is
+        indexed the first time it is pruned, that consensus state stored
+        before changes were kept, which has no block number, is deleted
+        then, and that the consensus state stored as changes from it can
+        still be read.
+        """
+        my_dict = _ReadCountingDatabase()
+        index_dict = _MockDatabase()
+        _use_databases(mock_lmdb, my_dict, index_dict)
+
+        store = \
+            consensus_state_store.ConsensusStateStore(
+                data_dir=tempfile.gettempdir(),
+                validator_id='0123456789abcdef',
+                checkpoint_interval=4,
+                prune_depth=100,
+                fork_prune_depth=100)
+
+        state = consensus_state.ConsensusState()
+        _claim_block(state, 0)
+        my_dict['legacy'] = state.serialize_to_bytes()
+
+        expected = {}
+        previous_block_id = 'legacy'
+        for block_num in range(1, 4):
+            _claim_block(state, block_num % 3)
+            block_id = 'block_{:03d}'.format(block_num)
+            store.put(
+                block_id=block_id,
+                consensus_state=state,
+                previous_block_id=previous_block_id,
+                block_num=block_num)
+            expected[block_id] = state.serialize_to_bytes()
+            previous_block_id = block_id
+
+        # The index was not built, so is not used until it is
+        self.assertNotIn('buckets', index_dict)
+
+        consensus_state_store.ConsensusStateStore._store_caches.clear()
+        store.prune(chain_head_id='block_003', chain_head_block_num=3)
+        self.assertEqual(my_dict.scans, 1)
+        self.assertEqual(sorted(my_dict), sorted(expected))
+        self.assertIn('state', my_dict['block_001'])
+        self.assertIn('changes', my_dict['block_002'])
+        self.assertEqual(index_dict['buckets'], [0])
+
+        consensus_state_store.ConsensusStateStore._store_caches.clear()
+        for block_id, serialized_state in expected.items():
+            self.assertEqual(
+                store[block_id].serialize_to_bytes(),
+                serialized_state)
+
+        store.prune(chain_head_id='block_003', chain_head_block_num=7)
+        self.assertEqual(my_dict.scans, 1)
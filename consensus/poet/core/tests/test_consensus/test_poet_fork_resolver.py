@@ -45,6 +45,8 @@ class TestPoetForkResolver(TestCase):
     def tearDown(self):
         shutil.rmtree(self._temp_dir)
 
+    @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
+                'PoetSettingsView')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
                 'ConsensusStateStore')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.factory')
@@ -59,7 +61,8 @@ class TestPoetForkResolver(TestCase):
             mock_validator_registry_view,
             mock_consensus_state,
             mock_poet_enclave_factory,
-            mock_consensus_state_store):
+            mock_consensus_state_store,
+            mock_poet_settings_view):
         """ Test verifies that if the new fork head is not a valid block,
             raises appropriate exception
         """
@@ -113,6 +116,8 @@ class TestPoetForkResolver(TestCase):
                 'New fork head {} is not a PoET block',
                 str(cm.exception))
 
+    @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
+                'PoetSettingsView')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
                 'ConsensusStateStore')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.factory')
@@ -127,7 +132,8 @@ class TestPoetForkResolver(TestCase):
             mock_validator_registry_view,
             mock_consensus_state,
             mock_poet_enclave_factory,
-            mock_consensus_state_store):
+            mock_consensus_state_store,
+            mock_poet_settings_view):
         """ Test verifies that if the current fork head is not a valid block,
             and if new_fork_head.previous_block_id == cur_fork_head.identifier
             then the new fork head switches consensus. Otherwise, raises the
@@ -222,6 +228,8 @@ class TestPoetForkResolver(TestCase):
             self.assertTrue('New fork head switches consensus to PoET'
                             in message)
 
+    @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
+                'PoetSettingsView')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
                 'ConsensusStateStore')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.factory')
@@ -236,7 +244,8 @@ class TestPoetForkResolver(TestCase):
             mock_validator_registry_view,
             mock_consensus_state,
             mock_poet_enclave_factory,
-            mock_consensus_state_store):
+            mock_consensus_state_store,
+            mock_poet_settings_view):
         """ If both current and new fork heads are valid PoET blocks,
             the test checks if they share the same immediate previous block,
             then the one with the smaller wait duration is chosen
@@ -382,6 +391,8 @@ class TestPoetForkResolver(TestCase):
                             'greater than current fork header signature (%s)'
                             in message)
 
+    @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
+                'PoetSettingsView')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.'
                 'ConsensusStateStore')
     @mock.patch('sawtooth_poet.poet_consensus.poet_fork_resolver.factory')
@@ -396,7 +407,8 @@ class TestPoetForkResolver(TestCase):
             mock_validator_registry_view,
             mock_consensus_state,
             mock_poet_enclave_factory,
-            mock_consensus_state_store):
+            mock_consensus_state_store,
+            mock_poet_settings_view):
         """ When both current and new fork heads are valid
             PoET blocks with different previous block ids,
             the test verifies that the one with
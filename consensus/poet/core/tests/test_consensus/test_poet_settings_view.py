@@ -24,6 +24,10 @@ class TestPoetSettingsView(unittest.TestCase):
 
     # pylint: disable=invalid-name
     _EXPECTED_DEFAULT_BLOCK_CLAIM_DELAY_ = 1
+    _EXPECTED_DEFAULT_CONSENSUS_STATE_CACHE_SIZE_ = 256
+    _EXPECTED_DEFAULT_CONSENSUS_STATE_CHECKPOINT_INTERVAL_ = 64
+    _EXPECTED_DEFAULT_CONSENSUS_STATE_FORK_PRUNE_DEPTH_ = 64
+    _EXPECTED_DEFAULT_CONSENSUS_STATE_PRUNE_DEPTH_ = 1000
     _EXPECTED_DEFAULT_ENCLAVE_MODULE_NAME_ = \
         'sawtooth_poet_simulator.poet_enclave_simulator.poet_enclave_simulator'
     _EXPECTED_DEFAULT_INITIAL_WAIT_TIME_ = 3000.0
@@ -76,6 +80,58 @@ class TestPoetSettingsView(unittest.TestCase):
         mock_settings_view.return_value.get_setting.return_value = 1
         self.assertEqual(poet_settings_view.block_claim_delay, 1)
 
+    def test_consensus_state_store_settings(self, mock_settings_view):
+        """Verify that retrieving the consensus state store settings works
+        for invalid cases (missing, invalid format, invalid value) as well as
+        valid case.
+        """
+        settings = [
+            ('consensus_state_cache_size',
+             TestPoetSettingsView.
+             _EXPECTED_DEFAULT_CONSENSUS_STATE_CACHE_SIZE_),
+            ('consensus_state_checkpoint_interval',
+             TestPoetSettingsView.
+             _EXPECTED_DEFAULT_CONSENSUS_STATE_CHECKPOINT_INTERVAL_),
+            ('consensus_state_fork_prune_depth',
+             TestPoetSettingsView.
+             _EXPECTED_DEFAULT_CONSENSUS_STATE_FORK_PRUNE_DEPTH_),
+            ('consensus_state_prune_depth',
+             TestPoetSettingsView.
+             _EXPECTED_DEFAULT_CONSENSUS_STATE_PRUNE_DEPTH_),
+        ]
+
+        for name, expected_default in settings:
+            # Simulate an underlying error parsing value
+            mock_settings_view.return_value.get_setting.side_effect = \
+                ValueError('bad value')
+
+            poet_settings_view = PoetSettingsView(state_view=None)
+            self.assertEqual(
+                getattr(poet_settings_view, name),
+                expected_default)
+
+            _, kwargs = \
+                mock_settings_view.return_value.get_setting.call_args
+
+            self.assertEqual(kwargs['key'], 'sawtooth.poet.' + name)
+            self.assertEqual(kwargs['default_value'], expected_default)
+            self.assertEqual(kwargs['value_type'], int)
+
+            # Underlying config setting is not a valid value
+            mock_settings_view.return_value.get_setting.side_effect = None
+            for bad_value in [-100, -1, 0]:
+                mock_settings_view.return_value.get_setting.return_value = \
+                    bad_value
+                poet_settings_view = PoetSettingsView(state_view=None)
+                self.assertEqual(
+                    getattr(poet_settings_view, name),
+                    expected_default)
+
+            # Underlying config setting is a valid value
+            mock_settings_view.return_value.get_setting.return_value = 1
+            poet_settings_view = PoetSettingsView(state_view=None)
+            self.assertEqual(getattr(poet_settings_view, name), 1)
+
     def test_enclave_module_name(self, mock_settings_view):
         """Verify that retrieving enclave module name works for invalid
         cases (missing, invalid format, invalid value) as well as valid case.
@@ -0,0 +1,156 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+
+from sawtooth_rest_api.protobuf.client_batch_submit_pb2 \
+    import ClientBatchStatus
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BatchWaiter:
+    """Resolves requests waiting for batches to be committed from the
+    batch-status events the validator sends, so that waiting requests do not
+    each hold a request open on the validator.
+
+    The waiter is only listening while the REST API is subscribed to
+    batch-status events. If the subscription is lost, every watch is ended
+    early, so the requests waiting on them can fall back to asking the
+    validator to wait.
+
+    Only used from the event loop, so it is not locked.
+    """
+
+    def __init__(self):
+        self._listening = False
+        self._watches = {}
+
+    @property
+    def listening(self):
+        """Whether batch-status events are being received.
+        """
+        return self._listening
+
+    def start_listening(self):
+        self._listening = True
+
+    def stop_listening(self):
+        self._listening = False
+        for watch in {w for ws in self._watches.values() for w in ws}:
+            watch.interrupt()
+        self._watches.clear()
+
+    def watch(self, batch_ids):
+        """Returns a context manager watching for statuses of the batches.
+        It should be entered before the current statuses of the batches are
+        fetched, so that no status sent in between is missed.
+        """
+        return BatchWatch(self, batch_ids)
+
+    def notify(self, batch_status):
+        """Passes the status of a batch, from a batch-status event, to
+        everything watching it.
+
+        Args:
+            batch_status (ClientBatchStatus): The new status of the batch
+        """
+        for watch in list(self._watches.get(batch_status.batch_id, ())):
+            watch.update(batch_status)
+
+    def _add(self, watch):
+        for batch_id in watch.batch_ids:
+            self._watches.setdefault(batch_id, set()).add(watch)
+
+    def _remove(self, watch):
+        for batch_id in watch.batch_ids:
+            watches = self._watches.get(batch_id)
+            if watches is not None:
+                watches.discard(watch)
+                if not watches:
+                    del self._watches[batch_id]
+
+
+class BatchWatch:
+    """Collects the statuses of a set of batches, until none of them are
+    pending.
+    """
+
+    def __init__(self, waiter, batch_ids):
+        self._waiter = waiter
+        self.batch_ids = list(batch_ids)
+        self._statuses = {}
+        self._known = False
+        self._done = asyncio.Event()
+        self._interrupted = False
+
+    def __enter__(self):
+        if not self._waiter.listening:
+            self.interrupt()
+        else:
+            self._waiter._add(self)  # pylint: disable=protected-access
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self._waiter._remove(self)  # pylint: disable=protected-access
+
+    @property
+    def statuses(self):
+        """The latest status of each batch, in the order they were given.
+        """
+        return [self._statuses[batch_id] for batch_id in self.batch_ids]
+
+    def set_statuses(self, batch_statuses):
+        """Sets the statuses of the batches as they were fetched from the
+        validator, keeping any newer ones already sent by events.
+
+        Args:
+            batch_statuses (list of ClientBatchStatus): The fetched statuses
+        """
+        for batch_status in batch_statuses:
+            if batch_status.batch_id not in self._statuses:
+                self._statuses[batch_status.batch_id] = batch_status
+        self._known = True
+        self._check_done()
+
+    def update(self, batch_status):
+        self._statuses[batch_status.batch_id] = batch_status
+        self._check_done()
+
+    def interrupt(self):
+        self._interrupted = True
+        self._done.set()
+
+    async def wait(self):
+        """Waits until none of the batches are pending.
+
+        Returns:
+            bool: True if the statuses are final, or False if the waiter
+                stopped listening first
+        """
+        await self._done.wait()
+        return not self._interrupted
+
+    def _check_done(self):
+        if not self._known:
+            return
+        if any(batch_id not in self._statuses
+               for batch_id in self.batch_ids):
+            return
+        if all(self._statuses[batch_id].status != ClientBatchStatus.PENDING
+               for batch_id in self.batch_ids):
+            self._done.set()
@@ -0,0 +1,259 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+"""Encodes Protobuf messages as compact JSON text directly, without first
+converting them to dicts.
+
+The JSON produced matches what the REST API sends for the same messages
+in its pretty-printed responses, except that it has no whitespace and its
+keys are in field order rather than sorted:
+
+    - fields are named as in the .proto files, and fields left at their
+      default value are included, as with MessageToDict
+    - the headers of blocks, batches and transactions are deserialized and
+      encoded in place of their bytes
+"""
+
+import base64
+import json
+import logging
+
+# pylint: disable=no-name-in-module,import-error
+# needed for the google.protobuf imports to pass pylint
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import DecodeError
+
+import sawtooth_rest_api.exceptions as errors
+from sawtooth_rest_api.protobuf.block_pb2 import Block
+from sawtooth_rest_api.protobuf.block_pb2 import BlockHeader
+from sawtooth_rest_api.protobuf.batch_pb2 import Batch
+from sawtooth_rest_api.protobuf.batch_pb2 import BatchHeader
+from sawtooth_rest_api.protobuf.transaction_pb2 import Transaction
+from sawtooth_rest_api.protobuf.transaction_pb2 import TransactionHeader
+
+
+LOGGER = logging.getLogger(__name__)
+
+# The header type of each resource whose header is deserialized
+HEADER_TYPES = {
+    Block.DESCRIPTOR.full_name: BlockHeader,
+    Batch.DESCRIPTOR.full_name: BatchHeader,
+    Transaction.DESCRIPTOR.full_name: TransactionHeader,
+}
+
+_INT32_TYPES = frozenset([
+    FieldDescriptor.TYPE_INT32,
+    FieldDescriptor.TYPE_UINT32,
+    FieldDescriptor.TYPE_SINT32,
+    FieldDescriptor.TYPE_FIXED32,
+    FieldDescriptor.TYPE_SFIXED32,
+])
+
+# MessageToDict encodes 64 bit integers as strings
+_INT64_TYPES = frozenset([
+    FieldDescriptor.TYPE_INT64,
+    FieldDescriptor.TYPE_UINT64,
+    FieldDescriptor.TYPE_SINT64,
+    FieldDescriptor.TYPE_FIXED64,
+    FieldDescriptor.TYPE_SFIXED64,
+])
+
+_SCALAR = 0
+_REPEATED_SCALAR = 1
+_MESSAGE = 2
+_REPEATED_MESSAGE = 3
+_HEADER = 4
+
+_encode_string = json.encoder.encode_basestring_ascii
+
+_ENCODERS = {}
+
+
+def message_to_json(message):
+    """Encodes a Protobuf message as compact JSON text.
+    """
+    parts = []
+    encode_message(message, parts)
+    return ''.join(parts)
+
+
+def encode_message(message, parts):
+    """Encodes a Protobuf message as compact JSON, appending the text to a
+    list of parts.
+
+    Raises:
+        ResourceHeaderInvalid: The message is or contains a block, batch or
+            transaction whose header cannot be deserialized
+    """
+    _get_encoder(message.DESCRIPTOR).encode(message, parts)
+
+
+def _get_encoder(descriptor):
+    try:
+        return _ENCODERS[descriptor.full_name]
+    except KeyError:
+        encoder = _MessageEncoder(descriptor)
+        _ENCODERS[descriptor.full_name] = encoder
+        return encoder
+
+
+def _encode_bytes(value):
+    return '"' + base64.b64encode(value).decode('ascii') + '"'
+
+
+def _encode_bool(value):
+    return 'true' if value else 'false'
+
+
+def _encode_int64(value):
+    return '"' + str(value) + '"'
+
+
+def _make_enum_encoder(enum_descriptor):
+    names = {
+        value.number: '"' + value.name + '"'
+        for value in enum_descriptor.values
+    }
+
+    def encode_enum(value):
+        return names.get(value) or str(value)
+
+    return encode_enum
+
+
+def _is_repeated(field):
+    # Newer versions of protobuf replace the field label with is_repeated
+    try:
+        return field.is_repeated
+    except AttributeError:
+        return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def _make_scalar_encoder(field):
+    """Returns a function encoding a value of the field, or None if values of
+    its type are not encoded directly.
+    """
+    if field.type == FieldDescriptor.TYPE_STRING:
+        return _encode_string
+    if field.type == FieldDescriptor.TYPE_BYTES:
+        return _encode_bytes
+    if field.type == FieldDescriptor.TYPE_BOOL:
+        return _encode_bool
+    if field.type in _INT32_TYPES:
+        return str
+    if field.type in _INT64_TYPES:
+        return _encode_int64
+    if field.type == FieldDescriptor.TYPE_ENUM:
+        return _make_enum_encoder(field.enum_type)
+
+    return None
+
+
+class _MessageEncoder:
+    """Encodes messages of a single type. Messages with fields which are not
+    simple to encode exactly as MessageToDict would, such as maps, floats,
+    or well known types, are encoded with MessageToDict instead.
+    """
+
+    def __init__(self, descriptor):
+        self._fields = []
+        self._fallback = descriptor.full_name.startswith('google.protobuf.')
+
+        header_type = HEADER_TYPES.get(descriptor.full_name)
+
+        for field in descriptor.fields:
+            key = _encode_string(field.name) + ':'
+            repeated = _is_repeated(field)
+            has_presence = \
+                field.containing_oneof is not None or (
+                    not repeated
+                    and field.type == FieldDescriptor.TYPE_MESSAGE)
+
+            if field.type == FieldDescriptor.TYPE_MESSAGE:
+                if field.message_type.GetOptions().map_entry:
+                    self._fallback = True
+                kind = _REPEATED_MESSAGE if repeated else _MESSAGE
+                encode = None
+            elif header_type is not None and field.name == 'header':
+                kind = _HEADER
+                encode = header_type
+            else:
+                kind = _REPEATED_SCALAR if repeated else _SCALAR
+                encode = _make_scalar_encoder(field)
+                if encode is None:
+                    self._fallback = True
+
+            self._fields.append(
+                (field.name, key, kind, encode, has_presence))
+
+    def encode(self, message, parts):
+        if self._fallback:
+            parts.append(json.dumps(
+                MessageToDict(
+                    message,
+                    including_default_value_fields=True,
+                    preserving_proto_field_name=True),
+                separators=(',', ':')))
+            return
+
+        separator = '{'
+        for name, key, kind, encode, has_presence in self._fields:
+            if has_presence and not message.HasField(name):
+                continue
+
+            parts.append(separator)
+            parts.append(key)
+            separator = ','
+
+            value = getattr(message, name)
+
+            if kind == _SCALAR:
+                parts.append(encode(value))
+
+            elif kind == _REPEATED_SCALAR:
+                parts.append('[' + ','.join(map(encode, value)) + ']')
+
+            elif kind == _MESSAGE:
+                _get_encoder(value.DESCRIPTOR).encode(value, parts)
+
+            elif kind == _REPEATED_MESSAGE:
+                parts.append('[')
+                for i, item in enumerate(value):
+                    if i:
+                        parts.append(',')
+                    _get_encoder(item.DESCRIPTOR).encode(item, parts)
+                parts.append(']')
+
+            else:
+                _get_encoder(encode.DESCRIPTOR).encode(
+                    _parse_header(encode, value), parts)
+
+        if separator == '{':
+            parts.append('{}')
+        else:
+            parts.append('}')
+
+
+def _parse_header(header_type, header_bytes):
+    header = header_type()
+    try:
+        header.ParseFromString(header_bytes)
+    except DecodeError:
+        LOGGER.error(
+            'The validator sent a resource with an invalid header: %s',
+            base64.b64encode(header_bytes).decode('ascii'))
+        raise errors.ResourceHeaderInvalid()
+    return header
@@ -29,7 +29,12 @@ def load_default_rest_api_config():
         bind=["127.0.0.1:8008"],
         connect="tcp://localhost:4004",
         timeout=300,
-        client_max_size=10485760)
+        client_max_size=10485760,
+        compact_json=False,
+        connection_pool_size=4,
+        max_in_flight_requests=32,
+        submit_coalesce_window=0,
+        submit_coalesce_max_bytes=1048576)
 
 
 def load_toml_rest_api_config(filename):
@@ -55,7 +60,9 @@ def load_toml_rest_api_config(filename):
 
     invalid_keys = set(toml_config.keys()).difference(
         ['bind', 'connect', 'timeout', 'opentsdb_db', 'opentsdb_url',
-         'opentsdb_username', 'opentsdb_password', 'client_max_size'])
+         'opentsdb_username', 'opentsdb_password', 'client_max_size',
+         'compact_json', 'connection_pool_size', 'max_in_flight_requests',
+         'submit_coalesce_window', 'submit_coalesce_max_bytes'])
     if invalid_keys:
         raise RestApiConfigurationError(
             "Invalid keys in rest api config: {}".format(
@@ -68,7 +75,15 @@ def load_toml_rest_api_config(filename):
         opentsdb_db=toml_config.get('opentsdb_db', None),
         opentsdb_username=toml_config.get('opentsdb_username', None),
         opentsdb_password=toml_config.get('opentsdb_password', None),
-        client_max_size=toml_config.get('client_max_size', None)
+        client_max_size=toml_config.get('client_max_size', None),
+        compact_json=toml_config.get('compact_json', None),
+        connection_pool_size=toml_config.get('connection_pool_size', None),
+        max_in_flight_requests=toml_config.get(
+            'max_in_flight_requests', None),
+        submit_coalesce_window=toml_config.get(
+            'submit_coalesce_window', None),
+        submit_coalesce_max_bytes=toml_config.get(
+            'submit_coalesce_max_bytes', None)
     )
 
     return config
@@ -87,6 +102,11 @@ def merge_rest_api_config(configs):
     opentsdb_username = None
     opentsdb_password = None
     client_max_size = None
+    compact_json = None
+    connection_pool_size = None
+    max_in_flight_requests = None
+    submit_coalesce_window = None
+    submit_coalesce_max_bytes = None
 
     for config in reversed(configs):
         if config.bind is not None:
@@ -105,6 +125,16 @@ def merge_rest_api_config(configs):
             opentsdb_password = config.opentsdb_password
         if config.client_max_size is not None:
             client_max_size = config.client_max_size
+        if config.compact_json is not None:
+            compact_json = config.compact_json
+        if config.connection_pool_size is not None:
+            connection_pool_size = config.connection_pool_size
+        if config.max_in_flight_requests is not None:
+            max_in_flight_requests = config.max_in_flight_requests
+        if config.submit_coalesce_window is not None:
+            submit_coalesce_window = config.submit_coalesce_window
+        if config.submit_coalesce_max_bytes is not None:
+            submit_coalesce_max_bytes = config.submit_coalesce_max_bytes
 
     return RestApiConfig(
         bind=bind,
@@ -114,7 +144,12 @@ def merge_rest_api_config(configs):
         opentsdb_db=opentsdb_db,
         opentsdb_username=opentsdb_username,
         opentsdb_password=opentsdb_password,
-        client_max_size=client_max_size)
+        client_max_size=client_max_size,
+        compact_json=compact_json,
+        connection_pool_size=connection_pool_size,
+        max_in_flight_requests=max_in_flight_requests,
+        submit_coalesce_window=submit_coalesce_window,
+        submit_coalesce_max_bytes=submit_coalesce_max_bytes)
 
 
 class RestApiConfig:
@@ -127,7 +162,12 @@ class RestApiConfig:
             opentsdb_db=None,
             opentsdb_username=None,
             opentsdb_password=None,
-            client_max_size=None):
+            client_max_size=None,
+            compact_json=None,
+            connection_pool_size=None,
+            max_in_flight_requests=None,
+            submit_coalesce_window=None,
+            submit_coalesce_max_bytes=None):
         self._bind = bind
         self._connect = connect
         self._timeout = timeout
@@ -136,6 +176,11 @@ class RestApiConfig:
         self._opentsdb_username = opentsdb_username
         self._opentsdb_password = opentsdb_password
         self._client_max_size = client_max_size
+        self._compact_json = compact_json
+        self._connection_pool_size = connection_pool_size
+        self._max_in_flight_requests = max_in_flight_requests
+        self._submit_coalesce_window = submit_coalesce_window
+        self._submit_coalesce_max_bytes = submit_coalesce_max_bytes
 
     @property
     def bind(self):
@@ -169,12 +214,34 @@ class RestApiConfig:
     def client_max_size(self):
         return self._client_max_size
 
+    @property
+    def compact_json(self):
+        return self._compact_json
+
+    @property
+    def connection_pool_size(self):
+        return self._connection_pool_size
+
+    @property
+    def max_in_flight_requests(self):
+        return self._max_in_flight_requests
+
+    @property
+    def submit_coalesce_window(self):
+        return self._submit_coalesce_window
+
+    @property
+    def submit_coalesce_max_bytes(self):
+        return self._submit_coalesce_max_bytes
+
     def __repr__(self):
         # skip opentsdb_db password
         return \
             "{}(bind={}, connect={}, timeout={}," \
             "opentsdb_url={}, opentsdb_db={}, opentsdb_username={}," \
-            "client_max_size={})" \
+            "client_max_size={}, compact_json={}," \
+            "connection_pool_size={}, max_in_flight_requests={}," \
+            "submit_coalesce_window={}, submit_coalesce_max_bytes={})" \
             .format(
                 self.__class__.__name__,
                 repr(self._bind),
@@ -183,7 +250,12 @@ class RestApiConfig:
                 repr(self._opentsdb_url),
                 repr(self._opentsdb_db),
                 repr(self._opentsdb_username),
-                repr(self._client_max_size))
+                repr(self._client_max_size),
+                repr(self._compact_json),
+                repr(self._connection_pool_size),
+                repr(self._max_in_flight_requests),
+                repr(self._submit_coalesce_window),
+                repr(self._submit_coalesce_max_bytes))
 
     def to_dict(self):
         return collections.OrderedDict([
@@ -194,7 +266,12 @@ class RestApiConfig:
             ('opentsdb_db', self._opentsdb_db),
             ('opentsdb_username', self._opentsdb_username),
             ('opentsdb_password', self._opentsdb_password),
-            ('client_max_size', self._client_max_size)
+            ('client_max_size', self._client_max_size),
+            ('compact_json', self._compact_json),
+            ('connection_pool_size', self._connection_pool_size),
+            ('max_in_flight_requests', self._max_in_flight_requests),
+            ('submit_coalesce_window', self._submit_coalesce_window),
+            ('submit_coalesce_max_bytes', self._submit_coalesce_max_bytes)
         ])
 
     def to_toml_string(self):
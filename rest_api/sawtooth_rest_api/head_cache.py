@@ -0,0 +1,101 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+from collections import OrderedDict
+import logging
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 1024
+
+
+class HeadCache:
+    """Keeps the current chain head and its state root, as reported by
+    block-commit events, along with the state roots of recently used blocks,
+    so that state queries do not have to fetch a block from the validator
+    just to find its state root.
+
+    A block's state root never changes, so the state roots are only evicted
+    to keep the cache to its size. The current head is cleared whenever the
+    events that keep it up to date may have stopped, such as when the
+    validator disconnects.
+
+    The chain generation is incremented whenever the chain may have switched
+    to another fork, so that anything cached against the old chain can be
+    recognized as stale.
+
+    Only used from the event loop, so it is not locked.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Args:
+            size (int): The number of block state roots to keep
+        """
+        self._size = size
+        self._state_roots = OrderedDict()
+        self._head = None
+        self._chain_generation = 0
+
+    @property
+    def head(self):
+        """The (block id, state root) of the current chain head, or None if it
+        is not known.
+        """
+        return self._head
+
+    @property
+    def chain_generation(self):
+        """A number that changes whenever the chain may have switched forks,
+        or None if the current chain head is not known.
+        """
+        if self._head is None:
+            return None
+        return self._chain_generation
+
+    def set_head(self, block_id, state_root, previous_block_id=None):
+        """Sets the current chain head, from a block-commit event. If the new
+        head does not extend the current one, the chain generation changes.
+        """
+        if self._head is not None and self._head[0] != block_id:
+            if previous_block_id is None \
+                    or previous_block_id != self._head[0]:
+                self._chain_generation += 1
+
+        self._head = (block_id, state_root)
+        self.put_state_root(block_id, state_root)
+
+    def clear_head(self):
+        """Forgets the current chain head. Whatever the chain does until the
+        head is set again is unknown, so the chain generation changes.
+        """
+        if self._head is not None:
+            self._chain_generation += 1
+        self._head = None
+
+    def get_state_root(self, block_id):
+        """Returns the state root of the block, or None if it is not cached.
+        """
+        state_root = self._state_roots.get(block_id)
+        if state_root is not None:
+            self._state_roots.move_to_end(block_id)
+        return state_root
+
+    def put_state_root(self, block_id, state_root):
+        self._state_roots[block_id] = state_root
+        self._state_roots.move_to_end(block_id)
+        while len(self._state_roots) > self._size:
+            self._state_roots.popitem(last=False)
@@ -14,8 +14,10 @@
 # ------------------------------------------------------------------------------
 
 import asyncio
+from collections import deque
 from enum import Enum
 import logging
+import time
 import uuid
 
 from google.protobuf.message import DecodeError
@@ -391,3 +393,153 @@ class Connection:
         except zmq.ZMQError as e:
             # The monitor socket was probably closed
             LOGGER.warning('Error occurred while monitoring the socket: %s', e)
+
+
+class ConnectionPool:
+    """A pool of connections to the same validator, over which validator
+    Message objects may be sent, and which may be used in place of a single
+    Connection.
+
+    Each message is sent over the connection with the fewest replies
+    outstanding, so that slow requests only hold up the connection they
+    were sent on. Each connection has a limit on the replies it may have
+    outstanding; once every connection is at its limit, messages wait their
+    turn in the order they were sent.
+
+    Event subscriptions are always made over the first connection, which is
+    where the validator will then send events, and which is the connection
+    whose state changes are reported.
+    """
+
+    # Requests which must be sent over the connection that receives events
+    _EVENT_REQUEST_TYPES = frozenset([
+        Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
+        Message.CLIENT_EVENTS_UNSUBSCRIBE_REQUEST,
+    ])
+
+    def __init__(self, url, size=1, max_in_flight=None,
+                 metrics_registry=None):
+        """
+        Args:
+            url (str): The url of the validator
+            size (int): The number of connections to open
+            max_in_flight (int): The number of replies each connection may
+                have outstanding, or None for no limit
+            metrics_registry (MetricsRegistry): Where to record how long
+                messages waited to be sent, if anywhere
+        """
+        self._url = url
+        self._connections = [Connection(url) for _ in range(max(size, 1))]
+        self._in_flight = [0] * len(self._connections)
+        self._max_in_flight = max_in_flight
+        self._waiters = deque()
+
+        if metrics_registry:
+            self._queued_count = metrics_registry.counter(
+                'validator_queued_count')
+            self._queue_time = metrics_registry.timer('validator_queue_time')
+        else:
+            self._queued_count = None
+            self._queue_time = None
+
+    @property
+    def url(self):
+        return self._url
+
+    def open(self):
+        """Opens each connection in the pool.
+        """
+        for connection in self._connections:
+            connection.open()
+
+    def on_connection_state_change(self, event_type, callback):
+        """Register a callback for a state change of the connection that
+        receives events. See Connection.on_connection_state_change.
+        """
+        self._connections[0].on_connection_state_change(event_type, callback)
+
+    async def send(self, message_type, message_content, timeout=None):
+        """Sends a message over the least busy connection, once one is below
+        its limit, and returns a future for the response. Time spent waiting
+        for a connection counts towards the timeout.
+        """
+        if message_type in self._EVENT_REQUEST_TYPES:
+            return await self._connections[0].send(
+                message_type, message_content, timeout=timeout)
+
+        start = time.time()
+        index = await self._acquire(timeout)
+        try:
+            if timeout is not None:
+                timeout = max(timeout - (time.time() - start), 0)
+            return await self._connections[index].send(
+                message_type, message_content, timeout=timeout)
+        finally:
+            self._release(index)
+
+    async def receive(self):
+        """Returns a future for an incoming message, such as an event.
+        """
+        return await self._connections[0].receive()
+
+    def close(self):
+        """Closes each connection in the pool.
+
+        All outstanding futures for replies will be sent a DisconnectError.
+        """
+        for connection in self._connections:
+            connection.close()
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(DisconnectError())
+
+    async def _acquire(self, timeout):
+        """Returns the index of the connection to send a message over, having
+        counted the message as in flight on it.
+        """
+        if not self._waiters:
+            index = min(
+                range(len(self._in_flight)), key=self._in_flight.__getitem__)
+            if self._max_in_flight is None \
+                    or self._in_flight[index] < self._max_in_flight:
+                self._in_flight[index] += 1
+                return index
+
+        if self._queued_count is not None:
+            self._queued_count.inc()
+
+        waiter = asyncio.Future()
+        self._waiters.append(waiter)
+
+        timer_ctx = self._queue_time.time() \
+            if self._queue_time is not None else None
+        try:
+            # Shielded, so that a connection handed to a waiter which is
+            # cancelled or times out can be released again
+            return await asyncio.wait_for(
+                asyncio.shield(waiter), timeout=timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            elif not waiter.cancelled() and waiter.exception() is None:
+                self._release(waiter.result())
+            raise
+        finally:
+            if timer_ctx is not None:
+                timer_ctx.stop()
+
+    def _release(self, index):
+        """Counts a reply as no longer outstanding on a connection, and hands
+        the connection to the next waiting message, if any.
+        """
+        self._in_flight[index] -= 1
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight[index] += 1
+                waiter.set_result(index)
+                return
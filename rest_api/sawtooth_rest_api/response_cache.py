@@ -0,0 +1,107 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+from collections import OrderedDict
+import hashlib
+import logging
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def make_etag(body):
+    """Returns a strong ETag for a rendered response body.
+    """
+    return '"{}"'.format(hashlib.sha256(body.encode()).hexdigest()[:32])
+
+
+class ResponseCache:
+    """An LRU of rendered JSON response bodies for resources which do not
+    change once committed, such as blocks, batches, transactions and
+    receipts fetched by id.
+
+    Such a resource only stops being valid if the chain switches to a fork
+    which does not include it, so each body is stored with the chain
+    generation it was fetched in, and is dropped once looked up in another
+    generation. The cache is bounded by the total size of the bodies it
+    holds.
+
+    Only used from the event loop, so it is not locked.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes (int): The total size of the bodies to keep
+        """
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """The total size of the bodies in the cache.
+        """
+        return self._size
+
+    def get(self, key, chain_generation):
+        """Returns the (body, etag) cached under the key, or None if there is
+        none for the given chain generation.
+        """
+        try:
+            generation, body, etag = self._entries[key]
+        except KeyError:
+            return None
+
+        if generation != chain_generation:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return body, etag
+
+    def put(self, key, chain_generation, body):
+        """Caches a body under the key for the given chain generation, and
+        returns its ETag. Bodies too large to ever fit are not cached.
+        """
+        etag = make_etag(body)
+
+        if key in self._entries:
+            self._remove(key)
+
+        if len(body) > self._max_bytes:
+            return etag
+
+        self._entries[key] = (chain_generation, body, etag)
+        self._size += len(body)
+
+        while self._size > self._max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+        return etag
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key):
+        _, body, _ = self._entries.pop(key)
+        self._size -= len(body)
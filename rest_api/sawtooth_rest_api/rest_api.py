@@ -32,8 +32,11 @@ from sawtooth_sdk.processor.log import log_configuration
 from sawtooth_sdk.processor.config import get_log_config
 from sawtooth_sdk.processor.config import get_log_dir
 from sawtooth_sdk.processor.config import get_config_dir
-from sawtooth_rest_api.messaging import Connection
+from sawtooth_rest_api.batch_waiter import BatchWaiter
+from sawtooth_rest_api.head_cache import HeadCache
+from sawtooth_rest_api.messaging import ConnectionPool
 from sawtooth_rest_api.route_handlers import RouteHandler
+from sawtooth_rest_api.submit_coalescer import SubmitCoalescer
 from sawtooth_rest_api.state_delta_subscription_handler \
     import StateDeltaSubscriberHandler
 from sawtooth_rest_api.config import load_default_rest_api_config
@@ -65,6 +68,28 @@ def parse_args(args):
     parser.add_argument('--client-max-size',
                         type=int,
                         help='the max size (in bytes) of a request body')
+    parser.add_argument('--connection-pool-size',
+                        type=int,
+                        help='the number of connections to open to the \
+                        validator')
+    parser.add_argument('--max-in-flight-requests',
+                        type=int,
+                        help='the number of requests each validator \
+                        connection may have waiting for a response')
+    parser.add_argument('--submit-coalesce-window',
+                        type=float,
+                        help='the time (in seconds) to hold batch \
+                        submissions to send them to the validator together, \
+                        or 0 to send each on its own')
+    parser.add_argument('--submit-coalesce-max-bytes',
+                        type=int,
+                        help='the size (in bytes) of held batch submissions \
+                        at which they are sent without waiting')
+    parser.add_argument('--compact-json',
+                        action='store_true',
+                        default=None,
+                        help='send compact rather than pretty-printed JSON \
+                        by default')
     parser.add_argument('-v', '--verbose',
                         action='count',
                         default=0,
@@ -91,7 +116,8 @@ def parse_args(args):
 
 
 def start_rest_api(host, port, connection, timeout, registry,
-                   client_max_size=None):
+                   client_max_size=None, compact_json=False,
+                   submit_coalesce_window=0, submit_coalesce_max_bytes=None):
     """Builds the web app, adds route handlers, and finally starts the app.
     """
     loop = asyncio.get_event_loop()
@@ -102,7 +128,22 @@ def start_rest_api(host, port, connection, timeout, registry,
     # Add routes to the web app
     LOGGER.info('Creating handlers for validator at %s', connection.url)
 
-    handler = RouteHandler(loop, connection, timeout, registry)
+    # Kept up to date from block-commit events by the subscriber handler
+    head_cache = HeadCache()
+    # Fed batch-status events by the subscriber handler
+    batch_waiter = BatchWaiter()
+
+    submit_coalescer = None
+    if submit_coalesce_window:
+        submit_coalescer = SubmitCoalescer(
+            loop, connection, submit_coalesce_window,
+            max_bytes=submit_coalesce_max_bytes,
+            metrics_registry=registry)
+
+    handler = RouteHandler(
+        loop, connection, timeout, registry, head_cache=head_cache,
+        compact_json=compact_json, batch_waiter=batch_waiter,
+        submit_coalescer=submit_coalescer)
 
     app.router.add_post('/batches', handler.submit_batches)
     app.router.add_get('/batch_statuses', handler.list_statuses)
@@ -128,8 +169,10 @@ def start_rest_api(host, port, connection, timeout, registry,
     app.router.add_get('/peers', handler.fetch_peers)
     app.router.add_get('/status', handler.fetch_status)
 
-    subscriber_handler = StateDeltaSubscriberHandler(connection)
+    subscriber_handler = StateDeltaSubscriberHandler(
+        connection, head_cache=head_cache, batch_waiter=batch_waiter)
     app.router.add_get('/subscriptions', subscriber_handler.subscriptions)
+    app.on_startup.append(lambda app: subscriber_handler.on_startup())
     app.on_shutdown.append(lambda app: subscriber_handler.on_shutdown())
 
     # Start app
@@ -169,6 +212,10 @@ class MetricsRegistryWrapper():
         return self._registry.timer(
             ''.join([name, ',host=', platform.node()]))
 
+    def histogram(self, name):
+        return self._registry.histogram(
+            ''.join([name, ',host=', platform.node()]))
+
 
 def main():
     loop = ZMQEventLoop()
@@ -183,15 +230,18 @@ def main():
             timeout=opts.timeout,
             opentsdb_url=opts.opentsdb_url,
             opentsdb_db=opts.opentsdb_db,
-            client_max_size=opts.client_max_size)
+            client_max_size=opts.client_max_size,
+            compact_json=opts.compact_json,
+            connection_pool_size=opts.connection_pool_size,
+            max_in_flight_requests=opts.max_in_flight_requests,
+            submit_coalesce_window=opts.submit_coalesce_window,
+            submit_coalesce_max_bytes=opts.submit_coalesce_max_bytes)
         rest_api_config = load_rest_api_config(opts_config)
-        url = None
+        validator_url = None
         if "tcp://" not in rest_api_config.connect:
-            url = "tcp://" + rest_api_config.connect
+            validator_url = "tcp://" + rest_api_config.connect
         else:
-            url = rest_api_config.connect
-
-        connection = Connection(url)
+            validator_url = rest_api_config.connect
 
         log_config = get_log_config(filename="rest_api_log_config.toml")
 
@@ -238,13 +288,24 @@ def main():
                 password=rest_api_config.opentsdb_password)
             reporter.start()
 
+        connection = ConnectionPool(
+            validator_url,
+            size=int(rest_api_config.connection_pool_size),
+            max_in_flight=int(rest_api_config.max_in_flight_requests),
+            metrics_registry=wrapped_registry)
+
         start_rest_api(
             host,
             port,
             connection,
             int(rest_api_config.timeout),
             wrapped_registry,
-            client_max_size=rest_api_config.client_max_size)
+            client_max_size=rest_api_config.client_max_size,
+            compact_json=rest_api_config.compact_json,
+            submit_coalesce_window=float(
+                rest_api_config.submit_coalesce_window),
+            submit_coalesce_max_bytes=int(
+                rest_api_config.submit_coalesce_max_bytes))
         # pylint: disable=broad-except
     except Exception as e:
         LOGGER.exception(e)
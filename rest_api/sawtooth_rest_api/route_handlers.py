@@ -29,8 +29,13 @@ from sawtooth_rest_api.protobuf.validator_pb2 import Message
 
 import sawtooth_rest_api.exceptions as errors
 import sawtooth_rest_api.error_handlers as error_handlers
+from sawtooth_rest_api.batch_waiter import BatchWaiter
+from sawtooth_rest_api.compact_json import encode_message
+from sawtooth_rest_api.head_cache import HeadCache
 from sawtooth_rest_api.messaging import DisconnectError
 from sawtooth_rest_api.messaging import SendBackoffTimeoutError
+from sawtooth_rest_api.response_cache import ResponseCache
+from sawtooth_rest_api.response_cache import make_etag
 from sawtooth_rest_api.protobuf import client_transaction_pb2
 from sawtooth_rest_api.protobuf import client_list_control_pb2
 from sawtooth_rest_api.protobuf import client_batch_submit_pb2
@@ -48,6 +53,8 @@ from sawtooth_rest_api.protobuf.transaction_pb2 import TransactionHeader
 # pylint: disable=too-many-lines
 
 DEFAULT_TIMEOUT = 300
+# The size of the chunks that compact JSON responses are streamed in
+STREAM_CHUNK_SIZE = 64 * 1024
 LOGGER = logging.getLogger(__name__)
 
 
@@ -98,14 +105,39 @@ class RouteHandler(object):
             with the validator.
         timeout (int, optional): The time in seconds before the Api should
             cancel a request and report that the validator is unavailable.
+        head_cache (:obj: head_cache.HeadCache, optional): The chain head and
+            block state roots, kept up to date from block-commit events.
+        response_cache (:obj: response_cache.ResponseCache, optional): The
+            rendered responses for blocks, batches, transactions and
+            receipts fetched by id. Only used while the chain head is known.
+        compact_json (bool, optional): Whether to send compact JSON rather
+            than pretty-printed JSON to clients which do not ask for either
+            with a format parameter in their Accept header.
+        batch_waiter (:obj: batch_waiter.BatchWaiter, optional): Resolves
+            batch status requests which wait for the batches to be committed
+            from batch-status events, while it is listening for them.
+        submit_coalescer (:obj: submit_coalescer.SubmitCoalescer, optional):
+            Merges batch submissions into fewer validator requests. If not
+            given, each submission is sent on its own.
     """
 
     def __init__(
             self, loop, connection,
-            timeout=DEFAULT_TIMEOUT, metrics_registry=None):
+            timeout=DEFAULT_TIMEOUT, metrics_registry=None, head_cache=None,
+            response_cache=None, compact_json=False, batch_waiter=None,
+            submit_coalescer=None):
         self._loop = loop
         self._connection = connection
+        self._submit_coalescer = submit_coalescer
         self._timeout = timeout
+        self._compact_json = compact_json
+        self._head_cache = \
+            head_cache if head_cache is not None else HeadCache()
+        self._response_cache = \
+            response_cache if response_cache is not None \
+            else ResponseCache()
+        self._batch_waiter = \
+            batch_waiter if batch_waiter is not None else BatchWaiter()
         if metrics_registry:
             self._post_batches_count = CounterWrapper(
                 metrics_registry.counter('post_batches_count'))
@@ -115,11 +147,17 @@ class RouteHandler(object):
                 metrics_registry.timer('post_batches_total_time'))
             self._post_batches_validator_time = TimerWrapper(
                 metrics_registry.timer('post_batches_validator_time'))
+            self._response_cache_hit_count = CounterWrapper(
+                metrics_registry.counter('response_cache_hit_count'))
+            self._response_cache_miss_count = CounterWrapper(
+                metrics_registry.counter('response_cache_miss_count'))
         else:
             self._post_batches_count = CounterWrapper()
             self._post_batches_error = CounterWrapper()
             self._post_batches_total_time = TimerWrapper()
             self._post_batches_validator_time = TimerWrapper()
+            self._response_cache_hit_count = CounterWrapper()
+            self._response_cache_miss_count = CounterWrapper()
 
     async def submit_batches(self, request):
         """Accepts a binary encoded BatchList and submits it to the validator.
@@ -229,11 +267,15 @@ class RouteHandler(object):
                 batch_ids=ids)
         self._set_wait(request, validator_query)
 
-        response = await self._query_validator(
-            Message.CLIENT_BATCH_STATUS_REQUEST,
-            client_batch_submit_pb2.ClientBatchStatusResponse,
-            validator_query,
-            error_traps)
+        if validator_query.wait and self._batch_waiter.listening:
+            response = await self._wait_for_statuses(
+                validator_query, error_traps)
+        else:
+            response = await self._query_validator(
+                Message.CLIENT_BATCH_STATUS_REQUEST,
+                client_batch_submit_pb2.ClientBatchStatusResponse,
+                validator_query,
+                error_traps)
 
         # Send response
         if request.method != 'POST':
@@ -271,11 +313,20 @@ class RouteHandler(object):
             sorting=self._get_sorting_message(request, "default"),
             paging=self._make_paging_message(paging_controls))
 
-        response = await self._query_validator(
+        response = await self._query_validator_proto(
             Message.CLIENT_STATE_LIST_REQUEST,
             client_state_pb2.ClientStateListResponse,
             validator_query)
 
+        if self._use_compact_json(request):
+            return await self._stream_paginated_response(
+                request=request,
+                response=response,
+                controls=paging_controls,
+                resources=response.entries,
+                head=head)
+
+        response = self._message_to_dict(response)
         return self._wrap_paginated_response(
             request=request,
             response=response,
@@ -337,11 +388,20 @@ class RouteHandler(object):
             sorting=self._get_sorting_message(request, "block_num"),
             paging=self._make_paging_message(paging_controls))
 
-        response = await self._query_validator(
+        response = await self._query_validator_proto(
             Message.CLIENT_BLOCK_LIST_REQUEST,
             client_block_pb2.ClientBlockListResponse,
             validator_query)
 
+        if self._use_compact_json(request):
+            return await self._stream_paginated_response(
+                request=request,
+                response=response,
+                controls=paging_controls,
+                resources=response.blocks)
+
+        response = self._message_to_dict(response)
+
         return self._wrap_paginated_response(
             request=request,
             response=response,
@@ -363,14 +423,22 @@ class RouteHandler(object):
         block_id = request.match_info.get('block_id', '')
         self._validate_id(block_id)
 
+        cache_key = ('block', block_id, self._build_url(request))
+        cached = self._get_cached_response(request, cache_key)
+        if cached is not None:
+            return cached
+        chain_generation = self._head_cache.chain_generation
+
         response = await self._query_validator(
             Message.CLIENT_BLOCK_GET_BY_ID_REQUEST,
             client_block_pb2.ClientBlockGetResponse,
             client_block_pb2.ClientBlockGetByIdRequest(block_id=block_id),
             error_traps)
 
-        return self._wrap_response(
+        return self._wrap_cached_response(
             request,
+            cache_key,
+            chain_generation,
             data=self._expand_block(response['block']),
             metadata=self._get_metadata(request, response))
 
@@ -395,11 +463,20 @@ class RouteHandler(object):
             sorting=self._get_sorting_message(request, "default"),
             paging=self._make_paging_message(paging_controls))
 
-        response = await self._query_validator(
+        response = await self._query_validator_proto(
             Message.CLIENT_BATCH_LIST_REQUEST,
             client_batch_pb2.ClientBatchListResponse,
             validator_query)
 
+        if self._use_compact_json(request):
+            return await self._stream_paginated_response(
+                request=request,
+                response=response,
+                controls=paging_controls,
+                resources=response.batches)
+
+        response = self._message_to_dict(response)
+
         return self._wrap_paginated_response(
             request=request,
             response=response,
@@ -422,14 +499,22 @@ class RouteHandler(object):
         batch_id = request.match_info.get('batch_id', '')
         self._validate_id(batch_id)
 
+        cache_key = ('batch', batch_id, self._build_url(request))
+        cached = self._get_cached_response(request, cache_key)
+        if cached is not None:
+            return cached
+        chain_generation = self._head_cache.chain_generation
+
         response = await self._query_validator(
             Message.CLIENT_BATCH_GET_REQUEST,
             client_batch_pb2.ClientBatchGetResponse,
             client_batch_pb2.ClientBatchGetRequest(batch_id=batch_id),
             error_traps)
 
-        return self._wrap_response(
+        return self._wrap_cached_response(
             request,
+            cache_key,
+            chain_generation,
             data=self._expand_batch(response['batch']),
             metadata=self._get_metadata(request, response))
 
@@ -454,11 +539,20 @@ class RouteHandler(object):
             sorting=self._get_sorting_message(request, "default"),
             paging=self._make_paging_message(paging_controls))
 
-        response = await self._query_validator(
+        response = await self._query_validator_proto(
             Message.CLIENT_TRANSACTION_LIST_REQUEST,
             client_transaction_pb2.ClientTransactionListResponse,
             validator_query)
 
+        if self._use_compact_json(request):
+            return await self._stream_paginated_response(
+                request=request,
+                response=response,
+                controls=paging_controls,
+                resources=response.transactions)
+
+        response = self._message_to_dict(response)
+
         data = [self._expand_transaction(t) for t in response['transactions']]
 
         return self._wrap_paginated_response(
@@ -483,6 +577,12 @@ class RouteHandler(object):
         txn_id = request.match_info.get('transaction_id', '')
         self._validate_id(txn_id)
 
+        cache_key = ('transaction', txn_id, self._build_url(request))
+        cached = self._get_cached_response(request, cache_key)
+        if cached is not None:
+            return cached
+        chain_generation = self._head_cache.chain_generation
+
         response = await self._query_validator(
             Message.CLIENT_TRANSACTION_GET_REQUEST,
             client_transaction_pb2.ClientTransactionGetResponse,
@@ -490,8 +590,10 @@ class RouteHandler(object):
                 transaction_id=txn_id),
             error_traps)
 
-        return self._wrap_response(
+        return self._wrap_cached_response(
             request,
+            cache_key,
+            chain_generation,
             data=self._expand_transaction(response['transaction']),
             metadata=self._get_metadata(request, response))
 
@@ -536,6 +638,17 @@ class RouteHandler(object):
                 LOGGER.debug('Request for receipts missing id query')
                 raise errors.ReceiptIdQueryInvalid()
 
+        # Receipts are only found once committed, so can be served from the
+        # response cache as long as the chain does not switch forks
+        if request.method != 'POST':
+            cache_key = ('receipts', tuple(ids), self._build_url(request))
+        else:
+            cache_key = ('receipts', tuple(ids), None)
+        cached = self._get_cached_response(request, cache_key)
+        if cached is not None:
+            return cached
+        chain_generation = self._head_cache.chain_generation
+
         # Query validator
         validator_query = \
             client_receipt_pb2.ClientReceiptGetRequest(
@@ -557,7 +670,9 @@ class RouteHandler(object):
         data = self._drop_id_prefixes(
             self._drop_empty_props(response['receipts']))
 
-        return self._wrap_response(request, data=data, metadata=metadata)
+        return self._wrap_cached_response(
+            request, cache_key, chain_generation,
+            data=data, metadata=metadata)
 
     async def fetch_peers(self, request):
         """Fetches the peers from the validator.
@@ -594,8 +709,59 @@ class RouteHandler(object):
             },
             metadata=self._get_metadata(request, response))
 
+    async def _wait_for_statuses(self, validator_query, error_traps):
+        """Waits for the batches in a batch status request to stop being
+        pending using batch-status events, rather than having the validator
+        wait. The validator is only asked for the statuses up front, and
+        again if the wait times out. If the events stop, the validator is
+        asked to wait for whatever time is left.
+        """
+        timeout = validator_query.timeout
+        validator_query.wait = False
+        validator_query.ClearField('timeout')
+
+        start = self._loop.time()
+        with self._batch_waiter.watch(validator_query.batch_ids) as watch:
+            response = await self._query_validator_proto(
+                Message.CLIENT_BATCH_STATUS_REQUEST,
+                client_batch_submit_pb2.ClientBatchStatusResponse,
+                validator_query,
+                error_traps)
+            watch.set_statuses(response.batch_statuses)
+
+            try:
+                finished = await asyncio.wait_for(watch.wait(), timeout)
+            except asyncio.TimeoutError:
+                finished = False
+
+        if finished:
+            return self._message_to_dict(
+                client_batch_submit_pb2.ClientBatchStatusResponse(
+                    status=response.status,
+                    batch_statuses=watch.statuses))
+
+        remaining = int(timeout - (self._loop.time() - start))
+        if remaining > 0:
+            validator_query.wait = True
+            validator_query.timeout = remaining
+
+        return await self._query_validator(
+            Message.CLIENT_BATCH_STATUS_REQUEST,
+            client_batch_submit_pb2.ClientBatchStatusResponse,
+            validator_query,
+            error_traps)
+
     async def _query_validator(self, request_type, response_proto,
                                payload, error_traps=None):
+        """Sends a request to the validator and parses the response into a
+        dict.
+        """
+        content = await self._query_validator_proto(
+            request_type, response_proto, payload, error_traps)
+        return self._message_to_dict(content)
+
+    async def _query_validator_proto(self, request_type, response_proto,
+                                     payload, error_traps=None):
         """Sends a request to the validator and parses the response.
         """
         LOGGER.debug(
@@ -612,14 +778,20 @@ class RouteHandler(object):
             self._get_status_name(response_proto, content.status))
 
         self._check_status_errors(response_proto, content, error_traps)
-        return self._message_to_dict(content)
+        return content
 
     async def _send_request(self, request_type, payload):
         """Uses an executor to send an asynchronous ZMQ request to the
-        validator with the handler's Connection
+        validator with the handler's Connection, or its submit coalescer for
+        batch submissions
         """
+        connection = self._connection
+        if request_type == Message.CLIENT_BATCH_SUBMIT_REQUEST \
+                and self._submit_coalescer is not None:
+            connection = self._submit_coalescer
+
         try:
-            return await self._connection.send(
+            return await connection.send(
                 message_type=request_type,
                 message_content=payload,
                 timeout=self._timeout)
@@ -634,6 +806,17 @@ class RouteHandler(object):
             raise errors.SendBackoffTimeout()
 
     async def _head_to_root(self, block_id):
+        """Returns the id and state root of the block, or of the chain head
+        if no block id is given, asking the validator only if they are not
+        cached.
+        """
+        if block_id:
+            state_root = self._head_cache.get_state_root(block_id)
+            if state_root is not None:
+                return block_id, state_root
+        elif self._head_cache.head is not None:
+            return self._head_cache.head
+
         error_traps = [error_handlers.BlockNotFoundTrap]
         if block_id:
             response = await self._query_validator(
@@ -651,6 +834,10 @@ class RouteHandler(object):
                         limit=1)),
                 error_traps)
             block = self._expand_block(response['blocks'][0])
+
+        self._head_cache.put_state_root(
+            block['header_signature'],
+            block['header']['state_root_hash'])
         return (
             block['header_signature'],
             block['header']['state_root_hash'],
@@ -712,33 +899,190 @@ class RouteHandler(object):
             for trap in error_traps:
                 trap.check(content.status)
 
-    @staticmethod
-    def _wrap_response(request, data=None, metadata=None, status=200):
+    def _wrap_response(self, request, data=None, metadata=None, status=200):
         """Creates the JSON response envelope to be sent back to the client.
         """
+        return web.Response(
+            status=status,
+            content_type='application/json',
+            text=self._render_envelope(request, data, metadata))
+
+    def _render_envelope(self, request, data=None, metadata=None):
+        """Renders the JSON response envelope as text, compact or
+        pretty-printed depending on the request.
+        """
         envelope = metadata or {}
 
         if data is not None:
             envelope['data'] = data
 
+        if self._use_compact_json(request):
+            return json.dumps(envelope, separators=(',', ':'))
+
+        return json.dumps(
+            envelope,
+            indent=2,
+            separators=(',', ': '),
+            sort_keys=True)
+
+    def _use_compact_json(self, request):
+        """Checks whether compact JSON should be sent back for a request. A
+        client can ask for it with an Accept header of
+        'application/json; format=compact', or for pretty-printed JSON with
+        'format=pretty'. Otherwise the handler's default is used.
+        """
+        for media_range in request.headers.get('Accept', '').split(','):
+            media_type, *params = media_range.split(';')
+            if media_type.strip().lower() != 'application/json':
+                continue
+
+            for param in params:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'format':
+                    value = value.strip().strip('"').lower()
+                    if value == 'compact':
+                        return True
+                    if value == 'pretty':
+                        return False
+
+        return self._compact_json
+
+    def _get_cached_response(self, request, cache_key):
+        """Returns a response for a cached resource if there is one for the
+        current chain, and otherwise None.
+        """
+        chain_generation = self._head_cache.chain_generation
+        if chain_generation is None:
+            return None
+
+        cache_key += (self._use_compact_json(request),)
+        cached = self._response_cache.get(cache_key, chain_generation)
+        if cached is None:
+            self._response_cache_miss_count.inc()
+            return None
+
+        self._response_cache_hit_count.inc()
+        body, etag = cached
+        return self._make_etag_response(request, body, etag)
+
+    def _wrap_cached_response(self, request, cache_key, chain_generation,
+                              data=None, metadata=None):
+        """Renders the JSON response envelope for a resource that does not
+        change once committed, caching it if the chain head was known when
+        the resource was fetched, and sends it back with an ETag.
+        """
+        body = self._render_envelope(request, data, metadata)
+
+        if chain_generation is not None:
+            cache_key += (self._use_compact_json(request),)
+            etag = self._response_cache.put(
+                cache_key, chain_generation, body)
+        else:
+            etag = make_etag(body)
+
+        return self._make_etag_response(request, body, etag)
+
+    @classmethod
+    def _make_etag_response(cls, request, body, etag):
+        """Sends back a rendered body with its ETag, or a 304 Not Modified if
+        the client already has it.
+        """
+        if cls._etag_matches(request, etag):
+            return web.Response(status=304, headers={'ETag': etag})
+
         return web.Response(
-            status=status,
             content_type='application/json',
-            text=json.dumps(
-                envelope,
-                indent=2,
-                separators=(',', ': '),
-                sort_keys=True))
+            text=body,
+            headers={'ETag': etag})
 
-    @classmethod
-    def _wrap_paginated_response(cls, request, response, controls, data,
+    @staticmethod
+    def _etag_matches(request, etag):
+        """Checks an ETag against the request's If-None-Match header, if any.
+        """
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is None:
+            return False
+
+        if if_none_match.strip() == '*':
+            return True
+
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+
+        return False
+
+    def _wrap_paginated_response(self, request, response, controls, data,
                                  head=None):
         """Builds the metadata for a pagingated response and wraps everying in
         a JSON encoded web.Response
         """
-        paging_response = response['paging']
         if head is None:
             head = response['head_id']
+
+        return self._wrap_response(
+            request,
+            data=data,
+            metadata=self._get_paginated_metadata(
+                request, response['paging'], controls, head))
+
+    async def _stream_paginated_response(self, request, response, controls,
+                                         resources, head=None):
+        """Streams a paginated response as compact JSON, encoding each of the
+        resources directly from its Protobuf message.
+
+        The response is sent in chunks once it grows beyond a single chunk,
+        so an invalid resource header found after that can only be reported
+        by dropping the connection.
+        """
+        if head is None:
+            head = response.head_id
+
+        metadata = self._get_paginated_metadata(
+            request, self._message_to_dict(response.paging), controls, head)
+
+        parts = [json.dumps(metadata, separators=(',', ':'))[:-1]]
+        parts.append(',"data":[')
+        size = 0
+        stream = None
+
+        for i, resource in enumerate(resources):
+            if i:
+                parts.append(',')
+            start = len(parts)
+            encode_message(resource, parts)
+            size += sum(len(part) for part in parts[start:])
+
+            if size >= STREAM_CHUNK_SIZE:
+                if stream is None:
+                    stream = web.StreamResponse()
+                    stream.content_type = 'application/json'
+                    stream.enable_chunked_encoding()
+                    await stream.prepare(request)
+
+                await stream.write(''.join(parts).encode())
+                parts = []
+                size = 0
+
+        parts.append(']}')
+
+        if stream is None:
+            return web.Response(
+                content_type='application/json',
+                text=''.join(parts))
+
+        await stream.write(''.join(parts).encode())
+        await stream.write_eof()
+        return stream
+
+    @classmethod
+    def _get_paginated_metadata(cls, request, paging_response, controls,
+                                head):
+        """Builds the head, link and paging metadata for a paginated response.
+        """
         link = cls._build_url(
             request,
             head=head,
@@ -752,14 +1096,11 @@ class RouteHandler(object):
         paging["start"] = start
         # If there are no resources, there should be nothing else in paging
         if paging_response.get("next") == "":
-            return cls._wrap_response(
-                request,
-                data=data,
-                metadata={
-                    'head': head,
-                    'link': link,
-                    'paging': paging
-                })
+            return {
+                'head': head,
+                'link': link,
+                'paging': paging
+            }
 
         next_id = paging_response['next']
         paging['next_position'] = next_id
@@ -770,14 +1111,11 @@ class RouteHandler(object):
 
         paging['next'] = build_pg_url(paging_response['next'])
 
-        return cls._wrap_response(
-            request,
-            data=data,
-            metadata={
-                'head': head,
-                'link': link,
-                'paging': paging
-            })
+        return {
+            'head': head,
+            'link': link,
+            'paging': paging
+        }
 
     @classmethod
     def _get_metadata(cls, request, response, head=None):
@@ -14,8 +14,10 @@
 # ------------------------------------------------------------------------------
 
 import asyncio
+from bisect import bisect_left
 import logging
 import json
+from operator import attrgetter
 import aiohttp
 from aiohttp import web
 
@@ -27,7 +29,10 @@ from sawtooth_rest_api.messaging import ConnectionEvent
 from sawtooth_rest_api.messaging import DisconnectError
 from sawtooth_rest_api.protobuf import client_list_control_pb2
 from sawtooth_rest_api.protobuf import client_block_pb2
+from sawtooth_rest_api.protobuf.block_pb2 import BlockHeader
 from sawtooth_rest_api.protobuf import client_event_pb2
+from sawtooth_rest_api.protobuf.client_batch_submit_pb2 \
+    import ClientBatchStatus
 from sawtooth_rest_api.protobuf import events_pb2
 from sawtooth_rest_api.protobuf import transaction_receipt_pb2
 
@@ -36,6 +41,9 @@ LOGGER = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 30
 
+BLOCK_COMMIT_EVENT_TYPE = "sawtooth/block-commit"
+BATCH_STATUS_EVENT_TYPE = "sawtooth/batch-status"
+
 
 class StateDeltaSubscriberHandler:
     """
@@ -48,20 +56,35 @@ class StateDeltaSubscriberHandler:
     own address prefix filters of interest. Subsequent websocket subscribers
     all are fed state deltas from the incoming complete stream, filtered by
     this handler according to their preferred filters.
+
+    If given a head cache, the handler also keeps it up to date with the
+    chain head from block-commit events. It then stays subscribed to
+    block-commit events while there are no websocket subscribers, and only
+    subscribes to state deltas while there are.
+
+    If given a batch waiter, the handler likewise stays subscribed to
+    batch-status events, and passes them on to the waiter.
     """
 
-    def __init__(self, connection):
+    def __init__(self, connection, head_cache=None, batch_waiter=None):
         """
         Constructs this handler on a given validator connection.
 
         Args:
             connection (messaging.Connection): the validator connection
+            head_cache (head_cache.HeadCache): the chain head cache to keep
+                up to date, if any
+            batch_waiter (batch_waiter.BatchWaiter): the waiter to pass
+                batch statuses to, if any
         """
         self._connection = connection
+        self._head_cache = head_cache
+        self._batch_waiter = batch_waiter
 
         self._latest_state_delta_event = None
         self._subscribers = []
         self._subscriber_lock = asyncio.Lock()
+        self._register_lock = asyncio.Lock()
         self._delta_task = None
         self._listening = False
         self._accepting = True
@@ -73,14 +96,23 @@ class StateDeltaSubscriberHandler:
             ConnectionEvent.RECONNECTED,
             self._handle_reconnection)
 
+    async def on_startup(self):
+        """
+        Subscribes to block-commit events, if there is a head cache or batch
+        waiter to keep up to date.
+        """
+        if self._stays_subscribed():
+            asyncio.ensure_future(
+                self._register_subscriptions(state_deltas=False))
+
     async def on_shutdown(self):
         """
         Cleans up any outstanding subscriptions.
         """
-        await self._unregister_subscriptions()
-
         self._accepting = False
 
+        await self._unregister_subscriptions()
+
         for (ws, _) in self._subscribers:
             await ws.close(code=aiohttp.WSCloseCode.GOING_AWAY,
                            message='Server shutdown')
@@ -139,7 +171,7 @@ class StateDeltaSubscriberHandler:
 
     async def _handle_subscribe(self, web_sock, subscription_message):
         if not self._subscribers:
-            await self._register_subscriptions()
+            await self._register_subscriptions(state_deltas=True)
 
         LOGGER.debug('Sending initial most recent event to new subscriber')
 
@@ -153,8 +185,7 @@ class StateDeltaSubscriberHandler:
                 'block_id': event.block_id,
                 'block_num': event.block_num,
                 'previous_block_id': event.previous_block_id,
-                'state_changes': self._client_deltas(
-                    event.state_changes, addr_prefixes)
+                'state_changes': event.client_deltas(addr_prefixes)
             }))
 
     async def _handle_unsubscribe(self, web_sock):
@@ -174,6 +205,11 @@ class StateDeltaSubscriberHandler:
 
     async def _handle_disconnect(self):
         LOGGER.debug('Validator disconnected')
+        if self._head_cache is not None:
+            self._head_cache.clear_head()
+        if self._batch_waiter is not None:
+            self._batch_waiter.stop_listening()
+
         for (ws, _) in self._subscribers:
             await ws.send_str(json.dumps({
                 'warning': 'Validator unavailable'
@@ -186,16 +222,28 @@ class StateDeltaSubscriberHandler:
         try:
             await self._unregister_subscriptions()
             if self._subscribers:
-                await self._register_subscriptions()
+                await self._register_subscriptions(state_deltas=True)
+            elif self._stays_subscribed() and not self._listening:
+                await self._register_subscriptions(state_deltas=False)
         except DisconnectError:
             LOGGER.debug('Validator is not yet available')
             return
 
-    async def _register_subscriptions(self):
+    async def _register_subscriptions(self, state_deltas):
+        with await self._register_lock:
+            # A subscriber may have arrived since block-commit events alone
+            # were asked for
+            if not state_deltas and self._subscribers:
+                return
+
+            await self._subscribe(state_deltas)
+
+    async def _subscribe(self, state_deltas):
         try:
             last_known_block_id = await self._get_latest_block_id()
-            self._latest_state_delta_event = \
-                await self._get_block_deltas(last_known_block_id)
+            if state_deltas:
+                self._latest_state_delta_event = \
+                    await self._get_block_deltas(last_known_block_id)
 
             LOGGER.debug('Starting subscriber from %s',
                          last_known_block_id[:8])
@@ -203,7 +251,9 @@ class StateDeltaSubscriberHandler:
             resp = await self._connection.send(
                 Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
                 client_event_pb2.ClientEventsSubscribeRequest(
-                    subscriptions=self._make_subscriptions(),
+                    subscriptions=self._make_subscriptions(
+                        state_deltas=state_deltas,
+                        batch_statuses=self._batch_waiter is not None),
                     last_known_block_ids=[last_known_block_id],
                 ).SerializeToString())
 
@@ -214,9 +264,15 @@ class StateDeltaSubscriberHandler:
             if subscription.status != \
                     client_event_pb2.ClientEventsSubscribeResponse.OK:
                 LOGGER.error('unable to subscribe!')
-
-            self._listening = True
-            self._delta_task = asyncio.ensure_future(self._listen_for_events())
+            elif self._batch_waiter is not None:
+                self._batch_waiter.start_listening()
+
+            # Changing the subscription keeps the events coming to the task
+            # already listening for them
+            if not self._listening:
+                self._listening = True
+                self._delta_task = \
+                    asyncio.ensure_future(self._listen_for_events())
         except asyncio.TimeoutError as e:
             LOGGER.error('Unable to subscribe to events: %s', str(e))
         except DisconnectError:
@@ -225,8 +281,17 @@ class StateDeltaSubscriberHandler:
 
     async def _unregister_subscriptions(self):
         with await self._subscriber_lock:
-            if self._delta_task and not self._subscribers:
+            # Keep following block commits for the head cache, but without
+            # the state deltas
+            if self._delta_task and not self._subscribers and \
+                    self._stays_subscribed() and self._accepting:
+                asyncio.ensure_future(
+                    self._register_subscriptions(state_deltas=False))
+
+            elif self._delta_task and not self._subscribers:
                 self._listening = False
+                if self._batch_waiter is not None:
+                    self._batch_waiter.stop_listening()
                 self._delta_task.cancel()
                 self._delta_task = None
 
@@ -256,8 +321,7 @@ class StateDeltaSubscriberHandler:
             'block_id': event.block_id,
             'block_num': event.block_num,
             'previous_block_id': event.previous_block_id,
-            'state_changes': self._client_deltas(
-                event.state_changes, addr_prefixes)
+            'state_changes': event.client_deltas(addr_prefixes)
         }))
 
     async def _get_block_deltas(self, block_id):
@@ -295,6 +359,12 @@ class StateDeltaSubscriberHandler:
            client_block_pb2.ClientBlockListResponse.OK:
             LOGGER.error('Unable to fetch latest block id')
 
+        elif self._head_cache is not None and block_list_resp.blocks:
+            header = BlockHeader()
+            header.ParseFromString(block_list_resp.blocks[0].header)
+            self._head_cache.set_head(
+                block_list_resp.head_id, header.state_root_hash)
+
         return block_list_resp.head_id
 
     async def _listen_for_events(self):
@@ -311,10 +381,25 @@ class StateDeltaSubscriberHandler:
                 event_list = events_pb2.EventList()
                 event_list.ParseFromString(msg.content)
                 events = list(event_list.events)
+                self._update_batch_waiter(events)
+
+                # Batch statuses are sent apart from the events of blocks
+                if not any(event.event_type == BLOCK_COMMIT_EVENT_TYPE
+                           for event in events):
+                    continue
+
+                self._update_head_cache(events)
+
+                # Only block commits are subscribed to while there are no
+                # subscribers for the state deltas
+                if not self._subscribers:
+                    continue
+
                 try:
                     state_delta_event = StateDeltaEvent(events)
                 except KeyError as err:
                     LOGGER.warning("Received unexpected event list: %s", err)
+                    continue
 
                 LOGGER.debug('Received event %s: %s changes',
                              state_delta_event.block_id[:8],
@@ -334,8 +419,8 @@ class StateDeltaSubscriberHandler:
                 LOGGER.debug('Updating %s subscribers', len(self._subscribers))
 
                 for (web_sock, addr_prefixes) in self._subscribers:
-                    base_event['state_changes'] = self._client_deltas(
-                        state_delta_event.state_changes, addr_prefixes)
+                    base_event['state_changes'] = \
+                        state_delta_event.client_deltas(addr_prefixes)
                     try:
                         await web_sock.send_str(json.dumps(base_event))
                     except asyncio.CancelledError:
@@ -343,30 +428,52 @@ class StateDeltaSubscriberHandler:
 
                 self._latest_state_delta_event = state_delta_event
 
-    @staticmethod
-    def _client_deltas(state_changes, addr_prefixes):
-        return [_message_to_dict(change)
-                for change in state_changes
-                if StateDeltaSubscriberHandler._matches_prefixes(
-                    change, addr_prefixes)]
+    def _stays_subscribed(self):
+        """Whether to keep subscribed to events while there are no
+        websocket subscribers.
+        """
+        return self._head_cache is not None or self._batch_waiter is not None
 
-    @staticmethod
-    def _matches_prefixes(state_change, addr_prefixes):
-        if not addr_prefixes:
-            return True
+    def _update_batch_waiter(self, events):
+        if self._batch_waiter is None:
+            return
 
-        for prefix in addr_prefixes:
-            if state_change.address.startswith(prefix):
-                return True
+        for event in events:
+            if event.event_type == BATCH_STATUS_EVENT_TYPE:
+                batch_status = ClientBatchStatus()
+                batch_status.ParseFromString(event.data)
+                self._batch_waiter.notify(batch_status)
 
-        return False
+    def _update_head_cache(self, events):
+        if self._head_cache is None:
+            return
+
+        try:
+            block_commit = \
+                StateDeltaEvent.get_event(BLOCK_COMMIT_EVENT_TYPE, events)
+            self._head_cache.set_head(
+                StateDeltaEvent.get_attr(block_commit, "block_id"),
+                StateDeltaEvent.get_attr(block_commit, "state_root_hash"),
+                StateDeltaEvent.get_attr(block_commit, "previous_block_id"))
+        except KeyError as err:
+            LOGGER.warning("Received unexpected event list: %s", err)
 
     @staticmethod
-    def _make_subscriptions(address_prefixes=None):
-        return [
-            events_pb2.EventSubscription(event_type="sawtooth/state-delta"),
-            events_pb2.EventSubscription(event_type="sawtooth/block-commit"),
+    def _make_subscriptions(address_prefixes=None, state_deltas=True,
+                            batch_statuses=False):
+        subscriptions = [
+            events_pb2.EventSubscription(event_type=BLOCK_COMMIT_EVENT_TYPE),
         ]
+        if state_deltas:
+            subscriptions.insert(
+                0,
+                events_pb2.EventSubscription(
+                    event_type="sawtooth/state-delta"))
+        if batch_statuses:
+            subscriptions.append(
+                events_pb2.EventSubscription(
+                    event_type=BATCH_STATUS_EVENT_TYPE))
+        return subscriptions
 
     @staticmethod
     def _make_state_delta_event(event_list):
@@ -386,19 +493,62 @@ class StateDeltaEvent:
                 An event was missing from the event list or an attribute was
                 missing from an event.
         """
-        block_commit = self._get_event("sawtooth/block-commit", event_list)
-        self.block_id = self._get_attr(block_commit, "block_id")
-        self.block_num = self._get_attr(block_commit, "block_num")
-        self.previous_block_id = self._get_attr(
+        block_commit = self.get_event("sawtooth/block-commit", event_list)
+        self.block_id = self.get_attr(block_commit, "block_id")
+        self.block_num = self.get_attr(block_commit, "block_num")
+        self.previous_block_id = self.get_attr(
             block_commit, "previous_block_id")
 
-        state_delta = self._get_event("sawtooth/state-delta", event_list)
+        state_delta = self.get_event("sawtooth/state-delta", event_list)
         state_change_list = transaction_receipt_pb2.StateChangeList()
         state_change_list.ParseFromString(state_delta.data)
-        self.state_changes = state_change_list.state_changes
+
+        # Sorted by address, the changes under a prefix are next to each
+        # other and can be found without testing every change
+        self.state_changes = sorted(
+            state_change_list.state_changes, key=attrgetter('address'))
+        self._addresses = [change.address for change in self.state_changes]
+        self._dicts = [None] * len(self.state_changes)
+        self._client_deltas = {}
+
+    def client_deltas(self, addr_prefixes):
+        """Returns the state changes under any of the address prefixes, or
+        all of them if there are none, as dicts ready to be sent to a
+        client. Subscribers with the same prefixes share the result.
+        """
+        key = tuple(sorted(set(addr_prefixes or [''])))
+        deltas = self._client_deltas.get(key)
+        if deltas is None:
+            deltas = [
+                self._to_dict(index)
+                for start, end in self._prefix_ranges(key)
+                for index in range(start, end)
+            ]
+            self._client_deltas[key] = deltas
+        return deltas
+
+    def _prefix_ranges(self, sorted_prefixes):
+        covering = None
+        for prefix in sorted_prefixes:
+            # A prefix that starts with another covers no more changes
+            if covering is not None and prefix.startswith(covering):
+                continue
+            covering = prefix
+
+            start = bisect_left(self._addresses, prefix)
+            end = start
+            while end < len(self._addresses) and \
+                    self._addresses[end].startswith(prefix):
+                end += 1
+            yield start, end
+
+    def _to_dict(self, index):
+        if self._dicts[index] is None:
+            self._dicts[index] = _message_to_dict(self.state_changes[index])
+        return self._dicts[index]
 
     @staticmethod
-    def _get_attr(event, key):
+    def get_attr(event, key):
         attrs = list(filter(
             lambda attr: attr.key == key,
             event.attributes))
@@ -407,7 +557,7 @@ class StateDeltaEvent:
         raise KeyError("Key '%s' not found in event attributes" % key)
 
     @staticmethod
-    def _get_event(event_type, event_list):
+    def get_event(event_type, event_list):
         events = list(filter(
             lambda event: event.event_type == event_type,
             event_list,
@@ -0,0 +1,198 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+
+# pylint: disable=no-name-in-module,import-error
+# needed for the google.protobuf imports to pass pylint
+from google.protobuf.message import DecodeError
+
+from sawtooth_rest_api.protobuf.validator_pb2 import Message
+from sawtooth_rest_api.protobuf.client_batch_submit_pb2 \
+    import ClientBatchSubmitResponse
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+
+class _Submission:
+    def __init__(self, content, future, timer_ctx):
+        self.content = content
+        self.future = future
+        self.timer_ctx = timer_ctx
+
+
+class SubmitCoalescer:
+    """Merges batch submissions sent within a short window of each other
+    into a single ClientBatchSubmitRequest, and passes the validator's
+    response back to each submitter. It may be used in place of a Connection
+    for sending ClientBatchSubmitRequests.
+
+    The requests are merged without being parsed, as concatenating
+    serialized Protobuf messages merges them, appending their batches.
+
+    The validator rejects a whole request if any batch in it is invalid, so
+    when a merged request is rejected as invalid, each submission in it is
+    sent again on its own to find out which were at fault. Any other
+    response, or error, is the same for every submission.
+    """
+
+    def __init__(self, loop, connection, window,
+                 max_bytes=DEFAULT_MAX_BYTES, metrics_registry=None):
+        """
+        Args:
+            loop (asyncio.AbstractEventLoop): The event loop to run on
+            connection (messaging.Connection): The validator connection
+            window (float): The time in seconds to hold the first submission
+                of a merged request for others to join it
+            max_bytes (int): The size of submissions at which a merged
+                request is sent without waiting for the window to end
+            metrics_registry (MetricsRegistry): Where to record the sizes of
+                merged requests, and how long submissions were held, if
+                anywhere
+        """
+        self._loop = loop
+        self._connection = connection
+        self._window = window
+        self._max_bytes = max_bytes
+
+        self._pending = []
+        self._pending_bytes = 0
+        self._flush_handle = None
+
+        if metrics_registry:
+            self._coalesced_submissions = metrics_registry.histogram(
+                'submit_coalesced_submissions')
+            self._coalesced_bytes = metrics_registry.histogram(
+                'submit_coalesced_bytes')
+            self._coalesce_split_count = metrics_registry.counter(
+                'submit_coalesce_split_count')
+            self._coalesce_delay = metrics_registry.timer(
+                'submit_coalesce_delay')
+        else:
+            self._coalesced_submissions = None
+            self._coalesced_bytes = None
+            self._coalesce_split_count = None
+            self._coalesce_delay = None
+
+    async def send(self, message_type, message_content, timeout=None):
+        """Queues a ClientBatchSubmitRequest to be sent to the validator as
+        part of a merged request, and returns the validator's response to it.
+
+        Raises:
+            DisconnectError, asyncio.TimeoutError, SendBackoffTimeoutError:
+                As for Connection.send
+        """
+        if message_type != Message.CLIENT_BATCH_SUBMIT_REQUEST:
+            raise ValueError(
+                'Only batch submit requests can be coalesced, not {}'.format(
+                    Message.MessageType.Name(message_type)))
+
+        timer_ctx = self._coalesce_delay.time() \
+            if self._coalesce_delay is not None else None
+        submission = _Submission(
+            message_content, self._loop.create_future(), timer_ctx)
+
+        self._pending.append(submission)
+        self._pending_bytes += len(message_content)
+
+        if self._pending_bytes >= self._max_bytes:
+            self._flush(timeout)
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(
+                self._window, self._flush, timeout)
+
+        return await submission.future
+
+    def _flush(self, timeout):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        # Submissions given up on while held are not sent at all
+        submissions = [s for s in self._pending if not s.future.done()]
+        self._pending = []
+        self._pending_bytes = 0
+
+        for submission in submissions:
+            if submission.timer_ctx is not None:
+                submission.timer_ctx.stop()
+
+        if submissions:
+            asyncio.ensure_future(
+                self._send_merged(submissions, timeout), loop=self._loop)
+
+    async def _send_merged(self, submissions, timeout):
+        content = b''.join(s.content for s in submissions)
+
+        if self._coalesced_submissions is not None:
+            self._coalesced_submissions.add(len(submissions))
+            self._coalesced_bytes.add(len(content))
+
+        try:
+            response = await self._connection.send(
+                message_type=Message.CLIENT_BATCH_SUBMIT_REQUEST,
+                message_content=content,
+                timeout=timeout)
+        except Exception as err:  # pylint: disable=broad-except
+            for submission in submissions:
+                _set_exception(submission.future, err)
+            return
+
+        if len(submissions) > 1 and _is_invalid_batch(response):
+            LOGGER.debug(
+                'Merged submission of %s requests had an invalid batch, '
+                'sending each alone', len(submissions))
+            if self._coalesce_split_count is not None:
+                self._coalesce_split_count.inc()
+            await asyncio.gather(
+                *[self._send_alone(s, timeout) for s in submissions])
+            return
+
+        for submission in submissions:
+            _set_result(submission.future, response)
+
+    async def _send_alone(self, submission, timeout):
+        try:
+            response = await self._connection.send(
+                message_type=Message.CLIENT_BATCH_SUBMIT_REQUEST,
+                message_content=submission.content,
+                timeout=timeout)
+        except Exception as err:  # pylint: disable=broad-except
+            _set_exception(submission.future, err)
+        else:
+            _set_result(submission.future, response)
+
+
+def _is_invalid_batch(response):
+    content = ClientBatchSubmitResponse()
+    try:
+        content.ParseFromString(response.content)
+    except DecodeError:
+        return False
+    return content.status == ClientBatchSubmitResponse.INVALID_BATCH
+
+
+def _set_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, err):
+    if not future.done():
+        future.set_exception(err)
@@ -13,10 +13,15 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+from unittest.mock import patch
+
 from aiohttp.test_utils import unittest_run_loop
 from components import Mocks, BaseApiTest
+from components import TEST_TIMEOUT
 from sawtooth_rest_api.protobuf.validator_pb2 import Message
 from sawtooth_rest_api.protobuf import client_block_pb2
+from sawtooth_rest_api.head_cache import HeadCache
+from sawtooth_rest_api.route_handlers import RouteHandler
 
 
 ID_A = 'a' * 128
@@ -319,6 +324,73 @@ class BlockListTests(BaseApiTest):
         self.assert_has_valid_data_list(response, 1)
         self.assert_blocks_well_formed(response['data'], ID_C)
 
+    @unittest_run_loop
+    async def test_block_list_compact(self):
+        """Verifies a GET /blocks asking for compact JSON sends back the same
+        data as a pretty-printed response, without the whitespace.
+
+        It will receive Protobuf responses with:
+            - a head id of ID_D
+            - a paging response with a next of '0x0002', start of
+              0x0003 and limit of 1
+            - two blocks with ids ID_C and ID_B
+
+        It should send back JSON responses with:
+            - a response status of 200
+            - identical content, only the first of which is indented
+        """
+        paging = Mocks.make_paging_response('0x0002', "0x0003", 1)
+        blocks = Mocks.make_blocks(ID_C, ID_B)
+        for _ in range(2):
+            self.connection.preset_response(
+                head_id=ID_D, paging=paging, blocks=blocks)
+
+        pretty = await self.client.get('/blocks?start=0x0003&limit=1')
+        compact = await self.client.get(
+            '/blocks?start=0x0003&limit=1',
+            headers={'Accept': 'application/json; format=compact'})
+        self.assertEqual(200, compact.status)
+
+        self.assertIn('\n  ', await pretty.text())
+        self.assertNotIn('\n', await compact.text())
+        self.assertEqual(await pretty.json(), await compact.json())
+        self.assert_blocks_well_formed(
+            (await compact.json())['data'], ID_C, ID_B)
+
+    @unittest_run_loop
+    async def test_block_list_compact_streamed(self):
+        """Verifies a GET /blocks asking for compact JSON is streamed in
+        chunks once it is larger than a chunk.
+
+        It will receive a Protobuf response with:
+            - a head id of ID_C
+            - three blocks with ids ID_C, ID_B, and ID_A
+
+        It should send back a chunked JSON response with:
+            - a response status of 200
+            - a head property of ID_C
+            - a data property that is a list of 3 dicts
+            - and those dicts are full blocks with ids ID_C, ID_B, and ID_A
+        """
+        paging = Mocks.make_paging_response("", ID_C, DEFAULT_LIMIT)
+        blocks = Mocks.make_blocks(ID_C, ID_B, ID_A)
+        self.connection.preset_response(
+            head_id=ID_C, paging=paging, blocks=blocks)
+
+        with patch('sawtooth_rest_api.route_handlers.STREAM_CHUNK_SIZE', 1):
+            request = await self.client.get(
+                '/blocks',
+                headers={'Accept': 'application/json; format=compact'})
+
+        self.assertEqual(200, request.status)
+        self.assertEqual('chunked', request.headers['Transfer-Encoding'])
+
+        response = await request.json()
+        self.assert_has_valid_head(response, ID_C)
+        self.assert_has_valid_paging(response, paging)
+        self.assert_has_valid_data_list(response, 3)
+        self.assert_blocks_well_formed(response['data'], ID_C, ID_B, ID_A)
+
     @unittest_run_loop
     async def test_block_list_with_zero_limit(self):
         """Verifies a GET /blocks with a limit of zero breaks properly.
@@ -573,3 +645,93 @@ class BlockGetTests(BaseApiTest):
         response = await self.get_assert_status('/blocks/{}'.format(ID_D), 404)
 
         self.assert_has_valid_error(response, 70)
+
+
+class BlockGetCacheTests(BaseApiTest):
+    async def get_application(self):
+        self.set_status_and_connection(
+            Message.CLIENT_BLOCK_GET_BY_ID_REQUEST,
+            client_block_pb2.ClientBlockGetByIdRequest,
+            client_block_pb2.ClientBlockGetResponse)
+
+        self.head_cache = HeadCache()
+        self.head_cache.set_head(ID_C, 'beef')
+        handlers = RouteHandler(
+            self.loop, self.connection, TEST_TIMEOUT,
+            head_cache=self.head_cache)
+        return self.build_app(
+            self.loop, '/blocks/{block_id}', handlers.fetch_block)
+
+    @unittest_run_loop
+    async def test_block_get_cached(self):
+        """Verifies a repeated GET /blocks/{block_id} is served from the
+        response cache while the chain does not switch forks.
+
+        It will receive a Protobuf response with:
+            - a block with an id of ID_B, for the first request only
+
+        It should send back JSON responses with:
+            - a response status of 200
+            - the same ETag header
+            - a data property that is a full block with an id of ID_B
+        """
+        self.connection.preset_response(block=Mocks.make_blocks(ID_B)[0])
+
+        first = await self.client.get('/blocks/{}'.format(ID_B))
+        self.assertEqual(200, first.status)
+        self.connection.assert_valid_request_sent(block_id=ID_B)
+
+        self.head_cache.set_head(ID_D, 'f00d', previous_block_id=ID_C)
+        second = await self.client.get('/blocks/{}'.format(ID_B))
+        self.assertEqual(200, second.status)
+
+        self.assertIn('ETag', first.headers)
+        self.assertEqual(first.headers['ETag'], second.headers['ETag'])
+        self.assertEqual(await first.text(), await second.text())
+        self.assert_blocks_well_formed((await second.json())['data'], ID_B)
+
+    @unittest_run_loop
+    async def test_block_get_not_modified(self):
+        """Verifies a GET /blocks/{block_id} with an If-None-Match header
+        matching the block's ETag is answered with a 304.
+
+        It will receive a Protobuf response with:
+            - a block with an id of ID_B, for the first request only
+
+        It should send back a response with:
+            - a response status of 304
+            - the block's ETag header
+        """
+        self.connection.preset_response(block=Mocks.make_blocks(ID_B)[0])
+
+        first = await self.client.get('/blocks/{}'.format(ID_B))
+        etag = first.headers['ETag']
+
+        second = await self.client.get(
+            '/blocks/{}'.format(ID_B),
+            headers={'If-None-Match': 'W/"other", {}'.format(etag)})
+        self.assertEqual(304, second.status)
+        self.assertEqual(etag, second.headers['ETag'])
+
+    @unittest_run_loop
+    async def test_block_get_after_fork_switch(self):
+        """Verifies a GET /blocks/{block_id} is fetched from the validator
+        again after the chain switches forks.
+
+        It will receive Protobuf responses with:
+            - a block with an id of ID_B
+            - a status of NO_RESOURCE, after the fork switch
+
+        It should send back JSON responses with:
+            - a response status of 200, then 404
+        """
+        self.connection.preset_response(self.status.NO_RESOURCE)
+        self.connection.preset_response(block=Mocks.make_blocks(ID_B)[0])
+
+        await self.get_assert_200('/blocks/{}'.format(ID_B))
+
+        self.head_cache.set_head(ID_D, 'f00d', previous_block_id=ID_A)
+        response = await self.get_assert_status('/blocks/{}'.format(ID_B), 404)
+        self.connection.assert_valid_request_sent(block_id=ID_B)
+
+        self.assert_has_valid_error(response, 70)
@@ -69,6 +69,16 @@ class TestRestApiConfig(unittest.TestCase):
                 fd.write('opentsdb_username = "name"')
                 fd.write(os.linesep)
                 fd.write('opentsdb_password = "secret"')
+                fd.write(os.linesep)
+                fd.write('compact_json = true')
+                fd.write(os.linesep)
+                fd.write('connection_pool_size = 8')
+                fd.write(os.linesep)
+                fd.write('max_in_flight_requests = 16')
+                fd.write(os.linesep)
+                fd.write('submit_coalesce_window = 0.005')
+                fd.write(os.linesep)
+                fd.write('submit_coalesce_max_bytes = 65536')
 
             config = load_toml_rest_api_config(filename)
             self.assertEqual(config.bind, ["test:1234"])
@@ -78,6 +88,11 @@ class TestRestApiConfig(unittest.TestCase):
             self.assertEqual(config.opentsdb_url, "http://data_base:0000")
             self.assertEqual(config.opentsdb_username, "name")
             self.assertEqual(config.opentsdb_password, "secret")
+            self.assertEqual(config.compact_json, True)
+            self.assertEqual(config.connection_pool_size, 8)
+            self.assertEqual(config.max_in_flight_requests, 16)
+            self.assertEqual(config.submit_coalesce_window, 0.005)
+            self.assertEqual(config.submit_coalesce_max_bytes, 65536)
 
         finally:
             os.environ.clear()
@@ -0,0 +1,234 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from sawtooth_rest_api.messaging import ConnectionPool
+from sawtooth_rest_api.messaging import DisconnectError
+from sawtooth_rest_api.protobuf.validator_pb2 import Message
+
+
+class _MockConnection:
+    """Replaces a Connection in the pool, holding each message sent until
+    the test replies to it.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.sent = []
+        self._replies = {}
+        self.closed = False
+
+    async def send(self, message_type, message_content, timeout=None):
+        reply = asyncio.Future()
+        self.sent.append(message_content)
+        self._replies[message_content] = reply
+        return await reply
+
+    def reply(self, message_content):
+        self._replies.pop(message_content).set_result(
+            Message(content=message_content))
+
+    def close(self):
+        self.closed = True
+        for reply in self._replies.values():
+            reply.set_exception(DisconnectError())
+        self._replies.clear()
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+
+        patcher = patch(
+            'sawtooth_rest_api.messaging.Connection',
+            side_effect=_MockConnection)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def _send(self, pool, content, timeout=None):
+        return asyncio.ensure_future(
+            pool.send(Message.CLIENT_BLOCK_LIST_REQUEST, content, timeout),
+            loop=self.loop)
+
+    def _run(self):
+        """Lets every task run until it is waiting on a reply or connection.
+        """
+        for _ in range(10):
+            self.loop.run_until_complete(asyncio.sleep(0))
+
+    def test_least_outstanding(self):
+        """Verifies that each message is sent over the connection with the
+        fewest replies outstanding, and that event subscriptions are always
+        sent over the first connection.
+        """
+        pool = ConnectionPool('tcp://validator:4004', size=3)
+        connections = pool._connections
+
+        tasks = [self._send(pool, content) for content in (b'a', b'b', b'c')]
+        self._run()
+        self.assertEqual(
+            [[b'a'], [b'b'], [b'c']], [c.sent for c in connections])
+
+        connections[1].reply(b'b')
+        self._run()
+        self.assertEqual(b'b', tasks[1].result().content)
+        self.assertEqual([1, 0, 1], pool._in_flight)
+
+        tasks.append(self._send(pool, b'd'))
+        self._run()
+        self.assertEqual([b'b', b'd'], connections[1].sent)
+
+        tasks.append(asyncio.ensure_future(
+            pool.send(Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST, b'e'),
+            loop=self.loop))
+        self._run()
+        self.assertEqual([b'a', b'e'], connections[0].sent)
+        self.assertEqual([1, 1, 1], pool._in_flight)
+
+        for connection, content in zip(
+                connections * 2, [b'a', b'd', b'c', b'e']):
+            connection.reply(content)
+        self._run()
+        self.assertTrue(all(task.done() for task in tasks))
+        self.assertEqual([0, 0, 0], pool._in_flight)
+
+    def test_max_in_flight(self):
+        """Verifies that once every connection has as many replies
+        outstanding as it may, messages wait, and are sent in the order they
+        were sent to the pool as replies come back.
+        """
+        pool = ConnectionPool(
+            'tcp://validator:4004', size=2, max_in_flight=1)
+        connections = pool._connections
+
+        tasks = [self._send(pool, content)
+                 for content in (b'a', b'b', b'c', b'd', b'e')]
+        self._run()
+        self.assertEqual([[b'a'], [b'b']], [c.sent for c in connections])
+        self.assertEqual(3, len(pool._waiters))
+
+        connections[1].reply(b'b')
+        self._run()
+        self.assertEqual([b'b', b'c'], connections[1].sent)
+
+        connections[0].reply(b'a')
+        self._run()
+        self.assertEqual([b'a', b'd'], connections[0].sent)
+
+        connections[1].reply(b'c')
+        self._run()
+        self.assertEqual([b'b', b'c', b'e'], connections[1].sent)
+        self.assertEqual([1, 1], pool._in_flight)
+
+        connections[0].reply(b'd')
+        connections[1].reply(b'e')
+        self._run()
+        self.assertEqual(
+            [b'a', b'b', b'c', b'd', b'e'],
+            [task.result().content for task in tasks])
+        self.assertEqual([0, 0], pool._in_flight)
+        self.assertFalse(pool._waiters)
+
+    def test_queued_timeout_and_cancel(self):
+        """Verifies that a message which times out or is cancelled while
+        waiting for a connection is never sent, and that the next message
+        waiting is sent in its place.
+        """
+        pool = ConnectionPool('tcp://validator:4004', max_in_flight=1)
+        connection = pool._connections[0]
+
+        first = self._send(pool, b'a')
+        timed_out = self._send(pool, b'b', timeout=0.01)
+        cancelled = self._send(pool, b'c')
+        waiting = self._send(pool, b'd')
+        self._run()
+        self.assertEqual(3, len(pool._waiters))
+
+        cancelled.cancel()
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(timed_out)
+        self._run()
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(1, len(pool._waiters))
+
+        connection.reply(b'a')
+        self._run()
+        self.assertEqual(b'a', first.result().content)
+        self.assertEqual([b'a', b'd'], connection.sent)
+
+        connection.reply(b'd')
+        self._run()
+        self.assertEqual(b'd', waiting.result().content)
+        self.assertEqual([0], pool._in_flight)
+
+    def test_cancel_after_hand_off(self):
+        """Verifies that a connection handed to a waiting message which is
+        cancelled before it can be sent is handed on to the next message
+        waiting, rather than staying counted as in flight.
+        """
+        pool = ConnectionPool('tcp://validator:4004', max_in_flight=1)
+        connection = pool._connections[0]
+
+        first = self._send(pool, b'a')
+        cancelled = self._send(pool, b'b')
+        waiting = self._send(pool, b'c')
+        self._run()
+
+        # Cancel the waiting message just as the connection is handed to it
+        release = pool._release
+
+        def cancel_and_release(index):
+            pool._release = release
+            cancelled.cancel()
+            release(index)
+
+        pool._release = cancel_and_release
+
+        connection.reply(b'a')
+        self._run()
+        self.assertEqual(b'a', first.result().content)
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual([b'a', b'c'], connection.sent)
+        self.assertFalse(pool._waiters)
+
+        connection.reply(b'c')
+        self._run()
+        self.assertEqual(b'c', waiting.result().content)
+        self.assertEqual([0], pool._in_flight)
+
+    def test_close(self):
+        """Verifies that closing the pool closes each connection, and fails
+        the messages waiting for a connection as well as those sent.
+        """
+        pool = ConnectionPool(
+            'tcp://validator:4004', size=2, max_in_flight=1)
+
+        tasks = [self._send(pool, content) for content in (b'a', b'b', b'c')]
+        self._run()
+
+        pool.close()
+        self._run()
+
+        self.assertTrue(all(c.closed for c in pool._connections))
+        for task in tasks:
+            with self.assertRaises(DisconnectError):
+                task.result()
+        self.assertFalse(pool._waiters)
+        self.assertEqual([0, 0], pool._in_flight)
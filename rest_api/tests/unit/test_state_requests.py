@@ -18,6 +18,9 @@ from base64 import b64decode
 from aiohttp.test_utils import unittest_run_loop
 
 from components import Mocks, BaseApiTest
+from components import TEST_TIMEOUT
+from sawtooth_rest_api.head_cache import HeadCache
+from sawtooth_rest_api.route_handlers import RouteHandler
 from sawtooth_rest_api.protobuf.validator_pb2 import Message
 from sawtooth_rest_api.protobuf import client_state_pb2
 from sawtooth_rest_api.protobuf import client_block_pb2
@@ -754,3 +757,82 @@ class StateGetTests(BaseApiTest):
             '/state/b?head={}'.format(ID_D), 404)
 
         self.assert_has_valid_error(response, 50)
+
+
+class StateHeadCacheTests(BaseApiTest):
+
+    async def get_application(self):
+        self.set_status_and_connection(
+            Message.CLIENT_STATE_GET_REQUEST,
+            client_state_pb2.ClientStateGetRequest,
+            client_state_pb2.ClientStateGetResponse)
+
+        self.head_cache = HeadCache()
+        handlers = RouteHandler(
+            self.loop, self.connection, TEST_TIMEOUT,
+            head_cache=self.head_cache)
+        return self.build_app(
+            self.loop, '/state/{address}', handlers.fetch_state)
+
+    @unittest_run_loop
+    async def test_state_get_with_cached_head(self):
+        """Verifies a GET /state/{address} uses the chain head from the head
+        cache without fetching the head block.
+
+        It will receive a Protobuf response with:
+            - data of b'3'
+
+        It should send a Protobuf request with:
+            - a state_root of 'beef', from the head cache
+
+        It should send back a JSON response with:
+            - a response status of 200
+            - a head property of ID_C
+        """
+        self.head_cache.set_head(ID_C, 'beef')
+        self.connection.preset_response(value=b'3')
+
+        response = await self.get_assert_200('/state/a')
+        self.connection.assert_valid_request_sent(
+            state_root='beef', address='a')
+
+        self.assert_has_valid_head(response, ID_C)
+        self.assertEqual(b'3', b64decode(response['data']))
+
+    @unittest_run_loop
+    async def test_state_get_with_cached_head_id(self):
+        """Verifies that the state root of a head specified in a
+        GET /state/{address} is only fetched from the validator once.
+
+        It will receive Protobuf responses with:
+            - a block with a header_signature of ID_B and a state root of
+              'beef', for the first request only
+            - data of b'4'
+
+        It should send Protobuf requests with:
+            - a state_root of 'beef'
+
+        It should send back JSON responses with:
+            - a response status of 200
+            - a head property of ID_B
+        """
+        self.connection.preset_response(value=b'4')
+        self.connection.preset_response(
+            proto=client_block_pb2.ClientBlockGetResponse,
+            block=block_pb2.Block(
+                header_signature=ID_B,
+                header=block_pb2.BlockHeader(
+                    state_root_hash='beef').SerializeToString()))
+
+        response = await self.get_assert_200('/state/b?head={}'.format(ID_B))
+        self.connection.assert_valid_request_sent(
+            state_root='beef', address='b')
+        self.assert_has_valid_head(response, ID_B)
+
+        self.connection.preset_response(value=b'4')
+
+        response = await self.get_assert_200('/state/b?head={}'.format(ID_B))
+        self.connection.assert_valid_request_sent(
+            state_root='beef', address='b')
+        self.assert_has_valid_head(response, ID_B)
+        self.assertEqual(b'4', b64decode(response['data']))
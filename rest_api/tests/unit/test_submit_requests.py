@@ -13,11 +13,16 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+import asyncio
 import json
 
 from aiohttp.test_utils import unittest_run_loop
 
 from components import Mocks, BaseApiTest
+from components import TEST_TIMEOUT
+from sawtooth_rest_api.batch_waiter import BatchWaiter
+from sawtooth_rest_api.route_handlers import RouteHandler
+from sawtooth_rest_api.submit_coalescer import SubmitCoalescer
 from sawtooth_rest_api.protobuf.validator_pb2 import Message
 from sawtooth_rest_api.protobuf import client_batch_submit_pb2
 from sawtooth_rest_api.protobuf.client_batch_submit_pb2 \
@@ -187,6 +192,93 @@ class PostBatchTests(BaseApiTest):
         self.assert_has_valid_error(response, 31)
 
 
+class CoalescingConnection(object):
+    """Records the batch ids in each batch submission sent, and accepts
+    them unless they include the batch ID_C.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message_type, message_content, timeout):
+        request = client_batch_submit_pb2.ClientBatchSubmitRequest()
+        request.ParseFromString(message_content)
+        batch_ids = [batch.header_signature for batch in request.batches]
+        self.sent.append(batch_ids)
+
+        response = client_batch_submit_pb2.ClientBatchSubmitResponse
+        status = response.INVALID_BATCH if ID_C in batch_ids else response.OK
+        return Message(content=response(status=status).SerializeToString())
+
+
+class PostBatchCoalesceTests(BaseApiTest):
+    async def get_application(self):
+        self.connection = CoalescingConnection()
+        coalescer = SubmitCoalescer(self.loop, self.connection, 0.2)
+        handlers = RouteHandler(
+            self.loop, self.connection, TEST_TIMEOUT,
+            submit_coalescer=coalescer)
+        return self.build_app(self.loop, '/batches', handlers.submit_batches)
+
+    @unittest_run_loop
+    async def test_post_batches_coalesced(self):
+        """Verifies POST /batches sent together are submitted to the
+        validator in one request.
+
+        It will receive a Protobuf response with:
+            - the default status of OK
+
+        It should send one Protobuf request with:
+            - the batches of both submissions
+
+        It should send back a JSON response to each with:
+            - a response status of 202
+            - a link property ending in its own batch ids
+        """
+        request_a, request_b = await asyncio.gather(
+            self.post_batches(Mocks.make_batches(ID_A)),
+            self.post_batches(Mocks.make_batches(ID_B, ID_D)))
+
+        self.assertEqual(1, len(self.connection.sent))
+        self.assertEqual(
+            sorted([ID_A, ID_B, ID_D]), sorted(self.connection.sent[0]))
+
+        self.assertEqual(202, request_a.status)
+        self.assert_has_valid_link(
+            await request_a.json(), '/batch_statuses?id={}'.format(ID_A))
+        self.assertEqual(202, request_b.status)
+        self.assert_has_valid_link(
+            await request_b.json(),
+            '/batch_statuses?id={},{}'.format(ID_B, ID_D))
+
+    @unittest_run_loop
+    async def test_post_batches_coalesced_invalid(self):
+        """Verifies POST /batches sent together, one with an invalid batch,
+        are each given their own result.
+
+        It will receive Protobuf responses with:
+            - a status of INVALID_BATCH for the request with both
+            - a status of INVALID_BATCH for the invalid submission alone
+            - the default status of OK for the valid submission alone
+
+        It should send back JSON responses with:
+            - a response status of 202 for the valid submission
+            - a response status of 400 and an error code of 30 for the
+              invalid submission
+        """
+        request_a, request_c = await asyncio.gather(
+            self.post_batches(Mocks.make_batches(ID_A)),
+            self.post_batches(Mocks.make_batches(ID_C)))
+
+        self.assertEqual(3, len(self.connection.sent))
+        self.assertEqual(
+            [[ID_A], [ID_C]], sorted(self.connection.sent[1:]))
+
+        self.assertEqual(202, request_a.status)
+        self.assertEqual(400, request_c.status)
+        self.assert_has_valid_error(await request_c.json(), 30)
+
+
 class ClientBatchStatusTests(BaseApiTest):
 
     async def get_application(self):
@@ -475,3 +567,102 @@ class ClientBatchStatusTests(BaseApiTest):
 
         response = await request.json()
         self.assert_has_valid_error(response, 46)
+
+
+class ClientBatchStatusWaitTests(BaseApiTest):
+
+    async def get_application(self):
+        self.set_status_and_connection(
+            Message.CLIENT_BATCH_STATUS_REQUEST,
+            client_batch_submit_pb2.ClientBatchStatusRequest,
+            client_batch_submit_pb2.ClientBatchStatusResponse)
+
+        self.batch_waiter = BatchWaiter()
+        self.batch_waiter.start_listening()
+        handlers = RouteHandler(
+            self.loop, self.connection, TEST_TIMEOUT,
+            batch_waiter=self.batch_waiter)
+        return self.build_app(self.loop, '/batch_statuses',
+                              handlers.list_statuses)
+
+    def after_send(self, callback, *args):
+        """Calls the callback soon after the next request is sent.
+        """
+        send = self.connection.send
+
+        async def send_then_call(*send_args, **send_kwargs):
+            self.connection.send = send
+            response = await send(*send_args, **send_kwargs)
+            self.loop.call_soon(callback, *args)
+            return response
+
+        self.connection.send = send_then_call
+
+    @unittest_run_loop
+    async def test_batch_statuses_wait_for_event(self):
+        """Verifies a GET /batch_statuses with a wait set is resolved by a
+        batch status event while listening for them.
+
+        It will receive a Protobuf response with:
+            - batch statuses of {batch_id: ID_D, status: PENDING}
+
+        It should send a Protobuf request with:
+            - a batch_ids property of [ID_D]
+            - no wait property
+
+        It will then be notified of:
+            - a batch status of {batch_id: ID_D, status: COMMITTED}
+
+        It should send back a JSON response with:
+            - a response status of 200
+            - a data property matching the notified batch status
+        """
+        self.connection.preset_response(batch_statuses=[
+            ClientBatchStatus(
+                batch_id=ID_D, status=ClientBatchStatus.PENDING)])
+        committed = ClientBatchStatus(
+            batch_id=ID_D, status=ClientBatchStatus.COMMITTED)
+        self.after_send(self.batch_waiter.notify, committed)
+
+        response = await self.get_assert_200(
+            '/batch_statuses?id={}&wait'.format(ID_D))
+        self.connection.assert_valid_request_sent(batch_ids=[ID_D])
+
+        self.assert_has_valid_link(
+            response, '/batch_statuses?id={}&wait'.format(ID_D))
+        self.assert_statuses_match([committed], response['data'])
+
+    @unittest_run_loop
+    async def test_batch_statuses_wait_interrupted(self):
+        """Verifies a GET /batch_statuses with a wait set falls back to the
+        validator waiting if batch status events stop.
+
+        It will receive Protobuf responses with:
+            - batch statuses of {batch_id: ID_D, status: PENDING}
+            - then batch statuses of {batch_id: ID_D, status: COMMITTED}
+
+        It should send a Protobuf request with:
+            - a batch_ids property of [ID_D]
+            - a wait property that is True
+            - a timeout of less than 4 (Rest Api default)
+
+        It should send back a JSON response with:
+            - a response status of 200
+            - a data property matching the second batch statuses received
+        """
+        statuses = [ClientBatchStatus(
+            batch_id=ID_D, status=ClientBatchStatus.COMMITTED)]
+        self.connection.preset_response(batch_statuses=statuses)
+        self.connection.preset_response(batch_statuses=[
+            ClientBatchStatus(
+                batch_id=ID_D, status=ClientBatchStatus.PENDING)])
+        self.after_send(self.batch_waiter.stop_listening)
+
+        response = await self.get_assert_200(
+            '/batch_statuses?id={}&wait'.format(ID_D))
+        self.connection.assert_valid_request_sent(
+            batch_ids=[ID_D],
+            wait=True,
+            timeout=3)
+
+        self.assert_statuses_match(statuses, response['data'])
@@ -26,6 +26,8 @@ from sawtooth_sdk.protobuf.state_context_pb2 import TpStateDeleteRequest
 from sawtooth_sdk.protobuf.state_context_pb2 import TpStateDeleteResponse
 from sawtooth_sdk.protobuf.state_context_pb2 import TpEventAddRequest
 from sawtooth_sdk.protobuf.state_context_pb2 import TpEventAddResponse
+from sawtooth_sdk.protobuf.state_context_pb2 import TpStateApplyRequest
+from sawtooth_sdk.protobuf.state_context_pb2 import TpStateApplyResponse
 from sawtooth_sdk.protobuf.validator_pb2 import Message
 
 
@@ -43,6 +45,8 @@ _TYPE_TO_PROTO = {
     Message.TP_STATE_DELETE_RESPONSE: TpStateDeleteResponse,
     Message.TP_EVENT_ADD_REQUEST: TpEventAddRequest,
     Message.TP_EVENT_ADD_RESPONSE: TpEventAddResponse,
+    Message.TP_STATE_APPLY_REQUEST: TpStateApplyRequest,
+    Message.TP_STATE_APPLY_RESPONSE: TpStateApplyResponse,
 }
 
 _PROTO_TO_TYPE = {
@@ -184,3 +184,179 @@ class Context(object):
             raise InternalError(
                 "Failed to add event: ({}, {}, {})".format(
                     event_type, attributes, data))
+
+
+class BufferedContext(Context):
+    """
+    BufferedContext is a Context which keeps the state changes, events and
+    receipt data of a transaction locally, rather than sending each one to
+    the validator as it is made, and applies them all with a single
+    message when flushed. Reads of addresses which have been set or
+    deleted are answered from the buffer.
+
+    Only the last set or delete of each address is kept, so the order in
+    which they were made is kept when they are applied. Because changes
+    are not sent until the context is flushed, an unauthorized set or
+    delete is reported by the flush.
+    """
+
+    def __init__(self, stream, context_id):
+        super().__init__(stream, context_id)
+        # address -> data, or None if the address has been deleted
+        self._changes = {}
+        self._events = []
+        self._receipt_data = []
+
+    def get_state(self, addresses, timeout=None):
+        """
+        get_state queries the validator state for data at each of the
+        addresses in the given list which have not been set or deleted in
+        this context. The addresses that have been set are returned in a
+        list.
+
+        Args:
+            addresses (list): the addresses to fetch
+            timeout: optional timeout, in seconds
+        Returns:
+            results (list): a list of Entries (address, data), for the
+            addresses that have a value
+
+        Raises:
+            AuthorizationException
+        """
+        unbuffered = [a for a in addresses if a not in self._changes]
+        fetched = {}
+        if unbuffered:
+            fetched = {
+                e.address: e
+                for e in super().get_state(unbuffered, timeout)
+            }
+
+        results = []
+        for address in addresses:
+            if address in self._changes:
+                data = self._changes[address]
+                if data:
+                    results.append(state_context_pb2.TpStateEntry(
+                        address=address, data=data))
+            elif address in fetched:
+                results.append(fetched[address])
+
+        return results
+
+    def set_state(self, entries, timeout=None):
+        """
+        set_state buffers each address in the provided dictionary to be set
+        to its corresponding value when the context is flushed.
+
+        Args:
+            entries (dict): dictionary where addresses are the keys and data is
+                the value.
+            timeout: unused; present for compatibility with Context
+
+        Returns:
+            addresses (list): a list of addresses that were set
+        """
+        self._changes.update(entries)
+        return list(entries)
+
+    def delete_state(self, addresses, timeout=None):
+        """
+        delete_state buffers each of the provided addresses to be unset
+        when the context is flushed.
+
+        Args:
+            addresses (list): list of addresses to delete
+            timeout: unused; present for compatibility with Context
+
+        Returns:
+            addresses (list): a list of addresses that were deleted
+        """
+        for address in addresses:
+            self._changes[address] = None
+        return list(addresses)
+
+    def add_receipt_data(self, data, timeout=None):
+        """Buffer a blob to add to the execution result for this
+        transaction.
+
+        Args:
+            data (bytes): The data to add.
+        """
+        self._receipt_data.append(data)
+
+    def add_event(self, event_type, attributes=None, data=None, timeout=None):
+        """Buffer a new event to add to the execution result for this
+        transaction.
+
+        Args:
+            event_type (str): This is used to subscribe to events. It should be
+                globally unique and describe what, in general, has occured.
+            attributes (list of (str, str) tuples): Additional information
+                about the event that is transparent to the validator.
+                Attributes can be used by subscribers to filter the type of
+                events they receive.
+            data (bytes): Additional information about the event that is opaque
+                to the validator.
+        """
+        if attributes is None:
+            attributes = []
+
+        self._events.append(events_pb2.Event(
+            event_type=event_type,
+            attributes=[
+                events_pb2.Event.Attribute(key=key, value=value)
+                for key, value in attributes
+            ],
+            data=data,
+        ))
+
+    def flush(self, timeout=None):
+        """Applies the buffered state changes, events and receipt data to
+        the validator's context in one request, and clears the buffer.
+
+        Args:
+            timeout: optional timeout, in seconds
+
+        Raises:
+            AuthorizationException
+            InternalError
+        """
+        self._apply(timeout)
+
+    def _apply(self, timeout):
+        if not (self._changes or self._events or self._receipt_data):
+            return state_context_pb2.TpStateApplyResponse(
+                status=state_context_pb2.TpStateApplyResponse.OK)
+
+        request = state_context_pb2.TpStateApplyRequest(
+            context_id=self._context_id,
+            entries=[
+                state_context_pb2.TpStateEntry(address=address, data=data)
+                for address, data in self._changes.items()
+                if data is not None
+            ],
+            deleted_addresses=[
+                address for address, data in self._changes.items()
+                if data is None
+            ],
+            events=self._events,
+            receipt_data=self._receipt_data).SerializeToString()
+
+        self._changes = {}
+        self._events = []
+        self._receipt_data = []
+
+        response = state_context_pb2.TpStateApplyResponse()
+        response.ParseFromString(
+            self._stream.send(
+                Message.TP_STATE_APPLY_REQUEST,
+                request).result(timeout).content)
+        if response.status == \
+                state_context_pb2.TpStateApplyResponse.AUTHORIZATION_ERROR:
+            raise AuthorizationException(
+                'Tried to set or delete an unauthorized address')
+        if response.status != state_context_pb2.TpStateApplyResponse.OK:
+            raise InternalError('Failed to apply buffered state changes')
+
+        return response
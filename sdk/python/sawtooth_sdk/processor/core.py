@@ -14,6 +14,7 @@
 # ------------------------------------------------------------------------------
 
 from concurrent.futures import CancelledError
+from concurrent.futures import ThreadPoolExecutor
 import concurrent.futures
 import itertools
 import logging
@@ -24,6 +25,7 @@ from sawtooth_sdk.messaging.future import FutureTimeoutError
 from sawtooth_sdk.messaging.stream import RECONNECT_EVENT
 from sawtooth_sdk.messaging.stream import Stream
 
+from sawtooth_sdk.processor.context import BufferedContext
 from sawtooth_sdk.processor.context import Context
 from sawtooth_sdk.processor.exceptions import InvalidTransaction
 from sawtooth_sdk.processor.exceptions import InternalError
@@ -46,17 +48,47 @@ class TransactionProcessor(object):
     """TransactionProcessor is a generic class for communicating with a
     validator and routing transaction processing requests to a registered
     handler. It uses ZMQ and channels to handle requests concurrently.
+
+    By default, requests are processed one at a time. When constructed
+    with more than one worker, requests are applied on a pool of threads,
+    so that a handler blocked on a state round trip to the validator does
+    not hold up the requests behind it. Handlers added to a processor with
+    more than one worker must be safe to apply from several threads.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, max_workers=1, max_occupancy=None,
+                 buffer_state=False):
         """
         Args:
             url (string): The URL of the validator
+            max_workers (int): The number of requests to process
+                concurrently
+            max_occupancy (int): The number of requests the validator may
+                have outstanding with this processor; defaults to
+                max_workers when more than one worker is used, and to the
+                validator's default otherwise
+            buffer_state (bool): Whether handlers are given a
+                BufferedContext, whose state changes, events and receipt
+                data are sent to the validator in one message after the
+                handler returns; requires a validator which handles
+                TP_STATE_APPLY_REQUEST
         """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
         self._stream = Stream(url)
         self._url = url
         self._handlers = []
 
+        if max_occupancy is None:
+            max_occupancy = max_workers if max_workers > 1 else 0
+        self._max_occupancy = max_occupancy
+        self._context_class = BufferedContext if buffer_state else Context
+
+        self._executor = None
+        if max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
     @property
     def zmq_id(self):
         return self._stream.zmq_id
@@ -95,7 +127,8 @@ class TransactionProcessor(object):
                 [TpRegisterRequest(
                     family=n,
                     version=v,
-                    namespaces=h.namespaces)
+                    namespaces=h.namespaces,
+                    max_occupancy=self._max_occupancy)
                  for n, v in itertools.product(
                     [h.family_name],
                      h.family_versions,)] for h in self._handlers])
@@ -119,7 +152,7 @@ class TransactionProcessor(object):
 
         request = TpProcessRequest()
         request.ParseFromString(msg.content)
-        state = Context(self._stream, request.context_id)
+        state = self._context_class(self._stream, request.context_id)
         header = request.header
         try:
             if not self._stream.is_ready():
@@ -128,6 +161,8 @@ class TransactionProcessor(object):
             if handler is None:
                 return
             handler.apply(request, state)
+            if isinstance(state, BufferedContext):
+                state.flush()
             self._stream.send_back(
                 message_type=Message.TP_PROCESS_RESPONSE,
                 correlation_id=msg.correlation_id,
@@ -213,7 +248,32 @@ class TransactionProcessor(object):
                     correlation_id=msg.correlation_id,
                     content=PingResponse().SerializeToString())
                 return
+            if self._executor is None:
+                self._process(msg)
+            else:
+                self._executor.submit(self._process_in_worker, msg)
+
+    def _process_in_worker(self, msg):
+        try:
             self._process(msg)
+        except Exception as err:  # pylint: disable=broad-except
+            # Nothing waits on the worker's future, so log anything that
+            # escapes rather than losing it, and answer the validator so
+            # that it is not left waiting for the transaction's result.
+            LOGGER.exception("Unhandled error processing %s",
+                             msg.correlation_id)
+            if msg.message_type != Message.TP_PROCESS_REQUEST:
+                return
+            try:
+                self._stream.send_back(
+                    message_type=Message.TP_PROCESS_RESPONSE,
+                    correlation_id=msg.correlation_id,
+                    content=TpProcessResponse(
+                        status=TpProcessResponse.INTERNAL_ERROR,
+                        message=str(err)
+                    ).SerializeToString())
+            except ValidatorConnectionError as vce:
+                LOGGER.warning("during internal error response: %s", vce)
 
     def _register(self):
         futures = []
@@ -284,9 +344,16 @@ class TransactionProcessor(object):
                 # If the validator is not able to respond to the
                 # unregister request, exit.
                 pass
+            finally:
+                # let the requests already handed to workers send their
+                # responses before the stream is closed
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
 
     def stop(self):
         """Closes the connection between the TransactionProcessor and the
         validator.
         """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
         self._stream.close()
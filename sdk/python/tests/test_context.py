@@ -18,6 +18,7 @@ from unittest.mock import Mock
 
 from collections import OrderedDict
 
+from sawtooth_sdk.processor.context import BufferedContext
 from sawtooth_sdk.processor.context import Context
 from sawtooth_sdk.messaging.future import Future
 from sawtooth_sdk.messaging.future import FutureResult
@@ -34,6 +35,8 @@ from sawtooth_sdk.protobuf.state_context_pb2 import TpReceiptAddDataRequest
 from sawtooth_sdk.protobuf.state_context_pb2 import TpReceiptAddDataResponse
 from sawtooth_sdk.protobuf.state_context_pb2 import TpEventAddRequest
 from sawtooth_sdk.protobuf.state_context_pb2 import TpEventAddResponse
+from sawtooth_sdk.protobuf.state_context_pb2 import TpStateApplyRequest
+from sawtooth_sdk.protobuf.state_context_pb2 import TpStateApplyResponse
 from sawtooth_sdk.protobuf.events_pb2 import Event
 
 
@@ -144,3 +147,113 @@ class ContextTest(unittest.TestCase):
                     event_type="test",
                     attributes=[Event.Attribute(key="test", value="test")],
                     data=b"test")).SerializeToString())
+
+
+class BufferedContextTest(unittest.TestCase):
+    def setUp(self):
+        self.context_id = "test"
+        self.mock_stream = Mock()
+        self.context = BufferedContext(self.mock_stream, self.context_id)
+
+    def _make_future(self, message_type, content):
+        f = Future(self.context_id)
+        f.set_result(FutureResult(
+            message_type=message_type,
+            content=content))
+        return f
+
+    def _make_apply_future(self, addresses=(), deleted_addresses=()):
+        return self._make_future(
+            message_type=Message.TP_STATE_APPLY_RESPONSE,
+            content=TpStateApplyResponse(
+                status=TpStateApplyResponse.OK,
+                addresses=addresses,
+                deleted_addresses=deleted_addresses).SerializeToString())
+
+    def test_writes_are_buffered(self):
+        """Tests that sets, events and receipt data are not sent until the
+        context is flushed, and are then sent in one request.
+        """
+        self.context.set_state({"a": b"a", "b": b"b"})
+        self.context.add_event("test", [("test", "test")], b"test")
+        self.context.add_receipt_data(b"test")
+
+        self.mock_stream.send.assert_not_called()
+
+        self.mock_stream.send.return_value = self._make_apply_future(
+            addresses=["a", "b"])
+
+        self.context.flush()
+
+        self.mock_stream.send.assert_called_once_with(
+            Message.TP_STATE_APPLY_REQUEST,
+            TpStateApplyRequest(
+                context_id=self.context_id,
+                entries=[TpStateEntry(address="a", data=b"a"),
+                         TpStateEntry(address="b", data=b"b")],
+                events=[Event(
+                    event_type="test",
+                    attributes=[Event.Attribute(key="test", value="test")],
+                    data=b"test")],
+                receipt_data=[b"test"]).SerializeToString())
+
+        self.mock_stream.send.reset_mock()
+        self.context.flush()
+        self.mock_stream.send.assert_not_called()
+
+    def test_deletes_are_buffered(self):
+        """Tests that deletes are not sent until the context is flushed, and
+        are then sent with the buffered sets, keeping only the last set or
+        delete of each address.
+        """
+        self.context.set_state({"a": b"a", "b": b"b"})
+        self.assertEqual(["b", "c"], self.context.delete_state(["b", "c"]))
+        self.context.set_state({"c": b"c"})
+        self.context.delete_state(["d"])
+
+        self.mock_stream.send.assert_not_called()
+        self.assertEqual(
+            [("c", b"c")],
+            [(e.address, e.data)
+             for e in self.context.get_state(["b", "c", "d"])])
+
+        self.mock_stream.send.return_value = self._make_apply_future(
+            addresses=["a", "c"], deleted_addresses=["b", "d"])
+
+        self.context.flush()
+
+        self.mock_stream.send.assert_called_once_with(
+            Message.TP_STATE_APPLY_REQUEST,
+            TpStateApplyRequest(
+                context_id=self.context_id,
+                entries=[TpStateEntry(address="a", data=b"a"),
+                         TpStateEntry(address="c", data=b"c")],
+                deleted_addresses=["b", "d"]).SerializeToString())
+
+        self.mock_stream.send.reset_mock()
+        self.context.flush()
+        self.mock_stream.send.assert_not_called()
+
+    def test_reads_see_buffered_writes(self):
+        """Tests that reads of buffered addresses are answered from the
+        buffer, and only the other addresses are requested.
+        """
+        self.context.set_state({"a": b"new"})
+
+        self.mock_stream.send.return_value = self._make_future(
+            message_type=Message.TP_STATE_GET_RESPONSE,
+            content=TpStateGetResponse(
+                status=TpStateGetResponse.OK,
+                entries=[TpStateEntry(address="c", data=b"c")]
+            ).SerializeToString())
+
+        results = self.context.get_state(["a", "b", "c"])
+
+        self.mock_stream.send.assert_called_once_with(
+            Message.TP_STATE_GET_REQUEST,
+            TpStateGetRequest(
+                context_id=self.context_id,
+                addresses=["b", "c"]).SerializeToString())
+        self.assertEqual(
+            [("a", b"new"), ("c", b"c")],
+            [(e.address, e.data) for e in results])
@@ -0,0 +1,171 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+import concurrent.futures
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from sawtooth_sdk.processor.core import TransactionProcessor
+from sawtooth_sdk.processor.handler import TransactionHandler
+
+from sawtooth_sdk.protobuf.processor_pb2 import TpProcessRequest
+from sawtooth_sdk.protobuf.processor_pb2 import TpProcessResponse
+from sawtooth_sdk.protobuf.processor_pb2 import TpUnregisterResponse
+from sawtooth_sdk.protobuf.transaction_pb2 import TransactionHeader
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+
+class _Handler(TransactionHandler):
+    def __init__(self, apply):
+        self._apply = apply
+
+    @property
+    def family_name(self):
+        return 'test'
+
+    @property
+    def family_versions(self):
+        return ['1.0']
+
+    @property
+    def namespaces(self):
+        return ['abcdef']
+
+    def apply(self, transaction, context):
+        self._apply(transaction, context)
+
+
+def _make_request(correlation_id):
+    return Message(
+        message_type=Message.TP_PROCESS_REQUEST,
+        correlation_id=correlation_id,
+        content=TpProcessRequest(
+            header=TransactionHeader(
+                family_name='test', family_version='1.0'),
+            context_id='context').SerializeToString())
+
+
+def _make_future(*results):
+    future = Mock()
+    future.result.side_effect = results
+    return future
+
+
+class TransactionProcessorTest(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('sawtooth_sdk.processor.core.Stream')
+        self.addCleanup(patcher.stop)
+        self.mock_stream = patcher.start().return_value
+        self.mock_stream.is_ready.return_value = True
+
+    def _make_processor(self, apply, **kwargs):
+        processor = TransactionProcessor('tcp://validator:4004', **kwargs)
+        processor.add_handler(_Handler(apply))
+        return processor
+
+    def _responses(self):
+        responses = {}
+        for call in self.mock_stream.send_back.call_args_list:
+            self.assertEqual(
+                Message.TP_PROCESS_RESPONSE, call[1]['message_type'])
+            response = TpProcessResponse()
+            response.ParseFromString(call[1]['content'])
+            responses[call[1]['correlation_id']] = response
+        return responses
+
+    def test_max_occupancy(self):
+        """Tests that the occupancy registered with the validator defaults
+        to the number of workers, unless only one is used, and may be set.
+        """
+        def occupancies(**kwargs):
+            processor = self._make_processor(Mock(), **kwargs)
+            occupancy = [r.max_occupancy
+                         for r in processor._register_requests()]
+            processor.stop()
+            return occupancy
+
+        self.assertEqual([0], occupancies())
+        self.assertEqual([4], occupancies(max_workers=4))
+        self.assertEqual([10], occupancies(max_workers=4, max_occupancy=10))
+
+        with self.assertRaises(ValueError):
+            TransactionProcessor('tcp://validator:4004', max_workers=0)
+
+    def test_workers_apply_concurrently(self):
+        """Tests that requests are applied on the worker pool at the same
+        time, and each is answered.
+        """
+        barrier = threading.Barrier(2, timeout=5)
+        processor = self._make_processor(
+            lambda transaction, context: barrier.wait(), max_workers=2)
+
+        processor._process_future(_make_future(_make_request('1')))
+        processor._process_future(_make_future(_make_request('2')))
+        processor._executor.shutdown(wait=True)
+
+        responses = self._responses()
+        self.assertEqual(
+            {'1': TpProcessResponse.OK, '2': TpProcessResponse.OK},
+            {c: r.status for c, r in responses.items()})
+
+    def test_unhandled_error_in_worker(self):
+        """Tests that a request whose handler raises an unexpected error on
+        a worker is answered with an internal error.
+        """
+        def apply(transaction, context):
+            raise KeyError('missing')
+
+        processor = self._make_processor(apply, max_workers=2)
+
+        processor._process_future(_make_future(_make_request('1')))
+        processor._executor.shutdown(wait=True)
+
+        response = self._responses()['1']
+        self.assertEqual(TpProcessResponse.INTERNAL_ERROR, response.status)
+        self.assertIn('missing', response.message)
+
+    def test_interrupt_waits_for_workers(self):
+        """Tests that when the processor is interrupted, it unregisters and
+        lets the requests already given to workers finish and be answered.
+        """
+        def apply(transaction, context):
+            time.sleep(0.1)
+
+        processor = self._make_processor(apply, max_workers=2)
+
+        self.mock_stream.send.return_value = _make_future(
+            Mock(content=TpUnregisterResponse(
+                status=TpUnregisterResponse.OK).SerializeToString()))
+        self.mock_stream.receive.side_effect = [
+            _make_future(
+                _make_request('1'),
+                concurrent.futures.TimeoutError()),
+            KeyboardInterrupt(),
+        ]
+        processor._register = Mock()
+
+        processor.start()
+
+        self.mock_stream.send.assert_called_once()
+        self.assertEqual(
+            Message.TP_UNREGISTER_REQUEST,
+            self.mock_stream.send.call_args[1]['message_type'])
+        self.assertEqual(
+            TpProcessResponse.OK, self._responses()['1'].status)
+        with self.assertRaises(RuntimeError):
+            processor._executor.submit(apply, None, None)
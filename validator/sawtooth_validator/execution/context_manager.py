@@ -17,18 +17,27 @@ import logging
 import re
 
 from collections import deque
+from collections import OrderedDict
+from itertools import chain
 from threading import Lock
 from queue import Queue
 
+from sawtooth_validator import metrics
 from sawtooth_validator.concurrent.thread import InstrumentedThread
 from sawtooth_validator.state.merkle import MerkleDatabase
 
 from sawtooth_validator.execution.execution_context \
     import AuthorizationException
+from sawtooth_validator.execution.execution_context import ChainWrites
 from sawtooth_validator.execution.execution_context import ExecutionContext
+from sawtooth_validator.protobuf.transaction_receipt_pb2 import StateChange
 
 
 LOGGER = logging.getLogger(__name__)
+COLLECTOR = metrics.get_collector(__name__)
+
+DEFAULT_STATE_READ_CACHE_SIZE = 64 * 1024 * 1024
+DEFAULT_STATE_DELTA_LOG_SIZE = 64 * 1024 * 1024
 
 
 class CreateContextException(Exception):
@@ -44,17 +53,29 @@ _SHUTDOWN_SENTINEL = -1
 
 class ContextManager(object):
 
-    def __init__(self, database):
+    def __init__(self, database,
+                 state_read_cache_size=DEFAULT_STATE_READ_CACHE_SIZE,
+                 state_delta_log_size=DEFAULT_STATE_DELTA_LOG_SIZE):
         """
 
         Args:
             database (database.Database subclass): the subclass/implementation
                 of the Database
+            state_read_cache_size (int): the approximate number of bytes of
+                values read from the merkle database to keep for reuse by
+                later contexts
+            state_delta_log_size (int): the approximate number of bytes of
+                the writes of recent squashes to keep for building state
+                delta events
         """
         self._database = database
         self._first_merkle_root = None
         self._contexts = _ThreadsafeContexts()
 
+        self._state_read_cache = _StateReadCache(state_read_cache_size)
+
+        self._state_deltas = _StateDeltaLog(state_delta_log_size)
+
         self._address_regex = re.compile('^[0-9a-f]{70}$')
 
         self._namespace_regex = re.compile('^([0-9a-f]{2}){0,35}$')
@@ -64,7 +85,8 @@ class ContextManager(object):
         self._inflated_addresses = Queue()
 
         self._context_reader = _ContextReader(database, self._address_queue,
-                                              self._inflated_addresses)
+                                              self._inflated_addresses,
+                                              self._state_read_cache)
         self._context_reader.start()
 
         self._context_writer = _ContextWriter(self._inflated_addresses,
@@ -112,23 +134,29 @@ class ContextManager(object):
 
         addresses_to_find = [add for add in inputs if len(add) == 70]
 
+        contexts_asked_not_found = [cid for cid in base_contexts
+                                    if cid not in self._contexts]
+        if contexts_asked_not_found:
+            raise KeyError(
+                "Basing a new context off of context ids {} "
+                "that are not in context manager".format(
+                    contexts_asked_not_found))
+
+        base_writes = ChainWrites.merge(
+            [self._contexts[c_id].get_chain_writes()
+             for c_id in base_contexts])
+
         address_values, reads = self._find_address_values_in_chain(
             base_contexts=base_contexts,
+            base_writes=base_writes,
             addresses_to_find=addresses_to_find)
 
         context = ExecutionContext(
             state_hash=state_hash,
             read_list=inputs,
             write_list=outputs,
-            base_context_ids=base_contexts)
-
-        contexts_asked_not_found = [cid for cid in base_contexts
-                                    if cid not in self._contexts]
-        if contexts_asked_not_found:
-            raise KeyError(
-                "Basing a new context off of context ids {} "
-                "that are not in context manager".format(
-                    contexts_asked_not_found))
+            base_context_ids=base_contexts,
+            base_writes=base_writes)
 
         context.create_initial(address_values)
 
@@ -140,12 +168,16 @@ class ContextManager(object):
                 (context.session_id, state_hash, reads))
         return context.session_id
 
-    def _find_address_values_in_chain(self, base_contexts, addresses_to_find):
-        """Breadth first search through the chain of contexts searching for
-        the bytes values at the addresses in addresses_to_find.
+    def _find_address_values_in_chain(self, base_contexts, base_writes,
+                                      addresses_to_find):
+        """Search the writes made in a chain of contexts, and then the inputs
+        of the base contexts, for the bytes values at the addresses in
+        addresses_to_find.
 
         Args:
             base_contexts (list of str): The context ids to start with.
+            base_writes (ChainWrites): The writes made in the chain of
+                contexts starting with base_contexts.
             addresses_to_find (list of str): Addresses to find values in the
                 chain of contexts.
 
@@ -153,65 +185,60 @@ class ContextManager(object):
             tuple of found address_values and still not found addresses
         """
 
-        contexts_in_chain = deque()
-        contexts_in_chain.extend(base_contexts)
-        reads = list(addresses_to_find)
-        address_values = []
-        context_ids_already_searched = []
-        context_ids_already_searched.extend(base_contexts)
+        address_values, reads = base_writes.find(addresses_to_find)
 
-        # There are two loop exit conditions, either all the addresses that
-        # are being searched for have been found, or we run out of contexts
-        # in the chain of contexts.
+        # An address that was not written anywhere in the chain has the
+        # same value as in the merkle tree, so it can be taken from a base
+        # context that had it as an input.
 
-        while reads:
-            try:
-                current_c_id = contexts_in_chain.popleft()
-            except IndexError:
-                # There aren't any more contexts known about.
+        for c_id in base_contexts:
+            if not reads:
                 break
-            current_context = self._contexts[current_c_id]
+            try:
+                current_context = self._contexts[c_id]
+            except KeyError:
+                continue
 
-            # First, check for addresses that have been deleted.
-            deleted_addresses = current_context.get_if_deleted(reads)
-            for address in deleted_addresses:
-                if address is not None:
-                    address_values.append((address, None))
+            addresses_in_inputs = [address for address in reads
+                                   if address in current_context]
 
-            reads = list(set(reads) - set(deleted_addresses))
+            values = current_context.get_if_not_set(addresses_in_inputs)
 
-            # Second, check for addresses that have been set in the context,
-            # and remove those addresses from being asked about again. Here
-            # any value of None means the address hasn't been set.
+            address_values.extend(list(zip(addresses_in_inputs, values)))
 
-            values = current_context.get_if_set(reads)
-            addresses_not_found = []
-            for address, value in zip(reads, values):
-                if value is not None:
-                    address_values.append((address, value))
-                else:
-                    addresses_not_found.append(address)
-            reads = addresses_not_found
+            reads = [address for address in reads
+                     if address not in addresses_in_inputs]
 
-            # Next check for addresses that might be in a context
-            # because they were inputs.
+        return address_values, reads
 
-            addresses_in_inputs = [address for address in reads
-                                   if address in current_context]
+    def _find_context_ids_in_chain(self, context_ids):
+        """Breadth first search through the chain of contexts, collecting
+        the ids of the contexts still in the context manager.
 
-            values = current_context.get_if_not_set(addresses_in_inputs)
+        Args:
+            context_ids (list of str): The context ids to start with.
 
-            address_values.extend(list(zip(addresses_in_inputs, values)))
+        Returns:
+            (set of str): The context ids in the chain, including
+                context_ids.
+        """
+
+        contexts_in_chain = deque(context_ids)
+        context_ids_already_searched = set(context_ids)
 
-            for add in addresses_in_inputs:
-                reads.remove(add)
+        while contexts_in_chain:
+            current_c_id = contexts_in_chain.popleft()
+            try:
+                current_context = self._contexts[current_c_id]
+            except KeyError:
+                continue
 
             for c_id in current_context.base_contexts:
                 if c_id not in context_ids_already_searched:
                     contexts_in_chain.append(c_id)
-                    context_ids_already_searched.append(c_id)
+                    context_ids_already_searched.add(c_id)
 
-        return address_values, reads
+        return context_ids_already_searched
 
     def delete_contexts(self, context_id_list):
         """Delete contexts from the ContextManager.
@@ -299,30 +326,17 @@ class ContextManager(object):
             # the context.
             for address in addresses_not_in_ctx:
                 context.validate_read(address)
-            try:
-                address_values, reads = self._find_address_values_in_chain(
-                    base_contexts=[context_id],
-                    addresses_to_find=addresses_not_in_ctx)
-            except KeyError:
-                # This is in the exceptional case when a txn is in flight
-                # and so the context may not exist but the tp is asking
-                # about it.
-                return []
+            address_values, reads = self._find_address_values_in_chain(
+                base_contexts=context.base_contexts,
+                base_writes=context.base_writes,
+                addresses_to_find=addresses_not_in_ctx)
 
             values_list.extend(address_values)
 
             if reads:
                 tree = MerkleDatabase(self._database, context.merkle_root)
-                add_values = []
-                for add in reads:
-                    value = None
-                    try:
-                        value = tree.get(add)
-                    except KeyError:
-                        # The address is not in the radix tree/merkle tree
-                        pass
-                    add_values.append((add, value))
-                values_list.extend(add_values)
+                values_list.extend(self._state_read_cache.read(
+                    tree, context.merkle_root, reads))
 
             values_list.sort(key=lambda x: address_list.index(x[0]))
 
@@ -362,60 +376,113 @@ class ContextManager(object):
         context.set_direct(add_value_dict)
         return True
 
+    def apply(self, context_id, address_value_dict, deleted_addresses,
+              events, data):
+        """Within a context, sets and deletes addresses, and appends events
+        and data to the execution result. Either all of the changes are
+        made, or none are.
+
+        Args:
+            context_id (str): the context id returned by create_context
+            address_value_dict (dict of str:bytes): addresses to set, with
+                their values
+            deleted_addresses (list of str): addresses to delete
+            events (list of Event): events to append
+            data (list of bytes): data to append
+
+        Returns:
+            (bool): True if the operation is successful, False if
+                the context_id doesn't reference a known context.
+
+        Raises:
+            AuthorizationException if an address to set or delete was not
+                in the original transaction's outputs, or is not a valid
+                address.
+        """
+        try:
+            context = self._contexts[context_id]
+        except KeyError:
+            LOGGER.warning("Context_id not in contexts, %s", context_id)
+            return False
+
+        for add in chain(address_value_dict, deleted_addresses):
+            if not self.address_is_valid(address=add):
+                raise AuthorizationException(address=add)
+
+        context.apply(address_value_dict, deleted_addresses, events, data)
+        return True
+
     def get_squash_handler(self):
         def _squash(state_root, context_ids, persist, clean_up):
-            contexts_in_chain = deque()
-            contexts_in_chain.extend(context_ids)
-            context_ids_already_searched = []
-            context_ids_already_searched.extend(context_ids)
+            contexts = [self._contexts[c_id] for c_id in context_ids]
+            squashed_ids = set(context_ids)
+
+            # The writes of each context are merged with those of the chain
+            # it is based on, unless every context in that chain is being
+            # squashed too, in which case its writes are already covered.
+            # The latest write to an address wins.
+            chains = []
+            for context in contexts:
+                if squashed_ids.issuperset(context.base_contexts):
+                    sequence, writes = context.get_writes()
+                    chains.append(ChainWrites().update(sequence, writes))
+                else:
+                    context.make_read_only()
+                    chains.append(context.get_chain_writes())
 
-            # There is only one exit condition and that is when all the
-            # contexts have been accessed once.
             updates = dict()
             deletes = set()
-            while contexts_in_chain:
-                current_c_id = contexts_in_chain.popleft()
-                current_context = self._contexts[current_c_id]
-                if not current_context.is_read_only():
-                    current_context.make_read_only()
-
-                addresses_w_values = current_context.get_all_if_set()
-                for add, val in addresses_w_values.items():
-                    # Since we are moving backwards through the graph of
-                    # contexts, only update if the address hasn't been set
-                    # or deleted
-                    if add not in updates and add not in deletes:
-                        updates[add] = val
-
-                addresses_w_values = current_context.get_all_if_deleted()
-                for add, _ in addresses_w_values.items():
-                    # Since we are moving backwards through the graph of
-                    # contexts, only add to deletes if the address hasn't been
-                    # previously deleted or set in the graph
-                    if add not in updates and add not in deletes:
-                        deletes.add(add)
-
-                for c_id in current_context.base_contexts:
-                    if c_id not in context_ids_already_searched:
-                        contexts_in_chain.append(c_id)
-                        context_ids_already_searched.append(c_id)
+            for add, val in ChainWrites.merge(chains).items():
+                if val is None:
+                    deletes.add(add)
+                else:
+                    updates[add] = val
 
             tree = MerkleDatabase(self._database, state_root)
 
             # filter the delete list to just those items in the tree
-            deletes = [addr for addr in deletes if addr in tree]
+            existing_deletes = [addr for addr in deletes if addr in tree]
 
-            if not updates and not deletes:
+            if not updates and not existing_deletes:
                 state_hash = state_root
             else:
                 virtual = not persist
-                state_hash = tree.update(updates, deletes, virtual=virtual)
+                state_hash = tree.update(
+                    updates, existing_deletes, virtual=virtual)
+                self._state_read_cache.add_derived_root(
+                    state_hash, state_root,
+                    set(updates).union(existing_deletes))
+
+            if updates or deletes:
+                self._state_deltas.add(
+                    state_hash, state_root, updates, deletes)
 
             if clean_up:
-                self.delete_contexts(context_ids_already_searched)
+                self.delete_contexts(
+                    self._find_context_ids_in_chain(context_ids))
             return state_hash
         return _squash
 
+    def get_state_changes(self, state_root, parent_root):
+        """Returns the changes made to the state at parent_root to derive
+        state_root, as recorded by the squashes that derived it.
+
+        Like the changes in transaction receipts, deletes are included
+        even if the address was not set under parent_root.
+
+        Args:
+            state_root (str): the derived state root
+            parent_root (str): the state root it was derived from
+
+        Returns:
+            (list of StateChange): one change per address, or None if the
+                squashes that derived state_root are no longer known, or
+                if the changes cannot be told apart from those of other
+                squashes because some of them left the state root as it
+                was
+        """
+        return self._state_deltas.get(state_root, parent_root)
+
     def stop(self):
         self._address_queue.put_nowait(_SHUTDOWN_SENTINEL)
         self._inflated_addresses.put_nowait(_SHUTDOWN_SENTINEL)
@@ -478,11 +545,13 @@ class _ContextReader(InstrumentedThread):
                                           (context_id, [(address, value), ...
     """
 
-    def __init__(self, database, address_queue, inflated_addresses):
+    def __init__(self, database, address_queue, inflated_addresses,
+                 state_read_cache):
         super(_ContextReader, self).__init__(name='_ContextReader')
         self._database = database
         self._addresses = address_queue
         self._inflated_addresses = inflated_addresses
+        self._state_read_cache = state_read_cache
 
     def run(self):
         while True:
@@ -491,14 +560,8 @@ class _ContextReader(InstrumentedThread):
                 break
             c_id, state_hash, address_list = context_state_addresslist_tuple
             tree = MerkleDatabase(self._database, state_hash)
-            return_values = []
-            for address in address_list:
-                value = None
-                try:
-                    value = tree.get(address)
-                except KeyError:
-                    pass
-                return_values.append((address, value))
+            return_values = self._state_read_cache.read(
+                tree, state_hash, address_list)
             self._inflated_addresses.put((c_id, return_values))
 
 
@@ -532,6 +595,270 @@ class _ContextWriter(InstrumentedThread):
                 self._contexts[c_id].set_from_tree(inflated_value_map)
 
 
+class _StateReadCache(object):
+    """A thread-safe cache of the values read from the merkle database,
+    keyed by state root and address, and bounded by the approximate size of
+    the values it holds. The least recently used values are evicted first.
+
+    The value at an address under a given state root never changes, so
+    entries never go stale. When a squash derives a new state root, the
+    addresses it changed are recorded, so that a read under the new root can
+    be served by a value cached under the old one if the address was left
+    unchanged. This lets the hot addresses of one block be reused by the
+    next.
+
+    Reads always go through a MerkleDatabase opened at the requested root,
+    which fails if the root has been pruned, so values are never served for
+    roots that are no longer in the database.
+    """
+
+    # Rough per-entry cost of the key tuple, the dict slot and the value
+    # object, on top of the address and value bytes.
+    _ENTRY_OVERHEAD = 200
+
+    # The number of squash results whose changed addresses are kept, and
+    # the number of those that are followed to find a cached value.
+    _MAX_DERIVED_ROOTS = 256
+    _MAX_DERIVED_DEPTH = 16
+
+    _NOT_CACHED = object()
+
+    def __init__(self, size):
+        self._size = size
+        self._current_size = 0
+        self._values = OrderedDict()
+        self._derived_roots = OrderedDict()
+        self._lock = Lock()
+
+        self._hit_count = COLLECTOR.counter(
+            'state_read_cache_hit_count', instance=self)
+        self._miss_count = COLLECTOR.counter(
+            'state_read_cache_miss_count', instance=self)
+
+    def read(self, tree, state_root, addresses):
+        """Returns the value of each address, from the cache if possible and
+        otherwise from the tree, caching what is read.
+
+        Args:
+            tree (MerkleDatabase): the tree, opened at state_root
+            state_root (str): the state root the addresses are read under
+            addresses (list of str): the addresses to read
+
+        Returns:
+            (list): (address, value) tuples, with None as the value of an
+                address that is not in the tree
+        """
+
+        found = {}
+        missing = []
+        with self._lock:
+            for address in addresses:
+                value = self._get(state_root, address)
+                if value is self._NOT_CACHED:
+                    missing.append(address)
+                else:
+                    found[address] = value
+
+        self._hit_count.inc(len(found))
+        self._miss_count.inc(len(missing))
+
+        if missing:
+            values = tree.get_multi(missing)
+            with self._lock:
+                for address, value in zip(missing, values):
+                    found[address] = value
+                    self._put(state_root, address, value)
+
+        return [(address, found[address]) for address in addresses]
+
+    def add_derived_root(self, state_root, parent_root, changed_addresses):
+        """Records that state_root was derived from parent_root by changing
+        changed_addresses, so that the other values cached under parent_root
+        also hold under state_root.
+
+        Args:
+            state_root (str): the derived state root
+            parent_root (str): the state root it was derived from
+            changed_addresses (set of str): the addresses set or deleted
+        """
+
+        if state_root == parent_root:
+            return
+
+        with self._lock:
+            self._derived_roots[state_root] = (parent_root, changed_addresses)
+            self._derived_roots.move_to_end(state_root)
+            while len(self._derived_roots) > self._MAX_DERIVED_ROOTS:
+                self._derived_roots.popitem(last=False)
+
+    def _get(self, state_root, address):
+        root = state_root
+        for _ in range(self._MAX_DERIVED_DEPTH + 1):
+            key = (root, address)
+            value = self._values.get(key, self._NOT_CACHED)
+            if value is not self._NOT_CACHED:
+                self._values.move_to_end(key)
+                if root != state_root:
+                    self._put(state_root, address, value)
+                return value
+
+            try:
+                root, changed_addresses = self._derived_roots[root]
+            except KeyError:
+                break
+
+            if address in changed_addresses:
+                break
+
+        return self._NOT_CACHED
+
+    def _put(self, state_root, address, value):
+        key = (state_root, address)
+        if key in self._values:
+            return
+
+        self._values[key] = value
+        self._current_size += self._entry_size(address, value)
+
+        while self._current_size > self._size and self._values:
+            (_, evicted_address), evicted_value = \
+                self._values.popitem(last=False)
+            self._current_size -= self._entry_size(
+                evicted_address, evicted_value)
+
+    def _entry_size(self, address, value):
+        if isinstance(value, bytes):
+            return self._ENTRY_OVERHEAD + len(address) + len(value)
+        return self._ENTRY_OVERHEAD + len(address)
+
+
+class _StateDeltaLog(object):
+    """A thread-safe record of the writes made by the most recent squashes,
+    keyed by the state root each derived and the root it was derived from,
+    so that the changes between two roots can be put together without going
+    back to the receipts.
+
+    A squash whose writes leave the state root unchanged, such as one that
+    sets addresses to the values they already had, cannot be told apart
+    from other such squashes of the same root. Changes are not put together
+    across a root that such a squash was made on, so that the receipts are
+    used instead.
+
+    The log is bounded by the approximate size of the writes it holds, as
+    well as by their number, and the oldest are evicted first.
+    """
+
+    # Rough per-entry cost of the entry tuple and its dict slot, and of each
+    # address and value object, on top of the address and value bytes.
+    _ENTRY_OVERHEAD = 200
+    _CHANGE_OVERHEAD = 100
+
+    # The number of squash results kept, and the number of those that are
+    # followed to find the changes from a parent root.
+    _MAX_DELTAS = 256
+    _MAX_DEPTH = 64
+
+    def __init__(self, size):
+        self._size = size
+        self._current_size = 0
+        # (state_root, parent_root) -> (updates, deletes, size)
+        self._deltas = OrderedDict()
+        # state_root -> the parent roots of its entries
+        self._parents = {}
+        self._lock = Lock()
+
+    def add(self, state_root, parent_root, updates, deletes):
+        """
+        Args:
+            state_root (str): the derived state root
+            parent_root (str): the state root it was derived from
+            updates (dict of str to bytes): the addresses set and their
+                values
+            deletes (set of str): the addresses deleted
+        """
+        key = (state_root, parent_root)
+        entry_size = \
+            self._ENTRY_OVERHEAD \
+            + sum(self._CHANGE_OVERHEAD + len(address) + len(value)
+                  for address, value in updates.items()) \
+            + sum(self._CHANGE_OVERHEAD + len(address) for address in deletes)
+
+        with self._lock:
+            if key in self._deltas:
+                self._remove(key)
+
+            # Writes too large to ever be kept are not recorded, and the
+            # changes will come from the receipts instead
+            if entry_size > self._size:
+                return
+
+            self._parents.setdefault(state_root, []).append(parent_root)
+            self._deltas[key] = (updates, deletes, entry_size)
+            self._current_size += entry_size
+            while len(self._deltas) > self._MAX_DELTAS \
+                    or self._current_size > self._size:
+                self._remove(next(iter(self._deltas)))
+
+    def _remove(self, key):
+        """Removes an entry. Must be called holding the lock.
+        """
+        root, parent = key
+        _, _, entry_size = self._deltas.pop(key)
+        self._current_size -= entry_size
+        parents = self._parents[root]
+        parents.remove(parent)
+        if not parents:
+            del self._parents[root]
+
+    def get(self, state_root, parent_root):
+        with self._lock:
+            if state_root == parent_root:
+                return None
+            path = self._find_path(state_root, parent_root)
+            if path is None:
+                return None
+            if any((root, root) in self._deltas for root in path):
+                return None
+            deltas = [
+                self._deltas[(root, parent)]
+                for root, parent in zip(path, path[1:])
+            ]
+
+        # The deltas are in order from the newest, so the first change
+        # found for an address is the latest
+        changes = {}
+        for updates, deletes, _ in deltas:
+            for address, value in updates.items():
+                if address not in changes:
+                    changes[address] = StateChange(
+                        address=address, value=value, type=StateChange.SET)
+            for address in deletes:
+                if address not in changes:
+                    changes[address] = StateChange(
+                        address=address, type=StateChange.DELETE)
+
+        return list(changes.values())
+
+    def _find_path(self, state_root, parent_root):
+        """Returns the roots from state_root back to parent_root, following
+        the recorded squashes, or None if there is no such path within
+        _MAX_DEPTH squashes. Must be called holding the lock.
+        """
+        stack = [[state_root]]
+        seen = {state_root}
+        while stack:
+            path = stack.pop()
+            if path[-1] == parent_root:
+                return path
+            if len(path) > self._MAX_DEPTH:
+                continue
+            for parent in self._parents.get(path[-1], ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(path + [parent])
+        return None
+
+
 class _ThreadsafeContexts(object):
     def __init__(self):
         self._lock = Lock()
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+from itertools import count
 import logging
 import uuid
 from threading import Condition
@@ -28,12 +29,215 @@ class AuthorizationException(Exception):
             "Not authorized to read/write to {}".format(address))
 
 
+# ChainWrites is a hash array mapped trie: each level of the trie is indexed
+# by the next _BITS bits of the hash of an address. Once the hash has been
+# used up, the deepest level is indexed by the address itself.
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_MAX_DEPTH = (_HASH_BITS + _BITS - 1) // _BITS
+
+# Contexts are numbered in the order they are created. A context is always
+# created after the contexts it is based on, so when two contexts in a chain
+# have written the same address, the one with the larger number wrote last.
+_CONTEXT_SEQUENCE = count()
+
+
+def _hash(address):
+    return hash(address) & ((1 << _HASH_BITS) - 1)
+
+
+def _slot(leaf, depth):
+    if depth < _MAX_DEPTH:
+        return (leaf[1] >> (depth * _BITS)) & _MASK
+    return leaf[0]
+
+
+def _latest(leaf, other):
+    return leaf if leaf[2] >= other[2] else other
+
+
+def _insert(node, leaf, depth, fresh):
+    """Returns the node with the leaf inserted, keeping the latest of it
+    and any leaf already there for the same address. Nodes whose ids are in
+    fresh were created by the current operation and are changed in place;
+    any other node is copied first.
+    """
+
+    if id(node) not in fresh:
+        node = dict(node)
+        fresh.add(id(node))
+
+    slot = _slot(leaf, depth)
+    current = node.get(slot)
+    if current is None:
+        node[slot] = leaf
+    elif isinstance(current, tuple):
+        if current[0] == leaf[0]:
+            node[slot] = _latest(leaf, current)
+        else:
+            child = {_slot(current, depth + 1): current}
+            fresh.add(id(child))
+            node[slot] = _insert(child, leaf, depth + 1, fresh)
+    else:
+        node[slot] = _insert(current, leaf, depth + 1, fresh)
+    return node
+
+
+def _merge(node, other, depth):
+    """Returns a node with the leaves of both nodes, keeping the latest
+    leaf for each address. Subtrees the nodes share are not visited.
+    """
+
+    if node is other or not other:
+        return node
+    if not node:
+        return other
+
+    merged = None
+    for slot, theirs in other.items():
+        ours = node.get(slot)
+        if ours is theirs:
+            continue
+
+        if ours is None:
+            result = theirs
+        elif isinstance(theirs, tuple):
+            if isinstance(ours, tuple) and ours[0] == theirs[0]:
+                result = _latest(ours, theirs)
+            elif isinstance(ours, tuple):
+                child = {_slot(ours, depth + 1): ours}
+                result = _insert(child, theirs, depth + 1, {id(child)})
+            else:
+                result = _insert(ours, theirs, depth + 1, set())
+        elif isinstance(ours, tuple):
+            result = _insert(theirs, ours, depth + 1, set())
+        else:
+            result = _merge(ours, theirs, depth + 1)
+
+        if result is not ours:
+            if merged is None:
+                merged = dict(node)
+            merged[slot] = result
+
+    return node if merged is None else merged
+
+
+def _leaves(node):
+    for value in node.values():
+        if isinstance(value, tuple):
+            yield value
+        else:
+            yield from _leaves(value)
+
+
+class ChainWrites(object):
+    """An immutable mapping of the addresses set or deleted in a chain of
+    contexts to their values, with None as the value of a deleted address.
+
+    Each entry records the sequence number of the context that made the
+    write, so that merging chains keeps the latest write to each address.
+    The entries are held in a hash array mapped trie, and a ChainWrites
+    derived from another shares every node it does not change, so the cost
+    of deriving one grows with the writes being added, and only with the
+    logarithm of the length of the chain.
+    """
+
+    __slots__ = ['_root']
+
+    def __init__(self, root=None):
+        self._root = root if root is not None else {}
+
+    def find(self, addresses):
+        """Looks up the values written to addresses in the chain.
+
+        Args:
+            addresses (list of str): The addresses to look up.
+
+        Returns:
+            (tuple): A list of (address, value) tuples for the addresses
+                written in the chain, and a list of the addresses that
+                were not.
+        """
+
+        found = []
+        not_found = []
+        for address in addresses:
+            leaf = (address, _hash(address))
+            value = self._root
+            depth = 0
+            while value is not None and not isinstance(value, tuple):
+                value = value.get(_slot(leaf, depth))
+                depth += 1
+
+            if value is not None and value[0] == address:
+                found.append((address, value[3]))
+            else:
+                not_found.append(address)
+        return found, not_found
+
+    def items(self):
+        """Yields (address, value) for every address written in the chain.
+        """
+
+        for address, _, _, value in _leaves(self._root):
+            yield address, value
+
+    def update(self, sequence, address_values):
+        """Returns a new ChainWrites with the writes of a context added.
+
+        Args:
+            sequence (int): The sequence number of the context, which must
+                be larger than that of every context already in the chain.
+            address_values (dict of str: bytes): The values set in the
+                context, with None for the addresses it deleted.
+
+        Returns:
+            (ChainWrites): The writes of the chain and the context.
+        """
+
+        if not address_values:
+            return self
+
+        root = self._root
+        fresh = set()
+        for address, value in address_values.items():
+            root = _insert(
+                root, (address, _hash(address), sequence, value), 0, fresh)
+
+        return ChainWrites(root)
+
+    @staticmethod
+    def merge(chains):
+        """Merges the writes of several chains, keeping the latest write to
+        each address. Parts of the chains they share are not copied.
+
+        Args:
+            chains (list of ChainWrites): The chains to merge.
+
+        Returns:
+            (ChainWrites): The writes of all of the chains.
+        """
+
+        unique = list({id(chain): chain for chain in chains}.values())
+        if not unique:
+            return ChainWrites()
+
+        merged = unique[0]
+        for chain in unique[1:]:
+            root = _merge(merged._root, chain._root, 0)
+            if root is not merged._root:
+                merged = ChainWrites(root)
+        return merged
+
+
 class ExecutionContext(object):
     """A thread-safe data structure holding address-_ContextFuture pairs and
     the addresses that can be written to and read from.
     """
 
-    def __init__(self, state_hash, read_list, write_list, base_context_ids):
+    def __init__(self, state_hash, read_list, write_list, base_context_ids,
+                 base_writes=None):
         """
 
         Args:
@@ -44,6 +248,8 @@ class ExecutionContext(object):
                 the transaction.
             base_context_ids (list of str): Context ids of contexts that this
                 context is based off of.
+            base_writes (ChainWrites): The writes made in the chain of
+                contexts that this context is based off of.
         """
 
         self._state_hash = state_hash
@@ -59,6 +265,13 @@ class ExecutionContext(object):
 
         self.base_contexts = base_context_ids
 
+        self._base_writes = base_writes if base_writes is not None \
+            else ChainWrites()
+        self._writes = None
+        self._chain_writes = None
+
+        self._sequence = next(_CONTEXT_SEQUENCE)
+
         self._id = uuid.uuid4().hex
 
         self._execution_data = []
@@ -72,6 +285,10 @@ class ExecutionContext(object):
     def merkle_root(self):
         return self._state_hash
 
+    @property
+    def base_writes(self):
+        return self._base_writes
+
     def _contains_and_deleted(self, address):
         return address in self._state and \
             self._state[address].deleted_in_context()
@@ -227,6 +444,55 @@ class ExecutionContext(object):
                     results[add] = fut.result()
             return results
 
+    def _get_writes(self):
+        # The writes can only be kept once the context is read only, as
+        # until then they may still change
+        if self._writes is not None:
+            return self._writes
+
+        writes = {}
+        for add, fut in self._state.items():
+            if fut.set_in_context():
+                writes[add] = fut.result()
+            elif fut.deleted_in_context():
+                writes[add] = None
+
+        if self._read_only:
+            self._writes = writes
+        return writes
+
+    def get_writes(self):
+        """Return the addresses set or deleted in the context, making the
+        context read only. Useful in the squash method.
+
+        Returns:
+            (tuple): The sequence number of the context, and a dict of the
+                addresses to the bytes set at them, or None if deleted.
+        """
+
+        self.make_read_only()
+        with self._lock:
+            return self._sequence, self._get_writes()
+
+    def get_chain_writes(self):
+        """Return the addresses set or deleted in the context and in the
+        chain of contexts it is based off of. Useful when creating a
+        context based off of this one.
+
+        Returns:
+            (ChainWrites): The writes of the context and its chain.
+        """
+
+        with self._lock:
+            if self._chain_writes is not None:
+                return self._chain_writes
+
+            chain_writes = self._base_writes.update(
+                self._sequence, self._get_writes())
+            if self._read_only:
+                self._chain_writes = chain_writes
+            return chain_writes
+
     def create_prefetch(self, addresses):
         """Create futures needed before starting the process of reading the
         address's value from the merkle tree.
@@ -313,6 +579,48 @@ class ExecutionContext(object):
                     self._state[address] = fut
                     fut.set_result(result=value)
 
+    def apply(self, address_value_dict, deleted_addresses, events, data):
+        """Called in the context manager's apply method to set and delete
+        addresses, and add events and execution data, together. Every
+        address is validated before any change is made.
+
+        Args:
+            address_value_dict (dict of str:bytes): The unique full
+                addresses with bytes to set at that address.
+            deleted_addresses (list of str): The unique full addresses to
+                delete.
+            events (list of Event): The events to add.
+            data (list of bytes): The execution data to add.
+
+        Raises:
+            AuthorizationException
+        """
+
+        with self._lock:
+            for address in address_value_dict:
+                self._validate_write(address)
+            for address in deleted_addresses:
+                self._validate_write(address)
+
+            for address, value in address_value_dict.items():
+                if address in self._state:
+                    self._state[address].set_result(result=value)
+                else:
+                    fut = _ContextFuture(address=address)
+                    self._state[address] = fut
+                    fut.set_result(result=value)
+
+            for address in deleted_addresses:
+                if address in self._state:
+                    self._state[address].set_deleted()
+                else:
+                    fut = _ContextFuture(address=address)
+                    self._state[address] = fut
+                    fut.set_deleted()
+
+            self._execution_events.extend(events)
+            self._execution_data.extend(data)
+
     def _validate_write(self, address):
         """Raises an exception if the address is not allowed to be set
         in this context, based on txn outputs.
@@ -43,33 +43,41 @@ class AddressNotInTree(Exception):
 
 
 class Node:
+    __slots__ = ['address', 'children', 'data']
+
     def __init__(self, address, data=None):
         self.address = address
-        self.children = set()
+        # Children are keyed by the first character of their address
+        # past this node's address, so finding the next step toward an
+        # address is a single dict lookup rather than a scan.
+        self.children = {}
         self.data = data
 
 
 class Tree:
     '''
-    This tree is a prefix tree: a node's address is always a strict
-    prefix of the addresses of its children, and every node either has
-    data or has multiple children.
+    This tree is a radix tree: a node's address is always a strict
+    prefix of the addresses of its children, every node either has
+    data or has multiple children, and no two children of a node share
+    the character that follows the node's address. Reaching an address
+    therefore takes at most one dict lookup per character of the
+    address.
     '''
     def __init__(self):
         self._root = Node('')
 
-    def _get_child(self, node, address):
-        for child in node.children:
+    @staticmethod
+    def _get_child(node, address):
+        child = node.children.get(address[len(node.address)])
+
+        if child is not None:
             if address.startswith(child.address):
                 return child
 
-        match = None
-
-        for child in node.children:
             if child.address.startswith(address):
-                match = child.address
+                raise AddressNotInTree(match=child.address)
 
-        raise AddressNotInTree(match=match)
+        raise AddressNotInTree()
 
     def _walk_to_address(self, address):
         node = self._root
@@ -140,7 +148,7 @@ class Tree:
         to_process = deque()
 
         to_process.extendleft(
-            node.children)
+            node.children.values())
 
         while to_process:
             node = to_process.pop()
@@ -149,73 +157,54 @@ class Tree:
 
             if node.children:
                 to_process.extendleft(
-                    node.children)
+                    node.children.values())
 
     def _get_or_create(self, address):
         # Walk as far down the tree as possible. If the desired
         # address is reached, return that node. Otherwise, add a new
         # one.
-        try:
-            for step in self._walk_to_address(address):
-                node = step
-
-            return node
-
-        except AddressNotInTree:
-            # The rest of the function deals with adding a new node,
-            # but there's no sense adding a level of indentation, so
-            # just pass here.
-            pass
-
-        # The address isn't in the tree, so a new node will be added
-        # one way or another.
-        new_node = Node(address)
+        node = self._root
 
-        # Try to get the next child with a matching prefix.
-        try:
+        while node.address < address:
             prefix_len = len(node.address)
+            key = address[prefix_len]
+            child = node.children.get(key)
 
-            match = next(
-                child
-                for child in node.children
-                if child.address[prefix_len:].startswith(
-                    address[prefix_len:][0])
-            )
+            # There's no child sharing the next character, so just add
+            # the new address as a child.
+            if child is None:
+                new_node = Node(address)
+                node.children[key] = new_node
+                return new_node
 
-        # There's no match, so just add the new address as a child.
-        except StopIteration:
-            node.children.add(new_node)
-            return new_node
-
-        # If node address is 'rustic' and the address being added is
-        # 'rust', then 'rust' will be the intermediate node taking
-        # 'rustic' as a child.
-        if match.address.startswith(address):
-            node.children.add(new_node)
-            new_node.children.add(match)
-            node.children.remove(match)
-            return new_node
-
-        # The address and the match address share a common prefix, so
-        # an intermediate node with the prefix as its address will
-        # take them both as children.
+            if address.startswith(child.address):
+                node = child
+                continue
 
-        shorter = (
-            address
-            if len(address) < len(match.address)
-            else match.address
-        )
+            new_node = Node(address)
 
-        for i in range(1, len(shorter)):
-            if address[i] != match.address[i]:
-                prefix = shorter[:i]
-                break
+            # If the child address is 'rustic' and the address being
+            # added is 'rust', then 'rust' will be the intermediate
+            # node taking 'rustic' as a child.
+            if child.address.startswith(address):
+                new_node.children[child.address[len(address)]] = child
+                node.children[key] = new_node
+                return new_node
+
+            # The address and the child address share a common prefix,
+            # so an intermediate node with the prefix as its address
+            # will take them both as children.
+            end = prefix_len + 1
+            while address[end] == child.address[end]:
+                end += 1
+
+            intermediate_node = Node(address[:end])
+            intermediate_node.children[address[end]] = new_node
+            intermediate_node.children[child.address[end]] = child
+            node.children[key] = intermediate_node
+            return new_node
 
-        intermediate_node = Node(prefix)
-        intermediate_node.children.update((new_node, match))
-        node.children.add(intermediate_node)
-        node.children.remove(match)
-        return new_node
+        return node
 
 
 class Predecessors:
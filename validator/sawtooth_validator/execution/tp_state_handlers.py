@@ -195,3 +195,49 @@ class TpEventAddHandler(Handler):
             status=HandlerStatus.RETURN,
             message_out=ack,
             message_type=validator_pb2.Message.TP_EVENT_ADD_RESPONSE)
+
+
+class TpStateApplyHandler(Handler):
+    def __init__(self, context_manager):
+        """
+
+        Args:
+            context_manager (sawtooth_validator.context_manager.
+            ContextManager):
+        """
+        self._context_manager = context_manager
+
+    def handle(self, connection_id, message_content):
+        apply_request = state_context_pb2.TpStateApplyRequest()
+        apply_request.ParseFromString(message_content)
+
+        try:
+            success = self._context_manager.apply(
+                apply_request.context_id,
+                {e.address: e.data for e in apply_request.entries},
+                list(apply_request.deleted_addresses),
+                list(apply_request.events),
+                list(apply_request.receipt_data))
+        except AuthorizationException:
+            response = state_context_pb2.TpStateApplyResponse(
+                status=state_context_pb2.
+                TpStateApplyResponse.AUTHORIZATION_ERROR)
+            return HandlerResult(
+                HandlerStatus.RETURN,
+                response,
+                validator_pb2.Message.TP_STATE_APPLY_RESPONSE)
+
+        response = state_context_pb2.TpStateApplyResponse(
+            status=state_context_pb2.TpStateApplyResponse.OK)
+        if success:
+            response.addresses.extend(
+                e.address for e in apply_request.entries)
+            response.deleted_addresses.extend(
+                apply_request.deleted_addresses)
+        else:
+            LOGGER.debug("APPLY: No Changes Applied")
+
+        return HandlerResult(
+            HandlerStatus.RETURN,
+            response,
+            validator_pb2.Message.TP_STATE_APPLY_RESPONSE)
@@ -362,18 +362,33 @@ class Gossip(object):
             exclude: A list of connection_ids that should be excluded from this
                 broadcast.
         """
+        if exclude is None:
+            exclude = []
+
         with self._lock:
-            if exclude is None:
-                exclude = []
-            for connection_id in self._peers.copy():
-                if connection_id not in exclude and \
-                        self._network.is_connection_handshake_complete(
-                            connection_id):
-                    self.send(
-                        message_type,
-                        gossip_message.SerializeToString(),
-                        connection_id,
-                        one_way=True)
+            connection_ids = [
+                connection_id for connection_id in self._peers
+                if connection_id not in exclude]
+
+        connection_ids = [
+            connection_id for connection_id in connection_ids
+            if self._network.is_connection_handshake_complete(connection_id)]
+        if not connection_ids:
+            return
+
+        invalid_connection_ids = self._network.broadcast(
+            message_type,
+            gossip_message.SerializeToString(),
+            connection_ids)
+
+        if invalid_connection_ids:
+            with self._lock:
+                for connection_id in invalid_connection_ids:
+                    LOGGER.debug("Connection %s is no longer valid. "
+                                 "Removing from list of peers.",
+                                 connection_id)
+                    if connection_id in self._peers:
+                        del self._peers[connection_id]
 
     def connect_success(self, connection_id):
         """
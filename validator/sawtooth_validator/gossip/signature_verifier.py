@@ -13,10 +13,14 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+from collections import OrderedDict
 import logging
 import hashlib
+from threading import Lock
+from threading import local
 
 from sawtooth_signing import create_context
+from sawtooth_signing import ParseError
 from sawtooth_signing.secp256k1 import Secp256k1PublicKey
 
 from sawtooth_validator.protobuf import client_batch_submit_pb2
@@ -35,86 +39,187 @@ from sawtooth_validator.journal.timed_cache import TimedCache
 LOGGER = logging.getLogger(__name__)
 COLLECTOR = metrics.get_collector(__name__)
 
+DEFAULT_PUBLIC_KEY_CACHE_SIZE = 1024
+
+
+class _PublicKeyCache:
+    """A thread-safe, size-bounded cache of parsed public keys, keyed by
+    their hex encoding. The least recently used key is evicted first.
+    """
+
+    def __init__(self, size=DEFAULT_PUBLIC_KEY_CACHE_SIZE):
+        self._size = size
+        self._keys = OrderedDict()
+        self._lock = Lock()
+
+        self._hit_count = COLLECTOR.counter(
+            'public_key_cache_hit_count', instance=self)
+        self._miss_count = COLLECTOR.counter(
+            'public_key_cache_miss_count', instance=self)
+
+    def get(self, public_key_hex):
+        """Returns the parsed public key for the given hex string.
+
+        Raises:
+            ParseError: if the public key is invalid
+        """
+        with self._lock:
+            public_key = self._keys.get(public_key_hex)
+            if public_key is not None:
+                self._keys.move_to_end(public_key_hex)
+                self._hit_count.inc()
+                return public_key
+
+        self._miss_count.inc()
+        public_key = Secp256k1PublicKey.from_hex(public_key_hex)
+
+        with self._lock:
+            self._keys[public_key_hex] = public_key
+            while len(self._keys) > self._size:
+                self._keys.popitem(last=False)
+
+        return public_key
+
+
+class SignatureVerifier:
+    """Verifies the signatures of blocks, batches and transactions.
+
+    A signing context is kept per thread, and parsed public keys are cached,
+    as most signatures come from a small set of signers. If a thread pool is
+    provided, the batches of a block or batch list are verified in parallel
+    across it; libsecp256k1 is called without holding the GIL.
+
+    Args:
+        thread_pool (:obj:`Executor`, optional): the pool used to verify
+            batches in parallel. It must not be the pool running the calling
+            handlers, or a handler could wait on work queued behind it.
+        public_key_cache_size (int): the number of public keys to cache
+    """
+
+    def __init__(self, thread_pool=None,
+                 public_key_cache_size=DEFAULT_PUBLIC_KEY_CACHE_SIZE):
+        self._thread_pool = thread_pool
+        self._public_keys = _PublicKeyCache(public_key_cache_size)
+        self._local = local()
+
+    def _verify(self, signature, header_bytes, public_key_hex):
+        try:
+            context = self._local.context
+        except AttributeError:
+            context = create_context('secp256k1')
+            self._local.context = context
+
+        try:
+            public_key = self._public_keys.get(public_key_hex)
+        except ParseError:
+            return False
 
-def is_valid_block(block):
-    # validate block signature
-    header = BlockHeader()
-    header.ParseFromString(block.header)
+        return context.verify(signature, header_bytes, public_key)
 
-    context = create_context('secp256k1')
-    public_key = Secp256k1PublicKey.from_hex(header.signer_public_key)
-    if not context.verify(block.header_signature,
-                          block.header,
-                          public_key):
-        LOGGER.debug("block failed signature validation: %s",
-                     block.header_signature)
-        return False
+    def is_valid_block(self, block):
+        # validate block signature
+        header = BlockHeader()
+        header.ParseFromString(block.header)
 
-    # validate all batches in block. These are not all batches in the
-    # batch_ids stored in the block header, only those sent with the block.
-    if not all(map(is_valid_batch, block.batches)):
-        return False
+        if not self._verify(block.header_signature,
+                            block.header,
+                            header.signer_public_key):
+            LOGGER.debug("block failed signature validation: %s",
+                         block.header_signature)
+            return False
 
-    return True
+        # validate all batches in block. These are not all batches in the
+        # batch_ids stored in the block header, only those sent with the
+        # block.
+        return all(self.verify_batches(block.batches))
 
+    def verify_batches(self, batches):
+        """Verifies a list of batches, in parallel if a thread pool was
+        provided.
 
-def is_valid_batch(batch):
-    # validate batch signature
-    header = BatchHeader()
-    header.ParseFromString(batch.header)
-
-    context = create_context('secp256k1')
-    public_key = Secp256k1PublicKey.from_hex(header.signer_public_key)
-    if not context.verify(batch.header_signature,
-                          batch.header,
-                          public_key):
-        LOGGER.debug("batch failed signature validation: %s",
-                     batch.header_signature)
-        return False
-
-    # validate all transactions in batch
-    for txn in batch.transactions:
-        if not is_valid_transaction(txn):
+        Args:
+            batches (list of Batch): the batches to verify
+
+        Returns:
+            list of bool: the verdict for each batch, in the given order
+        """
+        if self._thread_pool is None or len(batches) < 2:
+            return [self.is_valid_batch(batch) for batch in batches]
+
+        return list(self._thread_pool.map(self.is_valid_batch, batches))
+
+    def is_valid_batch(self, batch):
+        # validate batch signature
+        header = BatchHeader()
+        header.ParseFromString(batch.header)
+
+        if not self._verify(batch.header_signature,
+                            batch.header,
+                            header.signer_public_key):
+            LOGGER.debug("batch failed signature validation: %s",
+                         batch.header_signature)
             return False
 
-        txn_header = TransactionHeader()
-        txn_header.ParseFromString(txn.header)
-        if txn_header.batcher_public_key != header.signer_public_key:
-            LOGGER.debug("txn batcher public_key does not match signer"
-                         "public_key for batch: %s txn: %s",
-                         batch.header_signature,
+        # validate all transactions in batch
+        for txn in batch.transactions:
+            txn_header = TransactionHeader()
+            txn_header.ParseFromString(txn.header)
+
+            if not self._is_valid_transaction(txn, txn_header):
+                return False
+
+            if txn_header.batcher_public_key != header.signer_public_key:
+                LOGGER.debug("txn batcher public_key does not match signer"
+                             "public_key for batch: %s txn: %s",
+                             batch.header_signature,
+                             txn.header_signature)
+                return False
+
+        return True
+
+    def is_valid_transaction(self, txn):
+        header = TransactionHeader()
+        header.ParseFromString(txn.header)
+
+        return self._is_valid_transaction(txn, header)
+
+    def _is_valid_transaction(self, txn, header):
+        # validate transactions signature
+        if not self._verify(txn.header_signature,
+                            txn.header,
+                            header.signer_public_key):
+            LOGGER.debug("transaction signature invalid for txn: %s",
                          txn.header_signature)
             return False
 
-    return True
+        # verify the payload field matches the header
+        txn_payload_sha512 = hashlib.sha512(txn.payload).hexdigest()
+        if txn_payload_sha512 != header.payload_sha512:
+            LOGGER.debug("payload doesn't match payload_sha512 of the header"
+                         "for txn: %s", txn.header_signature)
+            return False
 
+        return True
 
-def is_valid_transaction(txn):
-    # validate transactions signature
-    header = TransactionHeader()
-    header.ParseFromString(txn.header)
 
-    context = create_context('secp256k1')
-    public_key = Secp256k1PublicKey.from_hex(header.signer_public_key)
-    if not context.verify(txn.header_signature,
-                          txn.header,
-                          public_key):
-        LOGGER.debug("transaction signature invalid for txn: %s",
-                     txn.header_signature)
-        return False
+_DEFAULT_VERIFIER = SignatureVerifier()
 
-    # verify the payload field matches the header
-    txn_payload_sha512 = hashlib.sha512(txn.payload).hexdigest()
-    if txn_payload_sha512 != header.payload_sha512:
-        LOGGER.debug("payload doesn't match payload_sha512 of the header"
-                     "for txn: %s", txn.header_signature)
-        return False
 
-    return True
+def is_valid_block(block):
+    return _DEFAULT_VERIFIER.is_valid_block(block)
+
+
+def is_valid_batch(batch):
+    return _DEFAULT_VERIFIER.is_valid_batch(batch)
+
+
+def is_valid_transaction(txn):
+    return _DEFAULT_VERIFIER.is_valid_transaction(txn)
 
 
 class GossipMessageSignatureVerifier(Handler):
-    def __init__(self):
+    def __init__(self, verifier=None):
+        self._verifier = verifier or _DEFAULT_VERIFIER
         self._seen_cache = TimedCache()
         self._batch_dropped_count = COLLECTOR.counter(
             'already_validated_batch_dropped_count', instance=self)
@@ -129,7 +234,7 @@ class GossipMessageSignatureVerifier(Handler):
                 self._block_dropped_count.inc()
                 return HandlerResult(status=HandlerStatus.DROP)
 
-            if not is_valid_block(obj):
+            if not self._verifier.is_valid_block(obj):
                 LOGGER.debug("block signature is invalid: %s",
                              obj.header_signature)
                 return HandlerResult(status=HandlerStatus.DROP)
@@ -142,7 +247,7 @@ class GossipMessageSignatureVerifier(Handler):
                 self._batch_dropped_count.inc()
                 return HandlerResult(status=HandlerStatus.DROP)
 
-            if not is_valid_batch(obj):
+            if not self._verifier.is_valid_batch(obj):
                 LOGGER.debug("batch signature is invalid: %s",
                              obj.header_signature)
                 return HandlerResult(status=HandlerStatus.DROP)
@@ -155,7 +260,8 @@ class GossipMessageSignatureVerifier(Handler):
 
 
 class GossipBlockResponseSignatureVerifier(Handler):
-    def __init__(self):
+    def __init__(self, verifier=None):
+        self._verifier = verifier or _DEFAULT_VERIFIER
         self._seen_cache = TimedCache()
         self._block_dropped_count = COLLECTOR.counter(
             'already_validated_block_dropped_count', instance=self)
@@ -167,7 +273,7 @@ class GossipBlockResponseSignatureVerifier(Handler):
             self.block_dropped_count.inc()
             return HandlerResult(status=HandlerStatus.DROP)
 
-        if not is_valid_block(block):
+        if not self._verifier.is_valid_block(block):
             LOGGER.debug("requested block's signature is invalid: %s",
                          block.header_signature)
             return HandlerResult(status=HandlerStatus.DROP)
@@ -177,7 +283,8 @@ class GossipBlockResponseSignatureVerifier(Handler):
 
 
 class GossipBatchResponseSignatureVerifier(Handler):
-    def __init__(self):
+    def __init__(self, verifier=None):
+        self._verifier = verifier or _DEFAULT_VERIFIER
         self._seen_cache = TimedCache()
         self._batch_dropped_count = COLLECTOR.counter(
             'already_validated_batch_dropped_count', instance=self)
@@ -189,7 +296,7 @@ class GossipBatchResponseSignatureVerifier(Handler):
             self._batch_dropped_count.inc()
             return HandlerResult(status=HandlerStatus.DROP)
 
-        if not is_valid_batch(batch):
+        if not self._verifier.is_valid_batch(batch):
             LOGGER.debug("requested batch's signature is invalid: %s",
                          batch.header_signature)
             return HandlerResult(status=HandlerStatus.DROP)
@@ -199,6 +306,9 @@ class GossipBatchResponseSignatureVerifier(Handler):
 
 
 class BatchListSignatureVerifier(Handler):
+    def __init__(self, verifier=None):
+        self._verifier = verifier or _DEFAULT_VERIFIER
+
     def handle(self, connection_id, message_content):
         response_proto = client_batch_submit_pb2.ClientBatchSubmitResponse
 
@@ -213,7 +323,12 @@ class BatchListSignatureVerifier(Handler):
                 LOGGER.debug("TRACE %s: %s", batch.header_signature,
                              self.__class__.__name__)
 
-        if not all(map(is_valid_batch, message_content.batches)):
+        verdicts = self._verifier.verify_batches(message_content.batches)
+        if not all(verdicts):
+            for batch, valid in zip(message_content.batches, verdicts):
+                if not valid:
+                    LOGGER.debug("submitted batch's signature is invalid: %s",
+                                 batch.header_signature)
             return make_response(response_proto.INVALID_BATCH)
 
         return HandlerResult(status=HandlerStatus.PASS)
@@ -19,6 +19,7 @@ from collections.abc import MutableMapping
 from sawtooth_validator.journal.block_wrapper import BlockStatus
 from sawtooth_validator.journal.block_wrapper import BlockWrapper
 from sawtooth_validator.protobuf.block_pb2 import Block
+from sawtooth_validator.protobuf.block_pb2 import BlockHeader
 from sawtooth_validator.state.merkle import INIT_ROOT_KEY
 
 
@@ -73,7 +74,9 @@ class BlockStore(MutableMapping):
     @staticmethod
     def deserialize_block(value):
         """
-        Deserialize a byte string into a BlockWrapper
+        Deserialize a byte string into a BlockWrapper. Only the block's
+        header and header signature are read up front; the batches are
+        parsed the first time the block itself is accessed.
 
         Args:
             value (bytes): the byte string to deserialze
@@ -83,11 +86,7 @@ class BlockStore(MutableMapping):
         """
         # Block id strings are stored under batch/txn ids for reference.
         # Only Blocks, not ids or Nones, should be returned by _get_block.
-        block = Block()
-        block.ParseFromString(value)
-        return BlockWrapper(
-            status=BlockStatus.Valid,
-            block=block)
+        return _StoredBlockWrapper(value)
 
     @staticmethod
     def serialize_block(blkw):
@@ -100,6 +99,9 @@ class BlockStore(MutableMapping):
         Returns:
             bytes: the serialized bytes
         """
+        if isinstance(blkw, _StoredBlockWrapper) and blkw.unparsed:
+            return blkw.unparsed
+
         return blkw.block.SerializeToString()
 
     def update_chain(self, new_chain, old_chain=None):
@@ -175,7 +177,10 @@ class BlockStore(MutableMapping):
                 opposite order.
 
         Returns:
-            An iterator of block wrappers
+            An iterator of block wrappers. Blocks read from the store are
+            parsed lazily, so consumers which only look at the block
+            headers, such as for paging, do not pay for parsing the
+            batches of every block they skip over.
 
         Raises:
             ValueError: If start_block or start_block_num do not specify a
@@ -202,6 +207,106 @@ class BlockStore(MutableMapping):
             for block in iterator:
                 yield block
 
+    def get_batch_iter(self, head_block, start_batch_id=None, reverse=True):
+        """Returns an iterator over the batches of the chain ending at
+        head_block, seeking directly to the block containing the start batch.
+
+        Batches are ordered by (block_num, position in block), from the head
+        to the genesis block if reverse is True, or the opposite order
+        otherwise.
+
+        Args:
+            head_block (:obj:`BlockWrapper`): the last block of the chain to
+                iterate over
+            start_batch_id (str): the id of the batch to start from; if not
+                provided, iteration begins at one end of the chain
+            reverse (bool): If True, traverse from the head block to the
+                genesis block
+
+        Returns:
+            An iterator of batches
+
+        Raises:
+            ValueError: If the start batch is not in the chain ending at the
+                head block
+        """
+        start_block = None
+        if start_batch_id:
+            start_block = self.get_block_by_batch_id(start_batch_id)
+
+        return self._get_block_content_iter(
+            head_block, start_block, start_batch_id, reverse,
+            lambda blkw: blkw.batches)
+
+    def get_transaction_iter(self, head_block, start_transaction_id=None,
+                             reverse=True):
+        """Returns an iterator over the transactions of the chain ending at
+        head_block, seeking directly to the block containing the start
+        transaction.
+
+        Transactions are ordered by (block_num, position in block), from the
+        head to the genesis block if reverse is True, or the opposite order
+        otherwise.
+
+        Args:
+            head_block (:obj:`BlockWrapper`): the last block of the chain to
+                iterate over
+            start_transaction_id (str): the id of the transaction to start
+                from; if not provided, iteration begins at one end of the chain
+            reverse (bool): If True, traverse from the head block to the
+                genesis block
+
+        Returns:
+            An iterator of transactions
+
+        Raises:
+            ValueError: If the start transaction is not in the chain ending
+                at the head block
+        """
+        start_block = None
+        if start_transaction_id:
+            start_block = self.get_block_by_transaction_id(
+                start_transaction_id)
+
+        return self._get_block_content_iter(
+            head_block, start_block, start_transaction_id, reverse,
+            lambda blkw: [txn for batch in blkw.batches
+                          for txn in batch.transactions])
+
+    def _get_block_content_iter(self, head_block, start_block, start_id,
+                                reverse, block_xform):
+        if start_block is None:
+            if reverse:
+                start_block = head_block
+        elif start_block.block_num > head_block.block_num:
+            raise ValueError(
+                '{} is not in the chain ending at {}'.format(
+                    start_id, head_block.identifier))
+
+        return self._iter_block_content(
+            head_block.block_num, start_block, start_id, reverse, block_xform)
+
+    def _iter_block_content(self, head_block_num, start_block, start_id,
+                            reverse, block_xform):
+        for blkw in self.get_block_iter(start_block=start_block,
+                                        reverse=reverse):
+            if blkw.block_num > head_block_num:
+                return
+
+            # A forward listing also reverses the items of each block, so
+            # that it is the exact reverse of the head-first listing.
+            items = block_xform(blkw)
+            if not reverse:
+                items = reversed(items)
+
+            for item in items:
+                if start_id is not None:
+                    if item.header_signature != start_id:
+                        continue
+                    start_id = None
+
+                yield item
+
     @staticmethod
     def _batch_index_keys(block):
         blkw = BlockWrapper.wrap(block)
@@ -471,3 +576,128 @@ class BlockStore(MutableMapping):
         raise ValueError(
             'Transaction {} not in block {}: possible index mismatch'.format(
                 txn_id, block.identifier))
+
+
+# Field numbers of the Block message, from block.proto
+_BLOCK_HEADER_FIELD = 1
+_BLOCK_HEADER_SIGNATURE_FIELD = 2
+_LENGTH_DELIMITED = 2
+
+
+def _decode_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_block_header_fields(packed):
+    """Reads the header and header_signature fields of a serialized Block
+    without parsing its batches.
+
+    Both fields precede the batches in the serialized block, so the scan
+    stops as soon as both have been seen.
+
+    Args:
+        packed (bytes): a serialized Block
+
+    Returns:
+        tuple: the header bytes and the header signature, or None if the
+            block is not laid out as expected
+    """
+    header = None
+    header_signature = None
+    pos = 0
+
+    try:
+        while pos < len(packed) and (
+                header is None or header_signature is None):
+            tag, pos = _decode_varint(packed, pos)
+            if tag & 0x7 != _LENGTH_DELIMITED:
+                return None
+
+            length, pos = _decode_varint(packed, pos)
+            end = pos + length
+            if end > len(packed):
+                return None
+
+            field_number = tag >> 3
+            if field_number == _BLOCK_HEADER_FIELD:
+                header = packed[pos:end]
+            elif field_number == _BLOCK_HEADER_SIGNATURE_FIELD:
+                header_signature = packed[pos:end].decode()
+
+            pos = end
+    except (IndexError, UnicodeDecodeError):
+        return None
+
+    return header or b'', header_signature or ''
+
+
+class _StoredBlockWrapper(BlockWrapper):
+    """A BlockWrapper over a block's serialized bytes, as read from the
+    block store. The header and header signature are read directly from
+    the bytes; the full Block is only parsed when it is accessed.
+    """
+
+    def __init__(self, packed):
+        self._block = None
+        self._packed = packed
+        super().__init__(block=None, status=BlockStatus.Valid)
+
+        fields = _read_block_header_fields(packed)
+        if fields is None:
+            self._parse()
+            self._header_bytes = self._block.header
+            self._header_signature = self._block.header_signature
+        else:
+            self._header_bytes, self._header_signature = fields
+
+    def _parse(self):
+        block = Block()
+        block.ParseFromString(self._packed)
+        self._block = block
+
+    @property
+    def unparsed(self):
+        """
+        Returns the serialized block if it has not been parsed, and so
+        cannot have been modified, otherwise None.
+        """
+        if self._block is None:
+            return self._packed
+        return None
+
+    @property
+    def block(self):
+        if self._block is None:
+            self._parse()
+        return self._block
+
+    @block.setter
+    def block(self, block):
+        if block is not None:
+            self._block = block
+            self._block_header = None
+            self._header_bytes = block.header
+            self._header_signature = block.header_signature
+
+    @property
+    def header(self):
+        if self._block_header is None:
+            self._block_header = BlockHeader()
+            self._block_header.ParseFromString(self._header_bytes)
+        return self._block_header
+
+    @property
+    def header_signature(self):
+        return self._header_signature
+
+    @property
+    def identifier(self):
+        return self._header_signature
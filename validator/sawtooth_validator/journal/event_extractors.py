@@ -13,9 +13,15 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+from operator import attrgetter
+
 from sawtooth_validator.server.events.extractor import EventExtractor
 from sawtooth_validator.protobuf.events_pb2 import Event
-from sawtooth_validator.protobuf.transaction_receipt_pb2 import StateChangeList
+
+STATE_DELTA_EVENT_TYPE = "sawtooth/state-delta"
+
+# The tag of StateChangeList.state_changes, field 1 of wire type 2
+_STATE_CHANGES_TAG = b'\x0a'
 
 
 class BlockEventExtractor(EventExtractor):
@@ -42,9 +48,124 @@ class BlockEventExtractor(EventExtractor):
         return None
 
 
+class StateDelta(object):
+    """The squashed state changes of a block, indexed by address.
+
+    Each change is serialized once, so that the StateChangeList of any
+    subset of the addresses can be put together without parsing or
+    serializing the rest of the changes.
+    """
+
+    def __init__(self, state_changes):
+        """
+        Args:
+            state_changes (iterable of StateChange): The changes, with at
+                most one per address.
+        """
+        state_changes = sorted(state_changes, key=attrgetter('address'))
+        self._addresses = [change.address for change in state_changes]
+        self._encoded = [
+            _encode_state_change(change) for change in state_changes]
+
+    @classmethod
+    def from_receipts(cls, receipts):
+        """Squashes the state changes of the receipts, in order, keeping
+        the last change to each address.
+        """
+        squashed = {}
+        for receipt in reversed(receipts):
+            for state_change in reversed(receipt.state_changes):
+                squashed.setdefault(state_change.address, state_change)
+        return cls(squashed.values())
+
+    @property
+    def addresses(self):
+        """The addresses changed, in sorted order."""
+        return self._addresses
+
+    @property
+    def size(self):
+        """The approximate number of bytes the changes take up."""
+        return sum(len(encoded) for encoded in self._encoded) + \
+            sum(len(address) for address in self._addresses)
+
+    def select(self, subscriptions):
+        """Returns the indices of the addresses covered by the
+        address filters of the state delta subscriptions, or None if any
+        of them covers every address.
+
+        A subscription with several address filters is sent the event if
+        each filter matches some address, not necessarily the same one, so
+        it covers the addresses matched by any of its filters.
+        """
+        selected = set()
+        for subscription in subscriptions:
+            if subscription.event_type != STATE_DELTA_EVENT_TYPE:
+                continue
+
+            address_filters = [
+                event_filter for event_filter in subscription.filters
+                if event_filter.key == "address"
+            ]
+            if not address_filters:
+                return None
+
+            for event_filter in address_filters:
+                selected.update(event_filter.select(self._addresses))
+
+        return sorted(selected)
+
+    def make_event(self, indices=None):
+        """Makes the state delta event for the changes at the given
+        indices, or for every change if indices is None.
+        """
+        if indices is None:
+            addresses = self._addresses
+            encoded = self._encoded
+        else:
+            addresses = [self._addresses[i] for i in indices]
+            encoded = [self._encoded[i] for i in indices]
+
+        return Event(
+            event_type=STATE_DELTA_EVENT_TYPE,
+            attributes=[
+                Event.Attribute(key="address", value=address)
+                for address in addresses
+            ],
+            data=b''.join(encoded))
+
+
+def _encode_state_change(state_change):
+    """Encodes the state change as an element of
+    StateChangeList.state_changes.
+    """
+    data = state_change.SerializeToString()
+    size = len(data)
+    varint = bytearray()
+    while size > 0x7f:
+        varint.append((size & 0x7f) | 0x80)
+        size >>= 7
+    varint.append(size)
+    return _STATE_CHANGES_TAG + bytes(varint) + data
+
+
 class ReceiptEventExtractor(EventExtractor):
-    def __init__(self, receipts):
+    def __init__(self, receipts, state_delta=None):
+        """
+        Args:
+            receipts (list of TransactionReceipt): The receipts of a block
+            state_delta (:obj:`StateDelta`): The block's squashed state
+                changes, if already known; otherwise they are squashed
+                from the receipts when needed.
+        """
         self._receipts = receipts
+        self._state_delta = state_delta
+
+    @property
+    def state_delta(self):
+        if self._state_delta is None:
+            self._state_delta = StateDelta.from_receipts(self._receipts)
+        return self._state_delta
 
     def extract(self, subscriptions):
         if not subscriptions:
@@ -61,36 +182,19 @@ class ReceiptEventExtractor(EventExtractor):
                 for subscription in subscriptions:
                     if event in subscription:
                         events.append(event)
+                        break
         return events
 
     def _make_state_delta_events(self, subscriptions):
         gen = False
         for subscription in subscriptions:
-            if subscription.event_type == "sawtooth/state-delta":
+            if subscription.event_type == STATE_DELTA_EVENT_TYPE:
                 gen = True
 
         if not gen:
             return []
 
-        addresses = set()
-        attributes = []
-        squashed_changes = []
-        for receipt in reversed(self._receipts):
-            for state_change in reversed(receipt.state_changes):
-                address = state_change.address
-                if address not in addresses:
-                    addresses.add(address)
-                    attributes.append(
-                        Event.Attribute(key="address", value=address))
-                    squashed_changes.append(state_change)
-
-        state_change_list = StateChangeList()
-        state_change_list.state_changes.extend(squashed_changes)
-
-        event = Event(
-            event_type="sawtooth/state-delta",
-            attributes=attributes,
-            data=state_change_list.SerializeToString())
+        event = self.state_delta.make_event()
 
         for subscription in subscriptions:
             if event in subscription:
@@ -52,6 +52,19 @@ class TransactionReceiptStore(ChainObserver):
         """
         self._receipt_db[txn_id] = txn_receipt.SerializeToString()
 
+    def put_multi(self, txn_receipts):
+        """Add the given transaction receipts to the store, in one write to
+        the backing store.
+
+        Args:
+            txn_receipts (:iterable:`tuple`): an iterable of transaction id
+                and TransactionReceipt pairs to store.
+        """
+        self._receipt_db.put_multi([
+            (txn_id, txn_receipt.SerializeToString())
+            for txn_id, txn_receipt in txn_receipts
+        ])
+
     def get(self, txn_id):
         """Returns the TransactionReceipt
 
@@ -65,17 +78,35 @@ class TransactionReceiptStore(ChainObserver):
         Raises:
             KeyError: if the transaction id is unknown.
         """
-        if txn_id not in self._receipt_db:
-            raise KeyError('Unknown transaction id {}'.format(txn_id))
+        for _, txn_receipt in self.get_multi([txn_id]):
+            return txn_receipt
 
-        txn_receipt_bytes = self._receipt_db[txn_id]
-        txn_receipt = TransactionReceipt()
-        txn_receipt.ParseFromString(txn_receipt_bytes)
-        return txn_receipt
+        raise KeyError('Unknown transaction id {}'.format(txn_id))
+
+    def get_multi(self, txn_ids):
+        """Returns the TransactionReceipts for the given transaction ids, read
+        from the backing store at once.
+
+        Args:
+            txn_ids (:iterable:str): the ids of the transactions for which
+                the receipts should be retrieved.
+
+        Returns:
+            list of (str, TransactionReceipt): The transaction ids and
+                receipts found, in the order requested. Unknown transaction
+                ids are left out.
+        """
+        txn_receipts = []
+        for txn_id, txn_receipt_bytes in self._receipt_db.get_multi(txn_ids):
+            txn_receipt = TransactionReceipt()
+            txn_receipt.ParseFromString(txn_receipt_bytes)
+            txn_receipts.append((txn_id, txn_receipt))
+
+        return txn_receipts
 
     def chain_update(self, block, receipts):
-        for receipt in receipts:
-            self.put(receipt.transaction_id, receipt)
+        self.put_multi(
+            (receipt.transaction_id, receipt) for receipt in receipts)
 
 
 class ClientReceiptGetRequestHandler(Handler):
@@ -89,15 +120,14 @@ class ClientReceiptGetRequestHandler(Handler):
         request = ClientReceiptGetRequest()
         request.ParseFromString(message_content)
 
-        try:
+        txn_receipts = self._txn_receipt_store.get_multi(
+            request.transaction_ids)
+
+        if len(txn_receipts) == len(request.transaction_ids):
             response = ClientReceiptGetResponse(
-                receipts=[
-                    self._txn_receipt_store.get(txn_id)
-                    for txn_id in request.transaction_ids
-                ],
+                receipts=[txn_receipt for _, txn_receipt in txn_receipts],
                 status=ClientReceiptGetResponse.OK)
-
-        except KeyError:
+        else:
             response = ClientReceiptGetResponse(
                 status=ClientReceiptGetResponse.NO_RESOURCE)
 
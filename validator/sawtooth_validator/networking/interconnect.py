@@ -372,6 +372,14 @@ class _SendReceive(object):
         """
         :param msg: protobuf validator_pb2.Message
         """
+        self.send_message_bytes(msg.SerializeToString(), connection_id)
+
+    def send_message_bytes(self, msg_bytes, connection_id=None):
+        """Sends an already serialized message, so that the same bytes can be
+        sent to several connections without serializing them again.
+
+        :param msg_bytes: bytes of a serialized validator_pb2.Message
+        """
         zmq_identity = None
         if connection_id is not None and self._connections is not None:
             if connection_id in self._connections:
@@ -386,10 +394,9 @@ class _SendReceive(object):
         self._ready.wait()
 
         if zmq_identity is None:
-            message_bundle = [msg.SerializeToString()]
+            message_bundle = [msg_bytes]
         else:
-            message_bundle = [bytes(zmq_identity),
-                              msg.SerializeToString()]
+            message_bundle = [bytes(zmq_identity), msg_bytes]
 
         try:
             asyncio.run_coroutine_threadsafe(
@@ -1006,6 +1013,38 @@ class Interconnect(object):
                 futures.append(self.send(message_type, data, connection_id))
         return futures
 
+    def broadcast(self, message_type, data, connection_ids):
+        """Sends the same one-way message to each of the given connections.
+
+        The message envelope is built and serialized once, and the same
+        bytes are written to every connection.
+
+        :param message_type: validator_pb2.Message.* enum value
+        :param data: bytes serialized protobuf
+        :param connection_ids: the identities of the connections to send to
+        :return: list of the connection ids which are no longer valid
+        """
+        message_bytes = validator_pb2.Message(
+            correlation_id=_generate_id(),
+            content=data,
+            message_type=message_type).SerializeToString()
+
+        invalid_connection_ids = []
+        for connection_id in connection_ids:
+            connection_info = self._connections.get(connection_id)
+            if connection_info is None:
+                invalid_connection_ids.append(connection_id)
+                continue
+
+            if connection_info.connection_type == \
+                    ConnectionType.ZMQ_IDENTITY:
+                self._send_receive_thread.send_message_bytes(
+                    message_bytes, connection_id=connection_id)
+            else:
+                connection_info.connection.send_message_bytes(message_bytes)
+
+        return invalid_connection_ids
+
     def send(self, message_type, data, connection_id, callback=None,
              one_way=False):
         """
@@ -1316,6 +1355,14 @@ class OutboundConnection(object):
         self._send_receive_thread.send_message(message)
         return fut
 
+    def send_message_bytes(self, message_bytes):
+        """Sends an already serialized, one-way message.
+
+        Args:
+            message_bytes (bytes): a serialized validator_pb2.Message
+        """
+        self._send_receive_thread.send_message_bytes(message_bytes)
+
     def send_last_message(self, message_type, data, callback=None,
                           one_way=False):
         """Sends a message of message_type and then close the connection.
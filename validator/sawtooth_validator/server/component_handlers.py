@@ -63,6 +63,7 @@ def add(
         thread_pool,
         client_thread_pool,
         sig_pool,
+        sig_verifier,
         block_publisher,
 ):
 
@@ -92,6 +93,11 @@ def add(
         tp_state_handlers.TpStateSetHandler(context_manager),
         thread_pool)
 
+    dispatcher.add_handler(
+        validator_pb2.Message.TP_STATE_APPLY_REQUEST,
+        tp_state_handlers.TpStateApplyHandler(context_manager),
+        thread_pool)
+
     dispatcher.add_handler(
         validator_pb2.Message.TP_REGISTER_REQUEST,
         processor_handlers.ProcessorRegisterHandler(
@@ -126,7 +132,7 @@ def add(
 
     dispatcher.add_handler(
         validator_pb2.Message.CLIENT_BATCH_SUBMIT_REQUEST,
-        signature_verifier.BatchListSignatureVerifier(),
+        signature_verifier.BatchListSignatureVerifier(sig_verifier),
         sig_pool)
 
     dispatcher.add_handler(
@@ -55,6 +55,7 @@ from sawtooth_validator.gossip.permission_verifier import IdentityCache
 from sawtooth_validator.gossip.identity_observer import IdentityObserver
 from sawtooth_validator.networking.interconnect import Interconnect
 from sawtooth_validator.gossip.gossip import Gossip
+from sawtooth_validator.gossip.signature_verifier import SignatureVerifier
 
 from sawtooth_validator.server.events.broadcaster import EventBroadcaster
 
@@ -161,6 +162,13 @@ class Validator(object):
         sig_pool = InstrumentedThreadPoolExecutor(
             max_workers=3,
             name='Signature')
+        sig_verifier_pool = InstrumentedThreadPoolExecutor(
+            max_workers=3,
+            name='SignatureVerifier')
+        sig_verifier = SignatureVerifier(thread_pool=sig_verifier_pool)
+        event_catchup_pool = InstrumentedThreadPoolExecutor(
+            max_workers=3,
+            name='EventCatchup')
 
         # -- Setup Dispatchers -- #
         component_dispatcher = Dispatcher()
@@ -202,7 +210,13 @@ class Validator(object):
         # -- Setup Transaction Execution Platform -- #
         context_manager = ContextManager(global_state_db)
 
-        batch_tracker = BatchTracker(block_store)
+        event_broadcaster = EventBroadcaster(
+            component_service, block_store, receipt_store,
+            thread_pool=event_catchup_pool,
+            context_manager=context_manager)
+
+        batch_tracker = BatchTracker(
+            block_store, status_observers=[event_broadcaster])
 
         settings_cache = SettingsCache(
             SettingsViewFactory(state_view_factory),
@@ -218,9 +232,6 @@ class Validator(object):
         component_service.set_check_connections(
             transaction_executor.check_connections)
 
-        event_broadcaster = EventBroadcaster(
-            component_service, block_store, receipt_store)
-
         # -- Setup P2P Networking -- #
         gossip = Gossip(
             network_service,
@@ -352,7 +363,7 @@ class Validator(object):
         # -- Register Message Handler -- #
         network_handlers.add(
             network_dispatcher, network_service, gossip, completer,
-            responder, network_thread_pool, sig_pool,
+            responder, network_thread_pool, sig_pool, sig_verifier,
             chain_controller.has_block, block_publisher.has_batch,
             permission_verifier, block_publisher, consensus_notifier)
 
@@ -362,7 +373,7 @@ class Validator(object):
             global_state_db, self.get_chain_head_state_root_hash,
             receipt_store, event_broadcaster, permission_verifier,
             component_thread_pool, client_thread_pool,
-            sig_pool, block_publisher)
+            sig_pool, sig_verifier, block_publisher)
 
         # -- Store Object References -- #
         self._component_dispatcher = component_dispatcher
@@ -391,6 +402,8 @@ class Validator(object):
 
         self._client_thread_pool = client_thread_pool
         self._sig_pool = sig_pool
+        self._sig_verifier_pool = sig_verifier_pool
+        self._event_catchup_pool = event_catchup_pool
 
         self._context_manager = context_manager
         self._transaction_executor = transaction_executor
@@ -443,6 +456,8 @@ class Validator(object):
         self._component_thread_pool.shutdown(wait=True)
         self._client_thread_pool.shutdown(wait=True)
         self._sig_pool.shutdown(wait=True)
+        self._sig_verifier_pool.shutdown(wait=True)
+        self._event_catchup_pool.shutdown(wait=True)
 
         self._transaction_executor.stop()
         self._context_manager.stop()
@@ -13,9 +13,15 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 
+from collections import OrderedDict
 import logging
 from threading import Condition
+from threading import Lock
 
+from sawtooth_validator.exceptions import PossibleForkDetectedError
+from sawtooth_validator.protobuf.client_batch_submit_pb2 \
+    import ClientBatchStatus
+from sawtooth_validator.protobuf.events_pb2 import Event
 from sawtooth_validator.protobuf.events_pb2 import EventList
 from sawtooth_validator.protobuf import validator_pb2
 
@@ -24,22 +30,66 @@ from sawtooth_validator.journal.event_extractors \
     import BlockEventExtractor
 from sawtooth_validator.journal.event_extractors \
     import ReceiptEventExtractor
+from sawtooth_validator.journal.event_extractors \
+    import STATE_DELTA_EVENT_TYPE
+from sawtooth_validator.journal.event_extractors import StateDelta
 from sawtooth_validator.journal.block_wrapper import NULL_BLOCK_IDENTIFIER
+from sawtooth_validator.server.events.subscription import EventSubscription
+from sawtooth_validator.server.events.subscription import SubscriptionIndex
+from sawtooth_validator.state.batch_tracker import BatchStatusObserver
 
 LOGGER = logging.getLogger(__name__)
 
+# The approximate number of bytes of block events kept for catching up
+# subscribers
+DEFAULT_BLOCK_EVENT_CACHE_SIZE = 64 * 1024 * 1024
+
+# The number of blocks a catch-up reads before checking that the
+# subscriber is still connected
+CATCHUP_CHUNK_SIZE = 16
+
+# Sent when a batch submitted to this validator is committed or found
+# invalid. Unlike other events, these are not extracted from blocks, so
+# subscribers are not caught up on them.
+BATCH_STATUS_EVENT_TYPE = "sawtooth/batch-status"
+
 
 class NoKnownBlockError(Exception):
     pass
 
 
-class EventBroadcaster(ChainObserver):
-    def __init__(self, service, block_store, receipt_store):
+class EventBroadcaster(ChainObserver, BatchStatusObserver):
+    def __init__(self, service, block_store, receipt_store,
+                 thread_pool=None,
+                 block_event_cache_size=DEFAULT_BLOCK_EVENT_CACHE_SIZE,
+                 context_manager=None):
+        """
+        Args:
+            service: The service used to send events to subscribers
+            block_store (:obj:`BlockStore`): The block store
+            receipt_store (:obj:`TransactionReceiptStore`): The receipt store
+            thread_pool (:obj:`Executor`): If given, subscribers are caught
+                up on this pool rather than on the calling thread
+            block_event_cache_size (int): The approximate size, in bytes, of
+                the extracted block events cached for catching up
+                subscribers
+            context_manager (:obj:`ContextManager`): If given, the state
+                changes of a block are taken from the squashes that
+                derived its state root, rather than from its receipts
+        """
         self._subscribers = {}
         self._subscribers_cv = Condition()
+        # Compiled from the listening subscribers when first needed after
+        # they change
+        self._subscription_index = None
         self._service = service
         self._block_store = block_store
         self._receipt_store = receipt_store
+        self._thread_pool = thread_pool
+        self._block_events = _BlockEventCache(block_event_cache_size)
+        self._context_manager = context_manager
+        # The number of the last block broadcast by chain_update
+        self._last_block_num = None
 
     def add_subscriber(self, connection_id, subscriptions,
                        last_known_block_id):
@@ -53,6 +103,7 @@ class EventBroadcaster(ChainObserver):
             self._subscribers[connection_id] = \
                 EventSubscriber(
                     connection_id, subscriptions, last_known_block_id)
+            self._subscription_index = None
 
         LOGGER.debug(
             'Added Subscriber %s for %s', connection_id, subscriptions)
@@ -62,6 +113,10 @@ class EventBroadcaster(ChainObserver):
         subscriptions from all blocks since that latest block in the current
         chain that is in the given last known block ids.
 
+        If the broadcaster has a thread pool, the catch-up runs on it and
+        this returns immediately; enabling the subscriber in the meantime
+        only takes effect once the catch-up has finished.
+
         Raises:
             PossibleForkDetectedError
                 A possible fork was detected while building the event list
@@ -72,19 +127,97 @@ class EventBroadcaster(ChainObserver):
         """
         with self._subscribers_cv:
             subscriber = self._subscribers[connection_id]
-            last_known_block_id = subscriber.get_last_known_block_id()
-            subscriptions = subscriber.subscriptions
+            if subscriber.get_last_known_block_id() is None:
+                return
+            subscriber.catching_up = True
+
+        if self._thread_pool is None:
+            self._catchup(connection_id, subscriber)
+        else:
+            self._thread_pool.submit(
+                self._catchup_in_background, connection_id, subscriber)
+
+    def _catchup_in_background(self, connection_id, subscriber):
+        try:
+            self._catchup(connection_id, subscriber)
+        except (PossibleForkDetectedError, KeyError) as err:
+            LOGGER.warning("Failed to catchup subscriber: %s", err)
+
+    def _catchup(self, connection_id, subscriber):
+        last_block_id = subscriber.get_last_known_block_id()
+        subscriptions = subscriber.subscriptions
 
-        if last_known_block_id is not None:
-            LOGGER.debug(
-                'Catching up Subscriber %s from %s',
-                connection_id, last_known_block_id)
-
-            # Send catchup events one block at a time
-            for block_id in self.get_catchup_block_ids(last_known_block_id):
-                events = self.get_events_for_block_id(block_id, subscriptions)
-                event_list = EventList(events=events)
-                self._send(connection_id, event_list.SerializeToString())
+        LOGGER.debug(
+            'Catching up Subscriber %s from %s',
+            connection_id, last_block_id)
+
+        # The blocks sent which chain_update may not have broadcast yet, as
+        # the block store is updated before chain_update is called
+        sent_blocks = OrderedDict()
+
+        try:
+            while True:
+                # Blocks committed while catching up are caught up on too,
+                # until the subscriber has reached the chain head and can
+                # be switched over to live events. The switch is made while
+                # holding the lock the broadcast takes to find its
+                # subscribers, so that no block falls in between.
+                blocks = self._get_catchup_blocks(last_block_id)
+                if not blocks:
+                    with self._subscribers_cv:
+                        blocks = self._get_catchup_blocks(last_block_id)
+                        if not blocks:
+                            self._finish_catchup(subscriber, sent_blocks)
+                            return
+
+                for start in range(0, len(blocks), CATCHUP_CHUNK_SIZE):
+                    with self._subscribers_cv:
+                        if self._subscribers.get(connection_id) \
+                                is not subscriber:
+                            return
+                        self._forget_broadcast_blocks(sent_blocks)
+
+                    # Send catchup events one block at a time
+                    for block_id, block_num in \
+                            blocks[start:start + CATCHUP_CHUNK_SIZE]:
+                        events = self.get_events_for_block_id(
+                            block_id, subscriptions)
+                        event_list = EventList(events=events)
+                        self._send(
+                            connection_id, event_list.SerializeToString())
+                        sent_blocks[block_id] = block_num
+
+                last_block_id = blocks[-1][0]
+        finally:
+            with self._subscribers_cv:
+                self._finish_catchup(subscriber, sent_blocks)
+
+    def _forget_broadcast_blocks(self, sent_blocks):
+        """Drops the blocks chain_update has already broadcast from the
+        blocks sent by a catch-up. Must be called holding the subscribers
+        lock.
+        """
+        if self._last_block_num is None:
+            return
+        while sent_blocks:
+            block_id, block_num = next(iter(sent_blocks.items()))
+            if block_num > self._last_block_num:
+                break
+            del sent_blocks[block_id]
+
+    def _finish_catchup(self, subscriber, sent_blocks):
+        """Starts the subscriber listening, if it has been enabled while it
+        was catching up, and records the blocks it was sent that
+        chain_update has yet to broadcast, so that they are not sent again.
+        Must be called holding the subscribers lock.
+        """
+        if subscriber.catching_up:
+            subscriber.catching_up = False
+            self._forget_broadcast_blocks(sent_blocks)
+            subscriber.sent_blocks = dict(sent_blocks)
+            if subscriber.enable_requested:
+                subscriber.start_listening()
+                self._subscription_index = None
 
     def enable_subscriber(self, connection_id):
         """Start sending events to the subscriber.
@@ -95,22 +228,46 @@ class EventBroadcaster(ChainObserver):
         the most recent block in last_known_block_ids.
         """
         with self._subscribers_cv:
-            self._subscribers[connection_id].start_listening()
+            subscriber = self._subscribers[connection_id]
+            subscriber.enable_requested = True
+            if not subscriber.catching_up:
+                subscriber.start_listening()
+                self._subscription_index = None
 
     def disable_subscriber(self, connection_id):
         with self._subscribers_cv:
             self._subscribers[connection_id].stop_listening()
+            self._subscription_index = None
 
     def remove_subscriber(self, connection_id):
         with self._subscribers_cv:
             if connection_id in self._subscribers:
                 del self._subscribers[connection_id]
+                self._subscription_index = None
+
+    def _get_subscription_index(self):
+        with self._subscribers_cv:
+            if self._subscription_index is None:
+                self._subscription_index = SubscriptionIndex({
+                    connection_id: subscriber.subscriptions
+                    for connection_id, subscriber in self._subscribers.items()
+                    if subscriber.is_listening()
+                })
+            return self._subscription_index
 
     def get_catchup_block_ids(self, last_known_block_id):
         '''
         Raises:
             PossibleForkDetectedError
         '''
+        return [
+            block_id for block_id, _
+            in self._get_catchup_blocks(last_known_block_id)]
+
+    def _get_catchup_blocks(self, last_known_block_id):
+        """Returns the id and number of each block after the last known
+        block, up to the chain head, in order.
+        """
         # If latest known block is not the current chain head, catch up
         catchup_up_blocks = []
         if last_known_block_id != self._block_store.chain_head.identifier:
@@ -121,7 +278,7 @@ class EventBroadcaster(ChainObserver):
                 if last_known_block_id != NULL_BLOCK_IDENTIFIER:
                     if block.identifier == last_known_block_id:
                         break
-                catchup_up_blocks.append(block.identifier)
+                catchup_up_blocks.append((block.identifier, block.block_num))
 
         return list(reversed(catchup_up_blocks))
 
@@ -175,8 +332,9 @@ class EventBroadcaster(ChainObserver):
         return self.get_events_for_blocks(blocks, subscriptions)
 
     def get_events_for_block_id(self, block_id, subscriptions):
-        block = self._block_store[block_id]
-        return self.get_events_for_block(block, subscriptions)
+        # The block is only read from the store if its events are not cached
+        return self._get_events(
+            block_id, lambda: self._block_store[block_id], subscriptions)
 
     def get_events_for_blocks(self, blocks, subscriptions):
         """Get a list of events associated with all the blocks.
@@ -199,40 +357,129 @@ class EventBroadcaster(ChainObserver):
         return events
 
     def get_events_for_block(self, blkw, subscriptions):
-        receipts = []
-        for batch in blkw.block.batches:
-            for txn in batch.transactions:
-                try:
-                    receipts.append(self._receipt_store.get(
-                        txn.header_signature))
-                except KeyError:
+        """Get the events in the block which are part of the subscriptions.
+
+        The events extracted from a block are cached, so that subscribers
+        catching up over the same blocks share the work of extracting them.
+
+        Args:
+            blkw (BlockWrapper): The block to search for events
+            subscriptions (list of EventSubscriptions): EventFilter and
+                event type to filter events.
+
+        Returns (list of Events): The Events in the block, in order, which
+            match a subscription.
+        """
+        return self._get_events(blkw.identifier, lambda: blkw, subscriptions)
+
+    def _get_events(self, block_id, get_block, subscriptions):
+        event_types = frozenset(sub.event_type for sub in subscriptions)
+        cached = self._block_events.get(block_id, event_types)
+        if cached is None:
+            event_types = event_types | self._block_events.peek(block_id)
+            events, state_delta = self._extract_block_events(
+                get_block(), event_types)
+            self._block_events.put(
+                block_id, event_types, events, state_delta)
+        else:
+            events, state_delta = cached
+
+        return _slice_state_delta(
+            [event for event in events
+             if any(event in sub for sub in subscriptions)],
+            state_delta,
+            subscriptions)
+
+    def _get_state_delta(self, blkw):
+        """Returns the squashed state changes of the block, if the context
+        manager still knows the squashes that derived its state root.
+        """
+        if self._context_manager is None or \
+                blkw.previous_block_id == NULL_BLOCK_IDENTIFIER:
+            return None
+
+        try:
+            parent = self._block_store[blkw.previous_block_id]
+        except KeyError:
+            return None
+
+        state_changes = self._context_manager.get_state_changes(
+            blkw.state_root_hash, parent.state_root_hash)
+        if state_changes is None:
+            return None
+        return StateDelta(state_changes)
+
+    def _extract_block_events(self, blkw, event_types):
+        """Extracts every event of the given types from the block.
+
+        Returns:
+            (list of Event, StateDelta): The events, and the state changes
+                of the block if state delta events were extracted
+        """
+        subscriptions = [
+            EventSubscription(event_type) for event_type in event_types]
+
+        txn_ids = [
+            txn.header_signature
+            for batch in blkw.block.batches
+            for txn in batch.transactions
+        ]
+        found = self._receipt_store.get_multi(txn_ids)
+        receipts = [receipt for _, receipt in found]
+
+        if len(found) < len(txn_ids):
+            found_ids = set(txn_id for txn_id, _ in found)
+            for txn_id in txn_ids:
+                if txn_id not in found_ids:
                     LOGGER.warning(
                         "Transaction id %s not found in receipt store "
                         " while looking"
                         " up events for block id %s",
-                        txn.header_signature[:10],
+                        txn_id[:10],
                         blkw.identifier[:10])
 
+        with_state_delta = STATE_DELTA_EVENT_TYPE in event_types
+
         block_event_extractor = BlockEventExtractor(blkw)
-        receipt_event_extractor = ReceiptEventExtractor(receipts=receipts)
+        receipt_event_extractor = ReceiptEventExtractor(
+            receipts=receipts,
+            state_delta=self._get_state_delta(blkw)
+            if with_state_delta else None)
 
         events = []
-        events.extend(block_event_extractor.extract(subscriptions))
+        events.extend(block_event_extractor.extract(subscriptions) or [])
         events.extend(receipt_event_extractor.extract(subscriptions))
 
-        return events
+        state_delta = None
+        if with_state_delta:
+            state_delta = receipt_event_extractor.state_delta
+
+        return events, state_delta
 
     def chain_update(self, block, receipts):
+        with self._subscribers_cv:
+            self._last_block_num = block.block_num
+            already_sent = self._take_sent_block(block)
+            # Extract every event of a subscribed type; the subscription
+            # index applies the subscribers' filters when the events are
+            # broadcast. The same index is used for the broadcast, so that
+            # a subscriber that finishes catching up in the meantime is not
+            # sent the block twice.
+            subscription_index = self._get_subscription_index()
+            event_types = subscription_index.event_types
+        with_state_delta = STATE_DELTA_EVENT_TYPE in event_types
+
+        receipt_event_extractor = ReceiptEventExtractor(
+            receipts,
+            state_delta=self._get_state_delta(block)
+            if with_state_delta else None)
         extractors = [
             BlockEventExtractor(block),
-            ReceiptEventExtractor(receipts),
+            receipt_event_extractor,
         ]
 
-        subscriptions = []
-        for subscriber in self._subscribers.values():
-            for subscription in subscriber.subscriptions:
-                if subscription not in subscriptions:
-                    subscriptions.append(subscription)
+        subscriptions = [
+            EventSubscription(event_type) for event_type in event_types]
 
         events = []
         for extractor in extractors:
@@ -240,27 +487,87 @@ class EventBroadcaster(ChainObserver):
             if extracted_events:
                 events.extend(extracted_events)
 
-        if events:
-            self.broadcast_events(events)
+        state_delta = None
+        if with_state_delta:
+            state_delta = receipt_event_extractor.state_delta
 
-    def broadcast_events(self, events):
-        LOGGER.debug("Broadcasting events: %s", events)
-        with self._subscribers_cv:
-            # Copy the subscribers
-            subscribers = {
-                conn: sub.copy()
-                for conn, sub in self._subscribers.items()
+        # Subscribers catching up soon after are likely to ask for the
+        # events of this block.
+        self._block_events.put(
+            block.identifier, frozenset(event_types), events, state_delta)
+
+        if events:
+            self._broadcast(
+                subscription_index, events, state_delta, skip=already_sent)
+
+    def _take_sent_block(self, block):
+        """Returns the connection ids of the subscribers that were sent the
+        block when they were caught up. Once a block is broadcast, the
+        blocks sent with the same or lower numbers, which were either
+        broadcast already or have been forked out, need not be tracked any
+        longer. Must be called holding the subscribers lock.
+        """
+        already_sent = set()
+        for connection_id, subscriber in self._subscribers.items():
+            if not subscriber.sent_blocks:
+                continue
+            if subscriber.sent_blocks.pop(block.identifier, None) \
+                    is not None:
+                already_sent.add(connection_id)
+            subscriber.sent_blocks = {
+                block_id: block_num
+                for block_id, block_num in subscriber.sent_blocks.items()
+                if block_num > block.block_num
             }
+        return already_sent
 
-        if subscribers:
-            for connection_id, subscriber in subscribers.items():
-                if subscriber.is_listening():
-                    subscriber_events = [
-                        event for event in events
-                        if subscriber.is_subscribed(event)
-                    ]
-                    event_list = EventList(events=subscriber_events)
-                    self._send(connection_id, event_list.SerializeToString())
+    def notify_batch_statuses(self, statuses):
+        """Broadcasts a batch status event for each batch, with the
+        ClientBatchStatus of the batch as its data, if anyone is subscribed
+        to them. The events are sent together in one event list.
+        """
+        if BATCH_STATUS_EVENT_TYPE not in \
+                self._get_subscription_index().event_types:
+            return
+
+        self.broadcast_events(
+            [_batch_status_event(batch_id, status, invalid_txns)
+             for batch_id, status, invalid_txns in statuses],
+            send_empty=False)
+
+    def broadcast_events(self, events, state_delta=None, send_empty=True):
+        """Sends each listening subscriber an event list of the events that
+        are part of its subscriptions, which is empty if none are.
+
+        If the state changes behind the state delta event are given, each
+        subscriber is sent only the changes under the addresses its
+        subscriptions cover.
+
+        If send_empty is False, subscribers none of the events are part of
+        are not sent anything. Events which are not extracted from blocks,
+        such as batch statuses, are broadcast this way, as subscribers
+        count the event lists they are sent as blocks.
+        """
+        self._broadcast(
+            self._get_subscription_index(), events, state_delta, send_empty)
+
+    def _broadcast(self, subscription_index, events, state_delta,
+                   send_empty=True, skip=()):
+        LOGGER.debug("Broadcasting events: %s", events)
+        routed = subscription_index.route(events)
+
+        # Subscribers with the same subscriptions share one EventList
+        for (connection_ids, group_events), subscriptions in zip(
+                routed, subscription_index.group_subscriptions):
+            if not group_events and not send_empty:
+                continue
+            group_events = _slice_state_delta(
+                group_events, state_delta, subscriptions)
+            message_bytes = EventList(
+                events=group_events).SerializeToString()
+            for connection_id in connection_ids:
+                if connection_id not in skip:
+                    self._send(connection_id, message_bytes)
 
     def _send(self, connection_id, message_bytes):
         self._service.send(
@@ -270,6 +577,51 @@ class EventBroadcaster(ChainObserver):
             one_way=True)
 
 
+def _batch_status_event(batch_id, status, invalid_txns):
+    batch_status = ClientBatchStatus(
+        batch_id=batch_id,
+        status=status,
+        invalid_transactions=[
+            ClientBatchStatus.InvalidTransaction(
+                transaction_id=info['id'],
+                message=info.get('message', ''),
+                extended_data=info.get('extended_data', b''))
+            for info in invalid_txns
+        ])
+
+    return Event(
+        event_type=BATCH_STATUS_EVENT_TYPE,
+        attributes=[
+            Event.Attribute(key='batch_id', value=batch_id),
+            Event.Attribute(
+                key='status',
+                value=ClientBatchStatus.Status.Name(status)),
+        ],
+        data=batch_status.SerializeToString())
+
+
+def _slice_state_delta(events, state_delta, subscriptions):
+    """Replaces the state delta event in the events with one holding only
+    the changes under the addresses the subscriptions cover.
+    """
+    if state_delta is None:
+        return events
+
+    if not any(event.event_type == STATE_DELTA_EVENT_TYPE
+               for event in events):
+        return events
+
+    indices = state_delta.select(subscriptions)
+    if indices is None:
+        return events
+
+    sliced = state_delta.make_event(indices)
+    return [
+        sliced if event.event_type == STATE_DELTA_EVENT_TYPE else event
+        for event in events
+    ]
+
+
 class EventSubscriber:
     def __init__(self, connection_id, subscriptions, last_known_block,
                  listening=False):
@@ -277,6 +629,13 @@ class EventSubscriber:
         self._subscriptions = subscriptions
         self._listening = listening
         self._last_known_block = last_known_block
+        # Whether a catch-up is in progress, and whether to start listening
+        # as soon as it has finished
+        self.catching_up = False
+        self.enable_requested = False
+        # The ids and numbers of the blocks sent while catching up that
+        # have yet to be broadcast
+        self.sent_blocks = {}
 
     def start_listening(self):
         self._listening = True
@@ -310,3 +669,60 @@ class EventSubscriber:
             self._subscriptions,
             self._last_known_block,
             self._listening)
+
+
+class _BlockEventCache(object):
+    """A least-recently-used cache of the events extracted from blocks,
+    keyed by block id, and bounded by the approximate size of the events.
+    Each entry records the event types that were extracted, as events of
+    other types are not included.
+    """
+
+    # Rough per-entry cost of the entry tuple, its dict slot and the event
+    # objects, on top of the serialized size of the events.
+    _ENTRY_OVERHEAD = 200
+
+    def __init__(self, size):
+        self._size = size
+        self._current_size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, block_id, event_types):
+        """Returns the block's events and its state delta, if events of all
+        the given types have been extracted from it, otherwise None.
+        """
+        with self._lock:
+            entry = self._entries.get(block_id)
+            if entry is None or not event_types <= entry[0]:
+                return None
+            self._entries.move_to_end(block_id)
+            return entry[1:3]
+
+    def peek(self, block_id):
+        """Returns the event types extracted from the block, without
+        affecting the order of eviction.
+        """
+        with self._lock:
+            entry = self._entries.get(block_id)
+            if entry is None:
+                return frozenset()
+            return entry[0]
+
+    def put(self, block_id, event_types, events, state_delta=None):
+        entry_size = self._ENTRY_OVERHEAD + sum(
+            self._ENTRY_OVERHEAD + event.ByteSize() for event in events)
+        if state_delta is not None:
+            entry_size += state_delta.size
+
+        with self._lock:
+            old_entry = self._entries.pop(block_id, None)
+            if old_entry is not None:
+                self._current_size -= old_entry[-1]
+
+            self._entries[block_id] = (
+                event_types, events, state_delta, entry_size)
+            self._current_size += entry_size
+            while self._current_size > self._size:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_size -= evicted[-1]
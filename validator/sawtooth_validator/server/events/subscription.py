@@ -15,6 +15,8 @@
 
 from abc import ABCMeta
 from abc import abstractmethod
+from bisect import bisect_left
+from collections import Counter
 import re
 
 from sawtooth_validator.protobuf import events_pb2
@@ -89,6 +91,9 @@ class EventFilter(object, metaclass=ABCMeta):
         return self.key == other.key \
             and self.match_string == other.match_string
 
+    def __hash__(self):
+        return hash((self.__class__, self.key, self.match_string))
+
     def __contains__(self, event):
         return self.matches(event)
 
@@ -97,6 +102,18 @@ class EventFilter(object, metaclass=ABCMeta):
         """Returns whether the event passes this filter."""
         raise NotImplementedError()
 
+    @abstractmethod
+    def matches_value(self, value):
+        """Returns whether an event with a single attribute with the
+        filter's key and the given value passes this filter."""
+        raise NotImplementedError()
+
+    def select(self, values):
+        """Returns the indices of the values, which must be sorted, that
+        pass this filter when matched on their own."""
+        return [i for i, value in enumerate(values)
+                if self.matches_value(value)]
+
 
 class SimpleAnyFilter(EventFilter):
     def matches(self, event):
@@ -106,6 +123,12 @@ class SimpleAnyFilter(EventFilter):
                     return True
         return False
 
+    def matches_value(self, value):
+        return self.match_string == value
+
+    def select(self, values):
+        return _select_equal(values, self.match_string)
+
 
 class SimpleAllFilter(EventFilter):
     def matches(self, event):
@@ -115,6 +138,12 @@ class SimpleAllFilter(EventFilter):
                     return False
         return True
 
+    def matches_value(self, value):
+        return self.match_string == value
+
+    def select(self, values):
+        return _select_equal(values, self.match_string)
+
 
 class RegexAnyFilter(EventFilter):
     """Represents a subset of events within an event type. Pattern must be a
@@ -152,6 +181,12 @@ class RegexAnyFilter(EventFilter):
                     return True
         return False
 
+    def matches_value(self, value):
+        return self.regex.search(value) is not None
+
+    def select(self, values):
+        return _select_regex(values, self)
+
 
 class RegexAllFilter(EventFilter):
     """Represents a subset of events within an event type. Pattern must be a
@@ -188,3 +223,219 @@ class RegexAllFilter(EventFilter):
                 if not self.regex.search(attribute.value):
                     return False
         return True
+
+    def matches_value(self, value):
+        return self.regex.search(value) is not None
+
+    def select(self, values):
+        return _select_regex(values, self)
+
+
+# A regular expression which only matches values starting with a literal
+# prefix, such as '^abc' or '^abc.*'
+_PREFIX_REGEX = re.compile(r'\^([A-Za-z0-9_/-]*)(\.\*)?')
+
+# Key of the filter ids held by a node in a prefix trie
+_FILTER_IDS = None
+
+
+def _select_equal(values, match_string):
+    index = bisect_left(values, match_string)
+    if index < len(values) and values[index] == match_string:
+        return [index]
+    return []
+
+
+def _select_regex(values, event_filter):
+    match = _PREFIX_REGEX.fullmatch(event_filter.match_string)
+    if match is None:
+        return EventFilter.select(event_filter, values)
+
+    # The values starting with the prefix are next to each other
+    prefix = match.group(1)
+    start = bisect_left(values, prefix)
+    end = start
+    while end < len(values) and values[end].startswith(prefix):
+        end += 1
+    return list(range(start, end))
+
+
+class _EventTypeIndex:
+    """The subscriptions to a single event type, compiled so that the
+    filters an event passes are found by looking up its attributes.
+
+    SIMPLE_ANY filters are hashed by attribute key and value, and
+    REGEX_ANY filters which only match a literal prefix are stored in a
+    trie per attribute key. Any other filter is evaluated against each
+    event once, however many subscriptions share it.
+    """
+
+    def __init__(self):
+        self.unfiltered_groups = set()
+
+        self._filter_ids = {}
+        self._subscriptions_by_filter = []
+        self._exact = {}
+        self._prefixes = {}
+        self._evaluated = []
+
+        self._subscription_ids = {}
+        self._subscription_sizes = []
+        self._subscription_groups = []
+
+    def add(self, subscription, group_id):
+        filters = frozenset(subscription.filters)
+        if not filters:
+            self.unfiltered_groups.add(group_id)
+            return
+
+        subscription_id = self._subscription_ids.get(filters)
+        if subscription_id is None:
+            subscription_id = len(self._subscription_sizes)
+            self._subscription_ids[filters] = subscription_id
+            self._subscription_sizes.append(len(filters))
+            self._subscription_groups.append(set())
+            for event_filter in filters:
+                self._subscriptions_by_filter[
+                    self._get_filter_id(event_filter)].append(subscription_id)
+
+        self._subscription_groups[subscription_id].add(group_id)
+
+    def _get_filter_id(self, event_filter):
+        filter_id = self._filter_ids.get(event_filter)
+        if filter_id is not None:
+            return filter_id
+
+        filter_id = len(self._subscriptions_by_filter)
+        self._filter_ids[event_filter] = filter_id
+        self._subscriptions_by_filter.append([])
+
+        prefix = None
+        if type(event_filter) is RegexAnyFilter:
+            match = _PREFIX_REGEX.fullmatch(event_filter.match_string)
+            if match is not None:
+                prefix = match.group(1)
+
+        if type(event_filter) is SimpleAnyFilter:
+            self._exact.setdefault(
+                (event_filter.key, event_filter.match_string),
+                []).append(filter_id)
+        elif prefix is not None:
+            node = self._prefixes.setdefault(event_filter.key, {})
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(_FILTER_IDS, []).append(filter_id)
+        else:
+            self._evaluated.append((filter_id, event_filter))
+
+        return filter_id
+
+    def match(self, event):
+        """Returns the ids of the groups with a subscription the event is
+        part of.
+        """
+        groups = set(self.unfiltered_groups)
+        if not self._subscription_sizes:
+            return groups
+
+        passed = set()
+        for attribute in event.attributes:
+            passed.update(
+                self._exact.get((attribute.key, attribute.value), ()))
+
+            node = self._prefixes.get(attribute.key)
+            if node is not None:
+                passed.update(node.get(_FILTER_IDS, ()))
+                for char in attribute.value:
+                    node = node.get(char)
+                    if node is None:
+                        break
+                    passed.update(node.get(_FILTER_IDS, ()))
+
+        for filter_id, event_filter in self._evaluated:
+            if event in event_filter:
+                passed.add(filter_id)
+
+        counts = Counter()
+        for filter_id in passed:
+            counts.update(self._subscriptions_by_filter[filter_id])
+
+        for subscription_id, count in counts.items():
+            if count == self._subscription_sizes[subscription_id]:
+                groups.update(self._subscription_groups[subscription_id])
+
+        return groups
+
+
+class SubscriptionIndex:
+    """Matches events against the subscriptions of many subscribers in one
+    pass.
+
+    Subscribers with the same set of subscriptions are grouped together,
+    so that the events for a group only need to be gathered and serialized
+    once. The subscriptions are indexed by event type, and then by the
+    attribute keys of their filters.
+    """
+
+    def __init__(self, subscriptions_by_connection):
+        """
+        Args:
+            subscriptions_by_connection (dict): A dict of connection ids to
+                their lists of :obj:`EventSubscription`.
+        """
+        self._groups = []
+        self._group_subscriptions = []
+        self._types = {}
+
+        group_ids = {}
+        for connection_id, subscriptions in \
+                subscriptions_by_connection.items():
+            key = frozenset(
+                (subscription.event_type, frozenset(subscription.filters))
+                for subscription in subscriptions)
+
+            group_id = group_ids.get(key)
+            if group_id is None:
+                group_id = len(self._groups)
+                group_ids[key] = group_id
+                self._groups.append([])
+                self._group_subscriptions.append(list(subscriptions))
+                for subscription in subscriptions:
+                    self._types.setdefault(
+                        subscription.event_type,
+                        _EventTypeIndex()).add(subscription, group_id)
+
+            self._groups[group_id].append(connection_id)
+
+    @property
+    def event_types(self):
+        """The event types that have at least one subscription."""
+        return list(self._types)
+
+    @property
+    def group_subscriptions(self):
+        """The subscriptions of each group, in the order the groups are
+        returned by :meth:`route`."""
+        return self._group_subscriptions
+
+    def route(self, events):
+        """Finds the events that are part of each group's subscriptions.
+
+        Args:
+            events (list of Event): The events to route.
+
+        Returns:
+            list of (list of str, list of Event): The connection ids of each
+                group of subscribers, with the events, in order, which match
+                their subscriptions.
+        """
+        routed = [[] for _ in self._groups]
+        for event in events:
+            type_index = self._types.get(event.event_type)
+            if type_index is None:
+                continue
+
+            for group_id in type_index.match(event):
+                routed[group_id].append(event)
+
+        return list(zip(self._groups, routed))
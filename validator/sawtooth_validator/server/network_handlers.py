@@ -80,6 +80,7 @@ def add(
         responder,
         thread_pool,
         sig_pool,
+        sig_verifier,
         has_block,
         has_batch,
         permission_verifier,
@@ -224,7 +225,7 @@ def add(
     # GOSSIP_MESSAGE ) Verifies signature
     dispatcher.add_handler(
         validator_pb2.Message.GOSSIP_MESSAGE,
-        signature_verifier.GossipMessageSignatureVerifier(),
+        signature_verifier.GossipMessageSignatureVerifier(sig_verifier),
         sig_pool)
 
     # GOSSIP_MESSAGE ) Verifies batch structure
@@ -302,7 +303,7 @@ def add(
     # GOSSIP_BLOCK_RESPONSE 3) Verifies signature
     dispatcher.add_handler(
         validator_pb2.Message.GOSSIP_BLOCK_RESPONSE,
-        signature_verifier.GossipBlockResponseSignatureVerifier(),
+        signature_verifier.GossipBlockResponseSignatureVerifier(sig_verifier),
         sig_pool)
 
     # GOSSIP_BLOCK_RESPONSE 4) Check batch structure
@@ -374,7 +375,7 @@ def add(
     # GOSSIP_BATCH_RESPONSE 2) Verifies signature
     dispatcher.add_handler(
         validator_pb2.Message.GOSSIP_BATCH_RESPONSE,
-        signature_verifier.GossipBatchResponseSignatureVerifier(),
+        signature_verifier.GossipBatchResponseSignatureVerifier(sig_verifier),
         sig_pool)
 
     # GOSSIP_BATCH_RESPONSE 3) Check batch structure
@@ -154,6 +154,11 @@ def verify_state(global_state_db, blockstore, bind_component, scheduler_type):
         tp_state_handlers.TpStateSetHandler(context_manager),
         component_thread_pool)
 
+    component_dispatcher.add_handler(
+        validator_pb2.Message.TP_STATE_APPLY_REQUEST,
+        tp_state_handlers.TpStateApplyHandler(context_manager),
+        component_thread_pool)
+
     component_dispatcher.add_handler(
         validator_pb2.Message.TP_REGISTER_REQUEST,
         processor_handlers.ProcessorRegisterHandler(
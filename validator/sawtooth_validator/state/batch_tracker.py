@@ -43,12 +43,15 @@ class BatchTracker(ChainObserver,
         block_store (BlockStore): For querying if a batch is committed
         cache_keep_time (float): Time in seconds to keep values in TimedCaches
         cache_purge_frequency (float): Time between purging the TimedCaches
+        status_observers (list of BatchStatusObserver): Notified whenever
+            a pending batch is committed or found invalid
     """
 
     def __init__(self,
                  block_store,
                  cache_keep_time=600,
-                 cache_purge_frequency=30):
+                 cache_purge_frequency=30,
+                 status_observers=None):
         self._block_store = block_store
         self._batch_info = TimedCache(cache_keep_time, cache_purge_frequency)
         self._invalid = TimedCache(cache_keep_time, cache_purge_frequency)
@@ -56,17 +59,24 @@ class BatchTracker(ChainObserver,
 
         self._lock = RLock()
         self._observers = {}
+        self._status_observers = \
+            status_observers if status_observers is not None else []
 
     def chain_update(self, block, receipts):
         """Removes batches from the pending cache if found in the block store,
         and notifies any observers.
         """
+        committed = []
         with self._lock:
             for batch_id in self._pending.copy():
                 if self._block_store.has_batch(batch_id):
                     self._pending.remove(batch_id)
                     self._update_observers(batch_id,
                                            ClientBatchStatus.COMMITTED)
+                    committed.append(
+                        (batch_id, ClientBatchStatus.COMMITTED, []))
+
+        self._notify_status_observers(committed)
 
     def notify_txn_invalid(self, txn_id, message=None, extended_data=None):
         """Adds a batch id to the invalid cache along with the id of the
@@ -85,6 +95,7 @@ class BatchTracker(ChainObserver,
         if extended_data is not None:
             invalid_txn_info['extended_data'] = extended_data
 
+        invalid = []
         with self._lock:
             for batch_id, txn_ids in self._batch_info.items():
                 if txn_id in txn_ids:
@@ -94,7 +105,12 @@ class BatchTracker(ChainObserver,
                         self._invalid[batch_id].append(invalid_txn_info)
                     self._pending.discard(batch_id)
                     self._update_observers(batch_id, ClientBatchStatus.INVALID)
-                    return
+                    invalid.append((
+                        batch_id, ClientBatchStatus.INVALID,
+                        self.get_invalid_txn_info(batch_id)))
+                    break
+
+        self._notify_status_observers(invalid)
 
     def notify_batch_pending(self, batch):
         """Adds a Batch id to the pending cache, with its transaction ids.
@@ -184,6 +200,17 @@ class BatchTracker(ChainObserver,
                     observer.notify_batches_finished(statuses)
                     self._observers.pop(observer)
 
+    def _notify_status_observers(self, statuses):
+        """Notifies each status observer of the batches that are no longer
+        pending, all in one call. Must be called without holding the lock,
+        so observers which send the statuses on do not block the tracker.
+        """
+        if not statuses:
+            return
+
+        for observer in self._status_observers:
+            observer.notify_batch_statuses(statuses)
+
     def _has_no_pendings(self, statuses):
         """Returns True if a statuses dict has no PENDING statuses.
         """
@@ -209,3 +236,26 @@ class BatchFinishObserver(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError('BatchFinishObservers must have a '
                                   '"notify_batches_finished" method')
+
+
+class BatchStatusObserver(metaclass=abc.ABCMeta):
+    """An interface class for components wishing to be notified by a
+    BatchTracker whenever any pending batch is committed or found invalid,
+    rather than watching for a particular set of batches.
+    """
+
+    @abc.abstractmethod
+    def notify_batch_statuses(self, statuses):
+        """This method will be called when pending Batches are committed or
+        found to be invalid, with every Batch a block commits or a single
+        invalid transaction affects in one call.
+
+        Args:
+            statuses (list of tuple): A (batch_id, status, invalid_txns)
+                tuple for each Batch, with its status enum, either COMMITTED
+                or INVALID, and for an invalid Batch, dicts with the 'id' of
+                each invalid Transaction, and any 'message' and
+                'extended_data' sent by the TP
+        """
+        raise NotImplementedError('BatchStatusObservers must have a '
+                                  '"notify_batch_statuses" method')
@@ -20,6 +20,7 @@ import abc
 import logging
 from time import time
 import itertools
+import operator
 from functools import cmp_to_key
 import re
 from threading import Condition
@@ -341,18 +342,28 @@ class _ClientRequestHandler(Handler, metaclass=abc.ABCMeta):
 class _Pager(object):
     """A static class containing methods to paginate lists of resources.
 
-    Contains a paginate method, as well as two helpers to fetch index of a
-    resource by its id (either address or header_signature), or conversely
-    to fetch the id by an index.
+    Each kind of resource is identified by a key function, which returns
+    the id used as its paging marker (either its address or its
+    header_signature). In-memory lists are searched for the start marker,
+    by bisection if they are sorted by id, and store-backed iterators are
+    expected to have been seeked to the start marker by the store's index.
     """
 
+    by_header_signature = operator.attrgetter('header_signature')
+    by_address = operator.attrgetter('address')
+
     @classmethod
-    def paginate_resources(cls, request, resources, on_fail_status):
+    def paginate_resources(cls, request, resources, on_fail_status,
+                           key=by_header_signature, descending=None):
         """Truncates a list of resources based on ClientPagingControls
 
         Args:
             request (object): The parsed protobuf request object
             resources (list of objects): The resources to be paginated
+            key (function): Returns the id of a resource
+            descending (bool): If the resources are sorted by their ids,
+                whether they are in descending order. None if they are not
+                sorted by id.
 
         Returns:
             list: The paginated list of resources
@@ -364,69 +375,107 @@ class _Pager(object):
         paging = request.paging
         limit = min(paging.limit, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
         # Find the start index from the location marker sent
-        try:
-            if paging.start:
-                start_index = cls.index_by_id(paging.start, resources)
-            else:
-                start_index = 0
-
-            if start_index < 0 or start_index >= len(resources):
-                raise AssertionError
-        except AssertionError:
-            raise _ResponseFailed(on_fail_status)
+        if paging.start:
+            start_index = cls.index_by_id(
+                paging.start, resources, key, descending)
+            if start_index is None:
+                raise _ResponseFailed(on_fail_status)
+        else:
+            start_index = 0
 
         paged_resources = resources[start_index: start_index + limit]
         if start_index + limit < len(resources):
             paging_response = client_list_control_pb2.ClientPagingResponse(
-                next=cls.id_by_index(start_index + limit, resources),
-                start=cls.id_by_index(start_index, resources),
+                next=key(resources[start_index + limit]),
+                start=key(resources[start_index]),
                 limit=limit)
         else:
             paging_response = client_list_control_pb2.ClientPagingResponse(
-                start=cls.id_by_index(start_index, resources),
+                start=key(resources[start_index]),
                 limit=limit)
 
         return paged_resources, paging_response
 
     @classmethod
-    def index_by_id(cls, target_id, resources):
-        """Helper method to fetch the index of a resource by its id or address
+    def paginate_iter(cls, request, resources, on_fail_status,
+                      key=by_header_signature):
+        """Takes a single page from an iterator of resources which has already
+        been positioned at the start specified by the ClientPagingControls.
+
+        Only the resources on the page, plus one to learn the next start
+        marker, are read from the iterator.
 
         Args:
-            resources (list of objects): The resources to be paginated
-            target_id (string): The address or header_signature of the resource
+            request (object): The parsed protobuf request object
+            resources (iterator of objects): The resources to be paginated,
+                starting at the requested start resource
+            key (function): Returns the id of a resource
 
         Returns:
-            integer: The index of the target resource
-
-        Raises:
-            AssertionError: Raised if the target is not found
+            list: The paginated list of resources
+            object: The ClientPagingResponse to be sent back to the client
         """
-        for index in range(len(resources)):
-            if cls.id_by_index(index, resources) == target_id:
-                return index
+        paging = request.paging
+        limit = min(paging.limit, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
 
-        raise AssertionError
+        paged_resources = list(itertools.islice(resources, limit + 1))
+        if not paged_resources:
+            return (paged_resources,
+                    client_list_control_pb2.ClientPagingResponse())
+
+        start = key(paged_resources[0])
+        if paging.start and start != paging.start:
+            raise _ResponseFailed(on_fail_status)
+
+        if len(paged_resources) > limit:
+            paging_response = client_list_control_pb2.ClientPagingResponse(
+                next=key(paged_resources[limit]),
+                start=start,
+                limit=limit)
+            paged_resources = paged_resources[:limit]
+        else:
+            paging_response = client_list_control_pb2.ClientPagingResponse(
+                start=start,
+                limit=limit)
+
+        return paged_resources, paging_response
 
     @staticmethod
-    def id_by_index(index, resources):
-        """Helper method to fetch the id or address of a resource by its index
+    def index_by_id(target_id, resources, key=by_header_signature,
+                    descending=None):
+        """Helper method to fetch the index of a resource by its id or address
 
         Args:
+            target_id (string): The address or header_signature of the resource
             resources (list of objects): The resources to be paginated
-            index (integer): The index of the target resource
+            key (function): Returns the id of a resource
+            descending (bool): If the resources are sorted by their ids,
+                whether they are in descending order, so that they can be
+                searched by bisection. None if they are not sorted by id.
 
         Returns:
-            str: The address or header_signature of the resource,
-                returns an empty string if not found
+            integer: The index of the first resource with the target id, or
+                None if it is not found
         """
-        if index < 0 or index >= len(resources):
-            return ''
+        if descending is None:
+            for index, resource in enumerate(resources):
+                if key(resource) == target_id:
+                    return index
+            return None
+
+        low, high = 0, len(resources)
+        while low < high:
+            middle = (low + high) // 2
+            middle_id = key(resources[middle])
+            if (middle_id > target_id if descending
+                    else middle_id < target_id):
+                low = middle + 1
+            else:
+                high = middle
 
-        try:
-            return resources[index].header_signature
-        except AttributeError:
-            return resources[index].address
+        if low < len(resources) and key(resources[low]) == target_id:
+            return low
+        return None
 
 
 class _Sorter(object):
@@ -690,22 +739,12 @@ class StateListRequest(_ClientRequestHandler):
             self._validate_state_root(request.state_root)
         state_root = self._set_root(request)
 
-        # Fetch entries and encode as protobuf
         self._validate_namespace(request.address)
-        entries = [
-            client_state_pb2.ClientStateListResponse.Entry(address=a, data=v)
-            for a, v in self._tree.leaves(request.address or '')]
-
-        # Order entries, remove if tree.entries refactored to be ordered
-        entries.sort(key=lambda l: l.address)
 
         if self.is_reverse(request.sorting, self._status.INVALID_SORT):
-            entries.reverse()
-
-        entries, paging = _Pager.paginate_resources(
-            request,
-            entries,
-            self._status.INVALID_PAGING)
+            entries, paging = self._list_reversed(request)
+        else:
+            entries, paging = self._list_ordered(request)
 
         if not entries:
             return self._wrap_response(
@@ -718,6 +757,46 @@ class StateListRequest(_ClientRequestHandler):
             paging=paging,
             entries=entries)
 
+    def _list_ordered(self, request):
+        """Seeks to the paging start within the tree's leaves, which are
+        ordered by address, and reads only the entries needed for one page.
+        """
+        paging = request.paging
+        leaves = self._tree.leaves(
+            request.address or '', start=paging.start or None)
+        entries, paging_response = _Pager.paginate_iter(
+            request,
+            (client_state_pb2.ClientStateListResponse.Entry(
+                address=a, data=v) for a, v in leaves),
+            self._status.INVALID_PAGING,
+            key=_Pager.by_address)
+
+        # A start past the last entry is only invalid if there are entries
+        # under the address at all
+        if not entries and paging.start and self._has_leaves(request.address):
+            raise _ResponseFailed(self._status.INVALID_PAGING)
+
+        return entries, paging_response
+
+    def _list_reversed(self, request):
+        """Lists entries in reverse address order. The leaf iterator only
+        walks forward, so every entry under the address is read.
+        """
+        entries = [
+            client_state_pb2.ClientStateListResponse.Entry(address=a, data=v)
+            for a, v in self._tree.leaves(request.address or '')]
+        entries.reverse()
+
+        return _Pager.paginate_resources(
+            request,
+            entries,
+            self._status.INVALID_PAGING,
+            key=_Pager.by_address,
+            descending=True)
+
+    def _has_leaves(self, address):
+        return next(iter(self._tree.leaves(address or '')), None) is not None
+
     @staticmethod
     def is_reverse(sorting, fail_status):
         if not sorting:
@@ -804,10 +883,14 @@ class BlockListRequest(_ClientRequestHandler):
                         lambda block: block.block_num <= head_block.block_num,
                         blocks)
 
-                blocks = itertools.islice(blocks, limit)
-                # realize the result list, which will evaluate the underlying
-                # iterator
-                blocks = list(map(lambda blkw: blkw.block, blocks))
+                # realize the page, which will evaluate the underlying
+                # iterator; only the headers of the blocks are read until
+                # their contents are needed for the response
+                blocks = list(itertools.islice(blocks, limit))
+                if not blocks:
+                    raise ValueError('No blocks in range')
+                start = blocks[0].block_num
+                blocks = [blkw.block for blkw in blocks]
 
                 next_block = next(block_iter, None)
                 if next_block:
@@ -815,9 +898,6 @@ class BlockListRequest(_ClientRequestHandler):
                         next_block.block_num)
                 else:
                     next_block_num = None
-
-                start = self._block_store.get(
-                    blocks[0].header_signature).block_num
             except ValueError:
                 if paging.start:
                     return self._status.INVALID_PAGING
@@ -945,23 +1025,40 @@ class BatchListRequest(_ClientRequestHandler):
             block_store=block_store)
 
     def _respond(self, request):
-        head_id = self._get_head_block(request).header_signature
+        head_block = self._get_head_block(request)
+        head_id = head_block.header_signature
         self._validate_ids(request.batch_ids)
+        reverse = self.is_reverse(request.sorting, self._status.INVALID_SORT)
 
-        batches = self._list_store_resources(
-            request,
-            head_id,
-            request.batch_ids,
-            self._block_store.get_batch,
-            lambda block: [a for a in block.batches])
+        if request.batch_ids:
+            batches = self._list_store_resources(
+                request,
+                head_id,
+                request.batch_ids,
+                self._block_store.get_batch,
+                lambda block: [a for a in block.batches])
 
-        if self.is_reverse(request.sorting, self._status.INVALID_SORT):
-            batches.reverse()
+            if reverse:
+                batches.reverse()
 
-        batches, paging = _Pager.paginate_resources(
-            request,
-            batches,
-            self._status.INVALID_PAGING)
+            batches, paging = _Pager.paginate_resources(
+                request,
+                batches,
+                self._status.INVALID_PAGING)
+        else:
+            try:
+                batch_iter = self._block_store.get_batch_iter(
+                    head_block,
+                    start_batch_id=request.paging.start or None,
+                    reverse=not reverse)
+            except ValueError as e:
+                LOGGER.debug(e)
+                raise _ResponseFailed(self._status.INVALID_PAGING)
+
+            batches, paging = _Pager.paginate_iter(
+                request,
+                batch_iter,
+                self._status.INVALID_PAGING)
 
         if not batches:
             return self._wrap_response(
@@ -1014,23 +1111,41 @@ class TransactionListRequest(_ClientRequestHandler):
             block_store=block_store)
 
     def _respond(self, request):
-        head_id = self._get_head_block(request).header_signature
+        head_block = self._get_head_block(request)
+        head_id = head_block.header_signature
         self._validate_ids(request.transaction_ids)
-
-        transactions = self._list_store_resources(
-            request,
-            head_id,
-            request.transaction_ids,
-            self._block_store.get_transaction,
-            lambda block: [t for a in block.batches for t in a.transactions])
-
-        if self.is_reverse(request.sorting, self._status.INVALID_SORT):
-            transactions.reverse()
-
-        transactions, paging = _Pager.paginate_resources(
-            request,
-            transactions,
-            self._status.INVALID_PAGING)
+        reverse = self.is_reverse(request.sorting, self._status.INVALID_SORT)
+
+        if request.transaction_ids:
+            transactions = self._list_store_resources(
+                request,
+                head_id,
+                request.transaction_ids,
+                self._block_store.get_transaction,
+                lambda block: [
+                    t for a in block.batches for t in a.transactions])
+
+            if reverse:
+                transactions.reverse()
+
+            transactions, paging = _Pager.paginate_resources(
+                request,
+                transactions,
+                self._status.INVALID_PAGING)
+        else:
+            try:
+                transaction_iter = self._block_store.get_transaction_iter(
+                    head_block,
+                    start_transaction_id=request.paging.start or None,
+                    reverse=not reverse)
+            except ValueError as e:
+                LOGGER.debug(e)
+                raise _ResponseFailed(self._status.INVALID_PAGING)
+
+            transactions, paging = _Pager.paginate_iter(
+                request,
+                transaction_iter,
+                self._status.INVALID_PAGING)
 
         if not transactions:
             return self._wrap_response(
@@ -15,6 +15,7 @@
 
 import ctypes
 from enum import IntEnum
+import struct
 
 import cbor
 
@@ -103,6 +104,47 @@ class MerkleDatabase(ffi.OwnedPointer):
 
         return _decode(ffi.from_c_bytes(c_data, c_data_len))
 
+    def get_multi(self, addresses, decode=True):
+        """Returns the values at several addresses, read in a single call
+        to the native library.
+
+        Args:
+            addresses (list of str): the addresses to read
+            decode (bool): False to return the encoded values, so that the
+                caller can decode only the values it uses
+
+        Returns:
+            (list): the value at each address, or None if the address has
+                no value
+        """
+        c_addresses = (ctypes.c_char_p * len(addresses))()
+        for (i, address) in enumerate(addresses):
+            c_addresses[i] = ctypes.c_char_p(address.encode())
+
+        (c_data, c_data_len) = ffi.prepare_byte_result()
+        _libexec('merkle_db_get_multi', self.pointer,
+                 c_addresses, ctypes.c_size_t(len(addresses)),
+                 ctypes.byref(c_data), ctypes.byref(c_data_len))
+
+        data = ctypes.string_at(c_data, c_data_len.value)
+
+        # The buffer starts with the length of each value, or -1 where
+        # there is none, followed by the values themselves.
+        lengths = struct.unpack_from('<{}q'.format(len(addresses)), data)
+        offset = struct.calcsize('<q') * len(addresses)
+
+        values = []
+        for length in lengths:
+            if length < 0:
+                values.append(None)
+                continue
+
+            encoded = data[offset:offset + length]
+            offset += length
+            values.append(_decode(encoded) if decode else encoded)
+
+        return values
+
     def __setitem__(self, address, value):
         return self.set(address, value)
 
@@ -170,11 +212,17 @@ class MerkleDatabase(ffi.OwnedPointer):
 
         return addresses
 
-    def leaves(self, prefix=None):
-        """Returns an iterator which returns tuples of (address, data) values
+    def leaves(self, prefix=None, start=None):
+        """Returns an iterator which returns tuples of (address, data) values,
+        ordered by address.
+
+        Args:
+            prefix (str): only return leaves under this address prefix
+            start (str): only return leaves whose address is greater than or
+                equal to this address. Subtrees before it are not loaded.
         """
         try:
-            return _LeafIterator(self.pointer, prefix)
+            return _LeafIterator(self.pointer, prefix, start)
         except KeyError:
             # The prefix doesn't exist
             return iter([])
@@ -210,7 +258,7 @@ def _libexec(name, *args):
 
 
 class _LeafIterator:
-    def __init__(self, merkle_db_ptr, prefix=None):
+    def __init__(self, merkle_db_ptr, prefix=None, start=None):
         if prefix is None:
             prefix = ''
 
@@ -218,8 +266,14 @@ class _LeafIterator:
 
         self._c_iter_ptr = ctypes.c_void_p()
 
-        _libexec('merkle_db_leaf_iterator_new',
-                 merkle_db_ptr, c_prefix, ctypes.byref(self._c_iter_ptr))
+        if start:
+            c_start = ctypes.c_char_p(start.encode())
+            _libexec('merkle_db_leaf_iterator_new_from',
+                     merkle_db_ptr, c_prefix, c_start,
+                     ctypes.byref(self._c_iter_ptr))
+        else:
+            _libexec('merkle_db_leaf_iterator_new',
+                     merkle_db_ptr, c_prefix, ctypes.byref(self._c_iter_ptr))
 
     def __del__(self):
         if self._c_iter_ptr:
@@ -453,22 +453,122 @@ impl StateReader for MerkleDatabase {
     }
 }
 
+impl MerkleDatabase {
+    /// Returns an iterator over the leaves under the given prefix, in address
+    /// order, which skips every leaf whose address is less than `start`.
+    ///
+    /// Subtrees that lie entirely before `start` are never loaded from the
+    /// database, so seeking to a page is proportional to the depth of the
+    /// trie, rather than the number of leaves preceding `start`.
+    pub fn leaves_from(
+        &self,
+        prefix: Option<&str>,
+        start: &str,
+    ) -> Result<MerkleLeafIterator, StateDatabaseError> {
+        MerkleLeafIterator::new_from(self.clone(), prefix, Some(start))
+    }
+
+    /// Returns the data for each of the given addresses, in order, or None
+    /// for an address that is not in the tree or has no data.
+    ///
+    /// All of the lookups share one read transaction, and a node on the path
+    /// to more than one of the addresses is only read and decoded once.
+    pub fn get_multi(
+        &self,
+        addresses: &[&str],
+    ) -> Result<Vec<Option<Vec<u8>>>, StateDatabaseError> {
+        let reader = self.db.reader()?;
+        let mut nodes: HashMap<String, Node> = HashMap::new();
+        let mut values = Vec::with_capacity(addresses.len());
+
+        for address in addresses {
+            let tokens = tokenize_address(address);
+
+            // None refers to the root node
+            let mut node_hash: Option<String> = None;
+            let mut found = true;
+
+            for token in tokens.iter() {
+                let child_hash = {
+                    let node = match node_hash {
+                        Some(ref hash) => &nodes[hash],
+                        None => &self.root_node,
+                    };
+                    match node.children.get(&token.to_string()) {
+                        Some(hash) => hash.clone(),
+                        None => {
+                            found = false;
+                            break;
+                        }
+                    }
+                };
+
+                if !nodes.contains_key(&child_hash) {
+                    let node = match reader.get(child_hash.as_bytes()) {
+                        Some(bytes) => Node::from_bytes(&bytes)?,
+                        None => return Err(StateDatabaseError::NotFound(child_hash)),
+                    };
+                    nodes.insert(child_hash.clone(), node);
+                }
+
+                node_hash = Some(child_hash);
+            }
+
+            values.push(if found {
+                match node_hash {
+                    Some(ref hash) => nodes[hash].value.clone(),
+                    None => self.root_node.value.clone(),
+                }
+            } else {
+                None
+            });
+        }
+
+        Ok(values)
+    }
+}
+
 /// A MerkleLeafIterator is fixed to iterate over the state address/value pairs
 /// the merkle root hash at the time of its creation.
 pub struct MerkleLeafIterator {
     merkle_db: MerkleDatabase,
     visited: VecDeque<(String, Node)>,
+    start: Option<String>,
 }
 
 impl MerkleLeafIterator {
     fn new(merkle_db: MerkleDatabase, prefix: Option<&str>) -> Result<Self, StateDatabaseError> {
+        MerkleLeafIterator::new_from(merkle_db, prefix, None)
+    }
+
+    fn new_from(
+        merkle_db: MerkleDatabase,
+        prefix: Option<&str>,
+        start: Option<&str>,
+    ) -> Result<Self, StateDatabaseError> {
         let path = prefix.unwrap_or("");
 
         let mut visited = VecDeque::new();
         let initial_node = merkle_db.get_by_address(path)?;
         visited.push_front((path.to_string(), initial_node));
 
-        Ok(MerkleLeafIterator { merkle_db, visited })
+        Ok(MerkleLeafIterator {
+            merkle_db,
+            visited,
+            start: start.map(String::from),
+        })
+    }
+
+    /// Returns true if every address under the given path sorts before the
+    /// start address, in which case the subtree does not need to be visited.
+    fn is_before_start(&self, path: &str) -> bool {
+        match self.start {
+            Some(ref start) => {
+                let len = path.len().min(start.len());
+                path.as_bytes() < &start.as_bytes()[..len]
+            }
+            None => false,
+        }
     }
 }
 
@@ -489,12 +589,15 @@ impl Iterator for MerkleLeafIterator {
                 // Reverse the list, such that we have an in-order traversal of the
                 // children, based on the natural path order.
                 for (child_path, hash_key) in node.children.iter().rev() {
+                    let mut child_address = path.clone();
+                    child_address.push_str(child_path);
+                    if self.is_before_start(&child_address) {
+                        continue;
+                    }
                     let child = match get_node_by_hash(&self.merkle_db.db, hash_key) {
                         Ok(node) => node,
                         Err(err) => return Some(Err(err)),
                     };
-                    let mut child_address = path.clone();
-                    child_address.push_str(child_path);
                     self.visited.push_front((child_address, child));
                 }
             } else {
@@ -1306,6 +1409,89 @@ mod tests {
         })
     }
 
+    #[test]
+    fn leaf_iteration_from_start() {
+        run_test(|merkle_path| {
+            let mut merkle_db = make_db(merkle_path);
+
+            let addresses = vec!["ab0000", "aba001", "abff02", "ac0003"];
+            for (i, key) in addresses.iter().enumerate() {
+                let new_root = merkle_db
+                    .set(key, format!("{:04x}", i * 10).as_bytes())
+                    .unwrap();
+                merkle_db.set_merkle_root(new_root).unwrap();
+            }
+
+            // start at an existing address
+            let mut leaf_iter = merkle_db.leaves_from(None, "aba001").unwrap();
+            assert_eq!(
+                ("aba001".into(), "000a".as_bytes().to_vec()),
+                leaf_iter.next().unwrap().unwrap()
+            );
+            assert_eq!(
+                ("abff02".into(), "0014".as_bytes().to_vec()),
+                leaf_iter.next().unwrap().unwrap()
+            );
+            assert_eq!(
+                ("ac0003".into(), "001e".as_bytes().to_vec()),
+                leaf_iter.next().unwrap().unwrap()
+            );
+            assert!(leaf_iter.next().is_none(), "Iterator should be Exhausted");
+
+            // start between two addresses, within a prefix
+            let mut leaf_iter = merkle_db.leaves_from(Some("ab"), "ab0001").unwrap();
+            assert_eq!(
+                ("aba001".into(), "000a".as_bytes().to_vec()),
+                leaf_iter.next().unwrap().unwrap()
+            );
+            assert_eq!(
+                ("abff02".into(), "0014".as_bytes().to_vec()),
+                leaf_iter.next().unwrap().unwrap()
+            );
+            assert!(leaf_iter.next().is_none(), "Iterator should be Exhausted");
+
+            // start after every address
+            let mut leaf_iter = merkle_db.leaves_from(None, "ff").unwrap();
+            assert!(leaf_iter.next().is_none(), "Iterator should be Exhausted");
+        })
+    }
+
+    #[test]
+    fn get_multi() {
+        run_test(|merkle_path| {
+            let mut merkle_db = make_db(merkle_path);
+
+            let addresses = vec!["ab0000", "aba001", "abff02", "ac0003"];
+            for (i, key) in addresses.iter().enumerate() {
+                let new_root = merkle_db
+                    .set(key, format!("{:04x}", i * 10).as_bytes())
+                    .unwrap();
+                merkle_db.set_merkle_root(new_root).unwrap();
+            }
+
+            let values = merkle_db
+                .get_multi(&["abff02", "ab0000", "ab0001", "ab", "ac0003"])
+                .unwrap();
+            assert_eq!(
+                vec![
+                    Some("0014".as_bytes().to_vec()),
+                    Some("0000".as_bytes().to_vec()),
+                    None,
+                    None,
+                    Some("001e".as_bytes().to_vec()),
+                ],
+                values
+            );
+
+            for address in addresses {
+                assert_eq!(
+                    merkle_db.get(address).unwrap(),
+                    merkle_db.get_multi(&[address]).unwrap()[0]
+                );
+            }
+        })
+    }
+
     fn run_test<T>(test: T) -> ()
     where
         T: FnOnce(&str) -> () + panic::UnwindSafe,
@@ -255,6 +255,89 @@ pub extern "C" fn merkle_db_get(
     }
 }
 
+/// Looks up the data at each of the given addresses in one call.
+///
+/// The result is a single buffer which starts with a little-endian i64
+/// length for each address, in order, where -1 marks an address with no
+/// data. The data of the addresses follows, concatenated in the same order.
+#[no_mangle]
+pub extern "C" fn merkle_db_get_multi(
+    merkle_db: *mut c_void,
+    addresses: *const *const c_char,
+    addresses_len: usize,
+    bytes: *mut *const u8,
+    bytes_len: *mut usize,
+) -> ErrorCode {
+    if merkle_db.is_null() {
+        return ErrorCode::NullPointerProvided;
+    }
+
+    if addresses_len > 0 && addresses.is_null() {
+        return ErrorCode::NullPointerProvided;
+    }
+
+    let addresses: Result<Vec<&str>, ErrorCode> = if addresses_len > 0 {
+        unsafe { slice::from_raw_parts(addresses, addresses_len) }
+            .iter()
+            .map(|c_str| {
+                unsafe { CStr::from_ptr(*c_str).to_str() }.map_err(|_| ErrorCode::InvalidAddress)
+            })
+            .collect()
+    } else {
+        Ok(Vec::with_capacity(0))
+    };
+
+    let addresses = match addresses {
+        Ok(addresses) => addresses,
+        Err(err) => return err,
+    };
+
+    match unsafe { (*(merkle_db as *mut MerkleDatabase)).get_multi(&addresses) } {
+        Ok(values) => {
+            let values_len: usize = values
+                .iter()
+                .map(|value| value.as_ref().map(|data| data.len()).unwrap_or(0))
+                .sum();
+
+            let mut buffer = Vec::with_capacity(values.len() * 8 + values_len);
+            for value in values.iter() {
+                let len: i64 = match *value {
+                    Some(ref data) => data.len() as i64,
+                    None => -1,
+                };
+                for i in 0..8 {
+                    buffer.push((len >> (i * 8)) as u8);
+                }
+            }
+            for value in values.into_iter() {
+                if let Some(data) = value {
+                    buffer.extend(data);
+                }
+            }
+
+            let buffer = buffer.into_boxed_slice();
+            unsafe {
+                *bytes_len = buffer.len();
+                *bytes = buffer.as_ptr();
+            }
+
+            // It will be up to the callee to cleanup this memory
+            mem::forget(buffer);
+
+            ErrorCode::Success
+        }
+        Err(StateDatabaseError::DatabaseError(err)) => {
+            error!("A Database Error occurred: {}", err);
+            ErrorCode::DatabaseError
+        }
+        Err(StateDatabaseError::NotFound(_)) => ErrorCode::NotFound,
+        Err(err) => {
+            error!("Unknown Error!: {:?}", err);
+            ErrorCode::Unknown
+        }
+    }
+}
+
 #[no_mangle]
 pub extern "C" fn merkle_db_set(
     merkle_db: *mut c_void,
@@ -532,6 +615,59 @@ pub extern "C" fn merkle_db_leaf_iterator_new(
     }
 }
 
+#[no_mangle]
+pub extern "C" fn merkle_db_leaf_iterator_new_from(
+    merkle_db: *mut c_void,
+    prefix: *const c_char,
+    start: *const c_char,
+    iterator: *mut *const c_void,
+) -> ErrorCode {
+    if merkle_db.is_null() {
+        return ErrorCode::NullPointerProvided;
+    }
+
+    if prefix.is_null() {
+        return ErrorCode::NullPointerProvided;
+    }
+
+    if start.is_null() {
+        return ErrorCode::NullPointerProvided;
+    }
+
+    let prefix = unsafe {
+        match CStr::from_ptr(prefix).to_str() {
+            Ok(s) => s,
+            Err(_) => return ErrorCode::InvalidAddress,
+        }
+    };
+
+    let start = unsafe {
+        match CStr::from_ptr(start).to_str() {
+            Ok(s) => s,
+            Err(_) => return ErrorCode::InvalidAddress,
+        }
+    };
+
+    match unsafe { (*(merkle_db as *mut MerkleDatabase)).leaves_from(Some(prefix), start) } {
+        Ok(leaf_iterator) => {
+            unsafe {
+                *iterator = Box::into_raw(Box::new(leaf_iterator)) as *const c_void;
+            }
+
+            ErrorCode::Success
+        }
+        Err(StateDatabaseError::DatabaseError(err)) => {
+            error!("A Database Error occurred: {}", err);
+            ErrorCode::DatabaseError
+        }
+        Err(StateDatabaseError::NotFound(_)) => ErrorCode::NotFound,
+        Err(err) => {
+            error!("Unknown Error!: {:?}", err);
+            ErrorCode::Unknown
+        }
+    }
+}
+
 #[no_mangle]
 pub extern "C" fn merkle_db_leaf_iterator_drop(iterator: *mut c_void) -> ErrorCode {
     if iterator.is_null() {
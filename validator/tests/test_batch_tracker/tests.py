@@ -13,9 +13,12 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 import unittest
+from threading import Thread
 from unittest.mock import Mock
 
 from sawtooth_validator.protobuf import batch_pb2
+from sawtooth_validator.protobuf.client_batch_submit_pb2 \
+    import ClientBatchStatus
 from sawtooth_validator.protobuf import transaction_pb2
 from sawtooth_validator.state.batch_tracker import BatchTracker
 
@@ -49,6 +52,72 @@ class BatchTrackerTest(unittest.TestCase):
         self.assertEqual(1, len(more_invalid_info))
         self.assertEqual("bad_txn", more_invalid_info[0]["id"])
 
+    def test_status_observers(self):
+        """Test that status observers are notified of every pending batch
+        that is committed or found invalid.
+
+        - Add two pending batches
+        - Commit one, and find a transaction in the other invalid
+        - Ensure the observer was notified of each, with the invalid info
+          of the invalid batch
+        """
+        block_store = Mock()
+        block_store.has_batch.side_effect = \
+            lambda batch_id: batch_id == "good_batch"
+        observer = Mock()
+        batch_tracker = BatchTracker(block_store, status_observers=[observer])
+
+        batch_tracker.notify_batch_pending(
+            make_batch("good_batch", "good_txn"))
+        batch_tracker.notify_batch_pending(
+            make_batch("bad_batch", "bad_txn"))
+        observer.notify_batch_statuses.assert_not_called()
+
+        batch_tracker.chain_update(Mock(), [])
+        observer.notify_batch_statuses.assert_called_once_with(
+            [("good_batch", ClientBatchStatus.COMMITTED, [])])
+
+        batch_tracker.notify_txn_invalid("bad_txn", message="error")
+        observer.notify_batch_statuses.assert_called_with(
+            [("bad_batch", ClientBatchStatus.INVALID,
+              [{"id": "bad_txn", "message": "error"}])])
+        self.assertEqual(2, observer.notify_batch_statuses.call_count)
+
+        batch_tracker.chain_update(Mock(), [])
+        self.assertEqual(2, observer.notify_batch_statuses.call_count)
+
+    def test_status_observers_outside_lock(self):
+        """Test that status observers are notified after the tracker lock
+        is released, with every batch a block commits in one call.
+        """
+        block_store = Mock()
+        block_store.has_batch.return_value = True
+        batch_tracker = BatchTracker(block_store)
+
+        notified = []
+
+        def notify_batch_statuses(statuses):
+            # Another thread must be able to take the lock meanwhile
+            acquired = Thread(target=lambda: notified.append(
+                batch_tracker.get_statuses(["batch_1"])))
+            acquired.start()
+            acquired.join(timeout=5)
+            notified.append(sorted(statuses))
+
+        observer = Mock()
+        observer.notify_batch_statuses.side_effect = notify_batch_statuses
+        batch_tracker._status_observers.append(observer)
+
+        batch_tracker.notify_batch_pending(make_batch("batch_1", "txn_1"))
+        batch_tracker.notify_batch_pending(make_batch("batch_2", "txn_2"))
+        batch_tracker.chain_update(Mock(), [])
+
+        self.assertEqual(
+            [{"batch_1": ClientBatchStatus.COMMITTED},
+             [("batch_1", ClientBatchStatus.COMMITTED, []),
+              ("batch_2", ClientBatchStatus.COMMITTED, [])]],
+            notified)
+
 
 def make_batch(batch_id, txn_id):
     transaction = transaction_pb2.Transaction(header_signature=txn_id)
@@ -23,8 +23,10 @@ from sawtooth_validator.journal.block_store import BlockStore
 from sawtooth_validator.journal.block_wrapper import NULL_BLOCK_IDENTIFIER
 from sawtooth_validator.journal.block_wrapper import BlockWrapper
 
+from sawtooth_validator.protobuf.batch_pb2 import Batch
 from sawtooth_validator.protobuf.block_pb2 import Block
 from sawtooth_validator.protobuf.block_pb2 import BlockHeader
+from sawtooth_validator.protobuf.transaction_pb2 import Transaction
 
 from test_journal.block_tree_manager import BlockTreeManager
 
@@ -196,6 +198,24 @@ class BlockStoreTest(unittest.TestCase):
         self.assertEqual(1, block_store.get_batch_count())
         self.assertEqual(1, block_store.get_transaction_count())
 
+    def test_deserialize_block(self):
+        """ Test that a deserialized block exposes its header and id before
+        its batches are parsed, and that it round trips through
+        serialization.
+        """
+        block = self.create_block()
+        packed = BlockStore.serialize_block(block)
+
+        stored = BlockStore.deserialize_block(packed)
+        self.assertEqual(block.header_signature, stored.header_signature)
+        self.assertEqual(block.identifier, stored.identifier)
+        self.assertEqual(block.block_num, stored.block_num)
+        self.assertEqual(block.previous_block_id, stored.previous_block_id)
+        self.assertEqual(packed, BlockStore.serialize_block(stored))
+
+        self.assert_blocks_equal(stored, block)
+        self.assertEqual(len(block.batches), len(stored.batches))
+
     def assert_blocks_equal(self, stored, reference):
         self.asset_protobufs_equal(stored.block,
                                    reference.block)
@@ -290,6 +310,98 @@ class BlockStorePredecessorIteratorTest(unittest.TestCase):
         return chain
 
 
+class BlockStoreContentIteratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.block_store = BlockStore(DictDatabase(
+            indexes=BlockStore.create_index_configuration()))
+        self.block_store.update_chain(self._create_chain(3))
+
+    def test_iterate_batches(self):
+        """Verify that batches are listed from the head block to the genesis
+        block, and in the opposite order when not reversed.
+        """
+        head = self.block_store.chain_head
+
+        ids = [b.header_signature
+               for b in self.block_store.get_batch_iter(head)]
+        self.assertEqual(
+            ['batch2-0', 'batch2-1', 'batch1-0', 'batch1-1',
+             'batch0-0', 'batch0-1'],
+            ids)
+
+        ids = [b.header_signature
+               for b in self.block_store.get_batch_iter(head, reverse=False)]
+        self.assertEqual(
+            ['batch0-1', 'batch0-0', 'batch1-1', 'batch1-0',
+             'batch2-1', 'batch2-0'],
+            ids)
+
+    def test_iterate_batches_from_start(self):
+        """Verify that batch iteration seeks to the start batch, and stops at
+        the given head block.
+        """
+        head = self.block_store['abcd1']
+
+        ids = [b.header_signature
+               for b in self.block_store.get_batch_iter(
+                   head, start_batch_id='batch1-1')]
+        self.assertEqual(['batch1-1', 'batch0-0', 'batch0-1'], ids)
+
+        ids = [b.header_signature
+               for b in self.block_store.get_batch_iter(
+                   head, start_batch_id='batch0-0', reverse=False)]
+        self.assertEqual(['batch0-0', 'batch1-1', 'batch1-0'], ids)
+
+        with self.assertRaises(ValueError):
+            self.block_store.get_batch_iter(head, start_batch_id='batch2-0')
+
+        with self.assertRaises(ValueError):
+            self.block_store.get_batch_iter(head, start_batch_id='missing')
+
+    def test_iterate_transactions_from_start(self):
+        """Verify that transaction iteration seeks to the start transaction.
+        """
+        head = self.block_store.chain_head
+
+        ids = [t.header_signature
+               for t in self.block_store.get_transaction_iter(
+                   head, start_transaction_id='txn1-0')]
+        self.assertEqual(['txn1-0', 'txn1-1', 'txn0-0', 'txn0-1'], ids)
+
+        with self.assertRaises(ValueError):
+            self.block_store.get_transaction_iter(
+                head, start_transaction_id='missing')
+
+    @staticmethod
+    def _create_chain(length):
+        chain = []
+        previous_block_id = NULL_BLOCK_IDENTIFIER
+        for i in range(length):
+            batches = [
+                Batch(header_signature='batch{}-{}'.format(i, j),
+                      transactions=[
+                          Transaction(
+                              header_signature='txn{}-{}'.format(i, j))])
+                for j in range(2)
+            ]
+            block = BlockWrapper(
+                Block(header_signature='abcd{}'.format(i),
+                      batches=batches,
+                      header=BlockHeader(
+                          block_num=i,
+                          previous_block_id=previous_block_id
+                ).SerializeToString()))
+
+            previous_block_id = block.identifier
+
+            chain.append(block)
+
+        chain.reverse()
+
+        return chain
+
+
 def _get_first_batch_id(block):
     for batch in block.batches:
         return batch.header_signature
@@ -0,0 +1,132 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+import unittest
+
+# pylint: disable=protected-access
+from sawtooth_validator.state.client_handlers import _Pager
+from sawtooth_validator.state.client_handlers import _ResponseFailed
+from sawtooth_validator.protobuf.client_list_control_pb2 \
+    import ClientPagingControls
+from sawtooth_validator.protobuf.client_state_pb2 \
+    import ClientStateListRequest
+from sawtooth_validator.protobuf.client_state_pb2 \
+    import ClientStateListResponse
+from sawtooth_validator.protobuf.client_batch_pb2 \
+    import ClientBatchListRequest
+from sawtooth_validator.protobuf.batch_pb2 import Batch
+
+
+FAIL_STATUS = 'fail'
+
+
+def make_entries(addresses):
+    return [ClientStateListResponse.Entry(address=a) for a in addresses]
+
+
+def make_batches(ids):
+    return [Batch(header_signature=i) for i in ids]
+
+
+class TestPager(unittest.TestCase):
+    def test_index_by_id_unsorted(self):
+        """Verifies that resources not sorted by id are searched for the
+        first resource with the id.
+        """
+        batches = make_batches(['c', 'a', 'b', 'a'])
+
+        self.assertEqual(0, _Pager.index_by_id('c', batches))
+        self.assertEqual(1, _Pager.index_by_id('a', batches))
+        self.assertEqual(2, _Pager.index_by_id('b', batches))
+        self.assertIsNone(_Pager.index_by_id('d', batches))
+        self.assertIsNone(_Pager.index_by_id('a', []))
+
+    def test_index_by_id_sorted(self):
+        """Verifies that resources sorted by id, in either order, are
+        searched by bisection, finding every id present and no others.
+        """
+        addresses = ['{:02x}'.format(i) for i in range(0, 100, 2)]
+        ascending = make_entries(addresses)
+        descending = make_entries(reversed(addresses))
+
+        for index, address in enumerate(addresses):
+            self.assertEqual(index, _Pager.index_by_id(
+                address, ascending, _Pager.by_address, descending=False))
+            self.assertEqual(
+                len(addresses) - 1 - index,
+                _Pager.index_by_id(
+                    address, descending, _Pager.by_address,
+                    descending=True))
+
+        for missing in ['', '01', '31', 'ff']:
+            self.assertIsNone(_Pager.index_by_id(
+                missing, ascending, _Pager.by_address, descending=False))
+            self.assertIsNone(_Pager.index_by_id(
+                missing, descending, _Pager.by_address, descending=True))
+
+    def test_paginate_resources_by_key(self):
+        """Verifies that a list is paged from the resource whose key matches
+        the start marker, with the key of the following resource as the
+        next marker.
+        """
+        addresses = ['{:02x}'.format(i) for i in range(10)]
+        entries = make_entries(reversed(addresses))
+        request = ClientStateListRequest(
+            paging=ClientPagingControls(start='06', limit=3))
+
+        page, paging = _Pager.paginate_resources(
+            request, entries, FAIL_STATUS,
+            key=_Pager.by_address, descending=True)
+
+        self.assertEqual(['06', '05', '04'], [e.address for e in page])
+        self.assertEqual('06', paging.start)
+        self.assertEqual('03', paging.next)
+        self.assertEqual(3, paging.limit)
+
+        request.paging.start = '01'
+        page, paging = _Pager.paginate_resources(
+            request, entries, FAIL_STATUS,
+            key=_Pager.by_address, descending=True)
+
+        self.assertEqual(['01', '00'], [e.address for e in page])
+        self.assertEqual('', paging.next)
+
+    def test_paginate_resources_bad_start(self):
+        """Verifies that a start marker matching no resource fails with the
+        status given.
+        """
+        request = ClientBatchListRequest(
+            paging=ClientPagingControls(start='z'))
+
+        with self.assertRaises(_ResponseFailed) as context:
+            _Pager.paginate_resources(
+                request, make_batches(['a', 'b']), FAIL_STATUS)
+
+        self.assertEqual(FAIL_STATUS, context.exception.status)
+
+    def test_paginate_iter(self):
+        """Verifies that only one page, plus the resource giving the next
+        marker, is read from an iterator.
+        """
+        batches = iter(make_batches(['a', 'b', 'c', 'd']))
+        request = ClientBatchListRequest(
+            paging=ClientPagingControls(start='a', limit=2))
+
+        page, paging = _Pager.paginate_iter(request, batches, FAIL_STATUS)
+
+        self.assertEqual(
+            ['a', 'b'], [b.header_signature for b in page])
+        self.assertEqual('c', paging.next)
+        self.assertEqual(['d'], [b.header_signature for b in batches])
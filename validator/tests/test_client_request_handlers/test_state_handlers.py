@@ -342,6 +342,25 @@ class TestStateListRequests(ClientHandlerTestCase):
         self.assertFalse(response.paging.SerializeToString())
         self.assertFalse(response.entries)
 
+    def test_state_list_with_missing_start(self):
+        """Verifies data requests break when the paging start is not an
+        existing entry.
+
+        Queries the latest state in the default mock db:
+            {'00...1': b'3', '00...2': b'5', '00...3': b'7'}
+
+        Expects to find:
+            - a status of INVALID_PAGING for a start of '00...0'
+            - a status of INVALID_PAGING for a start of '00...4'
+        """
+        response = self.make_paged_request(limit=1, start='0' * 70)
+        self.assertEqual(self.status.INVALID_PAGING, response.status)
+        self.assertFalse(response.entries)
+
+        response = self.make_paged_request(limit=1, start='0' * 69 + '4')
+        self.assertEqual(self.status.INVALID_PAGING, response.status)
+        self.assertFalse(response.entries)
+
     def test_state_list_paginated_with_state_root(self):
         """Verifies data list requests work with both paging and a head id.
 
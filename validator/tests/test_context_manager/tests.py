@@ -26,8 +26,13 @@ import time
 
 from sawtooth_validator.database.native_lmdb import NativeLmdbDatabase
 from sawtooth_validator.execution import context_manager
+from sawtooth_validator.execution.execution_context import ChainWrites
+from sawtooth_validator.execution.tp_state_handlers import \
+    TpStateApplyHandler
 from sawtooth_validator.state.merkle import MerkleDatabase
 from sawtooth_validator.protobuf.events_pb2 import Event
+from sawtooth_validator.protobuf import state_context_pb2
+from sawtooth_validator.protobuf.transaction_receipt_pb2 import StateChange
 
 
 TestAddresses = namedtuple('TestAddresses',
@@ -250,6 +255,77 @@ class TestContextManager(unittest.TestCase):
         self.assertEqual(events, results[2])
         self.assertEqual(data, results[3])
 
+    def test_apply_buffered_changes(self):
+        """Tests that a TpStateApplyRequest applies its sets, deletes,
+        events and receipt data to the context, that an unauthorized
+        address is reported without any of the changes being applied, and
+        that nothing is reported applied to an unknown context.
+        """
+        addr1 = self._create_address()
+        addr2 = self._create_address()
+        context_id = self.context_manager.create_context(
+            state_hash=self.context_manager.get_first_root(),
+            base_contexts=[],
+            inputs=[addr1, addr2],
+            outputs=[addr1, addr2])
+
+        events = [Event(event_type="test1"), Event(event_type="test2")]
+        data = [b'test1', b'test2']
+
+        handler = TpStateApplyHandler(self.context_manager)
+        result = handler.handle(
+            'test_conn_id',
+            state_context_pb2.TpStateApplyRequest(
+                context_id=context_id,
+                entries=[state_context_pb2.TpStateEntry(
+                    address=addr1, data=b'1')],
+                deleted_addresses=[addr2],
+                events=events,
+                receipt_data=data).SerializeToString())
+
+        self.assertEqual(
+            state_context_pb2.TpStateApplyResponse.OK,
+            result.message_out.status)
+        self.assertEqual([addr1], result.message_out.addresses)
+        self.assertEqual([addr2], result.message_out.deleted_addresses)
+
+        results = self.context_manager.get_execution_results(context_id)
+        self.assertEqual({addr1: b'1'}, results[0])
+        self.assertEqual({addr2: None}, results[1])
+        self.assertEqual(events, results[2])
+        self.assertEqual(data, results[3])
+
+        result = handler.handle(
+            'test_conn_id',
+            state_context_pb2.TpStateApplyRequest(
+                context_id=context_id,
+                entries=[state_context_pb2.TpStateEntry(
+                    address=addr2, data=b'2')],
+                deleted_addresses=[self._create_address('unauthorized')],
+                events=events,
+                receipt_data=data).SerializeToString())
+
+        self.assertEqual(
+            state_context_pb2.TpStateApplyResponse.AUTHORIZATION_ERROR,
+            result.message_out.status)
+        self.assertEqual(
+            results,
+            self.context_manager.get_execution_results(context_id))
+
+        result = handler.handle(
+            'test_conn_id',
+            state_context_pb2.TpStateApplyRequest(
+                context_id='unknown',
+                entries=[state_context_pb2.TpStateEntry(
+                    address=addr1, data=b'1')],
+                deleted_addresses=[addr2]).SerializeToString())
+
+        self.assertEqual(
+            state_context_pb2.TpStateApplyResponse.OK,
+            result.message_out.status)
+        self.assertEqual([], result.message_out.addresses)
+        self.assertEqual([], result.message_out.deleted_addresses)
+
     def test_address_enforcement(self):
         """Tests that the ContextManager enforces address characteristics.
 
@@ -522,6 +598,39 @@ class TestContextManager(unittest.TestCase):
               ('tttt', b'12'),
               ('zzoo', b'27')]])
 
+    def test_create_context_leaves_base_writable(self):
+        """Tests that creating a context based on another does not stop
+        the base context from being written to, and that the new context
+        sees the writes made to the base context before it was created.
+        """
+        base_id = self.context_manager.create_context(
+            state_hash=self.first_state_hash,
+            base_contexts=[],
+            inputs=[self._create_address('aaaa'),
+                    self._create_address('bbbb')],
+            outputs=[self._create_address('aaaa'),
+                     self._create_address('bbbb')])
+        self.context_manager.set(
+            base_id, [{self._create_address('aaaa'): b'1'}])
+
+        context_id = self.context_manager.create_context(
+            state_hash=self.first_state_hash,
+            base_contexts=[base_id],
+            inputs=[self._create_address('aaaa')],
+            outputs=[])
+
+        self.context_manager.set(
+            base_id, [{self._create_address('bbbb'): b'2'}])
+
+        self.assertEqual(
+            self.context_manager.get(
+                base_id, [self._create_address('bbbb')]),
+            [(self._create_address('bbbb'), b'2')])
+        self.assertEqual(
+            self.context_manager.get(
+                context_id, [self._create_address('aaaa')]),
+            [(self._create_address('aaaa'), b'1')])
+
     def test_squash(self):
         """Tests that squashing a context based on state from other
         contexts will result in the same merkle hash as updating the
@@ -571,6 +680,166 @@ class TestContextManager(unittest.TestCase):
         # 4)
         self.assertEqual(resulting_state_hash, test_resulting_state_hash)
 
+    def test_squash_contexts_with_shared_base(self):
+        """Tests that squashing several contexts whose shared base context
+        is not itself squashed keeps the latest write to each address.
+
+                   i:a
+                   o:a
+               +->ctx_2+
+               |  s:a:2|
+        ctx_1+-|       |--->squash(ctx_3, ctx_2)
+        s:a:1  |  i:b  |
+        s:b:1  |  o:c  |
+               +->ctx_3+
+                  s:c:3
+
+        Notes:
+            1. ctx_2 and ctx_3 are both based on ctx_1, which is not
+               passed to squash.
+            2. Assert that 'a' has the value set in ctx_2, and that 'b'
+               is squashed from ctx_1.
+        """
+
+        sh0 = self.first_state_hash
+        address_a = self._create_address('a')
+        address_b = self._create_address('b')
+        address_c = self._create_address('c')
+
+        ctx_1 = self.context_manager.create_context(
+            state_hash=sh0,
+            base_contexts=[],
+            inputs=[],
+            outputs=[address_a, address_b])
+        self.context_manager.set(ctx_1, [{address_a: b'1'},
+                                         {address_b: b'1'}])
+
+        ctx_2 = self.context_manager.create_context(
+            state_hash=sh0,
+            base_contexts=[ctx_1],
+            inputs=[address_a],
+            outputs=[address_a])
+        self.assertEqual(self.context_manager.get(ctx_2, [address_a]),
+                         [(address_a, b'1')])
+        self.context_manager.set(ctx_2, [{address_a: b'2'}])
+
+        ctx_3 = self.context_manager.create_context(
+            state_hash=sh0,
+            base_contexts=[ctx_1],
+            inputs=[address_b],
+            outputs=[address_c])
+        self.context_manager.set(ctx_3, [{address_c: b'3'}])
+
+        squash = self.context_manager.get_squash_handler()
+        resulting_state_hash = squash(
+            state_root=sh0,
+            context_ids=[ctx_3, ctx_2],
+            persist=True,
+            clean_up=True)
+
+        tree = MerkleDatabase(self.database_results)
+        expected_state_hash = tree.update({
+            address_a: b'2',
+            address_b: b'1',
+            address_c: b'3'
+        })
+
+        self.assertEqual(resulting_state_hash, expected_state_hash)
+
+    def test_squash_state_changes(self):
+        """Tests that the changes made by squashes are recorded, so that the
+        changes between a state root and one it was derived from, through
+        one or more squashes, can be looked up.
+
+        Notes:
+            1. Squash a context setting 'a' and 'b' onto sh0, giving sh1.
+            2. Squash a context setting 'a' again and deleting 'b' onto
+               sh1, giving sh2.
+            3. Assert that the changes from sh0 to sh2 hold the latest
+               change to each address, and that unknown roots give None.
+            4. Squash a context setting 'a' and 'b' back onto sh2, giving
+               sh1 again, and assert that the changes from either parent
+               of sh1 are known.
+            5. Squash a context setting 'a' to the value it has under sh1,
+               which leaves the root unchanged, and assert that changes
+               are no longer put together across sh1.
+        """
+        sh0 = self.first_state_hash
+        address_a = self._create_address('a')
+        address_b = self._create_address('b')
+        squash = self.context_manager.get_squash_handler()
+
+        # 1.
+        ctx_1 = self.context_manager.create_context(
+            state_hash=sh0,
+            base_contexts=[],
+            inputs=[],
+            outputs=[address_a, address_b])
+        self.context_manager.set(ctx_1, [{address_a: b'1'},
+                                         {address_b: b'1'}])
+        sh1 = squash(sh0, [ctx_1], persist=True, clean_up=True)
+
+        # 2.
+        ctx_2 = self.context_manager.create_context(
+            state_hash=sh1,
+            base_contexts=[],
+            inputs=[],
+            outputs=[address_a, address_b])
+        self.context_manager.set(ctx_2, [{address_a: b'2'}])
+        self.context_manager.delete(ctx_2, [address_b])
+        sh2 = squash(sh1, [ctx_2], persist=True, clean_up=True)
+
+        # 3.
+        def changes(state_root, parent_root):
+            return sorted(
+                (change.address, change.value, change.type)
+                for change in self.context_manager.get_state_changes(
+                    state_root, parent_root))
+
+        self.assertEqual(changes(sh1, sh0), [
+            (address_a, b'1', StateChange.SET),
+            (address_b, b'1', StateChange.SET)])
+        self.assertEqual(changes(sh2, sh0), [
+            (address_a, b'2', StateChange.SET),
+            (address_b, b'', StateChange.DELETE)])
+        self.assertIsNone(
+            self.context_manager.get_state_changes(sh0, sh2))
+
+        # 4.
+        ctx_3 = self.context_manager.create_context(
+            state_hash=sh2,
+            base_contexts=[],
+            inputs=[],
+            outputs=[address_a, address_b])
+        self.context_manager.set(ctx_3, [{address_a: b'1'},
+                                         {address_b: b'1'}])
+        self.assertEqual(
+            sh1, squash(sh2, [ctx_3], persist=True, clean_up=True))
+
+        self.assertEqual(changes(sh1, sh0), [
+            (address_a, b'1', StateChange.SET),
+            (address_b, b'1', StateChange.SET)])
+        self.assertEqual(changes(sh1, sh2), [
+            (address_a, b'1', StateChange.SET),
+            (address_b, b'1', StateChange.SET)])
+
+        # 5.
+        ctx_4 = self.context_manager.create_context(
+            state_hash=sh1,
+            base_contexts=[],
+            inputs=[],
+            outputs=[address_a])
+        self.context_manager.set(ctx_4, [{address_a: b'1'}])
+        self.assertEqual(
+            sh1, squash(sh1, [ctx_4], persist=True, clean_up=True))
+
+        self.assertIsNone(
+            self.context_manager.get_state_changes(sh1, sh1))
+        self.assertIsNone(
+            self.context_manager.get_state_changes(sh2, sh0))
+        self.assertIsNone(
+            self.context_manager.get_state_changes(sh1, sh0))
+
     def test_squash_no_updates(self):
         """Tests that squashing a context that has no state updates will return
            the starting state root hash.
@@ -1517,3 +1786,154 @@ class TestContextManager(unittest.TestCase):
             virtual=False)
         self.assertEqual(sh2, sh2_assertion,
                          "The final state hash must be correct")
+
+
+class _CountingTree(object):
+    """Stands in for a MerkleDatabase opened at a state root, recording the
+    addresses it is asked to read.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.reads = []
+
+    def get_multi(self, addresses):
+        self.reads.extend(addresses)
+        return [self.state.get(address) for address in addresses]
+
+
+class TestStateReadCache(unittest.TestCase):
+    def test_read_caches_values_per_state_root(self):
+        """Tests that values, including missing ones, are only read from the
+        tree once per state root.
+        """
+        cache = context_manager._StateReadCache(1024 * 1024)
+        tree = _CountingTree({'a': b'1'})
+
+        self.assertEqual(
+            [('a', b'1'), ('b', None)],
+            cache.read(tree, 'root_1', ['a', 'b']))
+        self.assertEqual(
+            [('b', None), ('a', b'1')],
+            cache.read(tree, 'root_1', ['b', 'a']))
+        self.assertEqual(['a', 'b'], tree.reads)
+
+        cache.read(tree, 'root_2', ['a'])
+        self.assertEqual(['a', 'b', 'a'], tree.reads)
+
+    def test_read_through_derived_root(self):
+        """Tests that a value cached under a state root is reused under a
+        root derived from it, unless the derivation changed the address.
+        """
+        cache = context_manager._StateReadCache(1024 * 1024)
+        parent_tree = _CountingTree({'a': b'1', 'b': b'2'})
+        cache.read(parent_tree, 'root_1', ['a', 'b'])
+
+        cache.add_derived_root('root_2', 'root_1', {'b'})
+
+        tree = _CountingTree({'a': b'1', 'b': b'3'})
+        self.assertEqual(
+            [('a', b'1'), ('b', b'3')],
+            cache.read(tree, 'root_2', ['a', 'b']))
+        self.assertEqual(['b'], tree.reads)
+
+    def test_size_limit(self):
+        """Tests that the least recently used values are evicted once the
+        cache is over its size.
+        """
+        entry_size = context_manager._StateReadCache._ENTRY_OVERHEAD + 2
+        cache = context_manager._StateReadCache(2 * entry_size)
+        tree = _CountingTree({'a': b'1', 'b': b'2', 'c': b'3'})
+
+        cache.read(tree, 'root', ['a', 'b'])
+        cache.read(tree, 'root', ['a'])
+        cache.read(tree, 'root', ['c'])
+        cache.read(tree, 'root', ['a', 'b'])
+
+        self.assertEqual(['a', 'b', 'c', 'b'], tree.reads)
+
+
+class TestStateDeltaLog(unittest.TestCase):
+    def test_size_limit(self):
+        """Tests that the oldest squash results are evicted once the log is
+        over its size, and that results too large to keep are not recorded.
+        """
+        log_class = context_manager._StateDeltaLog
+        entry_size = \
+            log_class._ENTRY_OVERHEAD + log_class._CHANGE_OVERHEAD + 2
+        log = log_class(2 * entry_size)
+
+        log.add('root_1', 'root_0', {'a': b'1'}, set())
+        log.add('root_2', 'root_1', {'b': b'2'}, set())
+        self.assertEqual(
+            ['a', 'b'],
+            sorted(c.address for c in log.get('root_2', 'root_0')))
+
+        log.add('root_3', 'root_2', {}, {'c'})
+        self.assertIsNone(log.get('root_2', 'root_0'))
+        self.assertEqual(
+            ['b', 'c'],
+            sorted(c.address for c in log.get('root_3', 'root_1')))
+
+        log.add('root_4', 'root_3', {'d': b'4' * (3 * entry_size)}, set())
+        self.assertIsNone(log.get('root_4', 'root_3'))
+        self.assertIsNotNone(log.get('root_3', 'root_2'))
+
+
+class TestChainWrites(unittest.TestCase):
+    def _address(self, value):
+        return hashlib.sha512(str(value).encode()).hexdigest()[:70]
+
+    def test_update_keeps_original(self):
+        """Tests that a ChainWrites derived by update holds the new writes,
+        with later writes replacing earlier ones, while the ChainWrites it
+        was derived from is unchanged.
+        """
+        first = ChainWrites().update(
+            1, {self._address(i): b'1' for i in range(1000)})
+        second = first.update(2, {self._address(0): b'2',
+                                  self._address(1000): None})
+
+        found, not_found = first.find(
+            [self._address(0), self._address(1000)])
+        self.assertEqual([(self._address(0), b'1')], found)
+        self.assertEqual([self._address(1000)], not_found)
+
+        found, not_found = second.find(
+            [self._address(0), self._address(1), self._address(1000)])
+        self.assertEqual(
+            [(self._address(0), b'2'),
+             (self._address(1), b'1'),
+             (self._address(1000), None)],
+            found)
+        self.assertEqual([], not_found)
+
+        self.assertEqual(1000, len(dict(first.items())))
+        self.assertEqual(1001, len(dict(second.items())))
+
+    def test_merge_keeps_latest_write(self):
+        """Tests that merging chains keeps the write to each address made
+        by the context with the largest sequence number, whichever chain it
+        is in.
+        """
+        base = ChainWrites().update(
+            1, {self._address(i): b'base' for i in range(100)})
+        left = base.update(2, {self._address(0): b'left',
+                               self._address(1): b'left'})
+        right = base.update(3, {self._address(1): b'right',
+                                self._address(2): None,
+                                self._address(100): b'right'})
+
+        expected = {self._address(i): b'base' for i in range(100)}
+        expected[self._address(0)] = b'left'
+        expected[self._address(1)] = b'right'
+        expected[self._address(2)] = None
+        expected[self._address(100)] = b'right'
+
+        self.assertEqual(
+            expected, dict(ChainWrites.merge([left, right]).items()))
+        self.assertEqual(
+            expected, dict(ChainWrites.merge([right, left, base]).items()))
+        self.assertEqual(
+            {self._address(i): b'base' for i in range(100)},
+            dict(base.items()))
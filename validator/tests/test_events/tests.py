@@ -27,7 +27,11 @@ from sawtooth_validator.journal.event_extractors \
 from sawtooth_validator.journal.receipt_store import TransactionReceiptStore
 from sawtooth_validator.networking.dispatch import HandlerStatus
 
+from sawtooth_validator.server.events.broadcaster \
+    import BATCH_STATUS_EVENT_TYPE
 from sawtooth_validator.server.events.broadcaster import EventBroadcaster
+# pylint: disable=protected-access
+from sawtooth_validator.server.events.broadcaster import _BlockEventCache
 from sawtooth_validator.server.events.handlers \
     import ClientEventsGetRequestHandler
 from sawtooth_validator.server.events.handlers \
@@ -38,10 +42,13 @@ from sawtooth_validator.server.events.handlers \
     import ClientEventsUnsubscribeHandler
 
 from sawtooth_validator.server.events.subscription import EventSubscription
+from sawtooth_validator.server.events.subscription import SubscriptionIndex
 from sawtooth_validator.server.events.subscription import EventFilterFactory
 
 from sawtooth_validator.execution.tp_state_handlers import TpEventAddHandler
 
+from sawtooth_validator.protobuf.client_batch_submit_pb2 \
+    import ClientBatchStatus
 from sawtooth_validator.protobuf import events_pb2
 from sawtooth_validator.protobuf import client_event_pb2
 from sawtooth_validator.protobuf import block_pb2
@@ -393,6 +400,390 @@ class EventBroadcasterTest(unittest.TestCase):
             validator_pb2.Message.CLIENT_EVENTS,
             event_list, connection_id="test_conn_id", one_way=True)
 
+    def test_broadcast_events_to_every_subscriber(self):
+        """Test that every listening subscriber is sent an event list for
+        each broadcast, which is empty if none of the events are part of
+        its subscriptions.
+
+        """
+        mock_service = Mock()
+        event_broadcaster = EventBroadcaster(mock_service, Mock(), Mock())
+
+        for connection_id, event_type in [
+                ("block_conn_id", "sawtooth/block-commit"),
+                ("other_conn_id", "other")]:
+            event_broadcaster.add_subscriber(
+                connection_id, [EventSubscription(event_type=event_type)], [])
+            event_broadcaster.enable_subscriber(connection_id)
+        event_broadcaster.add_subscriber(
+            "disabled_conn_id",
+            [EventSubscription(event_type="sawtooth/block-commit")], [])
+
+        def sent():
+            sent_events = {}
+            for call in mock_service.send.call_args_list:
+                event_list = events_pb2.EventList()
+                event_list.ParseFromString(call[0][1])
+                sent_events[call[1]["connection_id"]] = [
+                    event.event_type for event in event_list.events]
+            mock_service.reset_mock()
+            return sent_events
+
+        event_broadcaster.broadcast_events(
+            [events_pb2.Event(event_type="sawtooth/block-commit")])
+        self.assertEqual(
+            {"block_conn_id": ["sawtooth/block-commit"],
+             "other_conn_id": []},
+            sent())
+
+        event_broadcaster.broadcast_events(
+            [events_pb2.Event(event_type="unsubscribed")])
+        self.assertEqual(
+            {"block_conn_id": [], "other_conn_id": []},
+            sent())
+
+        event_broadcaster.broadcast_events(
+            [events_pb2.Event(event_type="other")], send_empty=False)
+        self.assertEqual({"other_conn_id": ["other"]}, sent())
+
+    def test_broadcast_batch_statuses(self):
+        """Test that batch statuses are only broadcast as events to
+        subscribers to the sawtooth/batch-status event type, all in one
+        event list, with the ClientBatchStatus of each batch as its data.
+        """
+        mock_service = Mock()
+        event_broadcaster = EventBroadcaster(mock_service, Mock(), Mock())
+
+        event_broadcaster.add_subscriber(
+            "block_conn_id", [create_block_commit_subscription()], [])
+        event_broadcaster.enable_subscriber("block_conn_id")
+
+        event_broadcaster.notify_batch_statuses(
+            [("batch_id", ClientBatchStatus.COMMITTED, [])])
+        mock_service.send.assert_not_called()
+
+        event_broadcaster.add_subscriber(
+            "status_conn_id",
+            [EventSubscription(event_type=BATCH_STATUS_EVENT_TYPE)], [])
+        event_broadcaster.enable_subscriber("status_conn_id")
+
+        event_broadcaster.notify_batch_statuses([
+            ("batch_id", ClientBatchStatus.INVALID,
+             [{'id': 'txn_id', 'message': 'error'}]),
+            ("other_batch_id", ClientBatchStatus.COMMITTED, []),
+        ])
+
+        self.assertEqual(1, mock_service.send.call_count)
+        _, event_list_bytes = mock_service.send.call_args[0]
+        self.assertEqual(
+            "status_conn_id",
+            mock_service.send.call_args[1]['connection_id'])
+
+        event_list = events_pb2.EventList()
+        event_list.ParseFromString(event_list_bytes)
+        event, other_event = event_list.events
+        self.assertEqual(BATCH_STATUS_EVENT_TYPE, event.event_type)
+        self.assertEqual(
+            [("batch_id", "batch_id"), ("status", "INVALID")],
+            [(attr.key, attr.value) for attr in event.attributes])
+        self.assertEqual(
+            [("batch_id", "other_batch_id"), ("status", "COMMITTED")],
+            [(attr.key, attr.value) for attr in other_event.attributes])
+
+        batch_status = ClientBatchStatus()
+        batch_status.ParseFromString(event.data)
+        self.assertEqual(
+            ClientBatchStatus(
+                batch_id="batch_id",
+                status=ClientBatchStatus.INVALID,
+                invalid_transactions=[
+                    ClientBatchStatus.InvalidTransaction(
+                        transaction_id="txn_id", message="error")
+                ]),
+            batch_status)
+
+    def test_catchup_subscriber(self):
+        """Test that catching up a subscriber sends an event list for each
+        block after its last known block, that the extracted events are
+        cached for later subscribers, and that enabling the subscriber
+        while it is catching up only takes effect once it has caught up.
+
+        """
+        mock_service = Mock()
+        mock_thread_pool = Mock()
+        block_store = BlockStore(DictDatabase(
+            indexes=BlockStore.create_index_configuration()))
+        receipt_store = TransactionReceiptStore(DictDatabase())
+        chain = create_chain(num=5)
+        block_store.update_chain([blk_w for _, blk_w, _ in chain])
+        for block_id, _, txn_ids in chain:
+            receipt_store.put_multi(
+                (txn_id,
+                 create_receipt(txn_id=txn_id,
+                                key_values=[("address", block_id)]))
+                for txn_id in txn_ids)
+        receipt_store.get_multi = Mock(wraps=receipt_store.get_multi)
+
+        event_broadcaster = EventBroadcaster(
+            mock_service, block_store, receipt_store,
+            thread_pool=mock_thread_pool)
+
+        event_broadcaster.add_subscriber(
+            "test_conn_id", [create_block_commit_subscription()],
+            chain[0][0])
+        event_broadcaster.catchup_subscriber("test_conn_id")
+        event_broadcaster.enable_subscriber("test_conn_id")
+
+        subscriber = event_broadcaster._subscribers["test_conn_id"]
+        self.assertFalse(subscriber.is_listening())
+        mock_service.send.assert_not_called()
+
+        catchup, *args = mock_thread_pool.submit.call_args[0]
+        catchup(*args)
+
+        self.assertTrue(subscriber.is_listening())
+        self.assertEqual(mock_service.send.call_count, 4)
+        for (block_id, _, _), call in zip(
+                chain[1:], mock_service.send.call_args_list):
+            event_list = events_pb2.EventList()
+            event_list.ParseFromString(call[0][1])
+            self.assertEqual(
+                [event.event_type for event in event_list.events],
+                ["sawtooth/block-commit"] * 21)
+            self.assertEqual(
+                event_list.events[0].attributes[0].value, block_id)
+        self.assertEqual(receipt_store.get_multi.call_count, 4)
+
+        event_broadcaster.add_subscriber(
+            "other_conn_id", [create_block_commit_subscription()],
+            chain[0][0])
+        event_broadcaster.catchup_subscriber("other_conn_id")
+        catchup, *args = mock_thread_pool.submit.call_args[0]
+        catchup(*args)
+
+        self.assertEqual(mock_service.send.call_count, 8)
+        self.assertEqual(receipt_store.get_multi.call_count, 4)
+
+    def test_catchup_not_repeated_by_broadcast(self):
+        """Test that blocks a subscriber was sent while catching up, which
+        were committed to the block store before chain_update broadcast
+        them, are not sent to it again by the broadcast.
+
+        """
+        mock_service = Mock()
+        mock_thread_pool = Mock()
+        block_store = BlockStore(DictDatabase(
+            indexes=BlockStore.create_index_configuration()))
+        chain = create_chain(num=6)
+        block_store.update_chain([blk_w for _, blk_w, _ in chain[:5]])
+
+        event_broadcaster = EventBroadcaster(
+            mock_service, block_store,
+            TransactionReceiptStore(DictDatabase()),
+            thread_pool=mock_thread_pool)
+        event_broadcaster.chain_update(chain[2][1], [])
+
+        event_broadcaster.add_subscriber(
+            "test_conn_id", [create_block_commit_subscription()],
+            chain[0][0])
+        event_broadcaster.catchup_subscriber("test_conn_id")
+        event_broadcaster.enable_subscriber("test_conn_id")
+        catchup, *args = mock_thread_pool.submit.call_args[0]
+        catchup(*args)
+
+        def sent_block_ids():
+            block_ids = []
+            for call in mock_service.send.call_args_list:
+                event_list = events_pb2.EventList()
+                event_list.ParseFromString(call[0][1])
+                block_ids.append(event_list.events[0].attributes[0].value)
+            mock_service.reset_mock()
+            return block_ids
+
+        self.assertEqual(
+            [block_id for block_id, _, _ in chain[1:5]], sent_block_ids())
+
+        event_broadcaster.chain_update(chain[3][1], [])
+        event_broadcaster.chain_update(chain[4][1], [])
+        self.assertEqual([], sent_block_ids())
+
+        block_store.update_chain([chain[5][1]])
+        event_broadcaster.chain_update(chain[5][1], [])
+        self.assertEqual([chain[5][0]], sent_block_ids())
+
+    def test_broadcast_state_delta_slices(self):
+        """Test that each subscriber to state deltas is sent only the
+        changes under the addresses its filters cover, including those
+        matched by any one of several address filters, and that the
+        changes are taken from the context manager when it knows them.
+
+        """
+        mock_service = Mock()
+        mock_context_manager = Mock()
+        parent = create_block(block_num=84, block_id="1234567890abcdef")
+        block = create_block(previous_block_id=parent.identifier)
+        state_changes = [
+            transaction_receipt_pb2.StateChange(
+                address=address, value=b'1',
+                type=transaction_receipt_pb2.StateChange.SET)
+            for address in ["ab01", "ab02", "cd01"]
+        ]
+        mock_context_manager.get_state_changes.return_value = state_changes
+
+        event_broadcaster = EventBroadcaster(
+            mock_service, {parent.identifier: parent}, Mock(),
+            context_manager=mock_context_manager)
+
+        for connection_id, filters in [
+                ("prefix_conn_id", [FILTER_FACTORY.create(
+                    key="address", match_string="^ab",
+                    filter_type=events_pb2.EventFilter.REGEX_ANY)]),
+                ("two_filters_conn_id", [
+                    FILTER_FACTORY.create(
+                        key="address", match_string="ab01",
+                        filter_type=events_pb2.EventFilter.SIMPLE_ANY),
+                    FILTER_FACTORY.create(
+                        key="address", match_string="cd01",
+                        filter_type=events_pb2.EventFilter.SIMPLE_ANY)]),
+                ("all_conn_id", [])]:
+            event_broadcaster.add_subscriber(
+                connection_id,
+                [EventSubscription(
+                    event_type="sawtooth/state-delta", filters=filters)],
+                [])
+            event_broadcaster.enable_subscriber(connection_id)
+
+        event_broadcaster.chain_update(block, [])
+
+        mock_context_manager.get_state_changes.assert_called_with(
+            block.state_root_hash, parent.state_root_hash)
+
+        sent = {}
+        for call in mock_service.send.call_args_list:
+            event_list = events_pb2.EventList()
+            event_list.ParseFromString(call[0][1])
+            state_change_list = transaction_receipt_pb2.StateChangeList()
+            state_change_list.ParseFromString(event_list.events[0].data)
+            sent[call[1]["connection_id"]] = [
+                change.address
+                for change in state_change_list.state_changes]
+
+        self.assertEqual(sent, {
+            "prefix_conn_id": ["ab01", "ab02"],
+            "two_filters_conn_id": ["ab01", "cd01"],
+            "all_conn_id": ["ab01", "ab02", "cd01"],
+        })
+
+
+class BlockEventCacheTest(unittest.TestCase):
+    def test_size_limit(self):
+        """Test that the least recently used blocks are evicted once the
+        events cached are over the cache's size.
+
+        """
+        events = [events_pb2.Event(event_type="test", data=b"x" * 100)]
+        event_types = frozenset(["test"])
+        entry_size = 2 * _BlockEventCache._ENTRY_OVERHEAD + \
+            events[0].ByteSize()
+        cache = _BlockEventCache(2 * entry_size)
+
+        cache.put("block_1", event_types, events)
+        cache.put("block_2", event_types, events)
+        self.assertEqual((events, None), cache.get("block_1", event_types))
+
+        cache.put("block_3", event_types, events)
+        self.assertIsNone(cache.get("block_2", event_types))
+        self.assertEqual((events, None), cache.get("block_1", event_types))
+        self.assertEqual((events, None), cache.get("block_3", event_types))
+
+        cache.put("block_4", event_types, events * 3)
+        self.assertIsNone(cache.get("block_1", event_types))
+        self.assertIsNone(cache.get("block_3", event_types))
+
+
+class SubscriptionIndexTest(unittest.TestCase):
+    def test_route_matches_subscriptions(self):
+        """Test that the subscription index routes each event to exactly the
+        subscribers that have a subscription the event is part of, for each
+        kind of filter.
+        """
+        addresses = ['abc123', 'abd456', 'ffe789']
+
+        filters = [
+            FILTER_FACTORY.create('address', 'abc123'),
+            FILTER_FACTORY.create(
+                'address', '^ab', events_pb2.EventFilter.REGEX_ANY),
+            FILTER_FACTORY.create(
+                'address', '^ff.*', events_pb2.EventFilter.REGEX_ANY),
+            FILTER_FACTORY.create(
+                'address', '^', events_pb2.EventFilter.REGEX_ANY),
+            FILTER_FACTORY.create(
+                'address', '6$', events_pb2.EventFilter.REGEX_ANY),
+            FILTER_FACTORY.create(
+                'address', '^ab', events_pb2.EventFilter.REGEX_ALL),
+            FILTER_FACTORY.create(
+                'address', 'abd456', events_pb2.EventFilter.SIMPLE_ALL),
+            FILTER_FACTORY.create('other', 'x'),
+        ]
+
+        subscriptions_by_connection = {
+            'unfiltered': [EventSubscription('test')],
+            'other_type': [EventSubscription('other')],
+        }
+        for i, event_filter in enumerate(filters):
+            subscriptions_by_connection['single{}'.format(i)] = [
+                EventSubscription('test', [event_filter])]
+            subscriptions_by_connection['pair{}'.format(i)] = [
+                EventSubscription(
+                    'test', [event_filter, filters[(i + 1) % len(filters)]])]
+        subscriptions_by_connection['duplicate'] = \
+            subscriptions_by_connection['pair1']
+
+        events = []
+        for i in range(len(addresses) + 1):
+            for j in range(i, len(addresses) + 1):
+                event = events_pb2.Event(event_type='test')
+                for address in addresses[i:j]:
+                    event.attributes.add(key='address', value=address)
+                events.append(event)
+        events.append(events_pb2.Event(event_type='unknown'))
+
+        index = SubscriptionIndex(subscriptions_by_connection)
+        routed = {
+            connection_id: group_events
+            for connection_ids, group_events in index.route(events)
+            for connection_id in connection_ids
+        }
+
+        self.assertEqual(set(subscriptions_by_connection), set(routed))
+        for connection_id, subscriptions in \
+                subscriptions_by_connection.items():
+            expected = [
+                event for event in events
+                if any(event in sub for sub in subscriptions)]
+            self.assertEqual(expected, routed[connection_id], connection_id)
+
+    def test_equal_subscriptions_share_group(self):
+        """Test that subscribers with the same subscriptions are routed
+        as one group.
+        """
+        def subscriptions():
+            return [
+                create_block_commit_subscription(),
+                EventSubscription(
+                    'test', [FILTER_FACTORY.create('address', 'abc')]),
+            ]
+
+        index = SubscriptionIndex({
+            'conn1': subscriptions(),
+            'conn2': list(reversed(subscriptions())),
+            'conn3': [create_block_commit_subscription()],
+        })
+
+        groups = sorted(
+            sorted(connection_ids) for connection_ids, _ in index.route([]))
+        self.assertEqual([['conn1', 'conn2'], ['conn3']], groups)
+
 
 class TpEventAddHandlerTest(unittest.TestCase):
     def test_add_event(self):
@@ -0,0 +1,140 @@
+# Copyright 2018 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+
+# pylint: disable=protected-access
+
+import unittest
+from unittest.mock import Mock
+
+from sawtooth_validator.gossip.gossip import Gossip
+from sawtooth_validator.networking.interconnect import ConnectionInfo
+from sawtooth_validator.networking.interconnect import ConnectionStatus
+from sawtooth_validator.networking.interconnect import ConnectionType
+from sawtooth_validator.networking.interconnect import Interconnect
+from sawtooth_validator.protobuf import validator_pb2
+from sawtooth_validator.protobuf.network_pb2 import GossipMessage
+
+
+class InterconnectBroadcastTest(unittest.TestCase):
+    def setUp(self):
+        self.interconnect = Interconnect(
+            'tcp://127.0.0.1:0', dispatcher=Mock())
+        self.interconnect._send_receive_thread = Mock()
+        self.outbound = Mock()
+
+        self.interconnect._connections.update({
+            'inbound_conn_id': ConnectionInfo(
+                ConnectionType.ZMQ_IDENTITY, b'inbound_identity',
+                None, ConnectionStatus.CONNECTED, None),
+            'outbound_conn_id': ConnectionInfo(
+                ConnectionType.OUTBOUND_CONNECTION, self.outbound,
+                'tcp://127.0.0.1:8800', ConnectionStatus.CONNECTED, None),
+        })
+
+    def tearDown(self):
+        self.interconnect._future_callback_threadpool.shutdown(wait=True)
+
+    def test_broadcast(self):
+        """Test that a broadcast serializes the message once, and writes the
+        same bytes to every connection, whether inbound or outbound.
+        """
+        invalid = self.interconnect.broadcast(
+            validator_pb2.Message.GOSSIP_MESSAGE, b'data',
+            ['inbound_conn_id', 'outbound_conn_id'])
+
+        self.assertEqual([], invalid)
+
+        send_inbound = self.interconnect._send_receive_thread \
+            .send_message_bytes
+        send_inbound.assert_called_once_with(
+            send_inbound.call_args[0][0], connection_id='inbound_conn_id')
+        self.outbound.send_message_bytes.assert_called_once_with(
+            send_inbound.call_args[0][0])
+
+        # The same bytes object is sent to both, so it was serialized once
+        self.assertIs(
+            send_inbound.call_args[0][0],
+            self.outbound.send_message_bytes.call_args[0][0])
+
+        message = validator_pb2.Message()
+        message.ParseFromString(send_inbound.call_args[0][0])
+        self.assertEqual(
+            validator_pb2.Message.GOSSIP_MESSAGE, message.message_type)
+        self.assertEqual(b'data', message.content)
+
+    def test_broadcast_unknown_connection(self):
+        """Test that a broadcast to a connection which no longer exists sends
+        to the others, and returns the connection as invalid.
+        """
+        invalid = self.interconnect.broadcast(
+            validator_pb2.Message.GOSSIP_MESSAGE, b'data',
+            ['inbound_conn_id', 'gone_conn_id', 'outbound_conn_id'])
+
+        self.assertEqual(['gone_conn_id'], invalid)
+        self.assertEqual(
+            1,
+            self.interconnect._send_receive_thread
+            .send_message_bytes.call_count)
+        self.assertEqual(1, self.outbound.send_message_bytes.call_count)
+
+
+class GossipBroadcastTest(unittest.TestCase):
+    def setUp(self):
+        self.network = Mock()
+        self.network.is_connection_handshake_complete.side_effect = \
+            lambda connection_id: connection_id != 'handshaking_conn_id'
+        self.network.broadcast.return_value = []
+
+        self.gossip = Gossip(
+            self.network, Mock(), Mock(), Mock(),
+            maximum_peer_connectivity=10)
+        self.gossip._topology = Mock()
+        for connection_id in ['conn_a', 'conn_b', 'conn_c',
+                              'handshaking_conn_id']:
+            self.gossip.register_peer(
+                connection_id, 'tcp://{}:8800'.format(connection_id))
+
+    def test_broadcast(self):
+        """Test that a gossip broadcast serializes the gossip message once,
+        and sends it to every peer which has completed its handshake and is
+        not excluded, in a single network broadcast.
+        """
+        gossip_message = GossipMessage(
+            content=b'content',
+            content_type=GossipMessage.BATCH)
+
+        self.gossip.broadcast(
+            gossip_message, validator_pb2.Message.GOSSIP_MESSAGE,
+            exclude=['conn_b'])
+
+        self.network.broadcast.assert_called_once_with(
+            validator_pb2.Message.GOSSIP_MESSAGE,
+            gossip_message.SerializeToString(),
+            ['conn_a', 'conn_c'])
+        self.network.send.assert_not_called()
+
+    def test_broadcast_removes_invalid_peers(self):
+        """Test that peers whose connections were found to be gone during a
+        broadcast are removed from the peers once it is sent.
+        """
+        self.network.broadcast.return_value = ['conn_c']
+
+        self.gossip.broadcast(
+            GossipMessage(content=b'content'),
+            validator_pb2.Message.GOSSIP_MESSAGE)
+
+        self.assertEqual(
+            ['conn_a', 'conn_b', 'handshaking_conn_id'],
+            sorted(self.gossip.get_peers()))
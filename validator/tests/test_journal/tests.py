@@ -50,6 +50,7 @@ from sawtooth_validator.journal.event_extractors \
     import BlockEventExtractor
 from sawtooth_validator.journal.event_extractors \
     import ReceiptEventExtractor
+from sawtooth_validator.journal.event_extractors import StateDelta
 from sawtooth_validator.journal.batch_injector import \
     DefaultBatchInjectorFactory
 
@@ -1967,10 +1968,67 @@ class TestReceiptEventExtractor(unittest.TestCase):
             event_type="sawtooth/state-delta",
             attributes=[
                 Event.Attribute(key="address", value=address)
-                for address in ["e", "d", "a", "b"]
+                for address in ["a", "b", "d", "e"]
             ],
             data=StateChangeList(state_changes=[
-                change_sets[2][0], change_sets[1][1],
                 change_sets[1][0], change_sets[0][1],
+                change_sets[1][1], change_sets[2][0],
             ]).SerializeToString(),
         )])
+
+    def test_state_delta_slices(self):
+        """Test that a state delta selects the changes under the addresses
+        covered by the address filters of the subscriptions, and makes an
+        event holding only those changes.
+        """
+        state_changes = [
+            StateChange(address=address, value=address.encode(),
+                        type=StateChange.SET)
+            for address in ["ab01", "ab02", "ac01", "bc01", "bc02"]
+        ]
+        state_delta = StateDelta(reversed(state_changes))
+        self.assertEqual(
+            state_delta.addresses, ["ab01", "ab02", "ac01", "bc01", "bc02"])
+
+        factory = EventFilterFactory()
+        indices = state_delta.select([
+            EventSubscription(
+                event_type="sawtooth/state-delta",
+                filters=[factory.create(
+                    "address", "^ab", EventFilter.REGEX_ANY)]),
+            EventSubscription(
+                event_type="sawtooth/state-delta",
+                filters=[factory.create("address", "bc02")]),
+            EventSubscription(event_type="sawtooth/block-commit"),
+        ])
+        self.assertEqual(indices, [0, 1, 4])
+
+        event = state_delta.make_event(indices)
+        self.assertEqual(
+            [attribute.value for attribute in event.attributes],
+            ["ab01", "ab02", "bc02"])
+        state_change_list = StateChangeList()
+        state_change_list.ParseFromString(event.data)
+        self.assertEqual(
+            list(state_change_list.state_changes),
+            [state_changes[0], state_changes[1], state_changes[4]])
+
+        indices = state_delta.select([
+            EventSubscription(
+                event_type="sawtooth/state-delta",
+                filters=[factory.create(
+                    "address", "01$", EventFilter.REGEX_ANY)]),
+        ])
+        self.assertEqual(indices, [0, 2, 3])
+
+        self.assertIsNone(state_delta.select([
+            EventSubscription(event_type="sawtooth/state-delta"),
+        ]))
+        self.assertEqual(state_delta.make_event(), Event(
+            event_type="sawtooth/state-delta",
+            attributes=[
+                Event.Attribute(key="address", value=change.address)
+                for change in state_changes
+            ],
+            data=StateChangeList(
+                state_changes=state_changes).SerializeToString()))
@@ -21,6 +21,8 @@ import shutil
 import tempfile
 from string import ascii_lowercase
 
+import cbor
+
 from sawtooth_validator.state.merkle import MerkleDatabase
 from sawtooth_validator.database.native_lmdb import NativeLmdbDatabase
 
@@ -169,6 +171,53 @@ class TestSawtoothMerkleTrie(unittest.TestCase):
         self.assertEqual([("010202", {"my_data": 2})],
                          [entry for entry in self.trie.leaves('0102')])
 
+    def test_merkle_trie_leaf_iteration_from_start(self):
+        new_root = self.update({
+            "010101": {"my_data": 1},
+            "010202": {"my_data": 2},
+            "010303": {"my_data": 3},
+            "020101": {"my_data": 4}
+        }, [], virtual=False)
+
+        self.set_merkle_root(new_root)
+
+        # Test iteration starting from an existing address
+        self.assertEqual(
+            [("010202", {"my_data": 2}),
+             ("010303", {"my_data": 3}),
+             ("020101", {"my_data": 4})],
+            [entry for entry in self.trie.leaves(start='010202')])
+
+        # Test prefixed iteration starting between addresses
+        self.assertEqual(
+            [("010303", {"my_data": 3})],
+            [entry for entry in self.trie.leaves('01', start='010203')])
+
+        # Test iteration starting after the last address
+        self.assertEqual([], [entry for entry in self.trie.leaves(start='03')])
+
+    def test_merkle_trie_get_multi(self):
+        new_root = self.update({
+            "010101": {"my_data": 1},
+            "010202": {"my_data": 2},
+            "020101": {"my_data": 3}
+        }, [], virtual=False)
+
+        self.set_merkle_root(new_root)
+
+        addresses = ["020101", "010101", "010102", "01", "010202"]
+
+        self.assertEqual(
+            [{"my_data": 3}, {"my_data": 1}, None, None, {"my_data": 2}],
+            self.trie.get_multi(addresses))
+
+        self.assertEqual(
+            [self.trie.get("020101"), self.trie.get("010202")],
+            [cbor.loads(value) for value in self.trie.get_multi(
+                ["020101", "010202"], decode=False)])
+
+        self.assertEqual([], self.trie.get_multi([]))
+
     # assertions
     def assert_value_at_address(self, address, value, ishash=False):
         self.assertEqual(
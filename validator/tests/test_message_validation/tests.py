@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import random
 import string
@@ -228,3 +229,27 @@ class TestMessageValidation(unittest.TestCase):
         block = block_list[0]
         valid = verifier.is_valid_block(block)
         self.assertFalse(valid)
+
+    def test_verify_batches_in_parallel(self):
+        """Verify that a SignatureVerifier with a thread pool returns a
+        verdict for each batch, in the order the batches were given.
+        """
+        batch_list = self._create_batches(2, 2)
+        batch_list.insert(1, self._create_batches(1, 1, valid_batch=False)[0])
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            sig_verifier = verifier.SignatureVerifier(thread_pool=pool)
+            self.assertEqual(
+                [True, False, True], sig_verifier.verify_batches(batch_list))
+
+    def test_invalid_public_key(self):
+        """Verify that a transaction signed by an unparsable public key is
+        invalid, rather than raising an error.
+        """
+        txn = self._create_transactions(1)[0]
+        header = TransactionHeader()
+        header.ParseFromString(txn.header)
+        header.signer_public_key = 'bad_public_key'
+        txn.header = header.SerializeToString()
+
+        self.assertFalse(verifier.is_valid_transaction(txn))
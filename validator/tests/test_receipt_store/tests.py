@@ -85,6 +85,25 @@ class ReceiptStoreTest(unittest.TestCase):
             self.assertEqual(stored_receipt.events, receipt.events)
             self.assertEqual(stored_receipt.data, receipt.data)
 
+    def test_receipt_store_put_and_get_multi(self):
+        """Tests that receipts put together can be got back together, and
+        that unknown transaction ids are left out.
+        """
+        receipt_store = TransactionReceiptStore(DictDatabase())
+
+        receipts = [
+            (str(i), TransactionReceipt(
+                transaction_id=str(i), data=[str(i).encode()]))
+            for i in range(10)
+        ]
+
+        receipt_store.put_multi(receipts)
+
+        self.assertEqual(
+            receipts[3:6],
+            receipt_store.get_multi(['3', '4', 'unknown', '5']))
+        self.assertEqual(receipts[9][1], receipt_store.get('9'))
+
     def test_raise_key_error_on_missing_receipt(self):
         """Tests that we correctly raise key error on a missing receipt
         """
@@ -0,0 +1,90 @@
+# Copyright 2017 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+
+"""Microbenchmarks for the ParallelScheduler predecessor tree.
+
+The radix tree is compared with a tree that finds children by scanning
+them linearly, which is how the tree looked up children before it was
+keyed by character, on the workloads that test_predecessor_tree_workloads
+checks the two trees agree on. It is not collected by the test runners.
+
+Run from the validator directory with:
+
+    python3 tests/test_scheduler/benchmark_predecessor_tree.py
+"""
+
+import argparse
+import random
+import sys
+import timeit
+
+from sawtooth_validator.execution.scheduler_parallel import Tree
+
+from test_predecessor_tree_workloads import LinearScanTree
+from test_predecessor_tree_workloads import intkey_workload
+from test_predecessor_tree_workloads import schedule
+from test_predecessor_tree_workloads import smallbank_workload
+
+
+def run(count, repeat, seed):
+    workloads = [
+        ('intkey', intkey_workload(count, random.Random(seed))),
+        ('intkey-namespace-reads',
+         intkey_workload(count, random.Random(seed), namespace_every=10)),
+        ('smallbank', smallbank_workload(count, random.Random(seed))),
+    ]
+
+    print('{:<24} {:>12} {:>12} {:>8}'.format(
+        'workload', 'linear (s)', 'radix (s)', 'speedup'))
+
+    for name, workload in workloads:
+        transactions = list(workload)
+
+        if schedule(LinearScanTree, transactions) != \
+                schedule(Tree, transactions):
+            raise AssertionError(
+                'Trees disagree on predecessors for {}'.format(name))
+
+        linear = min(timeit.repeat(
+            lambda: schedule(LinearScanTree, transactions),
+            number=1, repeat=repeat))
+        radix = min(timeit.repeat(
+            lambda: schedule(Tree, transactions),
+            number=1, repeat=repeat))
+
+        print('{:<24} {:>12.4f} {:>12.4f} {:>7.1f}x'.format(
+            name, linear, radix, linear / radix))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Compare predecessor tree implementations.')
+    parser.add_argument(
+        '-n', '--count', type=int, default=5000,
+        help='number of transactions per workload')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='number of timing runs; the fastest is reported')
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='seed for choosing keys and accounts')
+
+    opts = parser.parse_args(args)
+
+    run(opts.count, opts.repeat, opts.seed)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
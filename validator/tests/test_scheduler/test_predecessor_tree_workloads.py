@@ -0,0 +1,195 @@
+# Copyright 2017 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+
+# pylint: disable=protected-access
+
+import hashlib
+import random
+import unittest
+
+from sawtooth_validator.execution.scheduler_parallel import AddressNotInTree
+from sawtooth_validator.execution.scheduler_parallel import Node
+from sawtooth_validator.execution.scheduler_parallel import PredecessorTree
+from sawtooth_validator.execution.scheduler_parallel import Tree
+
+
+INTKEY_PREFIX = hashlib.sha512('intkey'.encode()).hexdigest()[:6]
+SMALLBANK_PREFIX = hashlib.sha512('smallbank'.encode()).hexdigest()[:6]
+
+
+class LinearScanTree(Tree):
+    '''
+    A Tree which finds children by scanning all of them for a matching
+    prefix, used as the reference for the radix tree.
+    '''
+
+    @staticmethod
+    def _get_child(node, address):
+        for child in node.children.values():
+            if address.startswith(child.address):
+                return child
+
+        match = None
+
+        for child in node.children.values():
+            if child.address.startswith(address):
+                match = child.address
+
+        raise AddressNotInTree(match=match)
+
+    def _get_or_create(self, address):
+        try:
+            for step in self._walk_to_address(address):
+                node = step
+
+            return node
+
+        except AddressNotInTree:
+            pass
+
+        new_node = Node(address)
+        prefix_len = len(node.address)
+
+        match = next(
+            (child
+             for child in node.children.values()
+             if child.address[prefix_len] == address[prefix_len]),
+            None)
+
+        if match is None:
+            node.children[address[prefix_len]] = new_node
+            return new_node
+
+        if match.address.startswith(address):
+            new_node.children[match.address[len(address)]] = match
+            node.children[address[prefix_len]] = new_node
+            return new_node
+
+        end = prefix_len + 1
+        while address[end] == match.address[end]:
+            end += 1
+
+        intermediate_node = Node(address[:end])
+        intermediate_node.children[address[end]] = new_node
+        intermediate_node.children[match.address[end]] = match
+        node.children[address[prefix_len]] = intermediate_node
+        return new_node
+
+
+def intkey_address(name):
+    return INTKEY_PREFIX + hashlib.sha512(name.encode()).hexdigest()[-64:]
+
+
+def smallbank_address(customer_id):
+    return SMALLBANK_PREFIX + hashlib.sha512(
+        str(customer_id).encode()).hexdigest()[:64]
+
+
+def intkey_workload(count, rand, namespace_every=0):
+    '''
+    Yields (txn_id, inputs, outputs) for intkey set/inc/dec
+    transactions over a key space twice the size of the workload. If
+    NAMESPACE_EVERY is set, every NAMESPACE_EVERY-th transaction
+    declares the whole intkey namespace as its input.
+    '''
+    names = ['key{}'.format(i) for i in range(count * 2)]
+
+    for i in range(count):
+        address = intkey_address(rand.choice(names))
+
+        if namespace_every and i % namespace_every == 0:
+            yield i, [INTKEY_PREFIX], [address]
+        else:
+            yield i, [address], [address]
+
+
+def smallbank_workload(count, rand, accounts=1000):
+    '''
+    Yields (txn_id, inputs, outputs) for smallbank transactions, half
+    of which touch two accounts (send_payment and amalgamate) and half
+    of which touch one.
+    '''
+    for i in range(count):
+        if rand.random() < 0.5:
+            addresses = [
+                smallbank_address(customer)
+                for customer in rand.sample(range(accounts), 2)]
+        else:
+            addresses = [smallbank_address(rand.randrange(accounts))]
+
+        yield i, addresses, addresses
+
+
+def schedule(tree_factory, transactions):
+    '''
+    Adds TRANSACTIONS to a PredecessorTree built on the tree returned by
+    TREE_FACTORY and returns the predecessors found for each of them.
+    '''
+    predecessor_tree = PredecessorTree()
+    predecessor_tree._tree = tree_factory()
+
+    predecessors_by_txn = []
+
+    for txn_id, inputs, outputs in transactions:
+        predecessors = set()
+
+        for address in inputs:
+            predecessors.update(
+                predecessor_tree.find_read_predecessors(address))
+
+        for address in outputs:
+            predecessors.update(
+                predecessor_tree.find_write_predecessors(address))
+
+        for address in inputs:
+            predecessor_tree.add_reader(address, txn_id)
+
+        for address in outputs:
+            predecessor_tree.set_writer(address, txn_id)
+
+        predecessors_by_txn.append(predecessors)
+
+    return predecessors_by_txn
+
+
+class TestPredecessorTreeWorkloads(unittest.TestCase):
+    '''
+    Replays the inputs and outputs that intkey and smallbank transactions
+    declare against a PredecessorTree, the way the ParallelScheduler does
+    when a batch is added, and checks that the tree finds the same
+    predecessors as one which finds children by scanning them linearly,
+    which is how the tree looked up children before it was keyed by the
+    next address character.
+    '''
+
+    COUNT = 1000
+
+    def assert_same_predecessors(self, transactions):
+        transactions = list(transactions)
+        self.assertEqual(
+            schedule(LinearScanTree, transactions),
+            schedule(Tree, transactions))
+
+    def test_intkey(self):
+        self.assert_same_predecessors(
+            intkey_workload(self.COUNT, random.Random(0)))
+
+    def test_intkey_namespace_reads(self):
+        self.assert_same_predecessors(
+            intkey_workload(self.COUNT, random.Random(0), namespace_every=10))
+
+    def test_smallbank(self):
+        self.assert_same_predecessors(
+            smallbank_workload(self.COUNT, random.Random(0)))